@@ -0,0 +1,330 @@
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlparse
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
+from azure.storage.blob import BlobSasPermissions, ContentSettings, generate_blob_sas
+from config.settings import get_settings
+from app.repository import AsyncBlobStorage
+from app.services import LazyService
+from app.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAzureStorageService(AsyncBlobStorage):
+    """
+    Non-blocking service for Azure Blob Storage built on ``azure.storage.blob.aio``.
+
+    One client (and one pooled aiohttp session) is opened for the lifetime of the
+    application in ``lifespan`` and shared by all requests.
+    """
+
+    def __init__(self):
+        settings = get_settings()
+        self.storage_url = os.getenv("AZURE_SA_URL")
+        self.storage_key = os.getenv("AZURE_SA_KEY")
+        self.container_name = os.getenv("AZURE_CONTAINER_NAME")
+
+        if not all([self.storage_url, self.storage_key, self.container_name]):
+            raise ValueError("Azure Storage configuration is missing in environment variables")
+
+        self.url_prefix = f"{self.storage_url.rstrip('/')}/{self.container_name}/"
+        self.upload_signing_key = self.storage_key.encode("utf-8")
+        self.account_name = urlparse(self.storage_url).hostname.split(".")[0]
+        self.content_addressed = settings.blob_content_addressed
+        self.max_concurrency = settings.blob_max_concurrency
+        self.max_block_size = settings.blob_max_block_size
+        self.max_single_put_size = settings.blob_max_single_put_size
+        self.stream_chunk_size = settings.blob_stream_chunk_size
+        self.connection_pool_size = settings.blob_connection_pool_size
+
+        self._session = None
+        self.blob_service_client = None
+        self.container_client = None
+
+    async def open(self):
+        """Open the shared client and its connection pool"""
+        if self.blob_service_client is not None:
+            return
+
+        # Imported here so importing the app doesn't pay for the aiohttp stack
+        import aiohttp
+        from azure.core.pipeline.transport import AioHttpTransport
+        from azure.storage.blob.aio import BlobServiceClient
+
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.connection_pool_size, ttl_dns_cache=300)
+        )
+        self.blob_service_client = BlobServiceClient(
+            account_url=self.storage_url,
+            credential=self.storage_key,
+            transport=AioHttpTransport(session=self._session, session_owner=False),
+            max_block_size=self.max_block_size,
+            max_single_put_size=self.max_single_put_size,
+            # Downloads fetch at most one chunk per request, so streaming keeps memory flat
+            max_single_get_size=self.stream_chunk_size,
+            max_chunk_get_size=self.stream_chunk_size
+        )
+        self.container_client = self.blob_service_client.get_container_client(self.container_name)
+        logger.info(f"✅ Opened async Blob Storage client (pool size {self.connection_pool_size})")
+
+    async def close(self):
+        """Close the shared client and its connection pool"""
+        if self.blob_service_client is not None:
+            await self.blob_service_client.close()
+            self.blob_service_client = None
+            self.container_client = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def ensure_container_exists(self):
+        """Ensure the container exists, create if it doesn't"""
+        try:
+            if not await self.container_client.exists():
+                await self.container_client.create_container()
+                logger.info(f"✅ Created container: {self.container_name}")
+            else:
+                logger.info(f"✅ Container already exists: {self.container_name}")
+        except Exception as e:
+            logger.error(f"❌ Error ensuring container exists: {str(e)}")
+            raise
+
+    def generate_upload_url(
+        self,
+        blob_name: str,
+        content_type: str = "application/octet-stream",
+        expires_in_seconds: int = 600,
+        api_base_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Issue a create/write-only SAS URL for a single blob
+        
+        The storage account's CORS rules must allow `PUT` from the frontend origin.
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=expires_in_seconds)
+        sas_token = generate_blob_sas(
+            account_name=self.account_name,
+            container_name=self.container_name,
+            blob_name=blob_name,
+            account_key=self.storage_key,
+            permission=BlobSasPermissions(create=True, write=True),
+            start=now - timedelta(minutes=5),  # tolerate client clock skew
+            expiry=expires_at
+        )
+        return {
+            "upload_url": f"{self.url_prefix}{quote(blob_name)}?{sas_token}",
+            "method": "PUT",
+            "headers": {"x-ms-blob-type": "BlockBlob", "Content-Type": content_type},
+            "blob_url": self.url_prefix + blob_name,
+            "expires_at": expires_at.isoformat() + "Z"
+        }
+
+    @traced()
+    async def upload_file(
+        self,
+        file_content: bytes,
+        file_name: str,
+        content_type: str = "application/octet-stream",
+        user_email: Optional[str] = None
+    ) -> Tuple[bool, str, Optional[str]]:
+        """
+        Upload a file to Azure Blob Storage without blocking the event loop
+
+        Large files are split into ``max_block_size`` blocks uploaded ``max_concurrency`` at a time.
+        With content addressing, content that is already stored is not transferred again.
+
+        Returns:
+            Tuple of (success: bool, message: str, blob_url: Optional[str])
+        """
+        try:
+            blob_name = self.blob_name_for_upload(file_content, file_name, user_email)
+            blob_client = self.container_client.get_blob_client(blob_name)
+
+            if self.content_addressed:
+                if await blob_client.exists():
+                    # Refresh Last-Modified so the orphan sweeper's age guard covers the new reference
+                    await blob_client.set_blob_metadata({"last_uploaded": datetime.utcnow().isoformat()})
+                    logger.info("♻️ File already stored, skipped upload: %s", blob_name)
+                    return True, "File already stored", blob_client.url
+                try:
+                    # Conditional put (If-None-Match: *) so a concurrent identical upload is not overwritten
+                    await blob_client.upload_blob(
+                        file_content,
+                        overwrite=False,
+                        content_settings=ContentSettings(content_type=content_type),
+                        max_concurrency=self.max_concurrency
+                    )
+                except ResourceExistsError:
+                    logger.info("♻️ File stored concurrently, skipped upload: %s", blob_name)
+                    return True, "File already stored", blob_client.url
+            else:
+                await blob_client.upload_blob(
+                    file_content,
+                    overwrite=True,
+                    content_settings=ContentSettings(content_type=content_type),
+                    max_concurrency=self.max_concurrency
+                )
+
+            logger.info("✅ File uploaded successfully: %s", blob_name)
+            return True, "File uploaded successfully", blob_client.url
+
+        except Exception as e:
+            logger.error(f"❌ Error uploading file to Azure Storage: {str(e)}")
+            return False, f"Failed to upload file: {str(e)}", None
+
+    @traced()
+    async def download_file(self, blob_name: str, etag: Optional[str] = None) -> Tuple[bool, str, Optional[bytes]]:
+        """
+        Download a file from Azure Blob Storage without blocking the event loop
+
+        With ``etag``, the download fails if the blob has been replaced since it was read.
+
+        Returns:
+            Tuple of (success: bool, message: str, file_content: Optional[bytes])
+        """
+        try:
+            blob_client = self.container_client.get_blob_client(blob_name)
+            conditions = {"etag": etag, "match_condition": MatchConditions.IfNotModified} if etag else {}
+            stream = await blob_client.download_blob(max_concurrency=self.max_concurrency, **conditions)
+            file_content = await stream.readall()
+
+            logger.info("✅ File downloaded successfully: %s", blob_name)
+            return True, "File downloaded successfully", file_content
+
+        except Exception as e:
+            logger.error(f"❌ Error downloading file from Azure Storage: {str(e)}")
+            return False, f"Failed to download file: {str(e)}", None
+
+    @traced()
+    async def delete_file(self, blob_name: str) -> Tuple[bool, str]:
+        """
+        Delete a file from Azure Blob Storage without blocking the event loop
+
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        try:
+            await self.container_client.delete_blob(blob_name)
+
+            logger.info("✅ File deleted successfully: %s", blob_name)
+            return True, "File deleted successfully"
+
+        except Exception as e:
+            logger.error(f"❌ Error deleting file from Azure Storage: {str(e)}")
+            return False, f"Failed to delete file: {str(e)}"
+
+    @traced()
+    async def delete_files(
+        self,
+        blob_names: List[str],
+        if_unmodified_since: Optional[datetime] = None
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Delete blobs with the Blob batch API (up to 256 sub-requests per call)
+
+        With ``if_unmodified_since`` each delete is conditional (``If-Unmodified-Since``); blobs
+        modified after that time answer 412 and are kept.
+
+        Returns:
+            Tuple of (deleted, failed) blob names; blobs that no longer exist count as deleted,
+            blobs kept by the condition are in neither list
+        """
+        conditions = {"if_unmodified_since": if_unmodified_since} if if_unmodified_since else {}
+        deleted, failed = [], []
+        for start in range(0, len(blob_names), 256):
+            batch = blob_names[start:start + 256]
+            try:
+                responses = await self.container_client.delete_blobs(*batch, raise_on_any_failure=False, **conditions)
+                async for blob_name, response in _zip_async(batch, responses):
+                    if response.status_code in (202, 404):
+                        deleted.append(blob_name)
+                    elif response.status_code != 412:
+                        failed.append(blob_name)
+            except Exception as e:
+                logger.error(f"❌ Error batch deleting {len(batch)} blob(s): {str(e)}")
+                failed.extend(batch)
+        logger.info(f"🗑️ Batch deleted {len(deleted)} blob(s), {len(failed)} failed")
+        return deleted, failed
+
+    async def list_prefixes(self) -> AsyncIterator[str]:
+        """Yield the top-level virtual directories of the container"""
+        async for item in self.container_client.walk_blobs(delimiter="/"):
+            if item.name.endswith("/"):
+                yield item.name
+
+    async def list_files(self, prefix: str = "") -> AsyncIterator[Dict[str, Any]]:
+        """Yield blobs under a prefix, paged by the service"""
+        async for blob in self.container_client.list_blobs(name_starts_with=prefix or None):
+            yield {"name": blob.name, "size": blob.size, "last_modified": blob.last_modified}
+
+    @traced()
+    async def get_file_properties(self, blob_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a blob's size, ETag, content type and last-modified time
+
+        Returns:
+            Dictionary of properties, or None if the blob doesn't exist
+        """
+        try:
+            properties = await self.container_client.get_blob_client(blob_name).get_blob_properties()
+        except ResourceNotFoundError:
+            return None
+        return {
+            "size": properties.size,
+            "etag": properties.etag,
+            "content_type": properties.content_settings.content_type,
+            "last_modified": properties.last_modified
+        }
+
+    async def stream_file(
+        self,
+        blob_name: str,
+        offset: int = 0,
+        length: Optional[int] = None,
+        etag: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a blob (or a byte range of it) in ``stream_chunk_size`` chunks
+        """
+        conditions = {"etag": etag, "match_condition": MatchConditions.IfNotModified} if etag else {}
+        downloader = await self.container_client.get_blob_client(blob_name).download_blob(
+            offset=offset,
+            length=length,
+            max_concurrency=1,
+            **conditions
+        )
+        async for chunk in downloader.chunks():
+            yield chunk
+
+
+async def _zip_async(names: List[str], responses: AsyncIterator[Any]):
+    """Pair batch sub-request responses with the blob names they were issued for"""
+    index = 0
+    async for response in responses:
+        yield names[index], response
+        index += 1
+
+
+def create_async_storage_service() -> AsyncBlobStorage:
+    """
+    Build the async blob storage service selected by ``settings.storage_backend``
+    """
+    settings = get_settings()
+    if settings.storage_backend == "local":
+        from app.local_storage import AsyncLocalBlobStorageService, LocalBlobStorageService
+        return AsyncLocalBlobStorageService(LocalBlobStorageService(
+            os.path.join(settings.local_data_dir, "blobs"),
+            settings.azure_container_name or "contracts",
+            signing_key=settings.local_blob_signing_key,
+            content_addressed=settings.blob_content_addressed
+        ), stream_chunk_size=settings.blob_stream_chunk_size)
+    return AsyncAzureStorageService()
+
+
+# Global instance (built on first use, opened and closed by the application lifespan)
+async_storage_service: AsyncBlobStorage = LazyService("blob storage", create_async_storage_service)
@@ -0,0 +1,302 @@
+"""
+Deferred, batched deletion of contract files and a sweeper for files no contract points at
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.repository import AsyncBlobStorage, ContractRepository
+from app.request_units import background_priority
+
+logger = logging.getLogger(__name__)
+
+# Derived artifacts (rendered pages) have their own size-based eviction
+SKIPPED_PREFIXES = ("_derived/",)
+
+
+def _timestamp(value: Any) -> float:
+    """Blob last-modified time as a POSIX timestamp (backends return datetimes or floats)"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value or 0)
+
+
+class BlobDeletionQueue:
+    """
+    Collects files released by contract deletions and deletes them in batches in the background.
+
+    Each queued file is re-checked against the repository when its batch is flushed, so a file
+    that a new contract started pointing at in the meantime (content-addressed re-upload) is kept.
+    A re-upload's contract is only saved once extraction finishes, so the delete is also
+    conditional: files modified after they were queued, or less than ``min_age_seconds`` before
+    the flush (re-uploads touch the stored file), are left for the orphan sweeper.
+    """
+
+    def __init__(
+        self,
+        repository: ContractRepository,
+        storage: AsyncBlobStorage,
+        batch_size: int = 256,
+        flush_interval_seconds: float = 2.0,
+        min_age_seconds: float = 900
+    ):
+        self.repository = repository
+        self.storage = storage
+        self.batch_size = max(1, min(int(batch_size), 256))
+        self.flush_interval_seconds = flush_interval_seconds
+        self.min_age_seconds = min_age_seconds
+
+        # (user email, blob URL, time queued)
+        self._pending: List[Tuple[str, str, float]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+        # Metrics
+        self.enqueued = 0
+        self.deleted = 0
+        self.kept = 0
+        self.kept_recent = 0
+        self.failed = 0
+        self.batches = 0
+
+    def enqueue(self, user_email: str, blob_url: Optional[str]) -> bool:
+        """Queue a contract's file for deletion; returns False if the URL is not one of our blobs"""
+        if not self.storage.blob_name_from_url(blob_url):
+            return False
+        self._pending.append((user_email, blob_url, time.time()))
+        self.enqueued += 1
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def flush(self) -> int:
+        """
+        Delete every queued file that is no longer referenced
+
+        Returns:
+            Number of files deleted
+        """
+        total = 0
+        while self._pending:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            total += await self._flush_batch(batch)
+        return total
+
+    async def _flush_batch(self, batch: List[Tuple[str, str, float]]) -> int:
+        queued_at: Dict[Tuple[str, str], float] = {}
+        for user_email, blob_url, enqueued_at in batch:
+            key = (user_email, blob_url)
+            queued_at[key] = min(enqueued_at, queued_at.get(key, enqueued_at))
+        unique = list(queued_at)
+        references = await asyncio.gather(
+            *(self.repository.count_blob_references(user_email, blob_url) for user_email, blob_url in unique),
+            return_exceptions=True
+        )
+        blob_names = []
+        for (user_email, blob_url), count in zip(unique, references):
+            if isinstance(count, Exception):
+                logger.warning(f"⚠️ Could not count references to {blob_url}: {str(count)}")
+                self.failed += 1
+            elif count:
+                self.kept += 1
+            else:
+                blob_names.append(self.storage.blob_name_from_url(blob_url))
+        if not blob_names:
+            self.batches += 1
+            return 0
+
+        # Only delete files untouched since they were queued and older than min_age_seconds
+        cutoff = min(min(queued_at.values()), time.time() - self.min_age_seconds)
+        deleted, failed = await self.storage.delete_files(
+            blob_names,
+            if_unmodified_since=datetime.fromtimestamp(cutoff, tz=timezone.utc)
+        )
+        self.batches += 1
+        self.deleted += len(deleted)
+        self.failed += len(failed)
+        self.kept_recent += len(blob_names) - len(deleted) - len(failed)
+        if failed:
+            logger.warning(f"⚠️ {len(failed)} blob(s) could not be deleted; the orphan sweeper will retry")
+        return len(deleted)
+
+    async def start(self) -> None:
+        """Start flushing queued deletions in the background"""
+        if self._task is None:
+            self._stopping.clear()
+            # Reference counting queries yield Cosmos throughput to interactive requests
+            with background_priority():
+                self._task = asyncio.create_task(self._run())
+            logger.info("🗑️ Blob deletion queue started")
+
+    async def stop(self) -> None:
+        """Stop the background task and flush what is still queued"""
+        if self._task is not None:
+            self._stopping.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending:
+            await self.flush()
+        logger.info("⏹️ Blob deletion queue stopped")
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Error flushing blob deletions: {str(e)}")
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return queue depth and deletion counters"""
+        return {
+            "running": self._task is not None,
+            "pending": len(self._pending),
+            "enqueued": self.enqueued,
+            "deleted": self.deleted,
+            "kept_referenced": self.kept,
+            "kept_recently_modified": self.kept_recent,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+class OrphanSweeper:
+    """
+    Finds (and optionally deletes) files that no contract's ``LinkImage`` points at.
+
+    The contract reference scan (paged, cross-partition) runs concurrently with the blob
+    listing, which is split by top-level user prefix and listed ``concurrency`` prefixes at a
+    time. Files younger than ``min_age_seconds`` are never touched, which protects uploads whose
+    contract has not been saved yet (and content-addressed files just re-used by an upload).
+    """
+
+    def __init__(
+        self,
+        repository: ContractRepository,
+        storage: AsyncBlobStorage,
+        min_age_seconds: float = 24 * 3600,
+        concurrency: int = 8,
+        page_size: int = 1000
+    ):
+        self.repository = repository
+        self.storage = storage
+        self.min_age_seconds = min_age_seconds
+        self.concurrency = max(1, int(concurrency))
+        self.page_size = page_size
+
+    def _referenced_blob_names(self) -> Set[str]:
+        referenced = set()
+        for page in self.repository.iter_blob_references(self.page_size):
+            for blob_url in page:
+                blob_name = self.storage.blob_name_from_url(blob_url)
+                if blob_name:
+                    referenced.add(blob_name)
+        return referenced
+
+    async def sweep(self, apply: bool = False) -> Dict[str, Any]:
+        """
+        Scan for orphaned files and delete them when ``apply`` is True
+
+        Returns:
+            Report with scan counts, orphan count and bytes, and bytes reclaimed
+        """
+        started = time.perf_counter()
+        cutoff = time.time() - self.min_age_seconds
+        with background_priority():
+            referenced_task = asyncio.ensure_future(asyncio.to_thread(self._referenced_blob_names))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        scanned = {"blobs": 0, "bytes": 0, "too_recent": 0}
+
+        async def scan_prefix(prefix: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                blobs = [blob async for blob in self.storage.list_files(prefix)]
+            referenced = await referenced_task
+            orphans = []
+            for blob in blobs:
+                scanned["blobs"] += 1
+                scanned["bytes"] += blob["size"] or 0
+                if blob["name"] in referenced:
+                    continue
+                if _timestamp(blob["last_modified"]) > cutoff:
+                    scanned["too_recent"] += 1
+                    continue
+                orphans.append(blob)
+            return orphans
+
+        try:
+            prefixes = [
+                prefix async for prefix in self.storage.list_prefixes()
+                if not prefix.startswith(SKIPPED_PREFIXES)
+            ]
+            results = await asyncio.gather(*(scan_prefix(prefix) for prefix in prefixes))
+            referenced = await referenced_task
+        finally:
+            if not referenced_task.done():
+                referenced_task.cancel()
+        orphans = [blob for result in results for blob in result]
+
+        report = {
+            "dry_run": not apply,
+            "prefixes_scanned": len(prefixes),
+            "blobs_scanned": scanned["blobs"],
+            "bytes_scanned": scanned["bytes"],
+            "referenced_blobs": len(referenced),
+            "skipped_too_recent": scanned["too_recent"],
+            "orphans": len(orphans),
+            "orphan_bytes": sum(blob["size"] or 0 for blob in orphans),
+            "deleted": 0,
+            "failed": 0,
+            "bytes_reclaimed": 0,
+        }
+        if apply and orphans:
+            sizes = {blob["name"]: blob["size"] or 0 for blob in orphans}
+            # Conditional, so a file re-used by an upload since the listing is kept
+            deleted, failed = await self.storage.delete_files(
+                list(sizes),
+                if_unmodified_since=datetime.fromtimestamp(cutoff, tz=timezone.utc)
+            )
+            report["deleted"] = len(deleted)
+            report["failed"] = len(failed)
+            report["bytes_reclaimed"] = sum(sizes[name] for name in deleted)
+
+        report["duration_seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(
+            f"🧹 Orphan sweep: {report['orphans']} orphan(s) of {report['blobs_scanned']} blob(s), "
+            f"{report['bytes_reclaimed']} bytes reclaimed"
+        )
+        return report
+
+
+def create_blob_deletion_queue(repository: ContractRepository, storage: AsyncBlobStorage, settings) -> BlobDeletionQueue:
+    """Build the deletion queue from settings"""
+    return BlobDeletionQueue(
+        repository,
+        storage,
+        batch_size=settings.blob_delete_batch_size,
+        flush_interval_seconds=settings.blob_delete_flush_interval_seconds,
+        min_age_seconds=settings.blob_delete_min_age_seconds
+    )
+
+
+def create_orphan_sweeper(repository: ContractRepository, storage: AsyncBlobStorage, settings) -> OrphanSweeper:
+    """Build the orphan sweeper from settings"""
+    return OrphanSweeper(
+        repository,
+        storage,
+        min_age_seconds=settings.orphan_sweep_min_age_seconds,
+        concurrency=settings.orphan_sweep_concurrency
+    )
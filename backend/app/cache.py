@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional
+
+
+@dataclass
+class CacheEntry:
+    """A cached contract document together with its ETag and freshness timestamp"""
+    document: Dict[str, Any]
+    etag: Optional[str]
+    stored_at: float
+
+
+class ContractCache:
+    """
+    Size-bounded LRU cache with a per-entry TTL for contract documents.
+
+    Entries younger than ``ttl_seconds`` are served without contacting Cosmos DB.
+    Older entries are kept (until evicted) so the caller can revalidate them with a
+    conditional read on their ETag instead of paying for a full read.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 10.0):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Return the entry for ``key`` if it is still fresh, counting a hit or a miss.
+
+        Stale entries are not returned here; use ``get_stale`` to fetch them for revalidation.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_fresh(entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def get_stale(self, key: Hashable) -> Optional[CacheEntry]:
+        """Return the entry for ``key`` regardless of freshness, without touching counters"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: Hashable, document: Dict[str, Any]) -> None:
+        """Store a document, evicting the least recently used entries beyond the size bound"""
+        if self.max_entries == 0:
+            return
+        entry = CacheEntry(document=document, etag=document.get("_etag"), stored_at=time.monotonic())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def touch(self, key: Hashable) -> None:
+        """Mark an entry as freshly revalidated (the stored document is unchanged)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.stored_at = time.monotonic()
+                self._entries.move_to_end(key)
+                self.revalidations += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop the entry for ``key`` if present"""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "revalidations": self.revalidations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _is_fresh(self, entry: CacheEntry) -> bool:
+        return (time.monotonic() - entry.stored_at) < self.ttl_seconds
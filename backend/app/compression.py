@@ -0,0 +1,228 @@
+"""
+gzip / brotli response compression middleware that is safe for streamed (SSE / NDJSON) responses
+"""
+
+import threading
+import zlib
+from typing import Any, Callable, Dict, Iterable, Optional
+
+try:
+    import brotli
+except ImportError:  # optional dependency; gzip is always available
+    brotli = None
+
+# Content types worth compressing (JSON lists, markdown reports, event streams)
+DEFAULT_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "text/event-stream",
+    "text/markdown",
+    "text/plain",
+    "text/html",
+    "text/csv",
+)
+
+# Streamed types: every body chunk is one or more events and must reach the client immediately
+STREAMING_TYPES = ("text/event-stream", "application/x-ndjson")
+
+
+class _Encoder:
+    """Incremental gzip or brotli encoder; ``flush`` emits everything written so far"""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=level)
+        else:
+            self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + self._brotli.flush() if flush else out
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionStats:
+    """Bytes in/out per route, for the compression report"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, route: str, encoding: str, original: int, compressed: int) -> None:
+        with self._lock:
+            entry = self._routes.setdefault(route, {"responses": 0, "bytes_in": 0, "bytes_out": 0, "encodings": {}})
+            entry["responses"] += 1
+            entry["bytes_in"] += original
+            entry["bytes_out"] += compressed
+            entry["encodings"][encoding] = entry["encodings"].get(encoding, 0) + 1
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {
+                route: {
+                    **entry,
+                    "encodings": dict(entry["encodings"]),
+                    "bytes_saved": entry["bytes_in"] - entry["bytes_out"],
+                    "ratio": round(entry["bytes_out"] / entry["bytes_in"], 4) if entry["bytes_in"] else None,
+                }
+                for route, entry in self._routes.items()
+            }
+        return {
+            "bytes_saved": sum(entry["bytes_saved"] for entry in routes.values()),
+            "routes": routes,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+# Global counters (reported by GET /api/v1/contracts/stats/compression)
+compression_stats = CompressionStats()
+
+
+def choose_encoding(accept_encoding: str, brotli_enabled: bool = True) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an ``Accept-Encoding`` header (None if neither is accepted)"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    if brotli_enabled and brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", accepted.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses whose content type is in ``compressible_types``.
+
+    Single-body responses smaller than ``minimum_size`` are sent as is. Streamed event responses
+    (SSE / NDJSON) are compressed chunk by chunk with a sync flush after every chunk, so each
+    event is delivered as soon as it is produced. Responses that already carry a
+    ``Content-Encoding`` and partial (206) responses are passed through untouched.
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        minimum_size: int = 1024,
+        compressible_types: Iterable[str] = DEFAULT_COMPRESSIBLE_TYPES,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        brotli_enabled: bool = True,
+        stats: CompressionStats = compression_stats
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressible_types = tuple(compressible_types)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.brotli_enabled = brotli_enabled
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"), self.brotli_enabled)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self, scope, encoding, send).run(receive)
+
+
+class _CompressedResponder:
+    """Per-request state of ``CompressionMiddleware``"""
+
+    def __init__(self, middleware: CompressionMiddleware, scope, encoding: str, send):
+        self.middleware = middleware
+        self.scope = scope
+        self.encoding = encoding
+        self.send = send
+        self.start_message = None
+        self.encoder: Optional[_Encoder] = None
+        self.streaming = False
+        self.passthrough = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def run(self, receive) -> None:
+        await self.middleware.app(self.scope, receive, self.wrapped_send)
+
+    def _compressible(self, message) -> bool:
+        headers = {key.lower(): value for key, value in message.get("headers", [])}
+        if message["status"] in (204, 206, 304) or b"content-encoding" in headers:
+            return False
+        content_type = headers.get(b"content-type", b"").decode("latin-1").split(";")[0].strip().lower()
+        self.streaming = content_type in STREAMING_TYPES
+        return content_type in self.middleware.compressible_types
+
+    def _start_headers(self):
+        headers = [
+            (key, value) for key, value in self.start_message.get("headers", [])
+            if key.lower() != b"content-length"
+        ]
+        headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        headers.append((b"vary", b"Accept-Encoding"))
+        return headers
+
+    def _route_label(self) -> str:
+        route = self.scope.get("route")
+        path = getattr(route, "path", None) or self.scope.get("path", "")
+        return f"{self.scope.get('method', 'GET')} {path}"
+
+    async def wrapped_send(self, message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._compressible(message)
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            # First body chunk decides: small single-body responses go out uncompressed
+            if not more_body and not self.streaming and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            level = self.middleware.brotli_quality if self.encoding == "br" else self.middleware.gzip_level
+            self.encoder = _Encoder(self.encoding, level)
+            await self.send({**self.start_message, "headers": self._start_headers()})
+
+        self.bytes_in += len(body)
+        if more_body:
+            compressed = self.encoder.compress(body, flush=self.streaming)
+        else:
+            compressed = self.encoder.compress(body) + self.encoder.finish()
+        self.bytes_out += len(compressed)
+
+        if compressed or not more_body:
+            await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+        if not more_body:
+            self.middleware.stats.record(self._route_label(), self.encoding, self.bytes_in, self.bytes_out)
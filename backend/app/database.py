@@ -1,26 +1,52 @@
 from azure.cosmos import CosmosClient, PartitionKey, exceptions
+from azure.cosmos._retry_options import RetryOptions
+from azure.cosmos.documents import ConnectionPolicy
+from azure.core import MatchConditions
 from typing import Optional, List, Dict, Any
 from app.models import ContractData, ContractUpdateData
+from app.cache import ContractCache
+from app.repository import ContractRepository
+from app.search import build_search_query
+from app.summaries import (
+    SUMMARY_ENTRY_TYPE,
+    TOMBSTONE_RETENTION_SECONDS,
+    create_summary_processor,
+    new_summary,
+    summary_entry_id,
+    summary_id,
+)
+from app.services import LazyService
+from app.indexing_policy import CONTRACTS_INDEXING_POLICY, diff_indexing_policy, is_unindexed
+from app.metrics import record_request_charge
+from app.request_units import RequestThrottled, cosmos_throttle, request_charge_ledger
+from app.tracing import current_span, traced
 from config.settings import get_settings
 import logging
-from datetime import datetime
+import os
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Disable Azure Cosmos DB verbose logging
-azure_logger = logging.getLogger('azure.core.pipeline.policies.http_logging_policy')
-azure_logger.setLevel(logging.WARNING)
-
-azure_cosmos_logger = logging.getLogger('azure.cosmos')
-azure_cosmos_logger.setLevel(logging.WARNING)
-
 # Get settings
 settings = get_settings()
 
 
-class CosmosDBManager:
+class _ResponseHeaders:
+    """
+    ``raw_response_hook`` keeping the headers of one call's own HTTP responses.
+
+    ``client_connection.last_response_headers`` is shared by every call made through the client,
+    so with request handlers and worker threads running calls concurrently it may belong to
+    another call. (``response_hook`` reads it too in this SDK version.)
+    """
+    
+    def __init__(self):
+        self.headers: Dict[str, str] = {}
+    
+    def __call__(self, response) -> None:
+        self.headers = response.http_response.headers
+
+
+class CosmosDBManager(ContractRepository):
     """
     Azure Cosmos DB manager for contract data operations
     """
@@ -29,22 +55,43 @@ class CosmosDBManager:
         # Get configuration from settings
         self.endpoint = settings.cosmos_endpoint
         self.key = settings.cosmos_key
+        if not all([self.endpoint, self.key]):
+            raise ValueError("Cosmos DB configuration is missing (COSMOS_ENDPOINT / COSMOS_KEY)")
         self.database_name = settings.cosmos_database_name
         self.container_name = settings.cosmos_container_name
+        self.summary_container_name = settings.cosmos_summary_container_name
+        self.lease_container_name = settings.change_feed_lease_container_name
         
         # Initialize Cosmos client
         try:
-            self.client = CosmosClient(self.endpoint, self.key)
+            # Throttled (429) calls get one short SDK retry; AdaptiveThrottle handles the rest.
+            # Only the throttle retry options are set: ``retry_total`` would also cut the
+            # connection retry policy (network errors) down to the same count.
+            connection_policy = ConnectionPolicy()
+            connection_policy.RetryOptions = RetryOptions(
+                max_retry_attempt_count=max(1, settings.cosmos_sdk_throttle_retries),
+                max_wait_time_in_seconds=settings.cosmos_sdk_throttle_max_wait_seconds
+            )
+            self.client = CosmosClient(self.endpoint, self.key, connection_policy=connection_policy)
             self.database = self.client.get_database_client(self.database_name)
             self.container = self.database.get_container_client(self.container_name)
+            self.summary_container = self.database.get_container_client(self.summary_container_name)
             logger.info(f"✅ Connected to Azure Cosmos DB: {self.database_name}/{self.container_name}")
         except Exception as e:
             logger.error(f"❌ Failed to connect to Cosmos DB: {str(e)}")
             raise
+        
+        # Read-through cache for point reads, keyed by (partition, id)
+        self.cache = ContractCache(
+            max_entries=settings.contract_cache_max_entries if settings.contract_cache_enabled else 0,
+            ttl_seconds=settings.contract_cache_ttl_seconds
+        )
     
-    async def create_database_and_container_if_not_exists(self):
+    def create_database_and_container_if_not_exists(self):
         """
         Create database and container if they don't exist
+
+        Every step is a blocking SDK call; run it with ``asyncio.to_thread``.
         """
         try:
             # Create database if it doesn't exist
@@ -65,28 +112,96 @@ class CosmosDBManager:
                     raise
             
             # Create container if it doesn't exist
-            try:
-                # For serverless accounts, don't specify offer_throughput
-                container = database.create_container(
-                    id=self.container_name,
-                    partition_key=PartitionKey(path="/UserEmail")
-                )
-                logger.info(f"📦 Created container: {self.container_name}")
-            except exceptions.CosmosResourceExistsError:
-                container = database.get_container_client(self.container_name)
-                logger.info(f"📦 Container {self.container_name} already exists")
-            except Exception as e:
-                if "serverless" in str(e).lower():
-                    logger.warning(f"⚠️ Serverless account detected, using existing container: {self.container_name}")
-                    container = database.get_container_client(self.container_name)
-                else:
-                    raise
+            self._create_container_if_not_exists(
+                database, self.container_name, "/UserEmail", indexing_policy=CONTRACTS_INDEXING_POLICY
+            )
+            
+            # Existing containers keep whatever policy they were created with; bring them in line
+            if settings.cosmos_reconcile_indexing_policy:
+                self.reconcile_indexing_policy()
+            else:
+                for drift in self.check_indexing_policy():
+                    logger.warning(f"⚠️ Indexing policy drift: {drift}")
+            
+            # Containers for the change-feed-maintained summaries and the processor lease
+            # (per-item TTL on, for the removal tombstones among the summary entries)
+            self._create_container_if_not_exists(database, self.summary_container_name, "/UserEmail", default_ttl=-1)
+            if self.lease_container_name:
+                self._create_container_if_not_exists(database, self.lease_container_name, "/id")
                 
             return True
         except Exception as e:
             logger.error(f"Error creating database/container: {str(e)}")
             return False
     
+    def _create_container_if_not_exists(
+        self,
+        database,
+        container_name: str,
+        partition_key_path: str,
+        indexing_policy: Optional[Dict[str, Any]] = None,
+        default_ttl: Optional[int] = None
+    ):
+        """
+        Create a container with the given partition key path (and indexing policy and default TTL)
+        if it doesn't exist
+        """
+        try:
+            # For serverless accounts, don't specify offer_throughput
+            container = database.create_container(
+                id=container_name,
+                partition_key=PartitionKey(path=partition_key_path),
+                indexing_policy=indexing_policy,
+                default_ttl=default_ttl
+            )
+            logger.info(f"📦 Created container: {container_name}")
+        except exceptions.CosmosResourceExistsError:
+            container = database.get_container_client(container_name)
+            logger.info(f"📦 Container {container_name} already exists")
+        except Exception as e:
+            if "serverless" in str(e).lower():
+                logger.warning(f"⚠️ Serverless account detected, using existing container: {container_name}")
+                container = database.get_container_client(container_name)
+            else:
+                raise
+        return container
+    
+    def check_indexing_policy(self) -> List[str]:
+        """
+        Compare the live contracts container indexing policy with the declared one
+        
+        Returns:
+            Human-readable drift descriptions; an empty list means no drift
+        """
+        live_policy = self.container.read().get("indexingPolicy", {})
+        return diff_indexing_policy(CONTRACTS_INDEXING_POLICY, live_policy)
+    
+    def reconcile_indexing_policy(self) -> bool:
+        """
+        Replace the contracts container indexing policy with the declared one if it has drifted
+        
+        Cosmos DB applies the new policy with an online index transformation, so reads and
+        writes keep working while it runs.
+        
+        Returns:
+            True if the policy was replaced
+        """
+        drift = self.check_indexing_policy()
+        if not drift:
+            logger.info("📑 Indexing policy matches the declared policy")
+            return False
+        
+        for item in drift:
+            logger.info(f"📑 Indexing policy drift: {item}")
+        self.database.replace_container(
+            self.container,
+            partition_key=PartitionKey(path="/UserEmail"),
+            indexing_policy=CONTRACTS_INDEXING_POLICY
+        )
+        logger.info(f"📑 Applied declared indexing policy to {self.container_name} ({len(drift)} change(s))")
+        return True
+    
+    @traced()
     async def create_contract(self, contract_data: ContractData) -> Dict[str, Any]:
         """
         Create a new contract in Cosmos DB
@@ -102,8 +217,10 @@ class CosmosDBManager:
                 contract_dict['updated_at'] = contract_dict['updated_at'].isoformat()
             
             # Create item in Cosmos DB
-            created_item = self.container.create_item(body=contract_dict)
-            logger.info(f"✅ Contract created successfully: {contract_data.id}")
+            created_item = await self._run(
+                "create", contract_data.UserEmail, self.container.create_item, body=contract_dict
+            )
+            logger.info("✅ Contract created successfully: %s", contract_data.id)
             
             return {
                 "success": True,
@@ -116,6 +233,8 @@ class CosmosDBManager:
                 "success": False,
                 "message": f"Contract with ID {contract_data.id} already exists"
             }
+        except RequestThrottled:
+            raise
         except Exception as e:
             logger.error(f"❌ Error creating contract: {str(e)}")
             return {
@@ -123,16 +242,51 @@ class CosmosDBManager:
                 "message": f"Error creating contract: {str(e)}"
             }
     
-    async def get_contract(self, contract_id: str, user_email: str) -> Dict[str, Any]:
+    @traced()
+    async def get_contract(self, contract_id: str, user_email: str, use_cache: bool = True) -> Dict[str, Any]:
         """
         Retrieve a contract by ID and user email (partition key)
+        
+        Fresh cache entries are served without a Cosmos round trip. Stale entries are
+        revalidated with a conditional read on their ETag, so documents changed by
+        another worker are picked up while unchanged ones cost no document transfer.
         """
+        cache_key = (user_email, contract_id)
+        if use_cache:
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                return {
+                    "success": True,
+                    "message": "Contract retrieved successfully",
+                    "data": entry.document
+                }
+        
         try:
-            item = self.container.read_item(
-                item=contract_id,
-                partition_key=user_email
-            )
-            logger.info(f"Retrieved contract with ID: {contract_id}")
+            stale = self.cache.get_stale(cache_key) if use_cache else None
+            if stale is not None and stale.etag:
+                item = await self._run(
+                    "read", user_email, self.container.read_item,
+                    item=contract_id,
+                    partition_key=user_email,
+                    etag=stale.etag,
+                    match_condition=MatchConditions.IfModified
+                )
+                if not item:
+                    # 304 Not Modified: the cached copy is still current
+                    self.cache.touch(cache_key)
+                    return {
+                        "success": True,
+                        "message": "Contract retrieved successfully",
+                        "data": stale.document
+                    }
+            else:
+                item = await self._run(
+                    "read", user_email, self.container.read_item,
+                    item=contract_id,
+                    partition_key=user_email
+                )
+            self.cache.put(cache_key, item)
+            logger.debug("Retrieved contract with ID: %s", contract_id)
             
             return {
                 "success": True,
@@ -140,11 +294,14 @@ class CosmosDBManager:
                 "data": item
             }
         except exceptions.CosmosResourceNotFoundError:
+            self.cache.invalidate(cache_key)
             logger.warning(f"Contract with ID {contract_id} not found")
             return {
                 "success": False,
                 "message": f"Contract with ID {contract_id} not found"
             }
+        except RequestThrottled:
+            raise
         except Exception as e:
             logger.error(f"Error retrieving contract: {str(e)}")
             return {
@@ -152,58 +309,56 @@ class CosmosDBManager:
                 "message": f"Error retrieving contract: {str(e)}"
             }
     
+    @traced()
     async def update_contract(self, contract_id: str, user_email: str, update_data: ContractUpdateData) -> Dict[str, Any]:
         """
         Update an existing contract
         """
         try:
-            # First, get the existing contract
-            existing_result = await self.get_contract(contract_id, user_email)
+            # First, get the existing contract (bypass the cache so we merge onto the latest version)
+            existing_result = await self.get_contract(contract_id, user_email, use_cache=False)
             if not existing_result["success"]:
                 return existing_result
             
-            existing_contract = existing_result["data"]
-            
-            # Update only the fields that are provided
-            update_dict = update_data.dict(exclude_unset=True)
-            
-            # Ensure updated_at is set to current time
-            update_dict['updated_at'] = datetime.utcnow().isoformat()
-            
-            # Merge with existing data
-            for key, value in update_dict.items():
-                if value is not None:
-                    existing_contract[key] = value
+            existing_contract = self.merge_update(existing_result["data"], update_data)
             
             # Update in Cosmos DB
-            updated_item = self.container.replace_item(
+            updated_item = await self._run(
+                "replace", user_email, self.container.replace_item,
                 item=contract_id,
                 body=existing_contract
             )
-            logger.info(f"Updated contract with ID: {contract_id}")
+            self.cache.put((user_email, contract_id), updated_item)
+            logger.info("Updated contract with ID: %s", contract_id)
             
             return {
                 "success": True,
                 "message": "Contract updated successfully",
                 "data": updated_item
             }
+        except RequestThrottled:
+            raise
         except Exception as e:
+            self.cache.invalidate((user_email, contract_id))
             logger.error(f"Error updating contract: {str(e)}")
             return {
                 "success": False,
                 "message": f"Error updating contract: {str(e)}"
             }
     
+    @traced()
     async def delete_contract(self, contract_id: str, user_email: str) -> Dict[str, Any]:
         """
         Delete a contract by ID and user email
         """
+        self.cache.invalidate((user_email, contract_id))
         try:
-            self.container.delete_item(
+            await self._run(
+                "delete", user_email, self.container.delete_item,
                 item=contract_id,
                 partition_key=user_email
             )
-            logger.info(f"Deleted contract with ID: {contract_id}")
+            logger.info("Deleted contract with ID: %s", contract_id)
             
             return {
                 "success": True,
@@ -215,6 +370,8 @@ class CosmosDBManager:
                 "success": False,
                 "message": f"Contract with ID {contract_id} not found"
             }
+        except RequestThrottled:
+            raise
         except Exception as e:
             logger.error(f"Error deleting contract: {str(e)}")
             return {
@@ -222,6 +379,24 @@ class CosmosDBManager:
                 "message": f"Error deleting contract: {str(e)}"
             }
     
+    @traced()
+    async def count_blob_references(self, user_email: str, blob_url: str) -> int:
+        """
+        Count the user's contracts that point at a blob (single-partition, indexed on LinkImage)
+        """
+        query = "SELECT VALUE COUNT(1) FROM c WHERE c.UserEmail = @user_email AND c.LinkImage = @link"
+        parameters = [
+            {"name": "@user_email", "value": user_email},
+            {"name": "@link", "value": blob_url}
+        ]
+        return await self._run("count_references", user_email, lambda **options: next(iter(self.container.query_items(
+            query=query,
+            parameters=parameters,
+            partition_key=user_email,
+            **options
+        )), 0))
+    
+    @traced()
     async def list_contracts_by_user(self, user_email: str, limit: int = 100) -> Dict[str, Any]:
         """
         List all contracts for a specific user
@@ -230,14 +405,15 @@ class CosmosDBManager:
             query = "SELECT * FROM c WHERE c.UserEmail = @user_email"
             parameters = [{"name": "@user_email", "value": user_email}]
             
-            items = list(self.container.query_items(
+            items = await self._run("list", user_email, lambda **options: list(self.container.query_items(
                 query=query,
                 parameters=parameters,
                 max_item_count=limit,
-                enable_cross_partition_query=False
-            ))
+                enable_cross_partition_query=False,
+                **options
+            )))
             
-            logger.info(f"Retrieved {len(items)} contracts for user: {user_email}")
+            logger.debug("Retrieved %d contracts for user: %s", len(items), user_email)
             
             return {
                 "success": True,
@@ -245,6 +421,8 @@ class CosmosDBManager:
                 "data": items,
                 "count": len(items)
             }
+        except RequestThrottled:
+            raise
         except Exception as e:
             logger.error(f"Error listing contracts: {str(e)}")
             return {
@@ -252,6 +430,395 @@ class CosmosDBManager:
                 "message": f"Error listing contracts: {str(e)}"
             }
 
+    
+    async def iter_contracts_by_user(self, user_email: str, page_size: int = 500):
+        """
+        Yield every contract of a user one page at a time (single-partition query)
+        
+        Each page is fetched by a pager rebuilt from the previous page's continuation, so a
+        throttled page is retried from where it left off.
+        """
+        query = "SELECT * FROM c WHERE c.UserEmail = @user_email"
+        parameters = [{"name": "@user_email", "value": user_email}]
+        continuation = None
+        
+        def fetch_page(**options):
+            pager = self.container.query_items(
+                query=query,
+                parameters=parameters,
+                partition_key=user_email,
+                max_item_count=page_size,
+                **options
+            ).by_page(continuation)
+            return list(next(pager, [])), pager.continuation_token
+        
+        while True:
+            items, continuation = await self._run("list", user_email, fetch_page)
+            if items:
+                yield items
+            if not continuation:
+                return
+    
+    @traced()
+    async def search_contracts(
+        self,
+        user_email: str,
+        filters: Dict[str, Any],
+        page_size: int = 50,
+        continuation: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a parameterized search query within a user's partition, one page at a time
+        
+        Args:
+            user_email: Email of the user (partition key)
+            filters: Search filters accepted by ``app.search.build_search_query``
+            page_size: Maximum number of contracts in the page
+            continuation: Continuation token returned by the previous page
+            
+        Returns:
+            Dictionary with the page of contracts and the continuation token for the next page
+            
+        Raises:
+            ValueError: If the filters are invalid
+        """
+        query, parameters = build_search_query(**filters)
+        response_headers = _ResponseHeaders()
+        
+        def fetch_page():
+            # A fresh pager per attempt: after a 429 the previous one may be partly consumed
+            pager = self.container.query_items(
+                query=query,
+                parameters=parameters,
+                partition_key=user_email,
+                max_item_count=page_size,
+                # Substring match on contract_details filters an unindexed path
+                enable_scan_in_query=bool(filters.get("text")) and is_unindexed("contract_details"),
+                raw_response_hook=response_headers
+            ).by_page(continuation)
+            return list(next(pager, [])), pager.continuation_token
+        
+        try:
+            items, next_continuation = await cosmos_throttle.run(fetch_page)
+            request_charge = self._record_charge("search", user_email, response_headers.headers)
+            
+            logger.debug("Search returned %d contracts for user: %s (%s RU)", len(items), user_email, request_charge)
+            
+            return {
+                "success": True,
+                "message": f"Retrieved {len(items)} contracts",
+                "data": items,
+                "count": len(items),
+                "continuation": next_continuation,
+                "request_charge": request_charge
+            }
+        except RequestThrottled:
+            raise
+        except Exception as e:
+            logger.error(f"Error searching contracts: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Error searching contracts: {str(e)}"
+            }
+    
+    def iter_blob_references(self, page_size: int = 1000):
+        """
+        Yield pages of every contract's LinkImage (cross-partition, projected to one field)
+        
+        The SDK's query iterator can't be resumed after a failed fetch (it would report the end
+        of the results), and a cross-partition query can't be rebuilt from a continuation, so a
+        throttled page read restarts the scan from the beginning. Pages may therefore repeat.
+        """
+        response_headers = _ResponseHeaders()
+        state = {"pages": None}
+        
+        def next_page():
+            if state["pages"] is None:
+                state["pages"] = iter(self.container.query_items(
+                    query="SELECT VALUE c.LinkImage FROM c WHERE IS_STRING(c.LinkImage)",
+                    enable_cross_partition_query=True,
+                    max_item_count=page_size,
+                    raw_response_hook=response_headers
+                ).by_page())
+            try:
+                return next(state["pages"], None)
+            except Exception:
+                state["pages"] = None
+                raise
+        
+        while True:
+            page = cosmos_throttle.run_sync(next_page)
+            if page is None:
+                return
+            self._record_charge("scan_references", None, response_headers.headers)
+            yield list(page)
+    
+    def read_change_feed(self, continuation: Optional[str] = None, max_item_count: int = 500):
+        """
+        Read one page of the contracts container change feed
+        
+        Args:
+            continuation: Continuation token from the previous call, or None to start from the beginning
+            max_item_count: Maximum number of changed documents to return
+            
+        Returns:
+            Tuple of (changed documents, continuation token for the next call)
+        """
+        response_headers = _ResponseHeaders()
+        start = {"continuation": continuation} if continuation else {"is_start_from_beginning": True}
+        
+        def read_page():
+            # A fresh iterator per attempt, so a throttled read is retried from ``continuation``
+            response = self.container.query_items_change_feed(
+                max_item_count=max_item_count, raw_response_hook=response_headers, **start
+            )
+            return list(next(response.by_page(), []))
+        
+        items = cosmos_throttle.run_sync(read_page)
+        self._record_charge("change_feed", None, response_headers.headers)
+        next_continuation = response_headers.headers.get("etag") or continuation
+        return items, next_continuation
+    
+    @traced()
+    async def get_summary(self, user_email: str) -> Dict[str, Any]:
+        """
+        Point-read the change-feed-maintained summary document for a user
+        """
+        try:
+            item = await self._run(
+                "read_summary", user_email, self.summary_container.read_item,
+                item=summary_id(user_email),
+                partition_key=user_email
+            )
+            return {
+                "success": True,
+                "message": "Summary retrieved successfully",
+                "data": item
+            }
+        except exceptions.CosmosResourceNotFoundError:
+            return {
+                "success": False,
+                "message": f"Summary for {user_email} not found"
+            }
+        except RequestThrottled:
+            raise
+        except Exception as e:
+            logger.error(f"Error retrieving summary: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Error retrieving summary: {str(e)}"
+            }
+    
+    @traced()
+    def update_summary(self, user_email: str, mutate, max_attempts: int = 5) -> Dict[str, Any]:
+        """
+        Read-modify-write a user's summary document with optimistic concurrency
+        
+        Args:
+            user_email: Owner of the summary (partition key)
+            mutate: Callable that modifies the summary document in place
+            max_attempts: Number of retries when another writer wins the race
+            
+        Returns:
+            The stored summary document
+        """
+        for _ in range(max_attempts):
+            try:
+                summary = self._run_sync(
+                    "read_summary", user_email, self.summary_container.read_item,
+                    item=summary_id(user_email),
+                    partition_key=user_email
+                )
+                exists = True
+            except exceptions.CosmosResourceNotFoundError:
+                summary = new_summary(user_email)
+                exists = False
+            
+            mutate(summary)
+            
+            try:
+                if exists:
+                    return self._run_sync(
+                        "replace_summary", user_email, self.summary_container.replace_item,
+                        item=summary["id"],
+                        body=summary,
+                        etag=summary.get("_etag"),
+                        match_condition=MatchConditions.IfNotModified
+                    )
+                return self._run_sync("create_summary", user_email, self.summary_container.create_item, body=summary)
+            except (exceptions.CosmosAccessConditionFailedError, exceptions.CosmosResourceExistsError):
+                continue
+        
+        raise RuntimeError(f"Summary for {user_email} kept changing, giving up after {max_attempts} attempts")
+    
+    def delete_all_summaries(self) -> int:
+        """
+        Delete every summary document and summary entry (used before a full change feed replay)
+        """
+        summaries = self._run_sync("list_summaries", None, lambda **options: list(self.summary_container.query_items(
+            query="SELECT c.id, c.UserEmail FROM c",
+            enable_cross_partition_query=True,
+            **options
+        )))
+        for summary in summaries:
+            self._run_sync(
+                "delete_summary", summary["UserEmail"], self.summary_container.delete_item,
+                item=summary["id"], partition_key=summary["UserEmail"]
+            )
+        logger.info(f"🗑️ Deleted {len(summaries)} summary document(s)")
+        return len(summaries)
+    
+    def _query_summary_items(self, operation: str, user_email: str, query: str, parameters: List[Dict[str, Any]]):
+        return self._run_sync(operation, user_email, lambda **options: list(self.summary_container.query_items(
+            query=query,
+            parameters=parameters,
+            partition_key=user_email,
+            **options
+        )))
+    
+    @staticmethod
+    def _summary_entry(item: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in item.items() if key not in ("id", "UserEmail", "type", "ttl") and not key.startswith("_")}
+    
+    def read_summary_entries(self, user_email: str, contract_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Read the stored summary entries of the given contracts (single-partition query)
+        """
+        entries = {}
+        for start in range(0, len(contract_ids), 500):
+            items = self._query_summary_items(
+                "read_summary_entries", user_email,
+                "SELECT * FROM c WHERE c.type = @type AND ARRAY_CONTAINS(@ids, c.contract_id)",
+                [{"name": "@type", "value": SUMMARY_ENTRY_TYPE}, {"name": "@ids", "value": contract_ids[start:start + 500]}]
+            )
+            entries.update((item["contract_id"], self._summary_entry(item)) for item in items)
+        return entries
+    
+    def write_summary_entries(self, user_email: str, entries: List[Dict[str, Any]], max_attempts: int = 5) -> None:
+        """
+        Store summary entries as items next to the summary document
+        
+        Each write is conditional on the entry it replaces and skipped over an entry of the same
+        or a newer ``version``, so a late write can't put back an older entry. Removal tombstones
+        expire after ``TOMBSTONE_RETENTION_SECONDS``.
+        """
+        for entry in entries:
+            item = {"id": summary_entry_id(entry["contract_id"]), "UserEmail": user_email, "type": SUMMARY_ENTRY_TYPE, **entry}
+            if entry.get("removed_ts") is not None:
+                item["ttl"] = TOMBSTONE_RETENTION_SECONDS
+            for _ in range(max_attempts):
+                try:
+                    stored = self._run_sync(
+                        "read_summary_entry", user_email, self.summary_container.read_item,
+                        item=item["id"],
+                        partition_key=user_email
+                    )
+                except exceptions.CosmosResourceNotFoundError:
+                    stored = None
+                if stored is not None and stored.get("version", -1) >= entry["version"]:
+                    break
+                try:
+                    if stored is None:
+                        self._run_sync("create_summary_entry", user_email, self.summary_container.create_item, body=item)
+                    else:
+                        self._run_sync(
+                            "replace_summary_entry", user_email, self.summary_container.replace_item,
+                            item=item["id"],
+                            body=item,
+                            etag=stored["_etag"],
+                            match_condition=MatchConditions.IfNotModified
+                        )
+                    break
+                except (exceptions.CosmosAccessConditionFailedError, exceptions.CosmosResourceExistsError):
+                    continue
+    
+    def query_next_expiring_entries(self, user_email: str, generation: int, after_date: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Live entries of a summary generation ending after ``after_date``, soonest first
+        (removal tombstones have no end date)
+        """
+        items = self._query_summary_items(
+            "query_next_expiring", user_email,
+            "SELECT TOP @limit * FROM c WHERE c.type = @type AND c.generation = @generation "
+            "AND c.end_date > @after ORDER BY c.end_date",
+            [
+                {"name": "@limit", "value": limit},
+                {"name": "@type", "value": SUMMARY_ENTRY_TYPE},
+                {"name": "@generation", "value": generation},
+                {"name": "@after", "value": after_date},
+            ]
+        )
+        return [self._summary_entry(item) for item in items]
+    
+    def list_stale_summary_entries(self, user_email: str, generation: int) -> List[str]:
+        """
+        Contract ids of live entries left from an earlier summary generation
+        """
+        return self._query_summary_items(
+            "list_stale_summary_entries", user_email,
+            "SELECT VALUE c.contract_id FROM c WHERE c.type = @type AND c.generation != @generation "
+            "AND NOT IS_DEFINED(c.removed_ts)",
+            [{"name": "@type", "value": SUMMARY_ENTRY_TYPE}, {"name": "@generation", "value": generation}]
+        )
+    
+    def get_lease_container(self):
+        """
+        Container client for the change feed processor lease
+        """
+        return self.database.get_container_client(self.lease_container_name)
+    
+    async def _run(self, operation: str, user_email: Optional[str], func, *args, **kwargs):
+        """
+        Run a Cosmos DB call through the 429-aware throttle and record its request charge
+        
+        ``func`` is passed a ``raw_response_hook`` keyword argument for the SDK call, which
+        captures the call's own response headers.
+        """
+        response_headers = _ResponseHeaders()
+        result = await cosmos_throttle.run(func, *args, raw_response_hook=response_headers, **kwargs)
+        self._record_charge(operation, user_email, response_headers.headers)
+        return result
+    
+    def _run_sync(self, operation: str, user_email: Optional[str], func, *args, **kwargs):
+        """
+        ``_run`` for calls made from worker threads (change feed processing, sweeps)
+        """
+        response_headers = _ResponseHeaders()
+        result = cosmos_throttle.run_sync(func, *args, raw_response_hook=response_headers, **kwargs)
+        self._record_charge(operation, user_email, response_headers.headers)
+        return result
+    
+    def _record_charge(self, operation: str, user_email: Optional[str], headers: Dict[str, str]) -> float:
+        """
+        Record the request charge (RU) of a Cosmos DB response per operation, route and user
+        """
+        charge = record_request_charge(operation, headers)
+        request_charge_ledger.record(operation, charge, user_email)
+        span = current_span()
+        if span is not None:
+            span.set_attribute("db.cosmos.request_charge", charge)
+        return charge
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Return hit/miss counters for the contract read cache
+        """
+        return self.cache.stats()
+
+
+def create_contract_repository() -> ContractRepository:
+    """
+    Build the contract repository selected by ``settings.storage_backend``
+    """
+    if settings.storage_backend == "local":
+        from app.local_storage import SQLiteContractRepository
+        return SQLiteContractRepository(os.path.join(settings.local_data_dir, "contracts.db"))
+    return CosmosDBManager()
+
 
-# Global instance
-cosmos_db = CosmosDBManager()
+# Global instances (built on first use / during lifespan warm-up)
+contract_repository: ContractRepository = LazyService("contract repository", create_contract_repository)
+summary_processor = LazyService(
+    "summary processor",
+    lambda: create_summary_processor(contract_repository.get(), settings)
+)
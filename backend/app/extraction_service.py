@@ -2,15 +2,69 @@ import os
 import logging
 import json
 import base64
-from typing import Dict, Optional, Any, List
-from openai import OpenAI
-from pdf2image import convert_from_bytes
-from PIL import Image
-import io
+import inspect
+import tempfile
+from typing import Dict, Optional, Any, Callable, Iterable, Iterator, List, Tuple
+import time
+import orjson
+from app.logging_setup import log_payload
+from app.metrics import observe_stage, observe_stage_seconds, record_openai_usage
+from app.page_cache import create_page_cache
+from app.profiling import profiled
+from app.progress import report_progress
+from app.tracing import current_span, traced, tracer
+from app.services import LazyService
+from config.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
 
+def build_vision_request(
+    params: Dict[str, Any],
+    system_prompt: str,
+    text: Callable[[int], str],
+    images: Iterable[bytes],
+    image_format: str,
+    detail: Optional[str] = None
+) -> Tuple[List[bytes], int]:
+    """
+    Serialize a chat completion request with ``images`` attached as base64 ``data:`` URLs
+    
+    Each image is base64-encoded straight into its own chunk of the body and can be released by
+    the caller before the next one is produced. The SDK's per-message dicts, ``data:`` URL strings
+    and JSON re-serialization are never built, and the chunks are sent as they are.
+    
+    Args:
+        params: Top-level request fields (model, temperature, max_tokens)
+        system_prompt: System message
+        text: Builds the user text from the number of images (known only once all are read)
+        images: Encoded images, consumed once
+        image_format: Image subtype for the ``data:`` URLs (png, jpeg, ...)
+        detail: Optional ``image_url.detail``
+        
+    Returns:
+        Tuple of (JSON body chunks, number of images)
+    """
+    image_prefix = b',{"type":"image_url","image_url":{"url":"data:image/' + image_format.encode("ascii") + b';base64,'
+    image_suffix = b'"' + (b',"detail":' + orjson.dumps(detail) if detail else b"") + b"}}"
+    
+    chunks: List[bytes] = [b""]
+    count = 0
+    for image in images:
+        chunks += (image_prefix, base64.b64encode(image), image_suffix)
+        count += 1
+    
+    chunks[0] = b"".join((
+        orjson.dumps(params)[:-1],
+        b',"messages":[',
+        orjson.dumps({"role": "system", "content": system_prompt}),
+        b',{"role":"user","content":[',
+        orjson.dumps({"type": "text", "text": text(count)}),
+    ))
+    chunks.append(b"]}]}")
+    return chunks, count
+
+
 class ContractExtractionService:
     """Service for extracting contract information using AI"""
     
@@ -21,7 +75,15 @@ class ContractExtractionService:
         if not self.openai_api_key:
             raise ValueError("OPENAI_API_KEY is not set in environment variables")
         
+        # Imported here: the OpenAI SDK alone takes about a second to import
+        from openai import OpenAI
         self.client = OpenAI(api_key=self.openai_api_key)
+        # Pre-serialized request bodies are passed as ``content`` by newer SDKs, as a bytes ``body`` before that
+        self._post_takes_content = "content" in inspect.signature(self.client.post).parameters
+        
+        # Rendered pages are reused across re-extractions of the same document
+        self.render_dpi = get_settings().pdf_render_dpi
+        self.page_cache = create_page_cache()
         
         # Poppler path for Windows (optional)
         self.poppler_path = os.getenv("POPPLER_PATH", None)
@@ -82,46 +144,93 @@ Task: read the entire contract, find relevant clauses, and **return JSON only**
             Dictionary with extracted contract information
         """
         try:
-            logger.info(f"📄 Processing PDF file: {file_name}")
-            logger.info(f"📊 PDF size: {len(file_content) / 1024:.2f} KB")
+            logger.info("📄 Processing PDF file: %s (%.2f KB)", file_name, len(file_content) / 1024)
             
-            # Convert PDF to images (one image per page)
-            logger.info("🔄 Converting PDF pages to images...")
+            # Pages are rendered, encoded into the request body and released one at a time
+            return self._extract_with_vision_multipage(self.iter_pdf_pages(file_content), file_name)
             
-            # Use poppler_path if available
-            if self.poppler_path:
-                images = convert_from_bytes(
-                    file_content, 
-                    dpi=200, 
+        except Exception as e:
+            logger.error("❌ Error extracting from PDF: %s", e)
+            raise
+    
+    def iter_pdf_pages(self, file_content: bytes) -> Iterator[bytes]:
+        """
+        Yield the PNG-encoded pages of a PDF in order, one at a time, from the page cache when a
+        rendition is stored there and rendered otherwise
+        
+        Args:
+            file_content: Binary content of the PDF file
+            
+        Yields:
+            PNG bytes of each page
+        """
+        document_hash = None
+        next_page = 1
+        if self.page_cache is not None:
+            document_hash = self.page_cache.document_hash(file_content)
+            rendition = self.page_cache.open(document_hash, self.render_dpi, "png")
+            if rendition is not None:
+                page_count, cached_pages = rendition
+                span = current_span()
+                if span is not None:
+                    span.set_attribute("pdf.page_cache_hit", True)
+                try:
+                    for page in cached_pages:
+                        report_progress("pages_rendered", page=next_page, pages=page_count, cached=True)
+                        yield page
+                        next_page += 1
+                    return
+                except RuntimeError:
+                    # Render the pages the cache could not serve; the partial rendition isn't re-stored
+                    logger.warning("⚠️ Rendering from page %d after a page cache read failure", next_page)
+                    document_hash = None
+        
+        yield from self._render_pdf_pages(file_content, document_hash, next_page)
+    
+    def _render_pdf_pages(self, file_content: bytes, document_hash: Optional[str], first_page: int) -> Iterator[bytes]:
+        """
+        Rasterize a PDF from ``first_page`` on, storing the rendition in the page cache when
+        ``document_hash`` is given. Poppler writes each page as a PNG file, which is read back
+        and deleted in turn, so no page exists as a decoded image in this process.
+        """
+        from pdf2image import convert_from_bytes
+        
+        writer = self.page_cache.writer(document_hash, self.render_dpi, "png") if document_hash else None
+        with tempfile.TemporaryDirectory(prefix="saaseer-pages-") as output_folder:
+            logger.info("🔄 Converting PDF pages to images...")
+            started = time.perf_counter()
+            with tracer.start_span("pdf.convert", {"pdf.dpi": self.render_dpi}) as span:
+                paths = convert_from_bytes(
+                    file_content,
+                    dpi=self.render_dpi,
                     fmt='png',
+                    first_page=first_page,
+                    output_folder=output_folder,
+                    paths_only=True,
                     poppler_path=self.poppler_path
                 )
-            else:
-                images = convert_from_bytes(file_content, dpi=200, fmt='png')
-                
-            logger.info(f"✅ Converted PDF to {len(images)} page(s)")
+                span.set_attribute("pdf.pages", len(paths))
             
-            # Convert images to base64
-            base64_images = []
-            for idx, image in enumerate(images):
-                # Convert PIL Image to bytes
-                img_byte_arr = io.BytesIO()
-                image.save(img_byte_arr, format='PNG')
-                img_byte_arr = img_byte_arr.getvalue()
-                
-                # Encode to base64
-                base64_image = base64.b64encode(img_byte_arr).decode('utf-8')
-                base64_images.append(base64_image)
-                logger.info(f"  📄 Page {idx + 1}: {len(img_byte_arr) / 1024:.2f} KB")
+            logger.info("✅ Converted PDF to %d page(s)", len(paths))
+            # Poppler renders the document in one call; attribute its time evenly across pages
+            convert_seconds_per_page = (time.perf_counter() - started) / max(len(paths), 1)
+            page_count = first_page - 1 + len(paths)
             
-            # Use OpenAI Vision to extract information from all pages
-            result = self._extract_with_vision_multipage(base64_images, file_name)
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"❌ Error extracting from PDF: {str(e)}")
-            raise
+            for page_number, path in enumerate(paths, start=first_page):
+                started = time.perf_counter()
+                with tracer.start_span("pdf.encode_page", {"pdf.page": page_number}) as span:
+                    with open(path, "rb") as page_file:
+                        page = page_file.read()
+                    os.remove(path)
+                    span.set_attribute("pdf.page_bytes", len(page))
+                observe_stage_seconds("rasterize_page", convert_seconds_per_page + time.perf_counter() - started)
+                report_progress("pages_rendered", page=page_number, pages=page_count)
+                if writer is not None:
+                    writer.add(page)
+                yield page
+        
+        if writer is not None:
+            writer.commit()
     
     def extract_from_image(self, file_content: bytes, file_name: str) -> Dict[str, Any]:
         """
@@ -135,10 +244,7 @@ Task: read the entire contract, find relevant clauses, and **return JSON only**
             Dictionary with extracted contract information
         """
         try:
-            logger.info(f"🖼️ Processing image file: {file_name}")
-            
-            # Encode image to base64
-            base64_image = base64.b64encode(file_content).decode('utf-8')
+            logger.info("🖼️ Processing image file: %s", file_name)
             
             # Determine image format
             image_format = "jpeg"
@@ -150,7 +256,7 @@ Task: read the entire contract, find relevant clauses, and **return JSON only**
                 image_format = "webp"
             
             # Use OpenAI Vision to extract information
-            result = self._extract_with_vision(base64_image, image_format, file_name)
+            result = self._extract_with_vision(file_content, image_format, file_name)
             
             return result
             
@@ -158,37 +264,30 @@ Task: read the entire contract, find relevant clauses, and **return JSON only**
             logger.error(f"❌ Error extracting from image: {str(e)}")
             raise
     
-    def _extract_with_vision(self, base64_image: str, image_format: str, file_name: str) -> Dict[str, Any]:
+    def _extract_with_vision(self, image: bytes, image_format: str, file_name: str) -> Dict[str, Any]:
         """Extract contract information using OpenAI Vision API for images"""
+        prompt = self.get_extraction_prompt()
+        body, _ = build_vision_request(
+            {"model": self.openai_model, "temperature": 0.1, "max_tokens": 2000},
+            "You are a contract data extraction expert. Extract information accurately from images and return valid JSON only.",
+            lambda pages: f"{prompt}\n\n# This is the contract file: {file_name}",
+            [image],
+            image_format
+        )
         try:
-            prompt = self.get_extraction_prompt()
-            
             # Call OpenAI Vision API
-            response = self.client.chat.completions.create(
-                model=self.openai_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a contract data extraction expert. Extract information accurately from images and return valid JSON only."
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": f"{prompt}\n\n# This is the contract file: {file_name}"
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/{image_format};base64,{base64_image}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                temperature=0.1,
-                max_tokens=2000
+            span_attributes = {"llm.model": self.openai_model, "llm.request_bytes": sum(map(len, body))}
+            report_progress("model_request_sent", pages=1)
+            with observe_stage("openai_call"), tracer.start_span("openai.chat.completions", span_attributes) as span:
+                response = self._create_chat_completion(body)
+                usage = getattr(response, "usage", None)
+                span.set_attribute("llm.prompt_tokens", getattr(usage, "prompt_tokens", None))
+                span.set_attribute("llm.completion_tokens", getattr(usage, "completion_tokens", None))
+            record_openai_usage(self.openai_model, usage)
+            report_progress(
+                "model_response_received",
+                prompt_tokens=getattr(usage, "prompt_tokens", None),
+                completion_tokens=getattr(usage, "completion_tokens", None)
             )
             
             # Extract response
@@ -201,10 +300,11 @@ Task: read the entire contract, find relevant clauses, and **return JSON only**
                 response_text = "\n".join([line for line in lines[1:-1] if line.strip()])
             
             # Parse JSON
-            extracted_data = json.loads(response_text)
+            with observe_stage("json_parse"):
+                extracted_data = json.loads(response_text)
             
-            logger.info(f"✅ Successfully extracted contract information from image: {file_name}")
-            logger.info(f"📊 Extracted data: {json.dumps(extracted_data, ensure_ascii=False, indent=2)}")
+            logger.info("✅ Successfully extracted contract information from image: %s", file_name)
+            log_payload(logger, logging.INFO, "📊 Extracted data: %s", extracted_data)
             
             return {
                 "success": True,
@@ -213,8 +313,8 @@ Task: read the entire contract, find relevant clauses, and **return JSON only**
             }
             
         except json.JSONDecodeError as e:
-            logger.error(f"❌ Failed to parse JSON response: {str(e)}")
-            logger.error(f"Response text: {response_text}")
+            logger.error("❌ Failed to parse JSON response: %s", e)
+            log_payload(logger, logging.ERROR, "Response text: %s", response_text)
             return {
                 "success": False,
                 "data": None,
@@ -228,46 +328,35 @@ Task: read the entire contract, find relevant clauses, and **return JSON only**
                 "message": f"Vision extraction failed: {str(e)}"
             }
     
-    def _extract_with_vision_multipage(self, base64_images: List[str], file_name: str) -> Dict[str, Any]:
+    def _extract_with_vision_multipage(self, pages: Iterable[bytes], file_name: str) -> Dict[str, Any]:
         """Extract contract information using OpenAI Vision API for multi-page documents"""
+        prompt = self.get_extraction_prompt()
+        
+        # Build the request with all pages, encoding each one as it arrives (rendering errors propagate)
+        body, page_count = build_vision_request(
+            {"model": self.openai_model, "temperature": 0.1, "max_tokens": 2000},
+            "You are a contract data extraction expert. Analyze all pages of the contract and extract information accurately. Return valid JSON only.",
+            lambda pages: f"{prompt}\n\n# This is the contract file: {file_name}\n# Total pages: {pages}",
+            pages,
+            "png",
+            detail="high"  # Use high detail for better accuracy
+        )
         try:
-            prompt = self.get_extraction_prompt()
-            
-            # Build content with all pages
-            content = [
-                {
-                    "type": "text",
-                    "text": f"{prompt}\n\n# This is the contract file: {file_name}\n# Total pages: {len(base64_images)}"
-                }
-            ]
-            
-            # Add all pages as images
-            for idx, base64_image in enumerate(base64_images):
-                content.append({
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/png;base64,{base64_image}",
-                        "detail": "high"  # Use high detail for better accuracy
-                    }
-                })
-                logger.info(f"  📎 Added page {idx + 1} to AI request")
-            
             # Call OpenAI Vision API with all pages
-            logger.info("🤖 Sending all pages to OpenAI Vision API...")
-            response = self.client.chat.completions.create(
-                model=self.openai_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a contract data extraction expert. Analyze all pages of the contract and extract information accurately. Return valid JSON only."
-                    },
-                    {
-                        "role": "user",
-                        "content": content
-                    }
-                ],
-                temperature=0.1,
-                max_tokens=2000
+            body_bytes = sum(map(len, body))
+            logger.info("🤖 Sending %d page(s) (%.2f MB) to OpenAI Vision API...", page_count, body_bytes / (1024 * 1024))
+            span_attributes = {"llm.model": self.openai_model, "llm.images": page_count, "llm.request_bytes": body_bytes}
+            report_progress("model_request_sent", pages=page_count)
+            with observe_stage("openai_call"), tracer.start_span("openai.chat.completions", span_attributes) as span:
+                response = self._create_chat_completion(body)
+                usage = getattr(response, "usage", None)
+                span.set_attribute("llm.prompt_tokens", getattr(usage, "prompt_tokens", None))
+                span.set_attribute("llm.completion_tokens", getattr(usage, "completion_tokens", None))
+            record_openai_usage(self.openai_model, usage)
+            report_progress(
+                "model_response_received",
+                prompt_tokens=getattr(usage, "prompt_tokens", None),
+                completion_tokens=getattr(usage, "completion_tokens", None)
             )
             
             # Extract response
@@ -281,20 +370,21 @@ Task: read the entire contract, find relevant clauses, and **return JSON only**
                 response_text = "\n".join([line for line in lines[1:-1] if line.strip()])
             
             # Parse JSON
-            extracted_data = json.loads(response_text)
+            with observe_stage("json_parse"):
+                extracted_data = json.loads(response_text)
             
-            logger.info(f"✅ Successfully extracted contract information from {len(base64_images)} page(s): {file_name}")
-            logger.info(f"📊 Extracted data: {json.dumps(extracted_data, ensure_ascii=False, indent=2)}")
+            logger.info("✅ Successfully extracted contract information from %d page(s): %s", page_count, file_name)
+            log_payload(logger, logging.INFO, "📊 Extracted data: %s", extracted_data)
             
             return {
                 "success": True,
                 "data": extracted_data,
-                "message": f"Contract information extracted successfully from {len(base64_images)} page(s)"
+                "message": f"Contract information extracted successfully from {page_count} page(s)"
             }
             
         except json.JSONDecodeError as e:
-            logger.error(f"❌ Failed to parse JSON response: {str(e)}")
-            logger.error(f"Response text: {response_text}")
+            logger.error("❌ Failed to parse JSON response: %s", e)
+            log_payload(logger, logging.ERROR, "Response text: %s", response_text)
             return {
                 "success": False,
                 "data": None,
@@ -308,6 +398,17 @@ Task: read the entire contract, find relevant clauses, and **return JSON only**
                 "message": f"Multi-page vision extraction failed: {str(e)}"
             }
     
+    def _create_chat_completion(self, chunks: List[bytes]):
+        """POST a pre-serialized request (see ``build_vision_request``) to /chat/completions"""
+        from openai.types.chat import ChatCompletion
+        if self._post_takes_content:
+            # Streamed from the chunks (a list, so retries can send it again) without joining them
+            headers = {"Content-Length": str(sum(map(len, chunks)))}
+            return self.client.post("/chat/completions", content=chunks, options={"headers": headers}, cast_to=ChatCompletion)
+        return self.client.post("/chat/completions", body=b"".join(chunks), cast_to=ChatCompletion)
+    
+    @profiled
+    @traced()
     def extract_from_file(self, file_content: bytes, file_name: str) -> Dict[str, Any]:
         """
         Extract contract information from any supported file type
@@ -333,6 +434,6 @@ Task: read the entire contract, find relevant clauses, and **return JSON only**
             }
 
 
-# Global instance
-extraction_service = ContractExtractionService()
+# Global instance (built on first use / during lifespan warm-up)
+extraction_service: ContractExtractionService = LazyService("extraction service", ContractExtractionService)
 
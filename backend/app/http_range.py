@@ -0,0 +1,53 @@
+"""
+HTTP ``Range`` request helpers for streaming file downloads
+"""
+
+from typing import Optional, Tuple
+
+
+class RangeNotSatisfiable(ValueError):
+    """The requested byte range lies outside the resource (HTTP 416)"""
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``Range: bytes=...`` header against a resource of ``size`` bytes
+
+    Malformed headers, other units and multi-range requests return None so the caller serves
+    the whole resource, as RFC 9110 allows.
+
+    Returns:
+        Inclusive (start, end) byte positions, or None to serve the full content
+
+    Raises:
+        RangeNotSatisfiable: If the range does not overlap the resource
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first or last).isdigit() or (first and last and not last.isdigit()):
+        return None
+
+    if first == "":
+        # Suffix range: the last N bytes
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable(range_header)
+        return max(0, size - suffix), size - 1
+
+    start = int(first)
+    if start >= size:
+        raise RangeNotSatisfiable(range_header)
+    end = int(last) if last else size - 1
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def content_range(start: int, end: int, size: int) -> str:
+    """``Content-Range`` header value for a satisfied range"""
+    return f"bytes {start}-{end}/{size}"
@@ -0,0 +1,386 @@
+"""
+Idempotency keys for requests that create contracts (``Idempotency-Key`` header)
+
+The first request with a key records it as in progress; its outcome is stored for
+``idempotency_ttl_seconds``. A retry with the same key and the same request gets the stored
+response (marked ``Idempotency-Replayed: true``) or, while the first one is still running, waits
+for it - attached to the running job in the same worker, by polling the shared store otherwise -
+instead of uploading, extracting and saving a second contract.
+
+* Reusing a key for a different request is rejected with 422.
+* A retry still waiting after ``idempotency_wait_seconds`` gets 409 with ``Retry-After``.
+* Server errors, transient rejections (408 / 409 / 429) and ``"success": False`` results are not
+  stored, so a retry runs again; so does a retry that was waiting on such a run.
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import orjson
+from fastapi import Header, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+# Handlers receive Starlette's UploadFile; fastapi.UploadFile is a subclass of it
+from starlette.datastructures import UploadFile
+
+logger = logging.getLogger(__name__)
+
+NEW = "new"
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+MAX_KEY_LENGTH = 255
+# Uploaded files are hashed in chunks of this size
+FINGERPRINT_CHUNK_SIZE = 1024 * 1024
+# Outcomes a retry should not get back: the retry may well succeed
+TRANSIENT_STATUS_CODES = frozenset({408, 409, 429})
+
+
+@dataclass
+class IdempotencyRecord:
+    key: str
+    fingerprint: str
+    state: str
+    status_code: Optional[int] = None
+    body: Optional[bytes] = None
+
+
+class MemoryIdempotencyStore:
+    """Idempotency records for a single worker process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records: Dict[str, Tuple[IdempotencyRecord, float]] = {}
+
+    def begin(self, key: str, fingerprint: str, lease_seconds: float) -> Tuple[str, IdempotencyRecord]:
+        """Claim ``key`` (``NEW``) or return the existing record's state"""
+        now = time.time()
+        with self._lock:
+            entry = self._records.get(key)
+            if entry is not None and entry[1] > now:
+                return entry[0].state, entry[0]
+            if len(self._records) > 10000:
+                self._records = {k: v for k, v in self._records.items() if v[1] > now}
+            record = IdempotencyRecord(key, fingerprint, IN_PROGRESS)
+            self._records[key] = (record, now + lease_seconds)
+            return NEW, record
+
+    def complete(self, key: str, status_code: int, body: bytes, ttl_seconds: float) -> None:
+        with self._lock:
+            entry = self._records.get(key)
+            if entry is not None:
+                record = IdempotencyRecord(key, entry[0].fingerprint, COMPLETED, status_code, body)
+                self._records[key] = (record, time.time() + ttl_seconds)
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._records.pop(key, None)
+
+
+IDEMPOTENCY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    state TEXT NOT NULL,
+    status_code INTEGER,
+    body BLOB,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_idempotency_expires ON idempotency_keys (expires_at);
+"""
+
+
+class SQLiteIdempotencyStore:
+    """Idempotency records in a SQLite file, shared by every worker on the host"""
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._pid = None
+        self._conn = None
+        self._connection()
+        logger.info(f"✅ Using shared idempotency store: {db_path}")
+
+    def _connection(self) -> sqlite3.Connection:
+        # A connection must not be used across fork (preloaded app): each worker opens its own
+        if self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=5.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(IDEMPOTENCY_SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def _transaction(self, func):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(conn)
+                conn.execute("COMMIT")
+                return result
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def begin(self, key: str, fingerprint: str, lease_seconds: float) -> Tuple[str, IdempotencyRecord]:
+        def begin(conn):
+            now = time.time()
+            conn.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+            row = conn.execute(
+                "SELECT fingerprint, state, status_code, body FROM idempotency_keys WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                return row[1], IdempotencyRecord(key, row[0], row[1], row[2], row[3])
+            conn.execute(
+                "INSERT INTO idempotency_keys (key, fingerprint, state, expires_at) VALUES (?, ?, ?, ?)",
+                (key, fingerprint, IN_PROGRESS, now + lease_seconds)
+            )
+            return NEW, IdempotencyRecord(key, fingerprint, IN_PROGRESS)
+        return self._transaction(begin)
+
+    def complete(self, key: str, status_code: int, body: bytes, ttl_seconds: float) -> None:
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE idempotency_keys SET state = ?, status_code = ?, body = ?, expires_at = ? WHERE key = ?",
+            (COMPLETED, status_code, body, time.time() + ttl_seconds, key)
+        ))
+
+    def release(self, key: str) -> None:
+        self._transaction(lambda conn: conn.execute("DELETE FROM idempotency_keys WHERE key = ?", (key,)))
+
+
+class IdempotencyConflict(HTTPException):
+    """The original request is still running; answered with 409 and Retry-After"""
+
+    def __init__(self, retry_after_seconds: int):
+        super().__init__(
+            status_code=409,
+            detail="A request with this Idempotency-Key is still being processed, please retry later",
+            headers={"Retry-After": str(retry_after_seconds)}
+        )
+
+
+def replay_response(record: IdempotencyRecord) -> Response:
+    """The stored outcome of the original request"""
+    return Response(
+        content=record.body,
+        status_code=record.status_code,
+        media_type="application/json",
+        headers={"Idempotency-Replayed": "true"}
+    )
+
+
+class IdempotencyManager:
+    """Runs a request once per idempotency key and answers retries from the stored outcome"""
+
+    def __init__(
+        self,
+        store,
+        ttl_seconds: float = 86400.0,
+        lease_seconds: float = 900.0,
+        wait_seconds: float = 120.0,
+        poll_interval_seconds: float = 0.5,
+        enabled: bool = True
+    ):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.enabled = enabled
+        # Requests running in this worker, so retries can wait on them directly
+        self._running: Dict[str, asyncio.Future] = {}
+        self._counters = {"executed": 0, "replayed": 0, "attached": 0, "conflicts": 0, "mismatches": 0}
+
+    async def _call(self, func, *args):
+        # Shared-store calls touch a file lock; keep them off the event loop
+        if isinstance(self.store, MemoryIdempotencyStore):
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    async def run(self, key: str, fingerprint: str, call: Callable, status_code: int = 200) -> Any:
+        """Run ``call()`` for the first request with ``key``; replay or wait for it on retries"""
+        deadline = time.monotonic() + self.wait_seconds
+        attached = False
+        while True:
+            state, record = await self._call(self.store.begin, key, fingerprint, self.lease_seconds)
+            if state == NEW:
+                return await self._execute(key, call, status_code)
+            if record.fingerprint != fingerprint:
+                self._counters["mismatches"] += 1
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+            if state == COMPLETED:
+                self._counters["attached" if attached else "replayed"] += 1
+                return replay_response(record)
+
+            # Still running: wait on it here, or poll until another worker stores the outcome
+            attached = True
+            remaining = deadline - time.monotonic()
+            future = self._running.get(key)
+            if future is not None and remaining > 0:
+                try:
+                    outcome = await asyncio.wait_for(asyncio.shield(future), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                else:
+                    if outcome is None:
+                        # The run failed and released the key: claim it and run again
+                        continue
+                    self._counters["attached"] += 1
+                    if isinstance(outcome, BaseException):
+                        raise outcome
+                    return replay_response(outcome)
+            elif remaining > 0:
+                await asyncio.sleep(min(self.poll_interval_seconds, remaining))
+                continue
+            self._counters["conflicts"] += 1
+            raise IdempotencyConflict(max(1, int(self.poll_interval_seconds * 2)))
+
+    async def _execute(self, key: str, call: Callable, status_code: int) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._running[key] = future
+        self._counters["executed"] += 1
+        try:
+            result = await call()
+        except HTTPException as e:
+            if e.status_code >= 500 or e.status_code in TRANSIENT_STATUS_CODES:
+                await self._call(self.store.release, key)
+                future.set_result(None)
+            else:
+                body = orjson.dumps({"detail": e.detail})
+                await self._call(self.store.complete, key, e.status_code, body, self.ttl_seconds)
+                future.set_result(e)
+            raise
+        except BaseException:
+            await self._call(self.store.release, key)
+            future.set_result(None)
+            raise
+        else:
+            record = self._record(key, result, status_code)
+            if isinstance(result, dict) and result.get("success") is False:
+                # e.g. "File uploaded but extraction failed": a retry should try again
+                await self._call(self.store.release, key)
+                future.set_result(None)
+            else:
+                await self._call(self.store.complete, key, record.status_code, record.body, self.ttl_seconds)
+                future.set_result(record)
+            return result
+        finally:
+            self._running.pop(key, None)
+
+    @staticmethod
+    def _record(key: str, result: Any, status_code: int) -> IdempotencyRecord:
+        if isinstance(result, Response):
+            return IdempotencyRecord(key, "", COMPLETED, result.status_code, bytes(result.body))
+        return IdempotencyRecord(key, "", COMPLETED, status_code, orjson.dumps(jsonable_encoder(result)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "backend": "sqlite" if isinstance(self.store, SQLiteIdempotencyStore) else "memory",
+            "ttl_seconds": self.ttl_seconds,
+            "running": len(self._running),
+            **self._counters,
+        }
+
+
+def body_user_email(body: bytes) -> Optional[str]:
+    """``UserEmail`` of a JSON request body, also inside the ``contract_data`` wrapper the frontend sends"""
+    try:
+        data = orjson.loads(body)
+        wrapped = data.get("contract_data") if isinstance(data, dict) else None
+        if isinstance(wrapped, str):
+            data = orjson.loads(wrapped)
+        elif isinstance(wrapped, dict):
+            data = wrapped
+    except orjson.JSONDecodeError:
+        return None
+    user_email = data.get("UserEmail") if isinstance(data, dict) else None
+    return user_email if isinstance(user_email, str) else None
+
+
+async def request_fingerprint(kwargs: Dict[str, Any]) -> Tuple[Optional[str], str]:
+    """The calling user (if known) and a hash of what the request asks for"""
+    digest = hashlib.sha256()
+    user_email = kwargs.get("user_email")
+    for name in sorted(kwargs):
+        value = kwargs[name]
+        if isinstance(value, Request):
+            body = await value.body()
+            # Handlers that parse the raw body themselves (create) name the user inside it
+            user_email = user_email or body_user_email(body)
+            digest.update(body)
+        elif isinstance(value, UploadFile):
+            # The content too: a different file with the same name and size is a different request
+            digest.update(f"{name}={value.filename}:{value.size}:{value.content_type}:".encode("utf-8"))
+            while chunk := await value.read(FINGERPRINT_CHUNK_SIZE):
+                digest.update(chunk)
+            await value.seek(0)
+        elif hasattr(value, "model_dump_json"):
+            user_email = user_email or getattr(value, "user_email", None)
+            digest.update(value.model_dump_json().encode("utf-8"))
+        else:
+            digest.update(f"{name}={value!r}".encode("utf-8"))
+    return user_email, digest.hexdigest()
+
+
+def create_idempotency_manager(settings) -> IdempotencyManager:
+    """Build the idempotency manager from ``idempotency_*`` settings"""
+    if settings.idempotency_backend == "sqlite":
+        path = settings.idempotency_state_path or os.path.join(settings.local_data_dir, "idempotency.db")
+        store = SQLiteIdempotencyStore(path)
+    else:
+        store = MemoryIdempotencyStore()
+    return IdempotencyManager(
+        store,
+        ttl_seconds=settings.idempotency_ttl_seconds,
+        lease_seconds=settings.idempotency_lease_seconds,
+        wait_seconds=settings.idempotency_wait_seconds,
+        enabled=settings.idempotency_enabled
+    )
+
+
+def _build_idempotency_manager() -> IdempotencyManager:
+    from config.settings import get_settings
+    return create_idempotency_manager(get_settings())
+
+
+# Global idempotency manager (reported by GET /api/v1/contracts/stats/idempotency)
+idempotency_manager = _build_idempotency_manager()
+
+
+def idempotent(operation: str, status_code: int = 200):
+    """
+    Decorator honouring an ``Idempotency-Key`` header on a route handler; ``status_code`` is the
+    route's success status, stored with the handler's return value
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, idempotency_key: Optional[str] = None, **kwargs):
+            if not idempotency_key or not idempotency_manager.enabled:
+                return await func(*args, **kwargs)
+            if len(idempotency_key) > MAX_KEY_LENGTH:
+                raise HTTPException(status_code=400, detail=f"Idempotency-Key longer than {MAX_KEY_LENGTH} characters")
+            user_email, fingerprint = await request_fingerprint(kwargs)
+            key = f"{operation}:{(user_email or '-').lower()}:{idempotency_key}"
+            return await idempotency_manager.run(key, fingerprint, lambda: func(*args, **kwargs), status_code)
+
+        # Expose the header to FastAPI (and the OpenAPI docs) next to the handler's own parameters
+        signature = inspect.signature(func)
+        header = inspect.Parameter(
+            "idempotency_key",
+            inspect.Parameter.KEYWORD_ONLY,
+            default=Header(None, alias="Idempotency-Key", description="Retries with the same key run once"),
+            annotation=Optional[str]
+        )
+        wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), header])
+        return wrapper
+    return decorator
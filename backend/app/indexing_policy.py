@@ -0,0 +1,101 @@
+"""
+Declared indexing policy for the contracts container, and drift detection against the live policy
+"""
+
+from typing import Any, Dict, List
+
+# Fields that can be used as sort keys in contract search
+SORTABLE_FIELDS = (
+    "contract_end_date",
+    "contract_start_date",
+    "updated_at",
+    "created_at",
+    "supplier_name",
+    "customer_name",
+    "service_name",
+)
+
+# Fields that can be used as equality filters in contract search
+EQUALITY_FILTER_FIELDS = ("supplier_name", "customer_name", "service_name")
+
+# Sort keys that have composite indexes paired with each equality filter field
+COMPOSITE_SORT_FIELDS = ("contract_end_date", "updated_at")
+
+
+# Large free-text fields that are never filtered by range or sorted on. Excluding them keeps
+# write RU and latency down; substring search on contract_details scans within the (already
+# partition-scoped and filtered) result instead. LinkImage stays indexed: blob reference
+# counting filters on it by equality.
+UNINDEXED_PATHS = ("contract_details", "termination_notice_period")
+
+
+def _composite(first: str, second: str, order: str = "ascending"):
+    return [
+        {"path": f"/{first}", "order": order},
+        {"path": f"/{second}", "order": order},
+    ]
+
+
+CONTRACTS_INDEXING_POLICY = {
+    "indexingMode": "consistent",
+    "automatic": True,
+    "includedPaths": [{"path": "/*"}],
+    "excludedPaths": [{"path": '/"_etag"/?'}] + [{"path": f"/{path}/?"} for path in UNINDEXED_PATHS],
+    "compositeIndexes": [
+        # Per-user listing ordered by end date or last update (also serves both-descending order)
+        _composite("UserEmail", "contract_end_date"),
+        _composite("UserEmail", "updated_at"),
+    ] + [
+        # Equality filter on a supplier/customer/service field, sorted by end date or last update
+        _composite(field, sort_field)
+        for field in EQUALITY_FILTER_FIELDS
+        for sort_field in COMPOSITE_SORT_FIELDS
+    ],
+}
+
+
+def has_composite_index(first: str, second: str) -> bool:
+    """Check whether the declared policy has a composite index on (first, second)"""
+    paths = [f"/{first}", f"/{second}"]
+    return any(
+        [entry["path"] for entry in composite] == paths
+        for composite in CONTRACTS_INDEXING_POLICY["compositeIndexes"]
+    )
+
+
+def is_unindexed(field: str) -> bool:
+    """Check whether a top-level field is excluded from the declared indexing policy"""
+    return field in UNINDEXED_PATHS
+
+
+def _normalize(policy: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "indexingMode": (policy.get("indexingMode") or "consistent").lower(),
+        "automatic": policy.get("automatic", True),
+        "includedPaths": {entry["path"] for entry in policy.get("includedPaths", [])},
+        "excludedPaths": {entry["path"] for entry in policy.get("excludedPaths", [])},
+        "compositeIndexes": {
+            tuple((entry["path"], (entry.get("order") or "ascending").lower()) for entry in composite)
+            for composite in policy.get("compositeIndexes", [])
+        },
+    }
+
+
+def diff_indexing_policy(declared: Dict[str, Any], live: Dict[str, Any]) -> List[str]:
+    """
+    Describe the differences between the declared and live indexing policies
+
+    Returns:
+        Human-readable drift descriptions; an empty list means the policies match
+    """
+    want, have = _normalize(declared), _normalize(live)
+    drift = []
+    for key in ("indexingMode", "automatic"):
+        if want[key] != have[key]:
+            drift.append(f"{key}: declared {want[key]!r}, live {have[key]!r}")
+    for key in ("includedPaths", "excludedPaths", "compositeIndexes"):
+        for missing in sorted(want[key] - have[key], key=str):
+            drift.append(f"{key}: missing {missing}")
+        for extra in sorted(have[key] - want[key], key=str):
+            drift.append(f"{key}: unexpected {extra}")
+    return drift
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from app.async_storage_service import async_storage_service
+from app.routes import MAX_UPLOAD_SIZE_MB, require_blob_storage
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Stand-in for direct-to-Blob uploads when running with STORAGE_BACKEND=local
+router = APIRouter(prefix="/api/v1/local-blobs", tags=["local-blobs"])
+
+
+@router.put("/{blob_name:path}", status_code=201, dependencies=[Depends(require_blob_storage)])
+async def put_local_blob(
+    request: Request,
+    blob_name: str = Path(..., description="Blob name from the upload URL"),
+    expires: int = Query(..., description="Expiry timestamp of the upload URL"),
+    sig: str = Query(..., description="Upload URL signature")
+):
+    """
+    Accept a file uploaded with a signed URL from `POST /api/v1/contracts/upload/sas`
+    """
+    if not async_storage_service.verify_upload_signature(blob_name, expires, sig):
+        raise HTTPException(status_code=403, detail="Upload URL is invalid or has expired")
+    
+    max_bytes = MAX_UPLOAD_SIZE_MB * 1024 * 1024
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"File size exceeds {MAX_UPLOAD_SIZE_MB}MB limit")
+        chunks.append(chunk)
+    
+    await async_storage_service.write_blob(blob_name, b"".join(chunks))
+    logger.info(f"✅ Local direct upload stored: {blob_name} ({size} bytes)")
+    return {"success": True, "blob_name": blob_name, "size": size}
@@ -0,0 +1,611 @@
+"""
+Local in-process storage backends: SQLite-backed contract documents and a filesystem blob store.
+
+Selected with ``STORAGE_BACKEND=local``. They need no network access, which makes them
+suitable for offline load testing, profiling the API's own overhead and fast tests.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import mimetypes
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import quote, urlencode
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.cache import ContractCache
+from app.models import ContractData, ContractUpdateData
+from app.repository import AsyncBlobStorage, BlobStorage, ContractRepository
+from app.search import build_sqlite_search_query
+from app.summaries import TOMBSTONE_RETENTION_SECONDS, new_summary
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contracts (
+    user_email TEXT NOT NULL,
+    id TEXT NOT NULL,
+    body TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (user_email, id)
+);
+CREATE INDEX IF NOT EXISTS ix_contracts_seq ON contracts (seq);
+CREATE TABLE IF NOT EXISTS summaries (
+    user_email TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS summary_entries (
+    user_email TEXT NOT NULL,
+    contract_id TEXT NOT NULL,
+    body TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    generation INTEGER NOT NULL,
+    live INTEGER NOT NULL,
+    end_date TEXT,
+    expires_at REAL,
+    PRIMARY KEY (user_email, contract_id)
+);
+CREATE INDEX IF NOT EXISTS ix_summary_entries_expiring ON summary_entries (user_email, generation, end_date);
+"""
+
+
+class SQLiteContractRepository(ContractRepository):
+    """
+    Contract repository backed by a local SQLite database.
+
+    Documents are stored as JSON with Cosmos-style ``_etag`` and ``_ts`` system fields,
+    and a monotonically increasing ``seq`` column stands in for the change feed.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        # Re-entrant: summary updates read and write entries while holding it
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        # No read cache needed for a local database; keep the counters shape consistent
+        self.cache = ContractCache(max_entries=0)
+        logger.info(f"✅ Using local SQLite contract store: {db_path}")
+
+    def create_database_and_container_if_not_exists(self) -> bool:
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+        return True
+
+    def _write(self, user_email: str, document: Dict[str, Any], insert: bool) -> Dict[str, Any]:
+        """Stamp system fields and insert/replace a document in a single transaction"""
+        document["_etag"] = f'"{uuid.uuid4()}"'
+        document["_ts"] = int(time.time())
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM contracts").fetchone()[0]
+                verb = "INSERT" if insert else "REPLACE"
+                self._conn.execute(
+                    f"{verb} INTO contracts (user_email, id, body, seq) VALUES (?, ?, ?, ?)",
+                    (user_email, document["id"], json.dumps(document, ensure_ascii=False), seq)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return document
+
+    def _read(self, contract_id: str, user_email: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM contracts WHERE user_email = ? AND id = ?", (user_email, contract_id)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def create_contract(self, contract_data: ContractData) -> Dict[str, Any]:
+        try:
+            contract_dict = contract_data.dict()
+            if contract_dict.get('created_at'):
+                contract_dict['created_at'] = contract_dict['created_at'].isoformat()
+            if contract_dict.get('updated_at'):
+                contract_dict['updated_at'] = contract_dict['updated_at'].isoformat()
+
+            created_item = self._write(contract_dict.get("UserEmail"), contract_dict, insert=True)
+            return {
+                "success": True,
+                "message": "Contract created successfully",
+                "data": created_item
+            }
+        except sqlite3.IntegrityError:
+            return {
+                "success": False,
+                "message": f"Contract with ID {contract_data.id} already exists"
+            }
+        except Exception as e:
+            logger.error(f"❌ Error creating contract: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Error creating contract: {str(e)}"
+            }
+
+    async def get_contract(self, contract_id: str, user_email: str, use_cache: bool = True) -> Dict[str, Any]:
+        try:
+            item = self._read(contract_id, user_email)
+            if item is None:
+                return {
+                    "success": False,
+                    "message": f"Contract with ID {contract_id} not found"
+                }
+            return {
+                "success": True,
+                "message": "Contract retrieved successfully",
+                "data": item
+            }
+        except Exception as e:
+            logger.error(f"Error retrieving contract: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Error retrieving contract: {str(e)}"
+            }
+
+    async def update_contract(self, contract_id: str, user_email: str, update_data: ContractUpdateData) -> Dict[str, Any]:
+        try:
+            existing_contract = self._read(contract_id, user_email)
+            if existing_contract is None:
+                return {
+                    "success": False,
+                    "message": f"Contract with ID {contract_id} not found"
+                }
+            updated_item = self._write(user_email, self.merge_update(existing_contract, update_data), insert=False)
+            return {
+                "success": True,
+                "message": "Contract updated successfully",
+                "data": updated_item
+            }
+        except Exception as e:
+            logger.error(f"Error updating contract: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Error updating contract: {str(e)}"
+            }
+
+    async def delete_contract(self, contract_id: str, user_email: str) -> Dict[str, Any]:
+        try:
+            with self._lock:
+                deleted = self._conn.execute(
+                    "DELETE FROM contracts WHERE user_email = ? AND id = ?", (user_email, contract_id)
+                ).rowcount
+            if not deleted:
+                return {
+                    "success": False,
+                    "message": f"Contract with ID {contract_id} not found"
+                }
+            return {
+                "success": True,
+                "message": "Contract deleted successfully"
+            }
+        except Exception as e:
+            logger.error(f"Error deleting contract: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Error deleting contract: {str(e)}"
+            }
+
+    async def count_blob_references(self, user_email: str, blob_url: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM contracts WHERE user_email = ? AND json_extract(body, '$.LinkImage') = ?",
+                (user_email, blob_url)
+            ).fetchone()[0]
+
+    async def list_contracts_by_user(self, user_email: str, limit: int = 100) -> Dict[str, Any]:
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT body FROM contracts WHERE user_email = ? LIMIT ?", (user_email, limit)
+                ).fetchall()
+            items = [json.loads(row[0]) for row in rows]
+            return {
+                "success": True,
+                "message": f"Retrieved {len(items)} contracts",
+                "data": items,
+                "count": len(items)
+            }
+        except Exception as e:
+            logger.error(f"Error listing contracts: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Error listing contracts: {str(e)}"
+            }
+
+    async def iter_contracts_by_user(self, user_email: str, page_size: int = 500):
+        last_id = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, body FROM contracts WHERE user_email = ? AND id > ? ORDER BY id LIMIT ?",
+                    (user_email, last_id, page_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [json.loads(row[1]) for row in rows]
+
+    async def search_contracts(
+        self,
+        user_email: str,
+        filters: Dict[str, Any],
+        page_size: int = 50,
+        continuation: Optional[str] = None
+    ) -> Dict[str, Any]:
+        clause, parameters = build_sqlite_search_query(**filters)
+        offset = int(continuation) if continuation and continuation.isdigit() else 0
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT body FROM contracts WHERE user_email = ?{clause} LIMIT ? OFFSET ?",
+                    [user_email, *parameters, page_size + 1, offset]
+                ).fetchall()
+            items = [json.loads(row[0]) for row in rows[:page_size]]
+            return {
+                "success": True,
+                "message": f"Retrieved {len(items)} contracts",
+                "data": items,
+                "count": len(items),
+                "continuation": str(offset + page_size) if len(rows) > page_size else None,
+                "request_charge": 0.0
+            }
+        except Exception as e:
+            logger.error(f"Error searching contracts: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Error searching contracts: {str(e)}"
+            }
+
+    def iter_blob_references(self, page_size: int = 1000):
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT json_extract(body, '$.LinkImage'), seq FROM contracts WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (last_seq, page_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_seq = rows[-1][1]
+            yield [row[0] for row in rows if row[0]]
+
+    def read_change_feed(self, continuation: Optional[str] = None, max_item_count: int = 500):
+        last_seq = int(continuation) if continuation else 0
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT body, seq FROM contracts WHERE seq > ? ORDER BY seq LIMIT ?", (last_seq, max_item_count)
+            ).fetchall()
+        if rows:
+            last_seq = rows[-1][1]
+        return [json.loads(row[0]) for row in rows], str(last_seq)
+
+    async def get_summary(self, user_email: str) -> Dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM summaries WHERE user_email = ?", (user_email,)).fetchone()
+        if row is None:
+            return {
+                "success": False,
+                "message": f"Summary for {user_email} not found"
+            }
+        return {
+            "success": True,
+            "message": "Summary retrieved successfully",
+            "data": json.loads(row[0])
+        }
+
+    def update_summary(self, user_email: str, mutate: Callable[[Dict[str, Any]], Any], max_attempts: int = 5) -> Dict[str, Any]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT body FROM summaries WHERE user_email = ?", (user_email,)).fetchone()
+                summary = json.loads(row[0]) if row else new_summary(user_email)
+                mutate(summary)
+                self._conn.execute(
+                    "REPLACE INTO summaries (user_email, body) VALUES (?, ?)",
+                    (user_email, json.dumps(summary, ensure_ascii=False))
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return summary
+
+    def delete_all_summaries(self) -> int:
+        with self._lock:
+            self._conn.execute("DELETE FROM summary_entries")
+            return self._conn.execute("DELETE FROM summaries").rowcount
+
+    def read_summary_entries(self, user_email: str, contract_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        entries = {}
+        with self._lock:
+            for start in range(0, len(contract_ids), 500):
+                chunk = contract_ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT contract_id, body FROM summary_entries WHERE user_email = ? "
+                    f"AND contract_id IN ({', '.join('?' * len(chunk))})",
+                    [user_email, *chunk]
+                ).fetchall()
+                entries.update((row[0], json.loads(row[1])) for row in rows)
+        return entries
+
+    def write_summary_entries(self, user_email: str, entries: List[Dict[str, Any]]) -> None:
+        now = time.time()
+        rows = [
+            (
+                user_email, entry["contract_id"], json.dumps(entry, ensure_ascii=False), entry["version"],
+                entry["generation"], int(entry.get("removed_ts") is None), entry.get("end_date"),
+                None if entry.get("removed_ts") is None else now + TOMBSTONE_RETENTION_SECONDS
+            )
+            for entry in entries
+        ]
+        with self._lock:
+            self._conn.execute("DELETE FROM summary_entries WHERE expires_at < ?", (now,))
+            self._conn.executemany(
+                "INSERT INTO summary_entries (user_email, contract_id, body, version, generation, live, end_date, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (user_email, contract_id) DO UPDATE SET "
+                "body = excluded.body, version = excluded.version, generation = excluded.generation, "
+                "live = excluded.live, end_date = excluded.end_date, expires_at = excluded.expires_at "
+                "WHERE excluded.version > summary_entries.version",
+                rows
+            )
+
+    def query_next_expiring_entries(self, user_email: str, generation: int, after_date: str, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT body FROM summary_entries WHERE user_email = ? AND generation = ? AND live = 1 "
+                "AND end_date > ? ORDER BY end_date, contract_id LIMIT ?",
+                (user_email, generation, after_date, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def list_stale_summary_entries(self, user_email: str, generation: int) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT contract_id FROM summary_entries WHERE user_email = ? AND generation != ? AND live = 1",
+                (user_email, generation)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+class LocalBlobStorageService(BlobStorage):
+    """
+    Blob store that keeps uploaded files under a local directory, one folder per container
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        container_name: str = "contracts",
+        signing_key: str = "saaseer-local-dev-key",
+        content_addressed: bool = False
+    ):
+        self.container_name = container_name
+        self.content_addressed = content_addressed
+        self.signing_key = signing_key.encode("utf-8")
+        self.container_path = Path(root_dir).resolve() / container_name
+        self.container_path.mkdir(parents=True, exist_ok=True)
+        self.url_prefix = self.container_path.as_uri() + "/"
+        logger.info(f"✅ Using local blob store: {self.container_path}")
+
+    def _path(self, blob_name: str) -> Path:
+        path = (self.container_path / blob_name).resolve()
+        if self.container_path not in path.parents:
+            raise ValueError(f"Invalid blob name: {blob_name}")
+        return path
+
+    def upload_file(
+        self,
+        file_content: bytes,
+        file_name: str,
+        content_type: str = "application/octet-stream",
+        user_email: Optional[str] = None
+    ) -> Tuple[bool, str, Optional[str]]:
+        try:
+            blob_name = self.blob_name_for_upload(file_content, file_name, user_email)
+            path = self._path(blob_name)
+            if self.content_addressed and path.is_file():
+                path.touch()
+                return True, "File already stored", self.url_prefix + blob_name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(file_content)
+            return True, "File uploaded successfully", self.url_prefix + blob_name
+        except Exception as e:
+            logger.error(f"❌ Error uploading file to local blob store: {str(e)}")
+            return False, f"Failed to upload file: {str(e)}", None
+
+    def download_file(self, blob_name: str) -> Tuple[bool, str, Optional[bytes]]:
+        try:
+            return True, "File downloaded successfully", self._path(blob_name).read_bytes()
+        except Exception as e:
+            logger.error(f"❌ Error downloading file from local blob store: {str(e)}")
+            return False, f"Failed to download file: {str(e)}", None
+
+    def delete_file(self, blob_name: str) -> Tuple[bool, str]:
+        try:
+            self._path(blob_name).unlink()
+            return True, "File deleted successfully"
+        except Exception as e:
+            logger.error(f"❌ Error deleting file from local blob store: {str(e)}")
+            return False, f"Failed to delete file: {str(e)}"
+
+
+    def write_blob(self, blob_name: str, file_content: bytes) -> str:
+        """Store content under an exact blob name; returns the blob URL"""
+        path = self._path(blob_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(file_content)
+        return self.url_prefix + blob_name
+
+    def get_file_properties(self, blob_name: str) -> Optional[Dict[str, Any]]:
+        path = self._path(blob_name)
+        if not path.is_file():
+            return None
+        stat = path.stat()
+        return {
+            "size": stat.st_size,
+            "etag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+            "content_type": mimetypes.guess_type(blob_name)[0] or "application/octet-stream",
+            "last_modified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        }
+
+    def iter_file(self, blob_name: str, offset: int = 0, length: Optional[int] = None, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """Yield a file (or ``length`` bytes from ``offset``) in ``chunk_size`` chunks"""
+        with open(self._path(blob_name), "rb") as f:
+            f.seek(offset)
+            remaining = length
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def list_prefixes(self) -> List[str]:
+        return sorted(f"{path.name}/" for path in self.container_path.iterdir() if path.is_dir())
+
+    def blob_exists(self, blob_name: str) -> bool:
+        return self._path(blob_name).is_file()
+
+    def put_blob(self, blob_name: str, content: bytes, content_type: str = "application/octet-stream") -> None:
+        self.write_blob(blob_name, content)
+
+    def list_blobs(self, prefix: str) -> List[Dict[str, Any]]:
+        blobs = []
+        for path in self.container_path.rglob("*"):
+            blob_name = path.relative_to(self.container_path).as_posix()
+            if path.is_file() and blob_name.startswith(prefix):
+                stat = path.stat()
+                blobs.append({"name": blob_name, "size": stat.st_size, "last_modified": stat.st_mtime})
+        return blobs
+
+    def _signature(self, blob_name: str, expires: int) -> str:
+        return hmac.new(self.signing_key, f"{blob_name}:{expires}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def generate_upload_url(
+        self,
+        blob_name: str,
+        content_type: str = "application/octet-stream",
+        expires_in_seconds: int = 600,
+        api_base_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Issue a signed URL for the local stand-in upload endpoint (mirrors a write-only SAS URL)
+        """
+        expires = int(time.time()) + expires_in_seconds
+        query = urlencode({"expires": expires, "sig": self._signature(blob_name, expires)})
+        base_url = (api_base_url or "http://localhost:8000/").rstrip("/")
+        return {
+            "upload_url": f"{base_url}/api/v1/local-blobs/{quote(blob_name)}?{query}",
+            "method": "PUT",
+            "headers": {"Content-Type": content_type},
+            "blob_url": self.url_prefix + blob_name,
+            "expires_at": datetime.utcfromtimestamp(expires).isoformat() + "Z"
+        }
+
+    def verify_upload_signature(self, blob_name: str, expires: int, signature: str) -> bool:
+        """Check a signed upload URL's signature and expiry"""
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._signature(blob_name, expires), signature)
+
+
+class AsyncLocalBlobStorageService(AsyncBlobStorage):
+    """
+    Async facade over ``LocalBlobStorageService`` that runs file I/O in worker threads
+    """
+
+    def __init__(self, store: LocalBlobStorageService, stream_chunk_size: int = 1024 * 1024):
+        self.store = store
+        self.stream_chunk_size = stream_chunk_size
+        self.container_name = store.container_name
+        self.content_addressed = store.content_addressed
+        self.url_prefix = store.url_prefix
+        self.upload_signing_key = store.signing_key
+
+    async def upload_file(
+        self,
+        file_content: bytes,
+        file_name: str,
+        content_type: str = "application/octet-stream",
+        user_email: Optional[str] = None
+    ) -> Tuple[bool, str, Optional[str]]:
+        return await asyncio.to_thread(self.store.upload_file, file_content, file_name, content_type, user_email)
+
+    async def download_file(self, blob_name: str, etag: Optional[str] = None) -> Tuple[bool, str, Optional[bytes]]:
+        if etag is not None:
+            properties = await self.get_file_properties(blob_name)
+            if properties is None or properties["etag"] != etag:
+                return False, f"File changed since it was read: {blob_name}", None
+        return await asyncio.to_thread(self.store.download_file, blob_name)
+
+    async def delete_file(self, blob_name: str) -> Tuple[bool, str]:
+        return await asyncio.to_thread(self.store.delete_file, blob_name)
+
+    async def write_blob(self, blob_name: str, file_content: bytes) -> str:
+        return await asyncio.to_thread(self.store.write_blob, blob_name, file_content)
+
+    async def get_file_properties(self, blob_name: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get_file_properties, blob_name)
+
+    async def list_prefixes(self) -> AsyncIterator[str]:
+        for prefix in await asyncio.to_thread(self.store.list_prefixes):
+            yield prefix
+
+    async def list_files(self, prefix: str = "") -> AsyncIterator[Dict[str, Any]]:
+        for blob in await asyncio.to_thread(self.store.list_blobs, prefix):
+            yield blob
+
+    async def stream_file(
+        self,
+        blob_name: str,
+        offset: int = 0,
+        length: Optional[int] = None,
+        etag: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        if etag is not None:
+            properties = await self.get_file_properties(blob_name)
+            if properties is None or properties["etag"] != etag:
+                raise RuntimeError(f"File changed while streaming: {blob_name}")
+        chunks = self.store.iter_file(blob_name, offset, length, self.stream_chunk_size)
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            chunks.close()
+
+    def generate_upload_url(
+        self,
+        blob_name: str,
+        content_type: str = "application/octet-stream",
+        expires_in_seconds: int = 600,
+        api_base_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return self.store.generate_upload_url(blob_name, content_type, expires_in_seconds, api_base_url)
+
+    def verify_upload_signature(self, blob_name: str, expires: int, signature: str) -> bool:
+        return self.store.verify_upload_signature(blob_name, expires, signature)
+
@@ -0,0 +1,205 @@
+"""
+Logging configuration: records are handed to a background thread through a bounded queue, so
+request handlers never block on stdout, and are written as JSON lines (``LOG_FORMAT=json``) or text.
+
+* Messages use lazy ``%``-formatting on hot paths; formatting happens in the background thread.
+* The request id and trace / span ids are captured when the record is created, so JSON lines can
+  be joined with traces.
+* Large payloads (extracted contract data, model responses) go through ``log_payload``: serialized
+  compactly and only when written, capped at ``LOG_PAYLOAD_MAX_CHARS``, and sampled at INFO.
+* When the queue is full, records below WARNING are dropped (and counted) instead of blocking.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+import orjson
+
+from app.tracing import current_request_id, current_span
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else was passed through ``extra=``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "trace_id", "span_id",
+}
+
+# Payload defaults until configure_logging() applies the settings
+_payload_max_chars = 2000
+_payload_sample_rate = 0.1
+
+
+class LogPayload:
+    """A value serialized as compact JSON, capped at ``max_chars``, only when the record is written"""
+
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value: Any, max_chars: Optional[int] = None):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        max_chars = self.max_chars or _payload_max_chars
+        if isinstance(self.value, (str, bytes)):
+            text = self.value.decode("utf-8", "replace") if isinstance(self.value, bytes) else self.value
+        else:
+            text = orjson.dumps(self.value, default=str).decode("utf-8")
+        if len(text) > max_chars:
+            return f"{text[:max_chars]}… [truncated, {len(text)} chars]"
+        return text
+
+
+def log_payload(
+    logger: logging.Logger,
+    level: int,
+    message: str,
+    payload: Any,
+    sample_rate: Optional[float] = None
+) -> None:
+    """
+    Log ``message % payload`` for a large payload: always at DEBUG / WARNING and above, for a
+    ``sample_rate`` fraction of calls at INFO
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if level == logging.INFO and not logger.isEnabledFor(logging.DEBUG):
+        rate = _payload_sample_rate if sample_rate is None else sample_rate
+        if rate < 1 and random.random() >= rate:
+            return
+    logger.log(level, message, LogPayload(payload))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request / trace ids and ``extra`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in ("request_id", "trace_id", "span_id"):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode("utf-8")
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    Enqueues records for the listener thread without formatting them.
+
+    The stdlib ``QueueHandler.prepare`` formats every record in the caller (so it can be pickled);
+    records stay in this process, so that work is left to the listener.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Context variables are only readable here, not in the listener thread
+        record.request_id = current_request_id()
+        span = current_span()
+        if span is not None:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno < logging.WARNING:
+                self.dropped += 1
+                return
+            # Warnings and errors are worth a short wait
+            try:
+                self.queue.put(record, timeout=0.1)
+            except queue.Full:
+                self.dropped += 1
+
+
+_handler: Optional[BackgroundQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_output: Optional[logging.Handler] = None
+_queue_size = 10000
+_lock = threading.Lock()
+
+
+def _start_listener() -> None:
+    global _listener
+    _handler.queue = queue.Queue(maxsize=_queue_size)
+    _listener = QueueListener(_handler.queue, _output, respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_after_fork() -> None:
+    # The listener thread doesn't survive fork (preloaded workers): give the child its own
+    if _handler is not None:
+        _start_listener()
+
+
+def configure_logging(settings) -> None:
+    """
+    Route the root logger through the background queue (idempotent; replaces ``logging.basicConfig``)
+    """
+    global _handler, _output, _payload_max_chars, _payload_sample_rate, _queue_size
+    with _lock:
+        _payload_max_chars = settings.log_payload_max_chars
+        _payload_sample_rate = settings.log_payload_sample_rate
+        root = logging.getLogger()
+        root.setLevel(settings.log_level.upper())
+        if _handler is not None:
+            return
+
+        _queue_size = settings.log_queue_size
+        _output = logging.StreamHandler(sys.stdout)
+        _output.setFormatter(JsonFormatter() if settings.log_format == "json" else logging.Formatter(TEXT_FORMAT))
+        _handler = BackgroundQueueHandler(queue.Queue(maxsize=_queue_size))
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(_handler)
+        _start_listener()
+        atexit.register(stop_logging)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_restart_after_fork)
+
+        if settings.log_format == "json":
+            # Uvicorn's own handlers would write plain text lines
+            for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+                logging.getLogger(name).handlers = []
+                logging.getLogger(name).propagate = True
+
+        # Keep Azure SDK request logging quiet
+        logging.getLogger("azure.core.pipeline.policies.http_logging_policy").setLevel(logging.WARNING)
+        logging.getLogger("azure.cosmos").setLevel(logging.WARNING)
+
+
+def stop_logging() -> None:
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def logging_stats() -> Dict[str, Any]:
+    return {
+        "queued": _handler.queue.qsize() if _handler is not None else 0,
+        "dropped": _handler.dropped if _handler is not None else 0,
+    }
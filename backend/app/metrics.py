@@ -0,0 +1,247 @@
+"""
+Prometheus metrics: per-route request latency, upload pipeline stage latency, OpenAI token usage,
+Cosmos DB request charge, cache hit ratios and in-flight jobs (served at ``/metrics``)
+"""
+
+import functools
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Upload pipeline stages timed by ``observe_stage``
+UPLOAD_STAGES = ("blob_upload", "blob_download", "rasterize_page", "openai_call", "json_parse", "db_write")
+
+REQUEST_LATENCY = Histogram(
+    "saaseer_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+STAGE_LATENCY = Histogram(
+    "saaseer_upload_stage_duration_seconds",
+    "Upload pipeline stage latency",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+)
+
+OPENAI_TOKENS = Counter(
+    "saaseer_openai_tokens",
+    "OpenAI token usage reported by response.usage",
+    ["model", "kind"]
+)
+
+COSMOS_REQUEST_CHARGE = Histogram(
+    "saaseer_cosmos_request_charge",
+    "Cosmos DB request charge (RU) per operation",
+    ["operation"],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+)
+
+JOBS_IN_PROGRESS = Gauge(
+    "saaseer_jobs_in_progress",
+    "Upload / extraction jobs currently running",
+    ["job"],
+    multiprocess_mode="livesum"
+)
+
+# Label children of the hot-path histograms, resolved once instead of on every observation
+_stage_children = {stage: STAGE_LATENCY.labels(stage) for stage in UPLOAD_STAGES}
+
+
+def _stage(stage: str):
+    child = _stage_children.get(stage)
+    if child is None:
+        child = _stage_children[stage] = STAGE_LATENCY.labels(stage)
+    return child
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """Time a block as one observation of an upload pipeline stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage(stage).observe(time.perf_counter() - started)
+
+
+def observe_stage_seconds(stage: str, seconds: float) -> None:
+    """Record an already-measured stage duration"""
+    _stage(stage).observe(seconds)
+
+
+def record_openai_usage(model: str, usage) -> None:
+    """Count prompt and completion tokens from an OpenAI ``response.usage`` object"""
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        tokens = getattr(usage, kind, None)
+        if tokens:
+            OPENAI_TOKENS.labels(model, kind.split("_")[0]).inc(tokens)
+
+
+def record_request_charge(operation: str, headers) -> float:
+    """Record the ``x-ms-request-charge`` of a Cosmos DB response; returns the charge"""
+    try:
+        charge = float((headers or {}).get("x-ms-request-charge", 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+    if charge:
+        COSMOS_REQUEST_CHARGE.labels(operation).observe(charge)
+    return charge
+
+
+def track_job(job: str):
+    """Decorator counting running calls of a coroutine function in ``saaseer_jobs_in_progress``"""
+    gauge = JOBS_IN_PROGRESS.labels(job)
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            gauge.inc()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                gauge.dec()
+        return wrapper
+    return decorator
+
+
+class ServiceStatsCollector:
+    """
+    Exports counters the services already keep (cache hits/misses, deletion queue depth) at
+    scrape time, so they cost nothing on the request path.
+
+    Services that have not been built yet are skipped rather than initialized by a scrape.
+    """
+
+    def describe(self):
+        # Declared up front so registering the collector doesn't import the services
+        return [
+            CounterMetricFamily("saaseer_cache_hits", "Cache hits", labels=["cache"]),
+            CounterMetricFamily("saaseer_cache_misses", "Cache misses", labels=["cache"]),
+            GaugeMetricFamily("saaseer_cache_hit_ratio", "Cache hits / lookups", labels=["cache"]),
+            GaugeMetricFamily("saaseer_blob_deletion_pending", "Blobs queued for deletion"),
+            CounterMetricFamily("saaseer_log_records_dropped", "Log records dropped because the log queue was full"),
+        ]
+
+    def collect(self):
+        from app.database import contract_repository
+        from app.extraction_service import extraction_service
+        from app.logging_setup import logging_stats
+        from app.routes import blob_deletion_queue
+
+        hits = CounterMetricFamily("saaseer_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("saaseer_cache_misses", "Cache misses", labels=["cache"])
+        ratio = GaugeMetricFamily("saaseer_cache_hit_ratio", "Cache hits / lookups", labels=["cache"])
+
+        caches = []
+        if contract_repository.initialized:
+            caches.append(("contract", contract_repository.cache_stats()))
+        if extraction_service.initialized and extraction_service.page_cache is not None:
+            caches.append(("page", extraction_service.page_cache.stats()))
+        for name, stats in caches:
+            lookups = stats["hits"] + stats["misses"]
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            ratio.add_metric([name], stats["hits"] / lookups if lookups else 0.0)
+        yield hits
+        yield misses
+        yield ratio
+
+        pending = GaugeMetricFamily("saaseer_blob_deletion_pending", "Blobs queued for deletion")
+        pending.add_metric([], blob_deletion_queue.metrics()["pending"])
+        yield pending
+
+        dropped = CounterMetricFamily("saaseer_log_records_dropped", "Log records dropped because the log queue was full")
+        dropped.add_metric([], logging_stats()["dropped"])
+        yield dropped
+
+
+_collector: Optional[ServiceStatsCollector] = None
+_multiprocess_registry: Optional[CollectorRegistry] = None
+
+
+def register_service_collector() -> None:
+    """Register ``ServiceStatsCollector`` with the default registry (once)"""
+    global _collector
+    if _collector is None:
+        _collector = ServiceStatsCollector()
+        REGISTRY.register(_collector)
+
+
+def _registry() -> CollectorRegistry:
+    """
+    The default registry, or - under several workers (``PROMETHEUS_MULTIPROC_DIR``) - one that sums
+    every worker's files. Service stats then describe the worker answering the scrape.
+    """
+    global _multiprocess_registry
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    if _multiprocess_registry is None:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        if _collector is not None:
+            registry.register(_collector)
+        _multiprocess_registry = registry
+    return _multiprocess_registry
+
+
+def render_metrics() -> bytes:
+    """Prometheus text exposition"""
+    return generate_latest(_registry())
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware observing request latency per route template (``/api/v1/contracts/{contract_id}``,
+    not the concrete path), so label cardinality stays bounded. Unmatched paths share one label.
+
+    For streamed responses the latency covers the whole body.
+    """
+
+    def __init__(self, app: Callable, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = frozenset(exclude_paths)
+        # (method, route, status) -> histogram child; skips the registry's label lookup per request
+        self._children = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            key = (scope["method"], getattr(route, "path", None) or "unmatched", status)
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = REQUEST_LATENCY.labels(key[0], key[1], str(status))
+            child.observe(elapsed)
+
@@ -62,3 +62,22 @@ class ContractUpdateData(BaseModel):
     termination_notice_period: Optional[str] = None
     UserEmail: Optional[str] = None
     updated_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
+
+
+class UploadUrlRequest(BaseModel):
+    """
+    Request for a short-lived direct upload URL
+    """
+    file_name: str = Field(..., description="Original file name (used for the extension)")
+    user_email: str = Field(..., description="User email")
+    content_type: Optional[str] = Field(None, description="MIME type of the file")
+
+
+class UploadCompleteRequest(BaseModel):
+    """
+    Notification that a direct upload has finished and the file is ready for extraction
+    """
+    blob_name: str = Field(..., description="Blob name returned by the upload URL request")
+    user_email: str = Field(..., description="User email")
+    upload_token: str = Field(..., description="Upload token returned by the upload URL request")
+    file_name: Optional[str] = Field(None, description="Original file name")
@@ -0,0 +1,246 @@
+"""
+Persisted cache of rasterized PDF pages, stored as derived blobs next to the uploaded documents
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.repository import BlobStorage
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Blob name prefix for derived artifacts; never under a user prefix, so user listings skip it
+DERIVED_PREFIX = "_derived/pages/"
+MANIFEST_NAME = "manifest.json"
+
+
+class PageCache:
+    """
+    Stores the encoded page images of a rendered PDF keyed by document hash and render settings.
+
+    A rendition lives under ``_derived/pages/{sha256}/{dpi}dpi-{fmt}/`` as one blob per page plus a
+    ``manifest.json`` written last, so a rendition without a manifest is never served. When the
+    tracked size exceeds ``max_bytes`` the oldest renditions (by manifest write time) are deleted.
+    """
+
+    def __init__(self, store: BlobStorage, max_bytes: int = 512 * 1024 * 1024):
+        self.store = store
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        # Approximate bytes stored, loaded from a listing on first use
+        self._total_bytes: Optional[int] = None
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.errors = 0
+
+    @staticmethod
+    def rendition_prefix(document_hash: str, dpi: int, fmt: str) -> str:
+        """Blob name prefix of one rendition of a document"""
+        return f"{DERIVED_PREFIX}{document_hash}/{dpi}dpi-{fmt.lower()}/"
+
+    @staticmethod
+    def document_hash(file_content: bytes) -> str:
+        return hashlib.sha256(file_content).hexdigest()
+
+    def get(self, document_hash: str, dpi: int, fmt: str) -> Optional[List[bytes]]:
+        """Return the cached encoded pages of a rendition, or None (counting a hit or a miss)"""
+        rendition = self.open(document_hash, dpi, fmt)
+        if rendition is None:
+            return None
+        try:
+            return list(rendition[1])
+        except RuntimeError:
+            return None
+
+    def open(self, document_hash: str, dpi: int, fmt: str) -> Optional[Tuple[int, Iterator[bytes]]]:
+        """
+        Page count and an iterator downloading the cached pages of a rendition one at a time, or None
+        on a miss. The hit is counted once the last page is read; if a page can't be read the
+        iterator raises ``RuntimeError``, counts a miss and drops the rendition.
+        """
+        prefix = self.rendition_prefix(document_hash, dpi, fmt)
+        try:
+            if not self.store.blob_exists(prefix + MANIFEST_NAME):
+                self._count("misses")
+                return None
+            success, message, manifest = self.store.download_file(prefix + MANIFEST_NAME)
+            if not success:
+                raise RuntimeError(message)
+            page_names = json.loads(manifest)["pages"]
+        except Exception as e:
+            logger.warning(f"⚠️ Page cache read failed for {prefix}: {str(e)}")
+            self._count("errors")
+            self._count("misses")
+            return None
+        return len(page_names), self._read_pages(prefix, page_names)
+
+    def _read_pages(self, prefix: str, page_names: List[str]) -> Iterator[bytes]:
+        for page_name in page_names:
+            try:
+                success, message, content = self.store.download_file(prefix + page_name)
+                if not success:
+                    # Drop the manifest so the incomplete rendition is re-rendered and evicted first
+                    self.store.delete_file(prefix + MANIFEST_NAME)
+                    raise RuntimeError(message)
+            except Exception as e:
+                logger.warning(f"⚠️ Page cache read failed for {prefix}: {str(e)}")
+                self._count("errors")
+                self._count("misses")
+                raise RuntimeError(str(e)) from e
+            yield content
+        self._count("hits")
+        logger.info(f"📦 Page cache hit: {prefix} ({len(page_names)} page(s))")
+
+    def writer(self, document_hash: str, dpi: int, fmt: str) -> Optional["RenditionWriter"]:
+        """Writer storing a rendition page by page as it is rendered (None when the cache is off)"""
+        if self.max_bytes == 0:
+            return None
+        return RenditionWriter(self, document_hash, dpi, fmt)
+
+    def put(self, document_hash: str, dpi: int, fmt: str, pages: Iterable[bytes]) -> None:
+        """Persist the encoded pages of a rendition, then evict beyond the size budget"""
+        writer = self.writer(document_hash, dpi, fmt)
+        if writer is None:
+            return
+        for page in pages:
+            writer.add(page)
+        writer.commit()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _add_bytes(self, size: int) -> None:
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += size
+            over_budget = self._total_bytes is None or self._total_bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Delete the oldest renditions until the cache fits in ``max_bytes``
+
+        Returns:
+            Number of renditions deleted
+        """
+        renditions: Dict[str, Dict[str, Any]] = {}
+        for blob in self.store.list_blobs(DERIVED_PREFIX):
+            prefix = blob["name"].rsplit("/", 1)[0] + "/"
+            rendition = renditions.setdefault(prefix, {"blobs": [], "bytes": 0, "written_at": None})
+            rendition["blobs"].append(blob["name"])
+            rendition["bytes"] += blob["size"]
+            if blob["name"].endswith(MANIFEST_NAME):
+                rendition["written_at"] = blob["last_modified"]
+
+        total = sum(rendition["bytes"] for rendition in renditions.values())
+        # Renditions without a manifest are incomplete (or being written); they go first
+        ordered = sorted(
+            renditions.values(),
+            key=lambda rendition: (rendition["written_at"] is not None, rendition["written_at"] or 0)
+        )
+        evicted = 0
+        for rendition in ordered:
+            if total <= self.max_bytes:
+                break
+            # Manifest first, so a half-deleted rendition is never served
+            for blob_name in sorted(rendition["blobs"], key=lambda name: not name.endswith(MANIFEST_NAME)):
+                self.store.delete_file(blob_name)
+            total -= rendition["bytes"]
+            evicted += 1
+
+        with self._lock:
+            self._total_bytes = total
+            self.evictions += evicted
+        if evicted:
+            logger.info(f"🧹 Evicted {evicted} rendition(s) from page cache ({total} bytes kept)")
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        """Return page cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+
+class RenditionWriter:
+    """
+    Stores the pages of one rendition as they are produced; the manifest is written by ``commit``.
+    A failed write abandons the rendition (it has no manifest, so it is evicted first) without
+    interrupting the caller.
+    """
+
+    def __init__(self, cache: PageCache, document_hash: str, dpi: int, fmt: str):
+        self.cache = cache
+        self.document_hash = document_hash
+        self.dpi = dpi
+        self.fmt = fmt.lower()
+        self.prefix = cache.rendition_prefix(document_hash, dpi, fmt)
+        self.page_names: List[str] = []
+        self.bytes = 0
+        self.failed = False
+
+    def add(self, page: bytes) -> None:
+        if self.failed:
+            return
+        page_name = f"page-{len(self.page_names) + 1:04d}.{self.fmt}"
+        try:
+            self.cache.store.put_blob(self.prefix + page_name, page, f"image/{self.fmt}")
+        except Exception as e:
+            self._fail(e)
+            return
+        self.page_names.append(page_name)
+        self.bytes += len(page)
+
+    def commit(self) -> None:
+        if self.failed:
+            return
+        try:
+            manifest = json.dumps({
+                "document_hash": self.document_hash,
+                "dpi": self.dpi,
+                "format": self.fmt,
+                "pages": self.page_names,
+                "bytes": self.bytes
+            }).encode("utf-8")
+            self.cache.store.put_blob(self.prefix + MANIFEST_NAME, manifest, "application/json")
+        except Exception as e:
+            self._fail(e)
+            return
+        self.cache._count("stores")
+        self.cache._add_bytes(self.bytes + len(manifest))
+        logger.info(f"💾 Stored {len(self.page_names)} rendered page(s) in page cache: {self.prefix}")
+
+    def _fail(self, error: Exception) -> None:
+        self.failed = True
+        logger.warning(f"⚠️ Page cache write failed for {self.prefix}: {str(error)}")
+        self.cache._count("errors")
+
+
+def create_page_cache() -> Optional[PageCache]:
+    """
+    Build the page cache on the configured blob store (None when ``page_cache_max_bytes`` is 0)
+    """
+    settings = get_settings()
+    if settings.page_cache_max_bytes <= 0:
+        return None
+    from app.storage_service import storage_service
+    return PageCache(storage_service, settings.page_cache_max_bytes)
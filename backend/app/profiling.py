@@ -0,0 +1,330 @@
+"""
+Opt-in sampling profiler for single requests
+
+A request sent with ``X-Profile-Token: <PROFILING_TOKEN>`` (when ``PROFILING_ENABLED``) runs under a
+wall-clock sampling profiler. A background thread samples:
+
+  * the event loop thread, only while the request's own task is running on it (so blocking
+    sections such as Cosmos DB SDK calls are covered, while other requests served in between are not)
+  * worker threads running sections marked with ``@profiled`` on the request's behalf
+    (``extract_from_file``: PDF rendering, page encoding, the OpenAI call)
+
+Stacks are written in collapsed ("folded") format, one ``frame;frame;frame count`` line per stack,
+which speedscope, flamegraph.pl and most flame graph viewers open directly. Each profile gets a
+``.json`` sidecar with the request it belongs to; ``GET /stats/profiles`` lists them.
+
+Without the middleware (profiling disabled) the only cost left is one context variable lookup per
+``@profiled`` call.
+"""
+
+import asyncio
+import functools
+import hmac
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+
+from app.tracing import current_request_id
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = ".collapsed"
+PROFILE_NAME_PATTERN = re.compile(r"^[0-9A-Za-z][0-9A-Za-z_.-]*$")
+MAX_STACK_DEPTH = 128
+
+_session: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+
+
+class ProfileSession:
+    """Samples collected for one request"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, task: Optional[asyncio.Task]):
+        self.loop = loop
+        self.task = task
+        self.loop_thread = threading.get_ident()
+        # Thread id -> nesting depth of @profiled sections running on it for this request
+        self.threads: Dict[int, int] = {}
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = time.perf_counter()
+        self.duration = 0.0
+
+    def enter_thread(self, thread_id: int) -> None:
+        self.threads[thread_id] = self.threads.get(thread_id, 0) + 1
+
+    def exit_thread(self, thread_id: int) -> None:
+        depth = self.threads.get(thread_id, 0) - 1
+        if depth > 0:
+            self.threads[thread_id] = depth
+        else:
+            self.threads.pop(thread_id, None)
+
+
+class SamplingProfiler:
+    """
+    One sampling thread per process, running only while at least one request is being profiled
+    """
+
+    def __init__(self, interval_seconds: float = 0.005):
+        self.interval_seconds = interval_seconds
+        self._sessions: List[ProfileSession] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict[Any, str] = {}
+
+    def start(self) -> ProfileSession:
+        """Start profiling the calling task (must be called from the event loop)"""
+        session = ProfileSession(asyncio.get_running_loop(), asyncio.current_task())
+        with self._lock:
+            self._sessions.append(session)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        return session
+
+    def stop(self, session: ProfileSession) -> None:
+        session.duration = time.perf_counter() - session.started
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _collapse(self, frame, thread_name: str) -> str:
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.append(thread_name)
+        return ";".join(reversed(labels))
+
+    def _sample(self) -> None:
+        frames = sys._current_frames()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for session in self._sessions:
+            session.samples += 1
+            if asyncio.current_task(session.loop) is session.task:
+                frame = frames.get(session.loop_thread)
+                if frame is not None:
+                    session.stacks[self._collapse(frame, "event-loop")] += 1
+            for thread_id in list(session.threads):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    session.stacks[self._collapse(frame, names.get(thread_id, "worker"))] += 1
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._sessions:
+                    self._thread = None
+                    return
+                self._sample()
+            time.sleep(self.interval_seconds)
+
+
+def _short_path(path: str) -> str:
+    """File names relative to the backend or site-packages, so stacks stay readable"""
+    for marker in ("site-packages" + os.sep, "backend" + os.sep):
+        index = path.rfind(marker)
+        if index >= 0:
+            return path[index + len(marker):]
+    return os.path.basename(path)
+
+
+def profiled(func: Callable) -> Callable:
+    """
+    Sample ``func`` as part of the profiled request it runs for; meant for blocking sections
+    run in worker threads (``asyncio.to_thread`` carries the request's context over)
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        session = _session.get()
+        if session is None:
+            return func(*args, **kwargs)
+        thread_id = threading.get_ident()
+        if thread_id == session.loop_thread:
+            return func(*args, **kwargs)
+        session.enter_thread(thread_id)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            session.exit_thread(thread_id)
+    return wrapper
+
+
+class ProfileStore:
+    """Profiles and their sidecars in a directory, oldest removed beyond ``max_profiles``"""
+
+    def __init__(self, directory: str, max_profiles: int = 200):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def new_name(self, method: str, path: str) -> str:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        slug = re.sub(r"[^0-9A-Za-z]+", "-", path).strip("-")[:60] or "root"
+        return f"{stamp}-{method.lower()}-{slug}-{uuid.uuid4().hex[:8]}"
+
+    def read(self, name: str) -> Optional[bytes]:
+        """Collapsed stacks of a profile, or None for unknown or malformed names"""
+        if not PROFILE_NAME_PATTERN.match(name):
+            return None
+        try:
+            with open(os.path.join(self.directory, name + PROFILE_SUFFIX), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def save(self, name: str, session: ProfileSession, metadata: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        lines = [f"{stack} {count}\n" for stack, count in session.stacks.most_common()]
+        with open(os.path.join(self.directory, name + PROFILE_SUFFIX), "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        metadata = {
+            **metadata,
+            "name": name,
+            "duration_ms": round(session.duration * 1000, 2),
+            "ticks": session.samples,
+            "samples": sum(session.stacks.values()),
+            "stacks": len(session.stacks),
+        }
+        with open(os.path.join(self.directory, name + ".json"), "wb") as f:
+            f.write(orjson.dumps(metadata))
+        self._prune()
+
+    def _sidecars(self) -> List[str]:
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith(".json")]
+        except FileNotFoundError:
+            return []
+        # Names start with a UTC timestamp, so they sort oldest first
+        return sorted(names)
+
+    def _prune(self) -> None:
+        sidecars = self._sidecars()
+        for sidecar in sidecars[:max(0, len(sidecars) - self.max_profiles)]:
+            stem = sidecar[:-len(".json")]
+            for suffix in (".json", PROFILE_SUFFIX):
+                try:
+                    os.remove(os.path.join(self.directory, stem + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent profiles first"""
+        profiles = []
+        for sidecar in reversed(self._sidecars()):
+            if len(profiles) >= limit:
+                break
+            try:
+                with open(os.path.join(self.directory, sidecar), "rb") as f:
+                    profiles.append(orjson.loads(f.read()))
+            except (OSError, orjson.JSONDecodeError):
+                continue
+        return profiles
+
+
+class RequestProfiler:
+    """Token check, sampler and store behind ``ProfilingMiddleware`` and ``GET /stats/profiles``"""
+
+    def __init__(self, token: str, store: ProfileStore, interval_seconds: float = 0.005):
+        self._token = token.encode("utf-8")
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self.sampler = SamplingProfiler(interval_seconds)
+
+    def authorized(self, token: Optional[str]) -> bool:
+        return token is not None and hmac.compare_digest(token.encode("utf-8"), self._token)
+
+    async def save(self, name: str, session: ProfileSession, metadata: Dict[str, Any]) -> None:
+        metadata["interval_ms"] = self.interval_seconds * 1000
+        try:
+            await asyncio.to_thread(self.store.save, name, session, metadata)
+            logger.info(f"🔬 Saved profile {name} ({sum(session.stacks.values())} samples)")
+        except OSError as e:
+            logger.error(f"❌ Failed to save profile {name}: {str(e)}")
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests that carry a valid ``X-Profile-Token``; the response
+    names the profile in ``X-Profile-ID``. Other requests pass straight through.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or request_profiler is None:
+            await self.app(scope, receive, send)
+            return
+        token = None
+        for name, value in scope.get("headers") or ():
+            if name == b"x-profile-token":
+                token = value.decode("latin-1")
+                break
+        if not request_profiler.authorized(token):
+            await self.app(scope, receive, send)
+            return
+
+        name = request_profiler.store.new_name(scope["method"], scope["path"])
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = [*message.get("headers", ()), (b"x-profile-id", name.encode("latin-1"))]
+            await send(message)
+
+        session = request_profiler.sampler.start()
+        context_token = _session.set(session)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _session.reset(context_token)
+            request_profiler.sampler.stop(session)
+            await request_profiler.save(name, session, {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status["code"],
+                "request_id": current_request_id(),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            })
+
+
+def create_request_profiler(settings) -> Optional[RequestProfiler]:
+    """Build the request profiler from ``profiling_*`` settings (None when disabled)"""
+    if not settings.profiling_enabled:
+        return None
+    if not settings.profiling_token:
+        logger.warning("⚠️ PROFILING_ENABLED is set without PROFILING_TOKEN; request profiling stays off")
+        return None
+    directory = settings.profiling_output_dir or os.path.join(settings.local_data_dir, "profiles")
+    return RequestProfiler(
+        settings.profiling_token,
+        ProfileStore(directory, max_profiles=settings.profiling_max_profiles),
+        interval_seconds=settings.profiling_interval_ms / 1000,
+    )
+
+
+def _build_request_profiler() -> Optional[RequestProfiler]:
+    from config.settings import get_settings
+    return create_request_profiler(get_settings())
+
+
+# Global request profiler (None unless PROFILING_ENABLED and PROFILING_TOKEN are set)
+request_profiler = _build_request_profiler()
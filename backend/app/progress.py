@@ -0,0 +1,447 @@
+"""
+Live progress of uploads and extraction jobs, streamed as Server-Sent Events
+
+A client picks an upload id, opens ``GET /api/v1/contracts/upload/{upload_id}/events`` and sends
+the upload (``POST /upload`` or ``/upload/complete``) with ``X-Upload-ID: <upload_id>``. The
+pipeline reports its stages through ``report_progress``:
+
+    receiving (bytes / total) -> received -> blob_uploaded | blob_downloaded
+    -> pages_rendered (page k of N) -> model_request_sent -> model_response_received (tokens)
+    -> saved (contract id) -> done (HTTP status)
+
+``done`` is always last; ``failed`` precedes it when extraction did not succeed. Publishing never
+blocks the pipeline: outside an upload with ``X-Upload-ID`` it is a context-variable lookup, and
+events are handed to the broker (in memory, or written to a shared SQLite file by a background
+thread) without waiting for subscribers.
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STAGE = "done"
+MAX_UPLOAD_ID_LENGTH = 128
+# Uploads tracked per worker; the oldest finished ones are dropped beyond this
+MAX_TRACKED_UPLOADS = 1000
+# Received-bytes events are throttled to one per this fraction of the body (or per chunk if smaller)
+RECEIVING_STEP = 0.05
+
+_upload_id: ContextVar[Optional[str]] = ContextVar("upload_id", default=None)
+
+
+def current_upload_id() -> Optional[str]:
+    """The ``X-Upload-ID`` of the request being handled, if any"""
+    return _upload_id.get()
+
+
+def valid_upload_id(upload_id: str) -> bool:
+    return 0 < len(upload_id) <= MAX_UPLOAD_ID_LENGTH and all(c.isalnum() or c in "-_." for c in upload_id)
+
+
+class _Waiter:
+    """One open event stream; woken at most once per batch of events"""
+
+    __slots__ = ("loop", "thread_id", "wakeup", "notified")
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+        self.wakeup = asyncio.Event()
+        self.notified = False
+
+    def notify(self) -> None:
+        if threading.get_ident() == self.thread_id:
+            self.wakeup.set()
+        elif not self.loop.is_closed():
+            try:
+                self.loop.call_soon_threadsafe(self.wakeup.set)
+            except RuntimeError:
+                pass
+
+
+class _Channel:
+    __slots__ = ("events", "next_id", "owner", "updated", "waiters")
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.next_id = 1
+        self.owner: Optional[str] = None
+        self.updated = time.monotonic()
+        self.waiters: List[_Waiter] = []
+
+
+def _evict(entries: Dict[str, Any], retention_seconds: float, updated: Callable[[Any], float],
+           keep: Callable[[Any], bool] = lambda entry: False) -> None:
+    """Drop entries idle for longer than the retention, then the oldest, down to 3/4 of the cap"""
+    cutoff = time.monotonic() - retention_seconds
+    for key in [key for key, entry in entries.items() if updated(entry) <= cutoff and not keep(entry)]:
+        del entries[key]
+    excess = len(entries) - MAX_TRACKED_UPLOADS * 3 // 4
+    if excess > 0:
+        oldest = [key for key, entry in entries.items() if not keep(entry)][:excess]
+        for key in oldest:
+            del entries[key]
+
+
+class MemoryProgressBroker:
+    """Progress events for uploads handled by this worker process"""
+
+    def __init__(self, retention_seconds: float = 600.0, max_events_per_upload: int = 500):
+        self.retention_seconds = retention_seconds
+        self.max_events_per_upload = max_events_per_upload
+        self._lock = threading.Lock()
+        self._channels: Dict[str, _Channel] = {}
+        self.published = 0
+        self.dropped = 0
+
+    def _channel(self, upload_id: str) -> _Channel:
+        channel = self._channels.get(upload_id)
+        if channel is None:
+            if len(self._channels) >= MAX_TRACKED_UPLOADS:
+                _evict(self._channels, self.retention_seconds, lambda c: c.updated, keep=lambda c: bool(c.waiters))
+            channel = self._channels[upload_id] = _Channel()
+        return channel
+
+    def publish(self, upload_id: str, event: Dict[str, Any], owner: Optional[str] = None) -> None:
+        """Append ``event`` to the upload's channel and wake its subscribers; safe from any thread"""
+        with self._lock:
+            channel = self._channel(upload_id)
+            if owner and channel.owner is None:
+                channel.owner = owner.lower()
+            if len(channel.events) >= self.max_events_per_upload and event["stage"] != TERMINAL_STAGE:
+                self.dropped += 1
+                return
+            event["id"] = channel.next_id
+            channel.next_id += 1
+            channel.events.append(event)
+            channel.updated = time.monotonic()
+            self.published += 1
+            # Streams already woken will pick this event up with the others
+            waiters = [waiter for waiter in channel.waiters if not waiter.notified]
+            for waiter in waiters:
+                waiter.notified = True
+        for waiter in waiters:
+            waiter.notify()
+
+    def owner(self, upload_id: str) -> Optional[str]:
+        with self._lock:
+            channel = self._channels.get(upload_id)
+            return channel.owner if channel is not None else None
+
+    def read(self, upload_id: str, after_id: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            channel = self._channels.get(upload_id)
+            if channel is None:
+                return []
+            return [event for event in channel.events if event["id"] > after_id]
+
+    async def subscribe(self, upload_id: str, after_id: int, heartbeat_seconds: float) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield batches of new events (an empty batch every ``heartbeat_seconds`` without any)"""
+        waiter = _Waiter()
+        with self._lock:
+            self._channel(upload_id).waiters.append(waiter)
+        last_yield = waiter.loop.time()
+        try:
+            while True:
+                with self._lock:
+                    waiter.wakeup.clear()
+                    waiter.notified = False
+                events = self.read(upload_id, after_id)
+                remaining = heartbeat_seconds - (waiter.loop.time() - last_yield)
+                if events or remaining <= 0:
+                    if events:
+                        after_id = events[-1]["id"]
+                    yield events
+                    last_yield = waiter.loop.time()
+                    continue
+                # Not asyncio.wait_for: it can swallow a cancellation that coincides with a wakeup
+                timer = waiter.loop.call_later(remaining, waiter.wakeup.set)
+                try:
+                    await waiter.wakeup.wait()
+                finally:
+                    timer.cancel()
+        finally:
+            with self._lock:
+                channel = self._channels.get(upload_id)
+                if channel is not None and waiter in channel.waiters:
+                    channel.waiters.remove(waiter)
+
+    def subscribers(self) -> int:
+        with self._lock:
+            return sum(len(channel.waiters) for channel in self._channels.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "uploads": len(self._channels),
+            "subscribers": self.subscribers(),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+PROGRESS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress_events (
+    upload_id TEXT NOT NULL,
+    event_id INTEGER NOT NULL,
+    owner TEXT,
+    event BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (upload_id, event_id)
+);
+CREATE INDEX IF NOT EXISTS idx_progress_created ON progress_events (created_at);
+"""
+
+
+class SQLiteProgressBroker:
+    """
+    Progress events in a SQLite file shared by every worker on the host, so the event stream
+    may be served by a different worker than the upload. Events are written by a background
+    thread; subscribers poll for new rows.
+    """
+
+    def __init__(self, db_path: str, retention_seconds: float = 600.0, poll_interval_seconds: float = 0.25,
+                 queue_size: int = 10000):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.retention_seconds = retention_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self._queue: "queue.Queue[Tuple[str, Dict[str, Any], Optional[str]]]" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        # An upload runs in one worker, so its event ids are numbered here
+        self._next_ids: Dict[str, Tuple[int, float]] = {}
+        self._pid = None
+        self._conn = None
+        self._writer_pid = None
+        self.published = 0
+        self.dropped = 0
+        self._connection()
+        logger.info(f"✅ Using shared progress store: {db_path}")
+
+    def _connection(self) -> sqlite3.Connection:
+        # A connection must not be used across fork (preloaded app): each worker opens its own
+        if self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=5.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(PROGRESS_SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def _ensure_writer(self) -> None:
+        if self._writer_pid != os.getpid():
+            self._writer_pid = os.getpid()
+            threading.Thread(target=self._write_loop, name="progress-writer", daemon=True).start()
+
+    def publish(self, upload_id: str, event: Dict[str, Any], owner: Optional[str] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._ensure_writer()
+            if upload_id not in self._next_ids and len(self._next_ids) >= MAX_TRACKED_UPLOADS:
+                _evict(self._next_ids, self.retention_seconds, lambda entry: entry[1])
+            event_id = self._next_ids.get(upload_id, (1, now))[0]
+            self._next_ids[upload_id] = (event_id + 1, now)
+        event["id"] = event_id
+        try:
+            self._queue.put_nowait((upload_id, event, owner.lower() if owner else None))
+            self.published += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self) -> None:
+        last_cleanup = 0.0
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            now = time.time()
+            try:
+                with self._lock:
+                    conn = self._connection()
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO progress_events (upload_id, event_id, owner, event, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        [(upload_id, event["id"], owner, orjson.dumps(event), now) for upload_id, event, owner in batch]
+                    )
+                    if now - last_cleanup > 60:
+                        conn.execute("DELETE FROM progress_events WHERE created_at < ?", (now - self.retention_seconds,))
+                        last_cleanup = now
+                    conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                logger.warning("⚠️ Failed to write %d progress event(s): %s", len(batch), e)
+
+    def owner(self, upload_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT owner FROM progress_events WHERE upload_id = ? AND owner IS NOT NULL LIMIT 1", (upload_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def read(self, upload_id: str, after_id: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT event FROM progress_events WHERE upload_id = ? AND event_id > ? ORDER BY event_id",
+                (upload_id, after_id)
+            ).fetchall()
+        return [orjson.loads(row[0]) for row in rows]
+
+    async def subscribe(self, upload_id: str, after_id: int, heartbeat_seconds: float) -> AsyncIterator[List[Dict[str, Any]]]:
+        idle = 0.0
+        while True:
+            events = await asyncio.to_thread(self.read, upload_id, after_id)
+            if events:
+                after_id = events[-1]["id"]
+                idle = 0.0
+                yield events
+                continue
+            if idle >= heartbeat_seconds:
+                idle = 0.0
+                yield []
+            await asyncio.sleep(self.poll_interval_seconds)
+            idle += self.poll_interval_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "uploads": len(self._next_ids),
+            "queued": self._queue.qsize(),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+def report_progress(stage: str, owner: Optional[str] = None, **data: Any) -> None:
+    """Publish a stage event for the current upload (no-op outside a request with ``X-Upload-ID``)"""
+    upload_id = _upload_id.get()
+    if upload_id is None or progress_broker is None:
+        return
+    progress_broker.publish(upload_id, {"stage": stage, "time": time.time(), **data}, owner=owner)
+
+
+def format_sse(events: List[Dict[str, Any]]) -> bytes:
+    """Server-Sent Events frames for ``events`` (a comment frame when empty, as a heartbeat)"""
+    if not events:
+        return b": keep-alive\n\n"
+    return b"".join(
+        b"id: %d\nevent: %s\ndata: %s\n\n" % (event["id"], event["stage"].encode("utf-8"), orjson.dumps(event))
+        for event in events
+    )
+
+
+async def stream_events(
+    upload_id: str,
+    user_email: str,
+    after_id: int = 0,
+    heartbeat_seconds: float = 15.0,
+    idle_timeout_seconds: float = 300.0
+) -> AsyncIterator[bytes]:
+    """
+    SSE body for one upload: replays events after ``after_id``, then follows until ``done``.
+    The stream ends without sending anything further once the upload turns out to belong to
+    another user (a stream may be opened before the upload has started).
+    """
+    idle_since = time.monotonic()
+    owner_checked = False
+    subscription = progress_broker.subscribe(upload_id, after_id, heartbeat_seconds)
+    try:
+        async for events in subscription:
+            if events and not owner_checked:
+                owner = await asyncio.to_thread(progress_broker.owner, upload_id)
+                if owner is not None:
+                    if owner != user_email.lower():
+                        return
+                    owner_checked = True
+            yield format_sse(events)
+            if events:
+                idle_since = time.monotonic()
+                if events[-1]["stage"] == TERMINAL_STAGE:
+                    return
+            elif time.monotonic() - idle_since > idle_timeout_seconds:
+                return
+    finally:
+        await subscription.aclose()
+
+
+class ProgressMiddleware:
+    """
+    ASGI middleware binding requests that carry ``X-Upload-ID`` to their progress channel:
+    reports request body bytes as they arrive and ``done`` with the response status.
+    Requests without the header pass straight through.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or progress_broker is None:
+            await self.app(scope, receive, send)
+            return
+        upload_id = None
+        content_length = 0
+        for name, value in scope.get("headers") or ():
+            if name == b"x-upload-id":
+                upload_id = value.decode("latin-1")
+            elif name == b"content-length" and value.isdigit():
+                content_length = int(value)
+        if upload_id is None or not valid_upload_id(upload_id):
+            await self.app(scope, receive, send)
+            return
+
+        received = 0
+        reported = 0
+        step = max(int(content_length * RECEIVING_STEP), 1)
+        status = {"code": 500}
+
+        async def receive_wrapper():
+            nonlocal received, reported
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received - reported >= step or (received > reported and not message.get("more_body", False)):
+                    reported = received
+                    report_progress("receiving", bytes=received, total=content_length or None)
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        token = _upload_id.set(upload_id)
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            report_progress(TERMINAL_STAGE, status=status["code"])
+            _upload_id.reset(token)
+
+
+def create_progress_broker(settings):
+    """Build the progress broker from ``progress_*`` settings (None when disabled)"""
+    if not settings.progress_enabled:
+        return None
+    if settings.progress_backend == "sqlite":
+        path = settings.progress_state_path or os.path.join(settings.local_data_dir, "progress.db")
+        return SQLiteProgressBroker(path, retention_seconds=settings.progress_retention_seconds)
+    return MemoryProgressBroker(retention_seconds=settings.progress_retention_seconds)
+
+
+def _build_progress_broker():
+    from config.settings import get_settings
+    return create_progress_broker(get_settings())
+
+
+# Global progress broker (streamed by GET /api/v1/contracts/upload/{upload_id}/events)
+progress_broker = _build_progress_broker()
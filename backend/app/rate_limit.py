@@ -0,0 +1,370 @@
+"""
+Per-user admission control for expensive endpoints (uploads, AI reports, expiry alerts)
+
+Each policy combines a per-user token bucket with a global concurrency cap. A request that
+finds no token or no free slot waits in a bounded queue for up to ``queue_timeout_seconds``;
+when the queue is full or the wait would be too long it is rejected with 429 and ``Retry-After``.
+
+Limiter state lives in memory (one worker) or in a SQLite file shared by every worker on the host.
+"""
+
+import asyncio
+import functools
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RatePolicy:
+    """Limits for one class of endpoints"""
+    name: str
+    rate_per_minute: float
+    burst: int
+    max_concurrency: int
+    # Slots of crashed workers are reclaimed after this long (shared store only)
+    slot_lease_seconds: float = 600.0
+
+
+class RateLimited(HTTPException):
+    """Rejected by admission control; answered with 429 and Retry-After"""
+
+    def __init__(self, policy: str, reason: str, retry_after_seconds: float):
+        super().__init__(
+            status_code=429,
+            detail=f"Too many {policy} requests ({reason}), please retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after_seconds)))}
+        )
+
+
+class MemoryRateLimitStore:
+    """Token buckets and concurrency slots for a single worker process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._slots: Dict[str, set] = {}
+
+    def take_token(self, key: str, rate_per_second: float, burst: int) -> float:
+        """Take one token; returns 0 on success, otherwise seconds until a token is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - updated) * rate_per_second)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate_per_second
+
+    def refund_token(self, key: str, burst: int) -> None:
+        """Give back a token taken by a request that was then not admitted"""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(burst), time.monotonic()))
+            self._buckets[key] = (min(float(burst), tokens + 1), updated)
+
+    def acquire_slot(self, policy: RatePolicy) -> Optional[str]:
+        with self._lock:
+            slots = self._slots.setdefault(policy.name, set())
+            if len(slots) >= policy.max_concurrency:
+                return None
+            slot = uuid.uuid4().hex
+            slots.add(slot)
+            return slot
+
+    def release_slot(self, policy: RatePolicy, slot: str) -> None:
+        with self._lock:
+            self._slots.get(policy.name, set()).discard(slot)
+
+    def in_flight(self, policy: RatePolicy) -> int:
+        with self._lock:
+            return len(self._slots.get(policy.name, ()))
+
+
+RATE_LIMIT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS slots (
+    policy TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (policy, slot)
+);
+"""
+
+
+class SQLiteRateLimitStore:
+    """
+    Token buckets and concurrency slots in a SQLite file, so limits hold across all workers on a host.
+
+    Every check is one short ``BEGIN IMMEDIATE`` transaction. Slots carry a lease so a worker that
+    dies mid-request doesn't hold its slot forever.
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._pid = None
+        self._conn = None
+        self._connection()
+        logger.info(f"✅ Using shared rate limit state: {db_path}")
+
+    def _connection(self) -> sqlite3.Connection:
+        # A connection must not be used across fork (preloaded app): each worker opens its own
+        if self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=5.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(RATE_LIMIT_SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def _transaction(self, func):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(conn)
+                conn.execute("COMMIT")
+                return result
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def take_token(self, key: str, rate_per_second: float, burst: int) -> float:
+        def take(conn):
+            # Wall clock: monotonic clocks are not comparable across processes
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = float(burst) if row is None else min(float(burst), row[0] + (now - row[1]) * rate_per_second)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate_per_second
+            conn.execute("REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)", (key, tokens, now))
+            return wait
+        return self._transaction(take)
+
+    def refund_token(self, key: str, burst: int) -> None:
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE buckets SET tokens = MIN(?, tokens + 1) WHERE key = ?", (float(burst), key)
+        ))
+
+    def acquire_slot(self, policy: RatePolicy) -> Optional[str]:
+        def acquire(conn):
+            now = time.time()
+            conn.execute("DELETE FROM slots WHERE policy = ? AND expires_at < ?", (policy.name, now))
+            in_use = conn.execute("SELECT COUNT(*) FROM slots WHERE policy = ?", (policy.name,)).fetchone()[0]
+            if in_use >= policy.max_concurrency:
+                return None
+            slot = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO slots (policy, slot, expires_at) VALUES (?, ?, ?)",
+                (policy.name, slot, now + policy.slot_lease_seconds)
+            )
+            return slot
+        return self._transaction(acquire)
+
+    def release_slot(self, policy: RatePolicy, slot: str) -> None:
+        self._transaction(lambda conn: conn.execute(
+            "DELETE FROM slots WHERE policy = ? AND slot = ?", (policy.name, slot)
+        ))
+
+    def in_flight(self, policy: RatePolicy) -> int:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM slots WHERE policy = ? AND expires_at >= ?", (policy.name, time.time())
+            ).fetchone()[0]
+
+
+class AdmissionController:
+    """
+    Admits requests per policy: per-user token bucket, then a global concurrency slot. A request
+    that gets a token but no slot has its token refunded, so being turned away as busy doesn't
+    count against the user's rate.
+
+    Waiting requests (for a token or a slot) are bounded by ``queue_size`` per policy and
+    worker, and by ``queue_timeout_seconds``.
+    """
+
+    def __init__(
+        self,
+        store,
+        policies: Dict[str, RatePolicy],
+        queue_size: int = 20,
+        queue_timeout_seconds: float = 10.0,
+        poll_interval_seconds: float = 0.05,
+        enabled: bool = True
+    ):
+        self.store = store
+        self.policies = policies
+        self.queue_size = queue_size
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.enabled = enabled
+        self._waiting: Dict[str, int] = {name: 0 for name in policies}
+        self._counters: Dict[str, Dict[str, int]] = {
+            name: {"admitted": 0, "queued": 0, "rejected_rate": 0, "rejected_busy": 0} for name in policies
+        }
+
+    async def _call(self, func, *args):
+        # Shared-store checks touch a file lock; keep them off the event loop
+        if isinstance(self.store, MemoryRateLimitStore):
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    def _reject(self, policy: RatePolicy, reason: str, counter: str, retry_after: float) -> RateLimited:
+        self._counters[policy.name][counter] += 1
+        logger.warning(f"🚦 Rejected {policy.name} request: {reason}")
+        return RateLimited(policy.name, reason, retry_after)
+
+    async def acquire(self, policy_name: str, user_email: Optional[str]) -> Optional[str]:
+        """Wait for admission; returns the concurrency slot to release, or raises ``RateLimited``"""
+        policy = self.policies[policy_name]
+        deadline = time.monotonic() + self.queue_timeout_seconds
+        queued = False
+        key = None
+        try:
+            # 1) Per-user rate
+            if user_email:
+                key = f"{policy.name}:{user_email.lower()}"
+                while True:
+                    wait = await self._call(self.store.take_token, key, policy.rate_per_minute / 60, policy.burst)
+                    if not wait:
+                        break
+                    if time.monotonic() + wait > deadline or self._queue_full(policy, queued):
+                        raise self._reject(policy, "per-user rate limit", "rejected_rate", wait)
+                    queued = self._enqueue(policy, queued)
+                    await asyncio.sleep(wait)
+
+            # 2) Global concurrency
+            try:
+                while True:
+                    slot = await self._call(self.store.acquire_slot, policy)
+                    if slot is not None:
+                        self._counters[policy.name]["admitted"] += 1
+                        return slot
+                    if time.monotonic() >= deadline or self._queue_full(policy, queued):
+                        raise self._reject(policy, "server busy", "rejected_busy", self.queue_timeout_seconds)
+                    queued = self._enqueue(policy, queued)
+                    await asyncio.sleep(self.poll_interval_seconds)
+            except BaseException:
+                # Not admitted (busy, or the client went away while queued): refund the token
+                if key is not None:
+                    await self._call(self.store.refund_token, key, policy.burst)
+                raise
+        finally:
+            if queued:
+                self._waiting[policy.name] -= 1
+
+    def _queue_full(self, policy: RatePolicy, queued: bool) -> bool:
+        return not queued and self._waiting[policy.name] >= self.queue_size
+
+    def _enqueue(self, policy: RatePolicy, queued: bool) -> bool:
+        if not queued:
+            self._waiting[policy.name] += 1
+            self._counters[policy.name]["queued"] += 1
+        return True
+
+    async def release(self, policy_name: str, slot: str) -> None:
+        await self._call(self.store.release_slot, self.policies[policy_name], slot)
+
+    async def stats(self) -> Dict[str, Any]:
+        in_flight = {name: await self._call(self.store.in_flight, policy) for name, policy in self.policies.items()}
+        return {
+            "enabled": self.enabled,
+            "backend": "sqlite" if isinstance(self.store, SQLiteRateLimitStore) else "memory",
+            "policies": {
+                name: {
+                    "rate_per_minute": policy.rate_per_minute,
+                    "burst": policy.burst,
+                    "max_concurrency": policy.max_concurrency,
+                    "in_flight": in_flight[name],
+                    "waiting": self._waiting[name],
+                    **self._counters[name],
+                }
+                for name, policy in self.policies.items()
+            },
+        }
+
+
+def _user_email_from(kwargs: Dict[str, Any]) -> Optional[str]:
+    user_email = kwargs.get("user_email")
+    if user_email is None:
+        for value in kwargs.values():
+            user_email = getattr(value, "user_email", None)
+            if user_email:
+                break
+    return user_email
+
+
+def create_admission_controller(settings) -> AdmissionController:
+    """Build the admission controller from ``rate_limit_*`` settings"""
+    policies = {
+        "upload": RatePolicy(
+            "upload", settings.rate_limit_upload_per_minute, settings.rate_limit_upload_burst,
+            settings.rate_limit_upload_concurrency
+        ),
+        "report": RatePolicy(
+            "report", settings.rate_limit_report_per_minute, settings.rate_limit_report_burst,
+            settings.rate_limit_report_concurrency
+        ),
+        "alerts": RatePolicy(
+            "alerts", settings.rate_limit_alerts_per_minute, settings.rate_limit_alerts_burst,
+            settings.rate_limit_alerts_concurrency
+        ),
+    }
+    if settings.rate_limit_backend == "sqlite":
+        path = settings.rate_limit_state_path or os.path.join(settings.local_data_dir, "rate_limits.db")
+        store = SQLiteRateLimitStore(path)
+    else:
+        store = MemoryRateLimitStore()
+    return AdmissionController(
+        store,
+        policies,
+        queue_size=settings.rate_limit_queue_size,
+        queue_timeout_seconds=settings.rate_limit_queue_timeout_seconds,
+        enabled=settings.rate_limit_enabled
+    )
+
+
+def _build_admission_controller() -> AdmissionController:
+    from config.settings import get_settings
+    return create_admission_controller(get_settings())
+
+
+# Global admission controller (reported by GET /api/v1/contracts/stats/rate-limits)
+admission_controller = _build_admission_controller()
+
+
+def rate_limited(policy_name: str):
+    """
+    Decorator admitting a route handler through ``policy_name``; the user is taken from the
+    ``user_email`` argument (or a request body model carrying ``user_email``)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not admission_controller.enabled:
+                return await func(*args, **kwargs)
+            slot = await admission_controller.acquire(policy_name, _user_email_from(kwargs))
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                await admission_controller.release(policy_name, slot)
+        return wrapper
+    return decorator
@@ -0,0 +1,331 @@
+"""
+Storage interfaces implemented by the Azure (Cosmos DB / Blob Storage) and local backends
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import unquote
+
+from app.models import ContractData, ContractUpdateData
+
+
+class ContractRepository(ABC):
+    """
+    Document store for contracts, partitioned by user email.
+
+    Methods return the ``{"success": bool, "message": str, "data": ...}`` dictionaries
+    the routes already consume, so implementations are interchangeable.
+    """
+
+    @abstractmethod
+    def create_database_and_container_if_not_exists(self) -> bool:
+        """Create the backing database/containers if they don't exist (blocking; run it in a thread)"""
+
+    @abstractmethod
+    async def create_contract(self, contract_data: ContractData) -> Dict[str, Any]:
+        """Create a new contract"""
+
+    @abstractmethod
+    async def get_contract(self, contract_id: str, user_email: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Retrieve a contract by ID and user email (partition key)"""
+
+    @abstractmethod
+    async def update_contract(self, contract_id: str, user_email: str, update_data: ContractUpdateData) -> Dict[str, Any]:
+        """Update the provided fields of an existing contract"""
+
+    @abstractmethod
+    async def delete_contract(self, contract_id: str, user_email: str) -> Dict[str, Any]:
+        """Delete a contract by ID and user email"""
+
+    @abstractmethod
+    async def list_contracts_by_user(self, user_email: str, limit: int = 100) -> Dict[str, Any]:
+        """List contracts for a user"""
+
+    @abstractmethod
+    def iter_contracts_by_user(self, user_email: str, page_size: int = 500) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield pages of every contract of a user, however many there are"""
+
+    @abstractmethod
+    async def search_contracts(
+        self,
+        user_email: str,
+        filters: Dict[str, Any],
+        page_size: int = 50,
+        continuation: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Search a user's contracts with the filters accepted by ``app.search``
+
+        Raises:
+            ValueError: If the filters are invalid
+        """
+
+    @abstractmethod
+    async def count_blob_references(self, user_email: str, blob_url: str) -> int:
+        """Count the user's contracts whose ``LinkImage`` points at ``blob_url``"""
+
+    @abstractmethod
+    def iter_blob_references(self, page_size: int = 1000) -> Iterator[List[str]]:
+        """Yield pages of the ``LinkImage`` values of every contract (all users)"""
+
+    @abstractmethod
+    def read_change_feed(self, continuation: Optional[str] = None, max_item_count: int = 500) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Read one page of changed contracts; returns (documents, next continuation)"""
+
+    @abstractmethod
+    async def get_summary(self, user_email: str) -> Dict[str, Any]:
+        """Read the per-user summary document"""
+
+    @abstractmethod
+    def update_summary(self, user_email: str, mutate: Callable[[Dict[str, Any]], Any], max_attempts: int = 5) -> Dict[str, Any]:
+        """Read-modify-write the per-user summary document"""
+
+    @abstractmethod
+    def delete_all_summaries(self) -> int:
+        """Delete every summary document and summary entry"""
+
+    @abstractmethod
+    def read_summary_entries(self, user_email: str, contract_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Read the stored summary entries of the given contracts, by contract id"""
+
+    @abstractmethod
+    def write_summary_entries(self, user_email: str, entries: List[Dict[str, Any]]) -> None:
+        """Store summary entries, except over a stored entry of the same or a newer ``version``"""
+
+    @abstractmethod
+    def query_next_expiring_entries(self, user_email: str, generation: int, after_date: str, limit: int) -> List[Dict[str, Any]]:
+        """Live entries of ``generation`` ending after ``after_date`` (YYYY-MM-DD), soonest first"""
+
+    @abstractmethod
+    def list_stale_summary_entries(self, user_email: str, generation: int) -> List[str]:
+        """Contract ids of live entries from a generation other than ``generation``"""
+
+    def check_indexing_policy(self) -> List[str]:
+        """Return drift between the declared and live indexing policy (empty if none)"""
+        return []
+
+    def reconcile_indexing_policy(self) -> bool:
+        """Apply the declared indexing policy if it has drifted; returns True if it was changed"""
+        return False
+
+    def get_lease_container(self):
+        """Container client for the change feed processor lease (Cosmos DB only)"""
+        raise NotImplementedError(f"{type(self).__name__} does not support lease containers")
+
+    @abstractmethod
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return read cache counters"""
+
+    @staticmethod
+    def merge_update(existing_contract: Dict[str, Any], update_data: ContractUpdateData) -> Dict[str, Any]:
+        """Merge the provided (non-null) update fields onto a stored contract document"""
+        update_dict = update_data.dict(exclude_unset=True)
+
+        # Ensure updated_at is set to current time
+        update_dict['updated_at'] = datetime.utcnow().isoformat()
+
+        for key, value in update_dict.items():
+            if value is not None:
+                existing_contract[key] = value
+        return existing_contract
+
+
+class BlobStorageBase:
+    """
+    Naming and URL helpers shared by the sync and async blob storage services
+    """
+
+    container_name: str
+    # When True, identical content uploaded by the same user is stored (and transferred) once
+    content_addressed: bool = False
+    # URL of the container with a trailing slash; blob URLs are this prefix plus the blob name
+    url_prefix: str
+
+    @staticmethod
+    def generate_blob_name(file_name: str, user_email: Optional[str] = None) -> str:
+        """Generate a unique blob name with timestamp and UUID, prefixed by the user if provided"""
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        file_extension = os.path.splitext(file_name)[1]
+        unique_id = str(uuid.uuid4())[:8]
+
+        if user_email:
+            return f"{BlobStorageBase.user_prefix(user_email)}/{timestamp}_{unique_id}{file_extension}"
+        return f"{timestamp}_{unique_id}{file_extension}"
+
+    @staticmethod
+    def content_blob_name(file_content: bytes, file_name: str, user_email: Optional[str] = None) -> str:
+        """Content-addressed blob name: the SHA-256 of the content, prefixed by the user if provided"""
+        digest = hashlib.sha256(file_content).hexdigest()
+        file_extension = os.path.splitext(file_name)[1].lower()
+
+        if user_email:
+            return f"{BlobStorageBase.user_prefix(user_email)}/{digest}{file_extension}"
+        return f"{digest}{file_extension}"
+
+    def blob_name_for_upload(self, file_content: bytes, file_name: str, user_email: Optional[str] = None) -> str:
+        """Blob name for ``upload_file``: content-addressed when enabled, otherwise timestamp + UUID"""
+        if self.content_addressed:
+            return self.content_blob_name(file_content, file_name, user_email)
+        return self.generate_blob_name(file_name, user_email)
+
+    @staticmethod
+    def user_prefix(user_email: str) -> str:
+        """Blob name prefix for a user's files"""
+        return user_email.replace("@", "_at_").replace(".", "_")
+
+    def blob_name_from_url(self, blob_url: Optional[str]) -> Optional[str]:
+        """Return the blob name for a URL produced by ``upload_file`` (None if it is not ours)"""
+        if blob_url and blob_url.startswith(self.url_prefix):
+            return unquote(blob_url[len(self.url_prefix):].split("?", 1)[0])
+        return None
+
+
+class BlobStorage(BlobStorageBase, ABC):
+    """
+    Binary object store for uploaded contract files
+    """
+
+    @abstractmethod
+    def upload_file(
+        self,
+        file_content: bytes,
+        file_name: str,
+        content_type: str = "application/octet-stream",
+        user_email: Optional[str] = None
+    ) -> Tuple[bool, str, Optional[str]]:
+        """Upload a file; returns (success, message, blob_url)"""
+
+    @abstractmethod
+    def download_file(self, blob_name: str) -> Tuple[bool, str, Optional[bytes]]:
+        """Download a file; returns (success, message, file_content)"""
+
+    @abstractmethod
+    def delete_file(self, blob_name: str) -> Tuple[bool, str]:
+        """Delete a file; returns (success, message)"""
+
+    @abstractmethod
+    def blob_exists(self, blob_name: str) -> bool:
+        """Check whether a blob exists"""
+
+    @abstractmethod
+    def put_blob(self, blob_name: str, content: bytes, content_type: str = "application/octet-stream") -> None:
+        """Store content under an exact blob name, overwriting it (raises on failure)"""
+
+    @abstractmethod
+    def list_blobs(self, prefix: str) -> List[Dict[str, Any]]:
+        """List blobs under a prefix as ``{"name", "size", "last_modified"}`` dictionaries"""
+
+
+class AsyncBlobStorage(BlobStorageBase, ABC):
+    """
+    Non-blocking binary object store for uploaded contract files, opened and closed by ``lifespan``
+    """
+
+    # Key for the tokens that bind a direct upload to the user its upload URL was issued to
+    upload_signing_key: bytes = b""
+
+    async def open(self) -> None:
+        """Open shared clients / connection pools"""
+
+    async def close(self) -> None:
+        """Release shared clients / connection pools"""
+
+    async def ensure_container_exists(self) -> None:
+        """Create the container if it doesn't exist"""
+
+    def generate_upload_url(
+        self,
+        blob_name: str,
+        content_type: str = "application/octet-stream",
+        expires_in_seconds: int = 600,
+        api_base_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Issue a short-lived, write-only URL for uploading ``blob_name`` directly
+
+        Returns:
+            Dictionary with ``upload_url``, ``method``, ``headers``, ``blob_url`` and ``expires_at``
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support direct uploads")
+
+    def upload_owner_token(self, blob_name: str, user_email: str) -> str:
+        """Token issued with an upload URL that binds ``blob_name`` to exactly ``user_email``"""
+        message = json.dumps([blob_name, user_email]).encode("utf-8")
+        return hmac.new(self.upload_signing_key, message, hashlib.sha256).hexdigest()
+
+    def verify_upload_owner(self, blob_name: str, user_email: str, token: str) -> bool:
+        """Check that ``blob_name``'s upload URL was issued to ``user_email``"""
+        return hmac.compare_digest(self.upload_owner_token(blob_name, user_email), token)
+
+    @abstractmethod
+    async def upload_file(
+        self,
+        file_content: bytes,
+        file_name: str,
+        content_type: str = "application/octet-stream",
+        user_email: Optional[str] = None
+    ) -> Tuple[bool, str, Optional[str]]:
+        """Upload a file; returns (success, message, blob_url)"""
+
+    @abstractmethod
+    async def download_file(self, blob_name: str, etag: Optional[str] = None) -> Tuple[bool, str, Optional[bytes]]:
+        """Download a file (only the version with ``etag``, when given); returns (success, message, file_content)"""
+
+    @abstractmethod
+    async def delete_file(self, blob_name: str) -> Tuple[bool, str]:
+        """Delete a file; returns (success, message)"""
+
+    async def delete_files(
+        self,
+        blob_names: List[str],
+        if_unmodified_since: Optional[datetime] = None
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Delete several files; returns (deleted, failed) blob names
+
+        Missing files count as deleted. With ``if_unmodified_since``, files modified after that
+        time are kept and reported in neither list. Backends with a batch API override this.
+        """
+        deleted, failed = [], []
+        for blob_name in blob_names:
+            if if_unmodified_since is not None:
+                properties = await self.get_file_properties(blob_name)
+                if properties is not None and properties["last_modified"] > if_unmodified_since:
+                    continue
+            success, message = await self.delete_file(blob_name)
+            (deleted if success or "not found" in message.lower() else failed).append(blob_name)
+        return deleted, failed
+
+    @abstractmethod
+    def list_prefixes(self) -> AsyncIterator[str]:
+        """Yield the top-level ``name/`` prefixes of the container (one per user)"""
+
+    @abstractmethod
+    def list_files(self, prefix: str = "") -> AsyncIterator[Dict[str, Any]]:
+        """Yield files under a prefix as ``{"name", "size", "last_modified"}`` dictionaries"""
+
+    @abstractmethod
+    async def get_file_properties(self, blob_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a file's ``size``, ``etag``, ``content_type`` and ``last_modified`` (None if it doesn't exist)
+        """
+
+    @abstractmethod
+    def stream_file(
+        self,
+        blob_name: str,
+        offset: int = 0,
+        length: Optional[int] = None,
+        etag: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield a file (or ``length`` bytes from ``offset``) in bounded chunks
+
+        When ``etag`` is given the read fails if the file has changed since its properties were read.
+        """
@@ -0,0 +1,286 @@
+"""
+Cosmos DB request unit (RU) accounting and 429-aware adaptive backpressure
+
+* ``RequestChargeLedger`` totals the ``x-ms-request-charge`` of every operation per operation
+  type, per route and per user; ``RequestChargeMiddleware`` attributes charges to the current
+  request and returns the request's total in an ``X-Request-Charge`` header.
+* ``AdaptiveThrottle`` runs Cosmos calls: on a 429 it honours ``x-ms-retry-after-ms`` for
+  everyone, and additionally slows background work (sweeps, change feed, backfills) with a
+  delay that doubles on every throttle and decays on success, so interactive requests get the
+  provisioned throughput first.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+_priority: ContextVar[str] = ContextVar("cosmos_priority", default=INTERACTIVE)
+_request_context: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_charge_context", default=None)
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """
+    Mark Cosmos calls made in this context (and in tasks / threads started from it) as background work
+    """
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class RequestThrottled(HTTPException):
+    """Cosmos DB kept throttling after the retries; surfaced to the client as 429 with Retry-After"""
+
+    def __init__(self, retry_after_ms: float):
+        self.retry_after_ms = retry_after_ms
+        super().__init__(
+            status_code=429,
+            detail="The database is busy, please retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after_ms / 1000)))}
+        )
+
+
+def is_throttled(exc: BaseException) -> bool:
+    """Whether an exception is a Cosmos DB 429 (request rate too large)"""
+    return getattr(exc, "status_code", None) == 429
+
+
+def retry_after_ms(exc: BaseException, default_ms: float = 1000.0) -> float:
+    """The ``x-ms-retry-after-ms`` of a throttled response"""
+    headers = getattr(exc, "headers", None) or {}
+    try:
+        return float(headers.get("x-ms-retry-after-ms") or default_ms)
+    except (TypeError, ValueError):
+        return default_ms
+
+
+class RequestChargeLedger:
+    """RU totals per operation type, per route and per user"""
+
+    def __init__(self, max_users: int = 10000):
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, operation: str, charge: float, user_email: Optional[str] = None) -> None:
+        context = _request_context.get()
+        if context is not None:
+            context["charge"] += charge
+            route = getattr(context["scope"].get("route"), "path", None) or "unmatched"
+            route = f"{context['scope']['method']} {route}"
+        else:
+            route = f"({current_priority()})"
+        with self._lock:
+            self._add(self._operations, operation, charge)
+            self._add(self._routes, route, charge)
+            if user_email:
+                if user_email not in self._users and len(self._users) >= self.max_users:
+                    user_email = "(other)"
+                self._add(self._users, user_email, charge)
+
+    @staticmethod
+    def _add(table: Dict[str, Dict[str, float]], key: str, charge: float) -> None:
+        entry = table.get(key)
+        if entry is None:
+            entry = table[key] = {"requests": 0, "ru": 0.0}
+        entry["requests"] += 1
+        entry["ru"] += charge
+
+    @staticmethod
+    def _rows(table: Dict[str, Dict[str, float]], limit: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        rows = sorted(table.items(), key=lambda item: item[1]["ru"], reverse=True)[:limit]
+        return {
+            key: {
+                "requests": entry["requests"],
+                "ru": round(entry["ru"], 2),
+                "ru_per_request": round(entry["ru"] / entry["requests"], 2),
+            }
+            for key, entry in rows
+        }
+
+    def report(self, top_users: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total_ru": round(sum(entry["ru"] for entry in self._operations.values()), 2),
+                "operations": self._rows(self._operations),
+                "routes": self._rows(self._routes),
+                "top_users": self._rows(self._users, top_users),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._operations: Dict[str, Dict[str, float]] = {}
+            self._routes: Dict[str, Dict[str, float]] = {}
+            self._users: Dict[str, Dict[str, float]] = {}
+
+
+class AdaptiveThrottle:
+    """
+    Runs Cosmos DB calls, retrying 429s after the server's ``x-ms-retry-after-ms``.
+
+    Interactive calls wait only for the retry-after window. Background calls also wait for a
+    backoff delay that doubles (up to ``max_background_delay_seconds``) on every 429 and decays
+    by ``decay`` on every success, so sweeps and backfills yield throughput until throttling stops.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        max_wait_seconds: float = 30.0,
+        max_background_delay_seconds: float = 10.0,
+        decay: float = 0.8
+    ):
+        self.max_retries = max_retries
+        self.max_wait_seconds = max_wait_seconds
+        self.max_background_delay_seconds = max_background_delay_seconds
+        self.decay = decay
+        self._lock = threading.Lock()
+        self._throttled_until = 0.0
+        self._background_delay = 0.0
+        self.throttled = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.gave_up = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.waited_seconds = {INTERACTIVE: 0.0, BACKGROUND: 0.0}
+
+    def _delay(self, priority: str) -> float:
+        with self._lock:
+            delay = max(0.0, self._throttled_until - time.monotonic())
+            if priority == BACKGROUND:
+                delay += self._background_delay
+            self.waited_seconds[priority] += delay
+            return delay
+
+    def _on_success(self) -> None:
+        if self._background_delay:
+            with self._lock:
+                self._background_delay *= self.decay
+                if self._background_delay < 0.001:
+                    self._background_delay = 0.0
+
+    def _on_throttled(self, priority: str, wait_ms: float) -> None:
+        with self._lock:
+            self.throttled[priority] += 1
+            self._throttled_until = max(self._throttled_until, time.monotonic() + wait_ms / 1000)
+            self._background_delay = min(
+                self.max_background_delay_seconds,
+                max(self._background_delay * 2, wait_ms / 1000)
+            )
+
+    def _give_up(self, priority: str, wait_ms: float) -> RequestThrottled:
+        with self._lock:
+            self.gave_up[priority] += 1
+        logger.warning(f"🐢 Cosmos DB still throttling after {self.max_retries} retries ({priority})")
+        return RequestThrottled(wait_ms)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Call ``func`` (a blocking Cosmos SDK call) from the event loop"""
+        priority = _priority.get()
+        for attempt in range(self.max_retries + 1):
+            delay = self._delay(priority)
+            if delay:
+                await asyncio.sleep(delay)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_throttled(e):
+                    raise
+                wait_ms = retry_after_ms(e)
+                self._on_throttled(priority, wait_ms)
+                if attempt == self.max_retries or wait_ms / 1000 > self.max_wait_seconds:
+                    raise self._give_up(priority, wait_ms) from e
+                continue
+            self._on_success()
+            return result
+
+    def run_sync(self, func: Callable, *args, **kwargs) -> Any:
+        """Call ``func`` from a worker thread (change feed processing, sweeps)"""
+        priority = _priority.get()
+        for attempt in range(self.max_retries + 1):
+            delay = self._delay(priority)
+            if delay:
+                time.sleep(delay)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_throttled(e):
+                    raise
+                wait_ms = retry_after_ms(e)
+                self._on_throttled(priority, wait_ms)
+                if attempt == self.max_retries or wait_ms / 1000 > self.max_wait_seconds:
+                    raise self._give_up(priority, wait_ms) from e
+                continue
+            self._on_success()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "throttled": dict(self.throttled),
+                "gave_up": dict(self.gave_up),
+                "waited_seconds": {key: round(value, 3) for key, value in self.waited_seconds.items()},
+                "retry_after_remaining_seconds": round(max(0.0, self._throttled_until - time.monotonic()), 3),
+                "background_delay_seconds": round(self._background_delay, 3),
+            }
+
+
+class RequestChargeMiddleware:
+    """
+    ASGI middleware attributing Cosmos DB charges to the current request; the total is returned
+    in the ``X-Request-Charge`` response header
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = {"scope": scope, "charge": 0.0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and context["charge"]:
+                message = {**message, "headers": [
+                    *message.get("headers", []),
+                    (b"x-request-charge", f"{context['charge']:.2f}".encode("latin-1")),
+                ]}
+            await send(message)
+
+        token = _request_context.set(context)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_context.reset(token)
+
+
+def _build_throttle() -> AdaptiveThrottle:
+    from config.settings import get_settings
+    settings = get_settings()
+    return AdaptiveThrottle(
+        max_retries=settings.cosmos_throttle_max_retries,
+        max_wait_seconds=settings.cosmos_throttle_max_wait_seconds,
+        max_background_delay_seconds=settings.cosmos_background_max_delay_seconds
+    )
+
+
+# Global ledger and throttle (reported by GET /api/v1/contracts/stats/request-charge)
+request_charge_ledger = RequestChargeLedger()
+cosmos_throttle = _build_throttle()
@@ -1,66 +1,155 @@
-from fastapi import APIRouter, HTTPException, Query, Path, Request, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Path, Request, Response, UploadFile, File, Form
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from email.utils import format_datetime
 from typing import List, Optional
-from app.models import ContractData, ContractResponse, ContractUpdateData
-from app.database import cosmos_db
-from app.storage_service import storage_service
+from app.models import ContractData, ContractResponse, ContractUpdateData, UploadUrlRequest, UploadCompleteRequest
+from app.database import contract_repository, summary_processor
+from app.summaries import (
+    apply_entry,
+    contract_entry,
+    fill_next_expiring,
+    is_legacy_summary,
+    new_summary,
+    refresh_aggregates,
+    render_summary,
+)
+from app.async_storage_service import async_storage_service
 from app.extraction_service import extraction_service
+from app.blob_cleanup import create_blob_deletion_queue
+from app.compression import compression_stats
+from app.metrics import observe_stage, track_job
+from app.tracing import traced, tracer
+from app.request_units import cosmos_throttle, request_charge_ledger
+from app.rate_limit import admission_controller, rate_limited
+from app.idempotency import idempotency_manager, idempotent
+from app.profiling import request_profiler
+from app.progress import progress_broker, report_progress, stream_events, valid_upload_id
+from app.services import readiness
+from app.http_range import RangeNotSatisfiable, content_range, parse_range_header
 from config.settings import get_settings
 from datetime import datetime, timedelta
+import asyncio
 import os
 import logging
 import json
 import uuid
+import hashlib
+import orjson
 
 logger = logging.getLogger(__name__)
 
 # Create router for contract operations
 router = APIRouter(prefix="/api/v1/contracts", tags=["contracts"])
 
+# Batched background deletion of files released by contract deletions (started in lifespan)
+blob_deletion_queue = create_blob_deletion_queue(contract_repository, async_storage_service, get_settings())
+
+
+async def require_blob_storage():
+    """
+    Hold requests that use Blob Storage until its client is open (briefly, while it warms up);
+    503 if it isn't ready by then
+    """
+    if not await readiness.wait_until_ready("blob_storage", get_settings().warm_up_request_wait_seconds):
+        raise HTTPException(
+            status_code=503,
+            detail="Blob Storage is not ready yet, please retry",
+            headers={"Retry-After": "5"}
+        )
+
+
+# Fields returned for a contract; stored documents also carry Cosmos system properties
+CONTRACT_FIELDS = tuple(ContractData.model_fields)
+
+
+def _contract_payload(document: dict) -> dict:
+    """
+    Project a stored contract document onto the API fields without re-validating it.
+    
+    Documents read back from the repository were validated as ``ContractData`` when written.
+    """
+    return {field: document.get(field) for field in CONTRACT_FIELDS}
+
+
+def _contract_etag(contract: dict) -> str:
+    """
+    Return a quoted HTTP entity tag for a stored contract document.
+    
+    Uses the Cosmos DB ``_etag`` when present, otherwise hashes the document.
+    """
+    etag = contract.get("_etag")
+    if etag:
+        return etag if etag.startswith('"') else f'"{etag}"'
+    digest = hashlib.sha256(json.dumps(contract, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an ``If-None-Match`` header value against an entity tag (weak comparison)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
 
 @router.post("/", response_model=ContractResponse, status_code=201)
+@idempotent("create", status_code=201)
 async def create_contract(request: Request):
     """
     Create a new contract in Azure Cosmos DB
     
     - **contract_data**: Contract information including all required fields
     
-    Returns the created contract data with success status
+    Returns the created contract data with success status. Retries carrying the same
+    `Idempotency-Key` header get the original response instead of a second attempt.
     """
     try:
-        # Parse JSON and handle wrapped data format
-        body = await request.body()
-        import json
-        raw_data = json.loads(body.decode('utf-8'))
-        
-        # Check if data is wrapped in "contract_data" field
-        if "contract_data" in raw_data and isinstance(raw_data["contract_data"], str):
-            # Parse the inner JSON string
-            contract_json = json.loads(raw_data["contract_data"])
-            raw_data = contract_json
-        elif "contract_data" in raw_data and isinstance(raw_data["contract_data"], dict):
-            raw_data = raw_data["contract_data"]
-        
-        # Create ContractData model
+        # Parse JSON (straight from bytes) and handle wrapped data format
+        try:
+            raw_data = orjson.loads(await request.body())
+            
+            # Check if data is wrapped in "contract_data" field
+            wrapped = raw_data.get("contract_data") if isinstance(raw_data, dict) else None
+            if isinstance(wrapped, str):
+                # The frontend sends the contract as a JSON string inside the body
+                raw_data = orjson.loads(wrapped)
+            elif isinstance(wrapped, dict):
+                raw_data = wrapped
+        except orjson.JSONDecodeError as decode_error:
+            raise HTTPException(status_code=422, detail=f"Invalid JSON body: {decode_error}")
+        
+        # Create ContractData model (the only validation pass)
         try:
-            contract_data = ContractData(**raw_data)
+            contract_data = ContractData.model_validate(raw_data)
         except Exception as validation_error:
             logger.error(f"❌ Validation error: {validation_error}")
             raise HTTPException(status_code=422, detail=f"Validation error: {validation_error}")
         
         # Log contract creation process
-        logger.info(f"📝 Creating contract: {contract_data.id}")
-        logger.info(f"👤 Customer: {contract_data.customer_name or 'N/A'}")
-        logger.info(f"🏢 Service: {contract_data.service_name or 'N/A'}")
+        logger.info(
+            "📝 Creating contract: %s (customer: %s, service: %s)",
+            contract_data.id, contract_data.customer_name or "N/A", contract_data.service_name or "N/A"
+        )
         
-        result = await cosmos_db.create_contract(contract_data)
+        result = await contract_repository.create_contract(contract_data)
         
         if result["success"]:
-            return ContractResponse(
-                success=True,
-                message=result["message"],
-                contract_id=contract_data.id,
-                data=ContractData(**result["data"])
-            )
+            return ORJSONResponse(status_code=201, content={
+                "success": True,
+                "message": result["message"],
+                "contract_id": contract_data.id,
+                "data": _contract_payload(result["data"])
+            })
         else:
             raise HTTPException(status_code=409, detail=result["message"])
     
@@ -71,8 +160,72 @@ async def create_contract(request: Request):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/search", response_model=dict)
+async def search_contracts(
+    user_email: str = Query(..., description="User email (partition key)"),
+    supplier_name: Optional[str] = Query(None, description="Exact supplier name"),
+    customer_name: Optional[str] = Query(None, description="Exact customer name"),
+    service_name: Optional[str] = Query(None, description="Exact service name"),
+    q: Optional[str] = Query(None, description="Case-insensitive substring match on contract_details"),
+    start_date_from: Optional[str] = Query(None, description="Earliest contract start date (YYYY/MM/DD)"),
+    start_date_to: Optional[str] = Query(None, description="Latest contract start date (YYYY/MM/DD)"),
+    end_date_from: Optional[str] = Query(None, description="Earliest contract end date (YYYY/MM/DD)"),
+    end_date_to: Optional[str] = Query(None, description="Latest contract end date (YYYY/MM/DD)"),
+    status: Optional[str] = Query(None, description="expired, near_expiry, active or missing_end_date"),
+    sort_by: str = Query("contract_end_date", description="Field to sort by"),
+    sort_order: str = Query("asc", description="asc or desc"),
+    page_size: int = Query(50, ge=1, le=500, description="Number of contracts per page"),
+    continuation: Optional[str] = Query(None, description="Continuation token from the previous page")
+):
+    """
+    Search, filter and sort a user's contracts server-side
+    
+    All filtering and sorting runs in the database as a parameterized single-partition query.
+    Pages are returned with a `continuation` token; pass it back to fetch the next page.
+    """
+    try:
+        settings = get_settings()
+        filters = {
+            "supplier_name": supplier_name,
+            "customer_name": customer_name,
+            "service_name": service_name,
+            "text": q,
+            "start_date_from": start_date_from,
+            "start_date_to": start_date_to,
+            "end_date_from": end_date_from,
+            "end_date_to": end_date_to,
+            "status": status,
+            "sort_by": sort_by,
+            "sort_order": sort_order,
+            "window_days": settings.expiry_warning_days
+        }
+        try:
+            result = await contract_repository.search_contracts(user_email, filters, page_size, continuation)
+        except ValueError as validation_error:
+            raise HTTPException(status_code=422, detail=str(validation_error))
+        
+        if result["success"]:
+            return ORJSONResponse({
+                "success": True,
+                "message": result["message"],
+                "data": result["data"],
+                "count": result["count"],
+                "continuation": result["continuation"],
+                "user_email": user_email
+            })
+        else:
+            raise HTTPException(status_code=500, detail=result["message"])
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error searching contracts: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.get("/{contract_id}", response_model=ContractResponse)
 async def get_contract(
+    request: Request,
     contract_id: str = Path(..., description="Contract ID"),
     user_email: str = Query(..., description="User email (partition key)")
 ):
@@ -82,18 +235,24 @@ async def get_contract(
     - **contract_id**: Unique identifier of the contract
     - **user_email**: Email of the user (used as partition key)
     
-    Returns the contract data if found
+    Returns the contract data if found. The response carries an `ETag` header;
+    send it back in `If-None-Match` to get `304 Not Modified` when unchanged.
     """
     try:
-        result = await cosmos_db.get_contract(contract_id, user_email)
+        result = await contract_repository.get_contract(contract_id, user_email)
         
         if result["success"]:
-            return ContractResponse(
-                success=True,
-                message=result["message"],
-                contract_id=contract_id,
-                data=ContractData(**result["data"])
-            )
+            etag = _contract_etag(result["data"])
+            headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+            if _etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=headers)
+            
+            return ORJSONResponse(headers=headers, content={
+                "success": True,
+                "message": result["message"],
+                "contract_id": contract_id,
+                "data": _contract_payload(result["data"])
+            })
         else:
             raise HTTPException(status_code=404, detail=result["message"])
     
@@ -104,6 +263,78 @@ async def get_contract(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/{contract_id}/file", dependencies=[Depends(require_blob_storage)])
+async def download_contract_file(
+    request: Request,
+    contract_id: str = Path(..., description="Contract ID"),
+    user_email: str = Query(..., description="User email (partition key)")
+):
+    """
+    Stream the uploaded file behind a contract's `LinkImage`
+    
+    Supports single `Range: bytes=...` requests (206 Partial Content) so PDF viewers can load
+    incrementally, and `If-None-Match` / `If-Range` against the file's `ETag`. The file is sent
+    in bounded chunks, so memory use does not grow with file size.
+    """
+    try:
+        result = await contract_repository.get_contract(contract_id, user_email)
+        if not result["success"]:
+            raise HTTPException(status_code=404, detail=result["message"])
+        
+        blob_name = async_storage_service.blob_name_from_url(result["data"].get("LinkImage"))
+        if not blob_name:
+            raise HTTPException(status_code=404, detail="Contract has no stored file")
+        
+        properties = await async_storage_service.get_file_properties(blob_name)
+        if properties is None:
+            raise HTTPException(status_code=404, detail=f"File not found: {blob_name}")
+        
+        size = properties["size"]
+        etag = properties["etag"] if properties["etag"].startswith('"') else f'"{properties["etag"]}"'
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "private, no-cache",
+            "Content-Disposition": f"inline; filename=\"{os.path.basename(blob_name)}\""
+        }
+        if properties.get("last_modified"):
+            headers["Last-Modified"] = format_datetime(properties["last_modified"], usegmt=True)
+        
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        
+        # A stale If-Range validator means the client's partial copy is outdated: send everything
+        if_range = request.headers.get("if-range")
+        range_header = request.headers.get("range") if not if_range or if_range == etag else None
+        try:
+            byte_range = parse_range_header(range_header, size)
+        except RangeNotSatisfiable:
+            raise HTTPException(status_code=416, detail="Requested range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+        
+        status_code = 200
+        offset, length = 0, None
+        headers["Content-Length"] = str(size)
+        if byte_range is not None:
+            start, end = byte_range
+            offset, length = start, end - start + 1
+            status_code = 206
+            headers["Content-Range"] = content_range(start, end, size)
+            headers["Content-Length"] = str(length)
+        
+        return StreamingResponse(
+            async_storage_service.stream_file(blob_name, offset=offset, length=length, etag=properties["etag"]),
+            status_code=status_code,
+            media_type=properties.get("content_type") or "application/octet-stream",
+            headers=headers
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error streaming contract file: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.put("/{contract_id}", response_model=ContractResponse)
 async def update_contract(
     update_data: ContractUpdateData,
@@ -120,15 +351,15 @@ async def update_contract(
     Returns the updated contract data
     """
     try:
-        result = await cosmos_db.update_contract(contract_id, user_email, update_data)
+        result = await contract_repository.update_contract(contract_id, user_email, update_data)
         
         if result["success"]:
-            return ContractResponse(
-                success=True,
-                message=result["message"],
-                contract_id=contract_id,
-                data=ContractData(**result["data"])
-            )
+            return ORJSONResponse({
+                "success": True,
+                "message": result["message"],
+                "contract_id": contract_id,
+                "data": _contract_payload(result["data"])
+            })
         else:
             raise HTTPException(status_code=404, detail=result["message"])
     
@@ -153,9 +384,16 @@ async def delete_contract(
     Returns success status
     """
     try:
-        result = await cosmos_db.delete_contract(contract_id, user_email)
+        existing = await contract_repository.get_contract(contract_id, user_email)
+        result = await contract_repository.delete_contract(contract_id, user_email)
         
         if result["success"]:
+            # Deletes are not visible in the change feed, so update the summary directly
+            last_ts = existing["data"].get("_ts") if existing["success"] else None
+            await summary_processor.remove_contract(user_email, contract_id, last_ts)
+            if existing["success"]:
+                # The file is deleted in the background once no other contract points at it
+                blob_deletion_queue.enqueue(user_email, existing["data"].get("LinkImage"))
             return ContractResponse(
                 success=True,
                 message=result["message"],
@@ -185,16 +423,16 @@ async def list_contracts(
     Returns a list of contracts for the specified user
     """
     try:
-        result = await cosmos_db.list_contracts_by_user(user_email, limit)
+        result = await contract_repository.list_contracts_by_user(user_email, limit)
         
         if result["success"]:
-            return {
+            return ORJSONResponse({
                 "success": True,
                 "message": result["message"],
                 "data": result["data"],
                 "count": result["count"],
                 "user_email": user_email
-            }
+            })
         else:
             raise HTTPException(status_code=500, detail=result["message"])
     
@@ -205,6 +443,209 @@ async def list_contracts(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/cache/stats", response_model=dict)
+async def contract_cache_stats():
+    """
+    Hit/miss counters for the in-process contract read cache
+    """
+    return {
+        "success": True,
+        "data": contract_repository.cache_stats()
+    }
+
+
+@router.get("/cache/pages", response_model=dict)
+async def page_cache_stats():
+    """
+    Hit/miss counters for the persisted rendered-page cache
+    """
+    page_cache = extraction_service.page_cache if extraction_service.initialized else None
+    return {
+        "success": True,
+        "data": page_cache.stats() if page_cache is not None else {"enabled": False}
+    }
+
+
+@router.get("/stats/summary", response_model=dict)
+async def get_contract_summary(
+    user_email: str = Query(..., description="User email (partition key)")
+):
+    """
+    Per-user contract summary: counts by status, next expiring contracts and supplier/service tallies.
+    
+    Served from the change-feed-maintained summary document with a single point read.
+    Falls back to aggregating the user's contracts if the summary has not been built yet
+    (or not since the per-contract entries moved out of it).
+    """
+    try:
+        settings = get_settings()
+        top_n = settings.summary_next_expiring_limit
+        result = await contract_repository.get_summary(user_email)
+        source = "summary"
+        
+        if result["success"] and not is_legacy_summary(result["data"]):
+            summary = result["data"]
+            # Contracts that expired since the last update leave next_expiring; refill it if short
+            refresh_aggregates(summary, settings.expiry_warning_days, top_n)
+            await asyncio.to_thread(fill_next_expiring, contract_repository, summary, top_n)
+        else:
+            summary = refresh_aggregates(new_summary(user_email), settings.expiry_warning_days, top_n)
+            async for page in contract_repository.iter_contracts_by_user(user_email):
+                for contract in page:
+                    apply_entry(summary, None, contract_entry(contract), top_n)
+            refresh_aggregates(summary, settings.expiry_warning_days, top_n)
+            source = "computed"
+        
+        return {
+            "success": True,
+            "source": source,
+            "data": render_summary(summary, settings.expiry_warning_days, settings.summary_next_expiring_limit)
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error retrieving contract summary: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/stats/change-feed", response_model=dict)
+async def change_feed_status():
+    """
+    Lag and throughput metrics of the summary change feed processor
+    """
+    return {
+        "success": True,
+        "data": summary_processor.metrics()
+    }
+
+
+@router.get("/stats/blob-cleanup", response_model=dict)
+async def blob_cleanup_status():
+    """
+    Queue depth and counters of the background blob deletion queue
+    """
+    return {
+        "success": True,
+        "data": blob_deletion_queue.metrics()
+    }
+
+
+@router.get("/stats/compression", response_model=dict)
+async def compression_status():
+    """
+    Response compression: bytes in/out and bytes saved per route
+    """
+    return {
+        "success": True,
+        "data": compression_stats.report()
+    }
+
+
+@router.get("/stats/request-charge", response_model=dict)
+async def request_charge_status(
+    top_users: int = Query(20, ge=1, le=1000, description="Number of heaviest users to list")
+):
+    """
+    Cosmos DB request units (RU) per operation type, route and user, and 429 throttling counters
+    """
+    return {
+        "success": True,
+        "data": {
+            **request_charge_ledger.report(top_users=top_users),
+            "throttling": cosmos_throttle.stats()
+        }
+    }
+
+
+@router.get("/stats/rate-limits", response_model=dict)
+async def rate_limit_status():
+    """
+    Admission control for uploads, reports and alerts: limits, in-flight and queued requests, rejections
+    """
+    return {
+        "success": True,
+        "data": await admission_controller.stats()
+    }
+
+
+@router.get("/stats/idempotency", response_model=dict)
+async def idempotency_status():
+    """
+    Idempotency-Key handling: requests executed, retries replayed or attached to a running request, conflicts
+    """
+    return {
+        "success": True,
+        "data": idempotency_manager.stats()
+    }
+
+
+@router.get("/stats/progress", response_model=dict)
+async def progress_status():
+    """
+    Live upload progress: uploads with events, open event streams, events published and dropped
+    """
+    return {
+        "success": True,
+        "data": progress_broker.stats() if progress_broker is not None else {"enabled": False}
+    }
+
+
+def _require_profiler(profile_token: Optional[str]):
+    if request_profiler is None:
+        raise HTTPException(status_code=404, detail="Request profiling is disabled")
+    if not request_profiler.authorized(profile_token):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Profile-Token")
+
+
+@router.get("/stats/profiles", response_model=dict)
+async def list_profiles(
+    limit: int = Query(50, ge=1, le=500, description="Number of profiles to return"),
+    profile_token: Optional[str] = Header(None, alias="X-Profile-Token")
+):
+    """
+    Recent request profiles (newest first), recorded for requests sent with `X-Profile-Token`
+    """
+    _require_profiler(profile_token)
+    return {
+        "success": True,
+        "data": await asyncio.to_thread(request_profiler.store.list, limit)
+    }
+
+
+@router.get("/stats/profiles/{name}")
+async def download_profile(
+    name: str = Path(..., description="Profile name (X-Profile-ID of the profiled response)"),
+    profile_token: Optional[str] = Header(None, alias="X-Profile-Token")
+):
+    """
+    One profile in collapsed-stack format (open with speedscope or flamegraph.pl)
+    """
+    _require_profiler(profile_token)
+    content = await asyncio.to_thread(request_profiler.store.read, name)
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Profile {name} not found")
+    return Response(
+        content=content,
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{name}.collapsed"'}
+    )
+
+
+@router.get("/stats/traces", response_model=dict)
+async def slowest_traces(
+    limit: int = Query(10, ge=1, le=100, description="Number of traces to return"),
+    spans: int = Query(5, ge=0, le=50, description="Slowest spans listed per trace")
+):
+    """
+    Slowest recent request traces, each with its slowest spans (storage, extraction, database)
+    """
+    return {
+        "success": True,
+        "data": tracer.recent.slowest(limit=limit, top_spans=spans)
+    }
+
+
 # Health check endpoint specifically for contracts
 @router.get("/health/status")
 async def health_check():
@@ -219,6 +660,7 @@ async def health_check():
 
 
 @router.get("/alerts/expiring", response_model=dict)
+@rate_limited("alerts")
 async def alert_expiring_contracts(
     user_email: str = Query(..., description="User email to filter contracts")
 ):
@@ -229,7 +671,7 @@ async def alert_expiring_contracts(
     try:
         settings = get_settings()
         # 1) Fetch contracts by user
-        result = await cosmos_db.list_contracts_by_user(user_email, limit=1000)
+        result = await contract_repository.list_contracts_by_user(user_email, limit=1000)
         if not result.get("success"):
             raise HTTPException(status_code=500, detail=result.get("message", "Failed to list contracts"))
         contracts = result.get("data", [])
@@ -354,6 +796,7 @@ async def alert_expiring_contracts(
 
 
 @router.get("/report/{contract_id}", response_model=dict)
+@rate_limited("report")
 async def generate_contract_report(
     contract_id: str = Path(..., description="Contract ID to analyze"),
     user_email: str = Query(..., description="User email (partition key)")
@@ -378,7 +821,7 @@ async def generate_contract_report(
         
         # 1) Fetch specific contract
         logger.info(f"📊 Generating report for contract: {contract_id}")
-        result = await cosmos_db.get_contract(contract_id, user_email)
+        result = await contract_repository.get_contract(contract_id, user_email)
         
         if not result.get("success"):
             raise HTTPException(status_code=404, detail=f"Contract {contract_id} not found")
@@ -489,7 +932,96 @@ async def generate_contract_report(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@router.post("/upload", response_model=dict, status_code=201)
+ALLOWED_UPLOAD_EXTENSIONS = ['.pdf', '.jpg', '.jpeg', '.png', '.gif', '.webp']
+MAX_UPLOAD_SIZE_MB = 10
+
+
+def _validate_upload_extension(file_name: str) -> None:
+    """
+    Reject file names whose extension is not a supported contract file type
+    """
+    file_extension = os.path.splitext(file_name)[1].lower()
+    if file_extension not in ALLOWED_UPLOAD_EXTENSIONS:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Unsupported file type: {file_extension}. Allowed types: {', '.join(ALLOWED_UPLOAD_EXTENSIONS)}"
+        )
+
+
+@traced()
+async def _extract_and_save_contract(file_content: bytes, file_name: str, blob_url: str, user_email: str) -> dict:
+    """
+    Extract contract information from an uploaded file and save it to the database
+    
+    Returns the response body shared by `/upload` and `/upload/complete`.
+    """
+    # Step 2: Extract contract information using AI
+    logger.debug("🤖 Step 2: Extracting contract information using AI...")
+    # Rendering and the model call block; run them off the event loop so other requests
+    # (and this upload's progress stream) keep being served
+    extraction_result = await asyncio.to_thread(extraction_service.extract_from_file, file_content, file_name)
+    
+    if not extraction_result["success"]:
+        # Even if extraction fails, we keep the file uploaded
+        logger.warning("⚠️ AI extraction failed: %s", extraction_result["message"])
+        report_progress("failed", message=extraction_result["message"])
+        return {
+            "success": False,
+            "message": "File uploaded but extraction failed",
+            "file_url": blob_url,
+            "extraction_error": extraction_result["message"],
+            "contract_id": None
+        }
+    
+    extracted_data = extraction_result["data"]
+    # Step 3: Save to Cosmos DB
+    logger.debug("💾 Step 3: Saving contract to database...")
+    
+    # Generate unique contract ID
+    contract_id = f"contract_{uuid.uuid4()}"
+    
+    # Create contract data object
+    contract_data = ContractData(
+        id=contract_id,
+        supplier_name=extracted_data.get("supplier_name"),
+        customer_name=extracted_data.get("customer_name"),
+        contract_start_date=extracted_data.get("contract_start_date"),
+        contract_end_date=extracted_data.get("contract_end_date"),
+        termination_notice_period=extracted_data.get("termination_notice_period"),
+        contract_details=extracted_data.get("contract_details"),
+        service_name=extracted_data.get("service_name"),
+        LinkImage=blob_url,
+        UserEmail=user_email,
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow()
+    )
+    
+    # Save to database
+    with observe_stage("db_write"):
+        db_result = await contract_repository.create_contract(contract_data)
+    
+    if not db_result["success"]:
+        logger.error("❌ Failed to save contract to database: %s", db_result["message"])
+        raise HTTPException(status_code=500, detail=db_result["message"])
+    
+    logger.info("✅ Contract saved to database with ID: %s", contract_id)
+    report_progress("saved", contract_id=contract_id)
+    
+    # Return success response
+    return {
+        "success": True,
+        "message": "Contract uploaded, extracted, and saved successfully",
+        "contract_id": contract_id,
+        "file_url": blob_url,
+        "extracted_data": extracted_data,
+        "data": db_result["data"]
+    }
+
+
+@router.post("/upload", response_model=dict, status_code=201, dependencies=[Depends(require_blob_storage)])
+@idempotent("upload", status_code=201)
+@rate_limited("upload")
+@track_job("upload")
 async def upload_and_extract_contract(
     file: UploadFile = File(..., description="Contract file (PDF, JPG, PNG, etc.)"),
     user_email: str = Form(..., description="User email")
@@ -512,105 +1044,170 @@ async def upload_and_extract_contract(
         Dictionary with success status, extracted contract data, and file URL
     """
     try:
-        logger.info(f"📤 Received file upload request: {file.filename} from user: {user_email}")
-        
         # Validate file type
-        allowed_extensions = ['.pdf', '.jpg', '.jpeg', '.png', '.gif', '.webp']
-        file_extension = os.path.splitext(file.filename)[1].lower()
-        
-        if file_extension not in allowed_extensions:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Unsupported file type: {file_extension}. Allowed types: {', '.join(allowed_extensions)}"
-            )
+        _validate_upload_extension(file.filename)
         
         # Read file content
         file_content = await file.read()
         file_size_mb = len(file_content) / (1024 * 1024)
-        logger.info(f"📊 File size: {file_size_mb:.2f} MB")
+        logger.info(
+            "📤 Received file upload request: %s (%.2f MB) from user: %s",
+            file.filename, file_size_mb, user_email,
+            extra={"file_name": file.filename, "file_size_bytes": len(file_content)}
+        )
         
         # Check file size (max 10MB)
-        if file_size_mb > 10:
+        if file_size_mb > MAX_UPLOAD_SIZE_MB:
             raise HTTPException(
                 status_code=400,
-                detail="File size exceeds 10MB limit"
+                detail=f"File size exceeds {MAX_UPLOAD_SIZE_MB}MB limit"
             )
+        report_progress("received", owner=user_email, bytes=len(file_content), file_name=file.filename)
         
         # Step 1: Upload to Azure Storage
-        logger.info("☁️ Step 1: Uploading file to Azure Storage...")
-        upload_success, upload_message, blob_url = storage_service.upload_file(
-            file_content=file_content,
-            file_name=file.filename,
-            content_type=file.content_type or "application/octet-stream",
-            user_email=user_email
-        )
+        logger.debug("☁️ Step 1: Uploading file to Azure Storage...")
+        with observe_stage("blob_upload"):
+            upload_success, upload_message, blob_url = await async_storage_service.upload_file(
+                file_content=file_content,
+                file_name=file.filename,
+                content_type=file.content_type or "application/octet-stream",
+                user_email=user_email
+            )
         
         if not upload_success:
             raise HTTPException(status_code=500, detail=upload_message)
         
-        logger.info(f"✅ File uploaded to: {blob_url}")
-        
-        # Step 2: Extract contract information using AI
-        logger.info("🤖 Step 2: Extracting contract information using AI...")
-        extraction_result = extraction_service.extract_from_file(file_content, file.filename)
-        
-        if not extraction_result["success"]:
-            # Even if extraction fails, we keep the file uploaded
-            logger.warning(f"⚠️ AI extraction failed: {extraction_result['message']}")
-            return {
-                "success": False,
-                "message": "File uploaded but extraction failed",
-                "file_url": blob_url,
-                "extraction_error": extraction_result["message"],
-                "contract_id": None
-            }
-        
-        extracted_data = extraction_result["data"]
-        logger.info("✅ Contract information extracted successfully")
-        
-        # Step 3: Save to Cosmos DB
-        logger.info("💾 Step 3: Saving contract to database...")
-        
-        # Generate unique contract ID
-        contract_id = f"contract_{uuid.uuid4()}"
-        
-        # Create contract data object
-        contract_data = ContractData(
-            id=contract_id,
-            supplier_name=extracted_data.get("supplier_name"),
-            customer_name=extracted_data.get("customer_name"),
-            contract_start_date=extracted_data.get("contract_start_date"),
-            contract_end_date=extracted_data.get("contract_end_date"),
-            termination_notice_period=extracted_data.get("termination_notice_period"),
-            contract_details=extracted_data.get("contract_details"),
-            service_name=extracted_data.get("service_name"),
-            LinkImage=blob_url,
-            UserEmail=user_email,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
-        )
+        logger.info("✅ File uploaded to: %s", blob_url)
+        report_progress("blob_uploaded")
         
-        # Save to database
-        db_result = await cosmos_db.create_contract(contract_data)
+        return await _extract_and_save_contract(file_content, file.filename, blob_url, user_email)
         
-        if not db_result["success"]:
-            logger.error(f"❌ Failed to save contract to database: {db_result['message']}")
-            raise HTTPException(status_code=500, detail=db_result["message"])
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("❌ Unexpected error in upload_and_extract_contract: %s", e)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/upload/{upload_id}/events")
+async def stream_upload_progress(
+    upload_id: str = Path(..., description="Upload id sent as X-Upload-ID with the upload"),
+    user_email: str = Query(..., description="User email"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Stream the stages of an upload as Server-Sent Events
+    
+    Open the stream, then send `POST /upload` (or `/upload/complete`) with `X-Upload-ID: {upload_id}`.
+    Events: `receiving`, `received`, `blob_uploaded` / `blob_downloaded`, `pages_rendered`,
+    `model_request_sent`, `model_response_received`, `saved`, `failed`, and `done` (with the
+    HTTP status of the upload) as the last one. A reconnecting `EventSource` resumes after
+    `Last-Event-ID`.
+    """
+    if progress_broker is None:
+        raise HTTPException(status_code=404, detail="Upload progress is disabled")
+    if not valid_upload_id(upload_id):
+        raise HTTPException(status_code=400, detail="Invalid upload id")
+    owner = await asyncio.to_thread(progress_broker.owner, upload_id)
+    if owner is not None and owner != user_email.lower():
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    settings = get_settings()
+    after_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    return StreamingResponse(
+        stream_events(
+            upload_id,
+            user_email,
+            after_id=after_id,
+            heartbeat_seconds=settings.progress_heartbeat_seconds,
+            idle_timeout_seconds=settings.progress_idle_timeout_seconds
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/upload/sas", response_model=dict, dependencies=[Depends(require_blob_storage)])
+async def create_upload_url(request: Request, upload_request: UploadUrlRequest):
+    """
+    Issue a short-lived, write-only URL so the browser can upload a contract file directly
+    to Blob Storage instead of proxying it through the API.
+    
+    The client sends the file with `PUT` to `upload_url` (including the returned `headers`),
+    then calls `POST /upload/complete` with the returned `blob_name` and `upload_token` to run
+    extraction.
+    """
+    try:
+        _validate_upload_extension(upload_request.file_name)
+        settings = get_settings()
         
-        logger.info(f"✅ Contract saved to database with ID: {contract_id}")
+        blob_name = async_storage_service.generate_blob_name(upload_request.file_name, upload_request.user_email)
+        upload = async_storage_service.generate_upload_url(
+            blob_name,
+            content_type=upload_request.content_type or "application/octet-stream",
+            expires_in_seconds=settings.upload_url_ttl_seconds,
+            api_base_url=str(request.base_url)
+        )
+        logger.info(f"🔑 Issued direct upload URL for {blob_name}")
         
-        # Return success response
         return {
             "success": True,
-            "message": "Contract uploaded, extracted, and saved successfully",
-            "contract_id": contract_id,
-            "file_url": blob_url,
-            "extracted_data": extracted_data,
-            "data": db_result["data"]
+            "blob_name": blob_name,
+            "upload_token": async_storage_service.upload_owner_token(blob_name, upload_request.user_email),
+            "max_size_mb": MAX_UPLOAD_SIZE_MB,
+            **upload
         }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Unexpected error issuing upload URL: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.post("/upload/complete", response_model=dict, status_code=201, dependencies=[Depends(require_blob_storage)])
+@idempotent("upload_complete", status_code=201)
+@rate_limited("upload")
+@track_job("upload_complete")
+async def complete_direct_upload(complete_request: UploadCompleteRequest):
+    """
+    Extract and save a contract file that the client uploaded directly to Blob Storage
+    using a URL from `POST /upload/sas`.
+    """
+    try:
+        blob_name = complete_request.blob_name
+        user_email = complete_request.user_email
+        
+        # Only blobs whose upload URL was issued to this exact user can be completed (the blob name
+        # prefix alone is ambiguous: "a.b@x.com" and "a_b@x.com" share one)
+        if not async_storage_service.verify_upload_owner(blob_name, user_email, complete_request.upload_token):
+            raise HTTPException(status_code=403, detail="Blob does not belong to this user")
+        file_name = complete_request.file_name or os.path.basename(blob_name)
+        _validate_upload_extension(blob_name)
         
+        logger.info("📥 Completing direct upload: %s from user: %s", blob_name, user_email)
+        # The SAS can't cap the upload size, so check it before anything is read into memory
+        properties = await async_storage_service.get_file_properties(blob_name)
+        if properties is None:
+            raise HTTPException(status_code=404, detail=f"Uploaded file not found: {blob_name}")
+        if properties["size"] > MAX_UPLOAD_SIZE_MB * 1024 * 1024:
+            await async_storage_service.delete_file(blob_name)
+            raise HTTPException(status_code=400, detail=f"File size exceeds {MAX_UPLOAD_SIZE_MB}MB limit")
+        
+        with observe_stage("blob_download"):
+            # Pinned to the checked version, so a larger file written since isn't downloaded
+            download_success, download_message, file_content = await async_storage_service.download_file(
+                blob_name, etag=properties["etag"]
+            )
+        if not download_success:
+            raise HTTPException(status_code=409, detail=f"Uploaded file changed or disappeared: {blob_name}")
+        report_progress("blob_downloaded", owner=user_email, bytes=len(file_content), file_name=file_name)
+        
+        blob_url = async_storage_service.url_prefix + blob_name
+        return await _extract_and_save_contract(file_content, file_name, blob_url, user_email)
+    
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Unexpected error in upload_and_extract_contract: {str(e)}")
+        logger.error(f"❌ Unexpected error in complete_direct_upload: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -0,0 +1,177 @@
+"""
+Parameterized query builders for contract search (Cosmos DB SQL and SQLite)
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.indexing_policy import EQUALITY_FILTER_FIELDS, SORTABLE_FIELDS, has_composite_index
+from app.summaries import CONTRACT_STATUSES, parse_contract_date
+
+# Contract dates are stored as YYYY/MM/DD strings, so range filters compare strings in this format
+STORED_DATE_FORMAT = "%Y/%m/%d"
+
+
+def normalize_date(value: Optional[str]) -> Optional[str]:
+    """
+    Convert a YYYY/MM/DD or YYYY-MM-DD date into the stored YYYY/MM/DD format
+
+    Raises:
+        ValueError: If the value is not a recognised date
+    """
+    if not value:
+        return None
+    parsed = parse_contract_date(value)
+    if parsed is None:
+        raise ValueError(f"Invalid date: {value}. Use YYYY/MM/DD or YYYY-MM-DD")
+    return parsed.strftime(STORED_DATE_FORMAT)
+
+
+@dataclass
+class SearchSpec:
+    """Validated, backend-neutral form of a contract search"""
+    # (field, operator, parameter name, value)
+    comparisons: List[Tuple[str, str, str, Any]] = field(default_factory=list)
+    text: Optional[str] = None
+    missing_end_date: bool = False
+    order_fields: List[str] = field(default_factory=list)
+    descending: bool = False
+
+
+def parse_search_filters(
+    supplier_name: Optional[str] = None,
+    customer_name: Optional[str] = None,
+    service_name: Optional[str] = None,
+    text: Optional[str] = None,
+    start_date_from: Optional[str] = None,
+    start_date_to: Optional[str] = None,
+    end_date_from: Optional[str] = None,
+    end_date_to: Optional[str] = None,
+    status: Optional[str] = None,
+    sort_by: str = "contract_end_date",
+    sort_order: str = "asc",
+    window_days: int = 60,
+    now: Optional[datetime] = None
+) -> SearchSpec:
+    """
+    Validate search filters and translate them into comparisons on stored fields
+
+    Raises:
+        ValueError: On an unknown sort field, sort order, status or malformed date
+    """
+    if sort_by not in SORTABLE_FIELDS:
+        raise ValueError(f"Unsupported sort field: {sort_by}. Allowed: {', '.join(SORTABLE_FIELDS)}")
+    if sort_order.lower() not in ("asc", "desc"):
+        raise ValueError("sort_order must be 'asc' or 'desc'")
+    if status and status not in CONTRACT_STATUSES:
+        raise ValueError(f"Unsupported status: {status}. Allowed: {', '.join(CONTRACT_STATUSES)}")
+
+    spec = SearchSpec(text=text or None, descending=sort_order.lower() == "desc")
+
+    equality_fields = []
+    for field_name, value in (
+        ("supplier_name", supplier_name),
+        ("customer_name", customer_name),
+        ("service_name", service_name),
+    ):
+        if value:
+            spec.comparisons.append((field_name, "=", f"@{field_name}", value))
+            equality_fields.append(field_name)
+
+    for field_name, operator, name, value in (
+        ("contract_start_date", ">=", "@start_from", start_date_from),
+        ("contract_start_date", "<=", "@start_to", start_date_to),
+        ("contract_end_date", ">=", "@end_from", end_date_from),
+        ("contract_end_date", "<=", "@end_to", end_date_to),
+    ):
+        normalized = normalize_date(value)
+        if normalized:
+            spec.comparisons.append((field_name, operator, name, normalized))
+
+    if status:
+        now = now or datetime.utcnow()
+        today = now.strftime(STORED_DATE_FORMAT)
+        window_end = (now + timedelta(days=window_days)).strftime(STORED_DATE_FORMAT)
+        if status == "missing_end_date":
+            spec.missing_end_date = True
+        elif status == "expired":
+            spec.comparisons.append(("contract_end_date", "<", "@today", today))
+        elif status == "near_expiry":
+            spec.comparisons.append(("contract_end_date", ">=", "@today", today))
+            spec.comparisons.append(("contract_end_date", "<=", "@window_end", window_end))
+        else:
+            spec.comparisons.append(("contract_end_date", ">", "@window_end", window_end))
+
+    spec.order_fields = [sort_by]
+    # With a single equality filter, ordering by the filtered field first lets Cosmos use the composite index
+    if len(equality_fields) == 1 and equality_fields[0] in EQUALITY_FILTER_FIELDS \
+            and has_composite_index(equality_fields[0], sort_by):
+        spec.order_fields = [equality_fields[0], sort_by]
+    return spec
+
+
+def build_search_query(**filters) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Build a parameterized Cosmos DB query over a single user's partition
+
+    The partition key is supplied separately to ``query_items``, so the query never
+    crosses partitions and no user input is interpolated into the SQL text.
+
+    Returns:
+        Tuple of (query text, parameters)
+
+    Raises:
+        ValueError: If the filters are invalid
+    """
+    spec = parse_search_filters(**filters)
+
+    conditions: List[str] = []
+    parameters: List[Dict[str, Any]] = []
+    for field_name, operator, name, value in spec.comparisons:
+        conditions.append(f"c.{field_name} {operator} {name}")
+        parameters.append({"name": name, "value": value})
+    if spec.text:
+        conditions.append("CONTAINS(c.contract_details, @text, true)")
+        parameters.append({"name": "@text", "value": spec.text})
+    if spec.missing_end_date:
+        conditions.append("(NOT IS_DEFINED(c.contract_end_date) OR IS_NULL(c.contract_end_date))")
+
+    direction = "DESC" if spec.descending else "ASC"
+    query = "SELECT * FROM c"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY " + ", ".join(f"c.{field_name} {direction}" for field_name in spec.order_fields)
+    return query, parameters
+
+
+def build_sqlite_search_query(**filters) -> Tuple[str, List[Any]]:
+    """
+    Build the equivalent parameterized SQLite query over the local ``contracts`` table
+
+    Returns:
+        Tuple of (WHERE/ORDER BY clause text, positional parameters); the caller adds the
+        partition condition, LIMIT and OFFSET.
+
+    Raises:
+        ValueError: If the filters are invalid
+    """
+    spec = parse_search_filters(**filters)
+
+    conditions: List[str] = []
+    parameters: List[Any] = []
+    for field_name, operator, _, value in spec.comparisons:
+        conditions.append(f"json_extract(body, '$.{field_name}') {operator} ?")
+        parameters.append(value)
+    if spec.text:
+        conditions.append("instr(lower(json_extract(body, '$.contract_details')), lower(?)) > 0")
+        parameters.append(spec.text)
+    if spec.missing_end_date:
+        conditions.append("json_extract(body, '$.contract_end_date') IS NULL")
+
+    direction = "DESC" if spec.descending else "ASC"
+    clause = ""
+    if conditions:
+        clause += " AND " + " AND ".join(conditions)
+    clause += " ORDER BY " + ", ".join(f"json_extract(body, '$.{field_name}') {direction}" for field_name in spec.order_fields)
+    return clause, parameters
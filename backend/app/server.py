@@ -0,0 +1,152 @@
+"""
+Production server: gunicorn managing uvicorn workers (uvloop + httptools)
+
+* one worker per available CPU by default, capped by ``server_max_workers``
+* the app is imported once in the master and forked (``server_preload``), so workers share its memory
+* workers are recycled after ``server_max_requests`` (+ jitter) requests, bounding PIL / PDF memory growth
+* with several workers, Prometheus metrics are aggregated through ``PROMETHEUS_MULTIPROC_DIR``
+
+Falls back to ``uvicorn --workers`` (no preloading or recycling) where gunicorn is unavailable, e.g. Windows.
+"""
+
+import importlib.util
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+APP_PATH = "main:app"
+WORKER_CLASS = "app.server.ProductionWorker"
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (honours affinity / cpusets, unlike ``os.cpu_count``)"""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def default_workers(settings) -> int:
+    """``server_workers``, or one worker per available CPU when it is 0"""
+    if settings.server_workers > 0:
+        return settings.server_workers
+    return max(1, min(available_cpus(), settings.server_max_workers))
+
+
+def event_loop_options() -> Dict[str, str]:
+    """uvloop / httptools when installed, otherwise asyncio / h11"""
+    return {
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools") else "h11",
+    }
+
+
+def gunicorn_options(settings, workers: Optional[int] = None, bind: Optional[str] = None) -> Dict[str, Any]:
+    """Gunicorn configuration built from the ``server_*`` settings"""
+    return {
+        "bind": bind or f"{settings.host}:{settings.port}",
+        "workers": workers or default_workers(settings),
+        "worker_class": WORKER_CLASS,
+        "preload_app": settings.server_preload,
+        "max_requests": settings.server_max_requests,
+        "max_requests_jitter": settings.server_max_requests_jitter if settings.server_max_requests else 0,
+        "keepalive": settings.server_keep_alive_seconds,
+        "backlog": settings.server_backlog,
+        "graceful_timeout": settings.server_graceful_timeout_seconds,
+        "timeout": settings.server_worker_timeout_seconds,
+        "loglevel": settings.log_level.lower(),
+        "accesslog": "-" if settings.server_access_log else None,
+        "child_exit": _child_exit,
+    }
+
+
+def _child_exit(server, worker) -> None:
+    """Drop a dead worker's live gauges from the shared Prometheus files"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def prepare_multiprocess_metrics(settings, workers: int) -> Optional[str]:
+    """
+    Point prometheus_client at a fresh shared directory when several workers serve ``/metrics``.
+
+    Must run before ``prometheus_client`` is imported (i.e. before the app is loaded).
+    """
+    if workers < 2 or not settings.metrics_enabled:
+        return None
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.path.join(tempfile.gettempdir(), "saaseer-prometheus")
+    # Files left by a previous run would be summed into the new one
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+    return path
+
+
+if importlib.util.find_spec("gunicorn") is not None:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    class ProductionWorker(UvicornWorker):
+        """Uvicorn worker on uvloop / httptools that drains in-flight requests on shutdown"""
+
+        CONFIG_KWARGS = event_loop_options()
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.config.timeout_graceful_shutdown = self.cfg.graceful_timeout
+
+    class GunicornApplication(BaseApplication):
+        """Runs the ASGI app under gunicorn without a config file"""
+
+        def __init__(self, options: Dict[str, Any], app_path: str = APP_PATH):
+            self.options = options
+            self.app_path = app_path
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from gunicorn.util import import_app
+            return import_app(self.app_path)
+else:
+    GunicornApplication = None
+
+
+def run(settings, workers: Optional[int] = None, bind: Optional[str] = None) -> None:
+    """Serve the API with the production configuration"""
+    options = gunicorn_options(settings, workers=workers, bind=bind)
+    prepare_multiprocess_metrics(settings, options["workers"])
+    loop = event_loop_options()
+    logger.info(
+        f"🚀 Serving on {options['bind']} with {options['workers']} worker(s), "
+        f"{loop['loop']} / {loop['http']}, recycling after {options['max_requests'] or '∞'} requests"
+    )
+    if options["workers"] == 1 and options["max_requests"]:
+        logger.warning("⚠️ Recycling the only worker pauses serving while it restarts; run at least 2 workers")
+    if options["workers"] > 1 and settings.rate_limit_enabled and settings.rate_limit_backend == "memory":
+        logger.warning("⚠️ RATE_LIMIT_BACKEND=memory keeps separate limits per worker; use sqlite to share them")
+
+    if GunicornApplication is not None:
+        GunicornApplication(options).run()
+        return
+
+    import uvicorn
+    logger.warning("⚠️ gunicorn is not installed: running uvicorn workers without preloading or recycling")
+    host, _, port = options["bind"].rpartition(":")
+    uvicorn.run(
+        APP_PATH,
+        host=host,
+        port=int(port),
+        workers=options["workers"],
+        backlog=options["backlog"],
+        timeout_keep_alive=options["keepalive"],
+        timeout_graceful_shutdown=options["graceful_timeout"],
+        log_level=options["loglevel"],
+        **loop
+    )
@@ -0,0 +1,150 @@
+"""
+Lazily-constructed service singletons and the warm-up status reported by ``/ready``
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LazyService(Generic[T]):
+    """
+    Proxy for a module-level service that is built on first use instead of at import time.
+
+    Attribute access is forwarded to the instance, so call sites keep using the module global
+    (``contract_repository.get_contract(...)``). ``lifespan`` builds the instances in worker
+    threads during warm-up; a request that arrives first builds it on demand.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self._name = name
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self) -> bool:
+        """Whether the service has been built"""
+        return self._instance is not None
+
+    def get(self) -> T:
+        """Return the service, building it on first call"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    started = time.perf_counter()
+                    self._instance = self._factory()
+                    logger.info(f"✅ Initialized {self._name} in {time.perf_counter() - started:.2f}s")
+        return self._instance
+
+    def override(self, instance: T) -> None:
+        """Use ``instance`` instead of building the service (load tests and other stand-ins)"""
+        with self._lock:
+            self._instance = instance
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.get(), attr)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self.initialized else "not initialized"
+        return f"<LazyService {self._name} ({state})>"
+
+
+class Readiness:
+    """
+    Per-dependency warm-up status: ``pending`` -> ``warming`` -> ``ready`` or ``failed``
+
+    A failed initializer is retried with exponential backoff (``failed`` in between), so a
+    dependency that was unreachable at startup becomes ready without restarting the process.
+    """
+
+    def __init__(self, retry_initial_seconds: float = 1.0, retry_max_seconds: float = 60.0):
+        self.retry_initial_seconds = retry_initial_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self._ready_events: Dict[str, asyncio.Event] = {}
+
+    def register(self, name: str, required: bool = True) -> None:
+        self.components[name] = {
+            "status": "pending", "required": required, "duration_seconds": None, "error": None, "attempts": 0
+        }
+        self._ready_events[name] = asyncio.Event()
+
+    async def warm_up(self, name: str, initializer: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Run one dependency's initializer until it succeeds, recording its status
+
+        Returns True once it succeeded (cancellation stops the retries).
+        """
+        if name not in self.components:
+            self.register(name)
+        component = self.components[name]
+        delay = self.retry_initial_seconds
+        started = time.perf_counter()
+        while True:
+            component["status"] = "warming"
+            component["attempts"] += 1
+            try:
+                await initializer()
+            except asyncio.CancelledError:
+                component["status"] = "pending"
+                raise
+            except Exception as e:
+                component["status"] = "failed"
+                component["error"] = str(e)
+                component["duration_seconds"] = round(time.perf_counter() - started, 3)
+                logger.error(f"❌ Failed to initialize {name} (attempt {component['attempts']}), retrying in {delay:.0f}s: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.retry_max_seconds)
+                continue
+            component["status"] = "ready"
+            component["error"] = None
+            component["duration_seconds"] = round(time.perf_counter() - started, 3)
+            self._ready_events[name].set()
+            return True
+
+    async def wait_until_ready(self, name: str, timeout: float) -> bool:
+        """
+        Wait up to ``timeout`` seconds for a dependency to become ready
+
+        Dependencies that aren't tracked (no lifespan warm-up, e.g. in tests) count as ready.
+        """
+        event = self._ready_events.get(name)
+        if event is None or event.is_set():
+            return True
+        if self.components[name]["status"] == "failed":
+            # Between retries: don't hold requests for a dependency known to be down
+            return False
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    @property
+    def ready(self) -> bool:
+        """True once every required dependency is ready"""
+        return all(
+            component["status"] == "ready"
+            for component in self.components.values()
+            if component["required"]
+        )
+
+    def report(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "components": self.components}
+
+
+def _build_readiness() -> Readiness:
+    from config.settings import get_settings
+    settings = get_settings()
+    return Readiness(settings.warm_up_retry_initial_seconds, settings.warm_up_retry_max_seconds)
+
+
+# Global warm-up status (filled in by lifespan)
+readiness = _build_readiness()
@@ -1,16 +1,20 @@
 import os
 import logging
+from azure.core.exceptions import ResourceExistsError
 from azure.storage.blob import BlobServiceClient, ContentSettings
-from typing import Optional, Tuple
-import uuid
 from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
+from app.repository import BlobStorage
+from app.services import LazyService
+from app.tracing import traced
+from config.settings import get_settings
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 
-class AzureStorageService:
+class AzureStorageService(BlobStorage):
     """Service for handling file uploads to Azure Blob Storage"""
     
     def __init__(self):
@@ -21,16 +25,16 @@ class AzureStorageService:
         if not all([self.storage_url, self.storage_key, self.container_name]):
             raise ValueError("Azure Storage configuration is missing in environment variables")
         
-        # Initialize blob service client
+        self.url_prefix = f"{self.storage_url.rstrip('/')}/{self.container_name}/"
+        self.content_addressed = get_settings().blob_content_addressed
+        
+        # Initialize blob service client (no network call; the container check runs on demand)
         self.blob_service_client = BlobServiceClient(
             account_url=self.storage_url,
             credential=self.storage_key
         )
-        
-        # Ensure container exists
-        self._ensure_container_exists()
     
-    def _ensure_container_exists(self):
+    def ensure_container_exists(self):
         """Ensure the container exists, create if it doesn't"""
         try:
             container_client = self.blob_service_client.get_container_client(self.container_name)
@@ -43,6 +47,7 @@ class AzureStorageService:
             logger.error(f"❌ Error ensuring container exists: {str(e)}")
             raise
     
+    @traced()
     def upload_file(
         self, 
         file_content: bytes, 
@@ -63,17 +68,8 @@ class AzureStorageService:
             Tuple of (success: bool, message: str, blob_url: Optional[str])
         """
         try:
-            # Generate unique blob name with timestamp and UUID
-            timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-            file_extension = os.path.splitext(file_name)[1]
-            unique_id = str(uuid.uuid4())[:8]
-            
-            # Create blob name with user email prefix if provided
-            if user_email:
-                safe_email = user_email.replace("@", "_at_").replace(".", "_")
-                blob_name = f"{safe_email}/{timestamp}_{unique_id}{file_extension}"
-            else:
-                blob_name = f"{timestamp}_{unique_id}{file_extension}"
+            # Content hash (or timestamp + UUID) blob name, with user email prefix if provided
+            blob_name = self.blob_name_for_upload(file_content, file_name, user_email)
             
             # Get blob client
             blob_client = self.blob_service_client.get_blob_client(
@@ -81,12 +77,23 @@ class AzureStorageService:
                 blob=blob_name
             )
             
+            # Skip the transfer when identical content is already stored
+            if self.content_addressed and blob_client.exists():
+                # Refresh Last-Modified so the orphan sweeper's age guard covers the new reference
+                blob_client.set_blob_metadata({"last_uploaded": datetime.utcnow().isoformat()})
+                logger.info(f"♻️ File already stored, skipped upload: {blob_name}")
+                return True, "File already stored", blob_client.url
+            
             # Upload the file
-            blob_client.upload_blob(
-                file_content,
-                overwrite=True,
-                content_settings=ContentSettings(content_type=content_type)
-            )
+            try:
+                blob_client.upload_blob(
+                    file_content,
+                    overwrite=not self.content_addressed,
+                    content_settings=ContentSettings(content_type=content_type)
+                )
+            except ResourceExistsError:
+                logger.info(f"♻️ File stored concurrently, skipped upload: {blob_name}")
+                return True, "File already stored", blob_client.url
             
             # Get the blob URL
             blob_url = blob_client.url
@@ -98,6 +105,7 @@ class AzureStorageService:
             logger.error(f"❌ Error uploading file to Azure Storage: {str(e)}")
             return False, f"Failed to upload file: {str(e)}", None
     
+    @traced()
     def download_file(self, blob_name: str) -> Tuple[bool, str, Optional[bytes]]:
         """
         Download a file from Azure Blob Storage
@@ -123,6 +131,7 @@ class AzureStorageService:
             logger.error(f"❌ Error downloading file from Azure Storage: {str(e)}")
             return False, f"Failed to download file: {str(e)}", None
     
+    @traced()
     def delete_file(self, blob_name: str) -> Tuple[bool, str]:
         """
         Delete a file from Azure Blob Storage
@@ -147,8 +156,61 @@ class AzureStorageService:
         except Exception as e:
             logger.error(f"❌ Error deleting file from Azure Storage: {str(e)}")
             return False, f"Failed to delete file: {str(e)}"
+    
+    @traced()
+    def blob_exists(self, blob_name: str) -> bool:
+        """
+        Check whether a blob exists
+        """
+        return self.blob_service_client.get_blob_client(
+            container=self.container_name,
+            blob=blob_name
+        ).exists()
+    
+    @traced()
+    def put_blob(self, blob_name: str, content: bytes, content_type: str = "application/octet-stream") -> None:
+        """
+        Store content under an exact blob name (used for derived artifacts such as rendered pages)
+        """
+        blob_client = self.blob_service_client.get_blob_client(
+            container=self.container_name,
+            blob=blob_name
+        )
+        blob_client.upload_blob(
+            content,
+            overwrite=True,
+            content_settings=ContentSettings(content_type=content_type)
+        )
+    
+    @traced()
+    def list_blobs(self, prefix: str) -> List[Dict[str, Any]]:
+        """
+        List blobs under a prefix with their size and last-modified time
+        """
+        container_client = self.blob_service_client.get_container_client(self.container_name)
+        return [
+            {"name": blob.name, "size": blob.size, "last_modified": blob.last_modified}
+            for blob in container_client.list_blobs(name_starts_with=prefix)
+        ]
+
+
+
+def create_storage_service() -> BlobStorage:
+    """
+    Build the blob storage service selected by ``settings.storage_backend``
+    """
+    settings = get_settings()
+    if settings.storage_backend == "local":
+        from app.local_storage import LocalBlobStorageService
+        return LocalBlobStorageService(
+            os.path.join(settings.local_data_dir, "blobs"),
+            settings.azure_container_name or "contracts",
+            signing_key=settings.local_blob_signing_key,
+            content_addressed=settings.blob_content_addressed
+        )
+    return AzureStorageService()
 
 
-# Global instance
-storage_service = AzureStorageService()
+# Global instance (built on first use)
+storage_service: BlobStorage = LazyService("blob storage (sync)", create_storage_service)
 
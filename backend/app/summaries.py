@@ -0,0 +1,735 @@
+"""
+Per-user contract summaries maintained incrementally from the Cosmos DB change feed
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from app.request_units import background_priority
+
+logger = logging.getLogger(__name__)
+
+DATE_FORMATS = ("%Y/%m/%d", "%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f")
+
+CONTRACT_STATUSES = ("expired", "near_expiry", "active", "missing_end_date")
+
+# Item type of the per-contract entries stored next to each user's summary document
+SUMMARY_ENTRY_TYPE = "summary_entry"
+
+# Removed contracts are remembered this long, so a lagging change feed batch can't resurrect them
+TOMBSTONE_RETENTION_SECONDS = 7 * 24 * 3600
+
+
+def parse_contract_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse a contract date in YYYY/MM/DD or ISO format"""
+    if not value:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except Exception:
+            continue
+    return None
+
+
+def contract_status(end_date: Optional[str], now: datetime, window_days: int) -> str:
+    """Classify a contract as expired, near_expiry, active or missing_end_date"""
+    end_dt = parse_contract_date(end_date)
+    if not end_dt:
+        return "missing_end_date"
+    if end_dt < now:
+        return "expired"
+    if end_dt <= now + timedelta(days=window_days):
+        return "near_expiry"
+    return "active"
+
+
+def summary_id(user_email: str) -> str:
+    """Document id of the summary for a user"""
+    return f"summary_{user_email}"
+
+
+def summary_entry_id(contract_id: str) -> str:
+    """Item id of a contract's summary entry (in its owner's partition of the summary container)"""
+    return f"entry_{contract_id}"
+
+
+def new_summary(user_email: str) -> Dict[str, Any]:
+    """
+    Return an empty summary document for a user
+
+    The document holds counts and tallies only, so its size doesn't grow with the number of
+    contracts: ``end_date_counts`` (contracts per end date, from which the statuses are counted
+    for any day), supplier and service tallies and the first ``top_n`` of ``next_expiring``. The
+    compact per-contract entries the tallies are maintained from are separate items.
+    """
+    return {
+        "id": summary_id(user_email),
+        "UserEmail": user_email,
+        "type": "user_summary",
+        # Bumped by a rebuild: entries from an older generation are not counted in the tallies
+        "generation": 0,
+        # Bumped by every update; stamped on the entries it writes
+        "version": 0,
+        "total": 0,
+        "end_date_counts": {},
+        "supplier_counts": {},
+        "service_counts": {},
+        "next_expiring": [],
+        # Entries of the last update, until they are known to be stored as items
+        "pending_entries": {},
+    }
+
+
+def reset_summary(summary: Dict[str, Any]) -> None:
+    """Start a new generation with empty tallies (entries are counted again as they are re-applied)"""
+    summary.update({
+        key: value for key, value in new_summary(summary["UserEmail"]).items()
+        if key not in ("generation", "version", "pending_entries")
+    })
+    summary["generation"] = summary.get("generation", 0) + 1
+
+
+def normalize_end_date(value: Optional[str]) -> Optional[str]:
+    """A contract end date as YYYY-MM-DD (sortable), or None if missing or unparseable"""
+    end_dt = parse_contract_date(value)
+    return end_dt.strftime("%Y-%m-%d") if end_dt else None
+
+
+def contract_entry(contract: Dict[str, Any]) -> Dict[str, Any]:
+    """The compact summary entry of a contract"""
+    return {
+        "contract_id": contract["id"],
+        "contract_end_date": contract.get("contract_end_date"),
+        "end_date": normalize_end_date(contract.get("contract_end_date")),
+        "supplier_name": contract.get("supplier_name"),
+        "service_name": contract.get("service_name"),
+        "contract_ts": contract.get("_ts") or 0,
+    }
+
+
+def removal_entry(contract_id: str, removed_ts: float) -> Dict[str, Any]:
+    """The summary entry (tombstone) of a deleted contract; ``removed_ts`` is epoch seconds"""
+    return {"contract_id": contract_id, "end_date": None, "removed_ts": removed_ts}
+
+
+def is_live(entry: Optional[Dict[str, Any]]) -> bool:
+    return entry is not None and entry.get("removed_ts") is None
+
+
+def supersede(
+    current: Optional[Dict[str, Any]],
+    update: Dict[str, Any],
+    authoritative: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    The entry to store for ``update`` (a contract's entry or a removal), or None if ``current``
+    already reflects it or something newer
+
+    A change older than the stored entry, or than the contract's removal (a lagging change feed
+    batch read after the delete), is ignored. ``authoritative`` updates (a rebuild listing the
+    contracts that exist now) replace whatever is stored.
+    """
+    if not is_live(update):
+        if not is_live(current) and current is not None:
+            return None
+        removed_ts = max(update["removed_ts"], (current or {}).get("contract_ts") or 0)
+        return {**update, "removed_ts": removed_ts}
+    if current is None or authoritative:
+        return dict(update)
+    if not is_live(current):
+        return dict(update) if update["contract_ts"] > current["removed_ts"] else None
+    return dict(update) if update["contract_ts"] >= (current.get("contract_ts") or 0) else None
+
+
+def _expiry_key(entry: Dict[str, Any]):
+    return entry["end_date"], entry["contract_id"]
+
+
+def _next_expiring_item(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "contract_id": entry["contract_id"],
+        "contract_end_date": entry.get("contract_end_date"),
+        "end_date": entry["end_date"],
+        "service_name": entry.get("service_name"),
+        "supplier_name": entry.get("supplier_name"),
+    }
+
+
+def _tally(counts: Dict[str, int], key: Optional[str], change: int) -> None:
+    if not key:
+        return
+    count = counts.get(key, 0) + change
+    if count > 0:
+        counts[key] = count
+    else:
+        counts.pop(key, None)
+
+
+def _count(summary: Dict[str, Any], entry: Dict[str, Any], change: int) -> None:
+    summary["total"] += change
+    _tally(summary["end_date_counts"], entry.get("end_date"), change)
+    _tally(summary["supplier_counts"], entry.get("supplier_name"), change)
+    _tally(summary["service_counts"], entry.get("service_name"), change)
+
+
+def upcoming_count(summary: Dict[str, Any]) -> int:
+    """Number of contracts ending after the summary's ``as_of`` day"""
+    today = summary["as_of"]
+    return sum(count for end_date, count in summary["end_date_counts"].items() if end_date > today)
+
+
+def apply_entry(
+    summary: Dict[str, Any],
+    old: Optional[Dict[str, Any]],
+    new: Optional[Dict[str, Any]],
+    top_n: int
+) -> None:
+    """
+    Move one contract's contribution to the summary from its ``old`` entry to its ``new`` one
+    (either may be None or a removal); aggregates must be refreshed for the current day first
+
+    ``next_expiring`` is kept as a prefix of the user's upcoming contracts by end date: a contract
+    is only added where it certainly belongs, and ``fill_next_expiring`` tops the list up from the
+    stored entries when removals leave it short.
+    """
+    if is_live(old):
+        _count(summary, old, -1)
+    listed = summary["next_expiring"]
+    contract_id = (new or old)["contract_id"]
+    listed[:] = [item for item in listed if item["contract_id"] != contract_id]
+    if not is_live(new):
+        return
+    end_date = new.get("end_date")
+    if end_date and end_date > summary["as_of"]:
+        # Every upcoming contract is listed, or this one sorts before the last one listed
+        if len(listed) >= upcoming_count(summary) or (listed and end_date < listed[-1]["end_date"]):
+            listed.append(_next_expiring_item(new))
+            listed.sort(key=_expiry_key)
+            del listed[top_n:]
+    _count(summary, new, 1)
+
+
+def next_expiring_is_short(summary: Dict[str, Any], top_n: int) -> bool:
+    """Whether ``next_expiring`` holds fewer contracts than it should"""
+    return len(summary["next_expiring"]) < min(top_n, upcoming_count(summary))
+
+
+def fill_next_expiring(db, summary: Dict[str, Any], top_n: int) -> None:
+    """
+    Refill a short ``next_expiring`` from the user's stored entries (one ordered query),
+    taking the summary's pending entries over their stored versions
+    """
+    if not next_expiring_is_short(summary, top_n):
+        return
+    generation = summary.get("generation", 0)
+    pending = summary.get("pending_entries", {})
+    entries = [
+        entry for entry in db.query_next_expiring_entries(
+            summary["UserEmail"], generation, summary["as_of"], top_n + len(pending)
+        )
+        if entry["contract_id"] not in pending
+    ]
+    entries += [
+        entry for entry in pending.values()
+        if is_live(entry) and entry.get("generation") == generation
+        and entry.get("end_date") and entry["end_date"] > summary["as_of"]
+    ]
+    entries.sort(key=_expiry_key)
+    summary["next_expiring"] = [_next_expiring_item(entry) for entry in entries[:top_n]]
+
+
+def refresh_aggregates(
+    summary: Dict[str, Any],
+    window_days: int,
+    top_n: int,
+    now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Recompute the counts by status from the end date tally, and drop contracts that have
+    expired since from ``next_expiring``
+
+    Statuses depend on the current date, so ``as_of`` records the day they were computed for.
+    """
+    now = now or datetime.utcnow()
+    today = now.strftime("%Y-%m-%d")
+    horizon = (now + timedelta(days=window_days)).strftime("%Y-%m-%d")
+
+    counts = {status: 0 for status in CONTRACT_STATUSES}
+    for end_date, count in summary["end_date_counts"].items():
+        if end_date <= today:
+            counts["expired"] += count
+        elif end_date <= horizon:
+            counts["near_expiry"] += count
+        else:
+            counts["active"] += count
+    counts["missing_end_date"] = summary["total"] - sum(summary["end_date_counts"].values())
+
+    summary["counts_by_status"] = counts
+    summary["next_expiring"] = [item for item in summary["next_expiring"] if item["end_date"] > today][:top_n]
+    summary["as_of"] = today
+    summary["updated_at"] = now.isoformat()
+    return summary
+
+
+def is_legacy_summary(summary: Dict[str, Any]) -> bool:
+    """Whether a summary was written before the per-contract entries moved out of the document"""
+    return "contracts" in summary
+
+
+def upgrade_summary(db, summary: Dict[str, Any], window_days: int, top_n: int) -> None:
+    """Move a legacy summary's per-contract entries and removals out to entry items and count them again"""
+    legacy = summary.pop("contracts")
+    removed = summary.pop("removed", {})
+    for key, value in new_summary(summary["UserEmail"]).items():
+        summary.setdefault(key, value)
+    summary.update(total=0, end_date_counts={}, supplier_counts={}, service_counts={}, next_expiring=[])
+    refresh_aggregates(summary, window_days, top_n)
+
+    stamp = {"version": summary["version"] + 1, "generation": summary["generation"]}
+    entries = []
+    for contract_id, legacy_entry in legacy.items():
+        entry = {**contract_entry({**legacy_entry, "id": contract_id}), **stamp}
+        apply_entry(summary, None, entry, top_n)
+        entries.append(entry)
+    entries += [{**removal_entry(contract_id, removed_ts), **stamp} for contract_id, removed_ts in removed.items()]
+    summary["version"] = stamp["version"]
+    db.write_summary_entries(summary["UserEmail"], entries)
+    logger.info(f"📦 Moved {len(entries)} summary entries of {summary['UserEmail']} out of the summary document")
+
+
+def render_summary(summary: Dict[str, Any], window_days: int, top_n: int) -> Dict[str, Any]:
+    """
+    Return the public view of a summary, refreshing time-dependent aggregates if the day has changed
+    """
+    now = datetime.utcnow()
+    if summary.get("as_of") != now.strftime("%Y-%m-%d"):
+        refresh_aggregates(summary, window_days, top_n, now)
+    return {
+        "user_email": summary["UserEmail"],
+        "total": summary["total"],
+        "counts_by_status": summary["counts_by_status"],
+        "next_expiring": [
+            {key: value for key, value in item.items() if key != "end_date"}
+            for item in summary["next_expiring"]
+        ],
+        "supplier_counts": summary["supplier_counts"],
+        "service_counts": summary["service_counts"],
+        "as_of": summary["as_of"],
+        "updated_at": summary.get("updated_at"),
+    }
+
+
+class FileCheckpointStore:
+    """
+    Change feed checkpoint and ownership lease kept in a local JSON file.
+
+    API workers on one host share the file: as with ``CosmosLeaseStore``, only the worker holding
+    an unexpired lease processes the feed. Each read-modify-write of the file happens under a
+    ``{path}.lock`` file created exclusively, and each process writes through its own temp file.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 60.0, lock_timeout_seconds: float = 5.0):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.lease_seconds = lease_seconds
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self._owner: Optional[str] = None
+
+    @contextmanager
+    def _locked(self):
+        deadline = time.monotonic() + self.lock_timeout_seconds
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    # Left behind by a worker that died holding it
+                    if time.time() - os.path.getmtime(self.lock_path) > self.lock_timeout_seconds:
+                        os.remove(self.lock_path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Change feed checkpoint {self.path} stayed locked")
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            try:
+                os.remove(self.lock_path)
+            except FileNotFoundError:
+                pass
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring unreadable change feed checkpoint {self.path}: {str(e)}")
+            return {}
+
+    def _write(self, state: Dict[str, Any]) -> None:
+        state["saved_at"] = datetime.utcnow().isoformat()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> Optional[str]:
+        return self._read().get("continuation")
+
+    def save(self, continuation: Optional[str]) -> None:
+        with self._locked():
+            state = self._read()
+            if state.get("owner") not in (None, self._owner):
+                logger.warning("⚠️ Change feed lease was taken over, not saving the checkpoint")
+                return
+            state["continuation"] = continuation
+            if self._owner is not None:
+                state["expires_at"] = time.time() + self.lease_seconds
+            self._write(state)
+
+    def reset(self) -> None:
+        with self._locked():
+            state = self._read()
+            state["continuation"] = None
+            self._write(state)
+
+    def try_acquire(self, owner: str) -> bool:
+        with self._locked():
+            state = self._read()
+            now = time.time()
+            if state.get("owner") not in (None, owner) and state.get("expires_at", 0) > now:
+                self._owner = None
+                return False
+            state["owner"] = owner
+            state["expires_at"] = now + self.lease_seconds
+            self._write(state)
+            self._owner = owner
+            return True
+
+
+class CosmosLeaseStore:
+    """
+    Change feed checkpoint and ownership lease kept in a Cosmos DB lease container.
+
+    Only the worker holding an unexpired lease processes the feed, so running several
+    API workers does not apply the same changes multiple times.
+    """
+
+    def __init__(self, container, lease_id: str = "contracts-summary-lease", lease_seconds: float = 60.0):
+        self.container = container
+        self.lease_id = lease_id
+        self.lease_seconds = lease_seconds
+        self._lease: Optional[Dict[str, Any]] = None
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        from azure.cosmos import exceptions
+        try:
+            return self.container.read_item(item=self.lease_id, partition_key=self.lease_id)
+        except exceptions.CosmosResourceNotFoundError:
+            return None
+
+    def load(self) -> Optional[str]:
+        lease = self._lease or self._read()
+        return lease.get("continuation") if lease else None
+
+    def save(self, continuation: Optional[str]) -> None:
+        if self._lease is None:
+            return
+        self._lease["continuation"] = continuation
+        self._lease["expires_at"] = time.time() + self.lease_seconds
+        self._lease = self._replace(self._lease)
+
+    def reset(self) -> None:
+        lease = self._read()
+        if lease:
+            lease["continuation"] = None
+            self.container.upsert_item(lease)
+            self._lease = None
+
+    def try_acquire(self, owner: str) -> bool:
+        from azure.cosmos import exceptions
+        lease = self._read()
+        now = time.time()
+        if lease is None:
+            try:
+                self._lease = self.container.create_item({
+                    "id": self.lease_id,
+                    "owner": owner,
+                    "expires_at": now + self.lease_seconds,
+                    "continuation": None,
+                })
+                return True
+            except exceptions.CosmosResourceExistsError:
+                return False
+        if lease.get("owner") != owner and lease.get("expires_at", 0) > now:
+            self._lease = None
+            return False
+        lease["owner"] = owner
+        lease["expires_at"] = now + self.lease_seconds
+        try:
+            self._lease = self._replace(lease)
+            return True
+        except exceptions.CosmosAccessConditionFailedError:
+            self._lease = None
+            return False
+
+    def _replace(self, lease: Dict[str, Any]) -> Dict[str, Any]:
+        from azure.core import MatchConditions
+        return self.container.replace_item(
+            item=lease["id"],
+            body=lease,
+            etag=lease.get("_etag"),
+            match_condition=MatchConditions.IfNotModified
+        )
+
+
+class ContractSummaryProcessor:
+    """
+    Background change feed consumer that keeps per-user summary documents up to date
+    """
+
+    def __init__(
+        self,
+        db,
+        checkpoint_store,
+        poll_interval_seconds: float = 5.0,
+        window_days: int = 60,
+        top_n: int = 5
+    ):
+        self.db = db
+        self.checkpoint_store = checkpoint_store
+        self.poll_interval_seconds = poll_interval_seconds
+        self.window_days = window_days
+        self.top_n = top_n
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+        # Lag / throughput metrics
+        self.is_owner = False
+        self.batches = 0
+        self.documents_processed = 0
+        self.errors = 0
+        self.last_poll_at: Optional[float] = None
+        self.last_change_ts: Optional[int] = None
+        self.lag_seconds: Optional[float] = None
+
+    async def start(self) -> None:
+        """Start polling the change feed in the background"""
+        if self._task is None:
+            self._stopping.clear()
+            # Change feed processing yields Cosmos throughput to interactive requests
+            with background_priority():
+                self._task = asyncio.create_task(self._run())
+            logger.info(f"🔁 Contract summary processor started (owner {self.owner})")
+
+    async def stop(self) -> None:
+        """Stop the background polling task"""
+        if self._task is not None:
+            self._stopping.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("⏹️ Contract summary processor stopped")
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.process_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"❌ Change feed processing failed: {str(e)}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def process_once(self) -> int:
+        """
+        Read and apply one round of changes; returns the number of changed documents applied
+        """
+        self.is_owner = await asyncio.to_thread(self.checkpoint_store.try_acquire, self.owner)
+        if not self.is_owner:
+            return 0
+
+        continuation = await asyncio.to_thread(self.checkpoint_store.load)
+        changes, continuation = await asyncio.to_thread(self.db.read_change_feed, continuation)
+        self.last_poll_at = time.time()
+
+        if changes:
+            await asyncio.to_thread(self._apply_changes, changes)
+            self.last_change_ts = max((c.get("_ts") or 0) for c in changes)
+            self.lag_seconds = max(0.0, self.last_poll_at - self.last_change_ts)
+            self.documents_processed += len(changes)
+            self.batches += 1
+        else:
+            self.lag_seconds = 0.0
+
+        await asyncio.to_thread(self.checkpoint_store.save, continuation)
+        return len(changes)
+
+    def _apply_changes(self, changes: List[Dict[str, Any]]) -> None:
+        by_user: Dict[str, List[Dict[str, Any]]] = {}
+        for change in changes:
+            user_email = change.get("UserEmail")
+            if user_email:
+                by_user.setdefault(user_email, []).append(contract_entry(change))
+
+        for user_email, updates in by_user.items():
+            self.apply_entries(user_email, updates)
+
+    def apply_entries(self, user_email: str, updates: List[Dict[str, Any]], authoritative: bool = False) -> int:
+        """
+        Store new summary entries for a user's contracts and move the summary's tallies along
+
+        The summary document is the single point of concurrency: it is read-modify-written on its
+        etag, and each update records the entries it counted in ``pending_entries`` with the new
+        ``version``. The entries are stored as items afterwards, and only over older versions, so
+        the next update of the user takes any pending entry over the stored one and stores it if
+        the worker that counted it died first. Returns the number of entries that changed.
+        """
+        stored_entries: List[Dict[str, Any]] = []
+
+        def apply(summary: Dict[str, Any]) -> None:
+            pending = summary.get("pending_entries", {})
+            stored = self.db.read_summary_entries(user_email, list({u["contract_id"] for u in updates} | set(pending)))
+            current = dict(stored)
+            behind = []
+            for contract_id, entry in pending.items():
+                if (stored.get(contract_id) or {}).get("version", -1) < entry["version"]:
+                    current[contract_id] = entry
+                    behind.append(entry)
+            self.db.write_summary_entries(user_email, behind)
+
+            generation = summary.get("generation", 0)
+            version = summary.get("version", 0) + 1
+            changed: Dict[str, Dict[str, Any]] = {}
+            for update in updates:
+                contract_id = update["contract_id"]
+                old = current.get(contract_id)
+                new = supersede(old, update, authoritative)
+                if new is None:
+                    continue
+                new.update(version=version, generation=generation)
+                counted = old if old is not None and old.get("generation") == generation else None
+                apply_entry(summary, counted, new, self.top_n)
+                current[contract_id] = changed[contract_id] = new
+            summary["version"] = version
+            summary["pending_entries"] = changed
+            stored_entries[:] = changed.values()
+
+        self.update_summary(user_email, apply)
+        self.db.write_summary_entries(user_email, stored_entries)
+        return len(stored_entries)
+
+    def update_summary(self, user_email: str, mutate: Callable[[Dict[str, Any]], Any]) -> None:
+        """Apply ``mutate`` to a user's summary with its aggregates current, and persist it"""
+        def apply(summary: Dict[str, Any]) -> None:
+            if is_legacy_summary(summary):
+                upgrade_summary(self.db, summary, self.window_days, self.top_n)
+            refresh_aggregates(summary, self.window_days, self.top_n)
+            mutate(summary)
+            refresh_aggregates(summary, self.window_days, self.top_n)
+            fill_next_expiring(self.db, summary, self.top_n)
+        self.db.update_summary(user_email, apply)
+
+    async def remove_contract(self, user_email: str, contract_id: str, last_ts: Optional[int] = None) -> None:
+        """
+        Drop a deleted contract from its owner's summary (deletes do not appear in the change feed)
+
+        The removal is stored as a tombstone entry so that changes to the contract from before its
+        deletion don't put it back. ``last_ts`` is the ``_ts`` of the deleted document when known,
+        guarding against clock skew between this host and the database.
+        """
+        removed_ts = max(time.time(), last_ts or 0)
+        try:
+            await asyncio.to_thread(self.apply_entries, user_email, [removal_entry(contract_id, removed_ts)])
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"❌ Failed to remove contract {contract_id} from summary: {str(e)}")
+
+    async def rebuild(self, user_email: Optional[str] = None) -> int:
+        """
+        Rebuild summaries from scratch.
+
+        For a single user, the summary starts a new generation with empty tallies and every
+        contract in the user's partition is applied again, a page at a time; entries of contracts
+        that no longer exist are then removed. Changes applied meanwhile count in the new generation.
+        Without a user, all summaries are dropped and the change feed is replayed from the beginning.
+        """
+        if user_email:
+            await asyncio.to_thread(self.update_summary, user_email, reset_summary)
+            total = 0
+            async for page in self.db.iter_contracts_by_user(user_email):
+                # Listed contracts exist now, whatever was removed before
+                await asyncio.to_thread(self.apply_entries, user_email, [contract_entry(c) for c in page], True)
+                total += len(page)
+            summary = (await self.db.get_summary(user_email))["data"]
+            stale = await asyncio.to_thread(self.db.list_stale_summary_entries, user_email, summary["generation"])
+            if stale:
+                removed_ts = time.time()
+                await asyncio.to_thread(
+                    self.apply_entries, user_email, [removal_entry(contract_id, removed_ts) for contract_id in stale]
+                )
+            return total
+
+        await asyncio.to_thread(self.db.delete_all_summaries)
+        await asyncio.to_thread(self.checkpoint_store.reset)
+        total = 0
+        while True:
+            applied = await self.process_once()
+            if not self.is_owner:
+                raise RuntimeError("Change feed lease is held by another worker")
+            total += applied
+            if applied == 0:
+                return total
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return change feed lag and throughput metrics"""
+        return {
+            "running": self._task is not None,
+            "owner": self.owner,
+            "is_owner": self.is_owner,
+            "batches": self.batches,
+            "documents_processed": self.documents_processed,
+            "errors": self.errors,
+            "last_poll_at": datetime.utcfromtimestamp(self.last_poll_at).isoformat() if self.last_poll_at else None,
+            "last_change_at": datetime.utcfromtimestamp(self.last_change_ts).isoformat() if self.last_change_ts else None,
+            "lag_seconds": round(self.lag_seconds, 3) if self.lag_seconds is not None else None,
+            "seconds_since_last_poll": round(time.time() - self.last_poll_at, 3) if self.last_poll_at else None,
+        }
+
+
+def create_summary_processor(db, settings) -> ContractSummaryProcessor:
+    """Build the summary processor using the lease container if configured, else a local checkpoint file"""
+    if settings.change_feed_lease_container_name:
+        checkpoint_store = CosmosLeaseStore(db.get_lease_container())
+    else:
+        checkpoint_store = FileCheckpointStore(settings.change_feed_checkpoint_file)
+    return ContractSummaryProcessor(
+        db,
+        checkpoint_store,
+        poll_interval_seconds=settings.change_feed_poll_interval_seconds,
+        window_days=settings.expiry_warning_days,
+        top_n=settings.summary_next_expiring_limit
+    )
@@ -0,0 +1,362 @@
+"""
+Lightweight request tracing with OpenTelemetry-compatible spans
+
+Spans carry W3C trace / span ids and are exported in the OTLP JSON field layout
+(``traceId``, ``spanId``, ``parentSpanId``, ``startTimeUnixNano``, ...), so a file of exported
+spans can be loaded into OpenTelemetry tooling. The current span and request id live in context
+variables, which ``asyncio`` tasks and ``asyncio.to_thread`` inherit.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def current_span() -> Optional["Span"]:
+    """The active span, if any"""
+    return _current_span.get()
+
+
+def current_request_id() -> Optional[str]:
+    """The request id of the request being handled (or of the active span), if any"""
+    request_id = _request_id.get()
+    if request_id is None:
+        span = _current_span.get()
+        request_id = span.request_id if span is not None else None
+    return request_id
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind", "request_id",
+        "start_ns", "end_ns", "attributes", "status", "status_message"
+    )
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: str = "INTERNAL",
+                 request_id: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.request_id = request_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "UNSET"
+        self.status_message: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "ERROR"
+        self.status_message = f"{type(exc).__name__}: {exc}"
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": f"SPAN_KIND_{self.kind}",
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": {**self.attributes, "request.id": self.request_id},
+            "status": {"code": f"STATUS_CODE_{self.status}", "message": self.status_message},
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is disabled"""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class ConsoleSpanExporter:
+    """Logs every finished span"""
+
+    def export(self, span: Span) -> None:
+        parent = f" parent={span.parent_id}" if span.parent_id else ""
+        logger.info(
+            f"🔭 {span.name} {span.duration_ms:.1f}ms trace={span.trace_id}{parent} "
+            f"request={span.request_id} status={span.status}"
+        )
+
+
+class FileSpanExporter:
+    """Appends every finished span to a JSON-lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class RecentTraces:
+    """
+    Keeps the spans of in-flight traces and a bounded history of finished ones, for the
+    slowest-traces report
+    """
+
+    def __init__(self, max_traces: int = 200, max_spans_per_trace: int = 500):
+        self.max_spans_per_trace = max_spans_per_trace
+        self._open: Dict[str, List[Span]] = {}
+        self._finished: deque = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    def add(self, span: Span, is_root: bool) -> None:
+        with self._lock:
+            if not is_root:
+                spans = self._open.get(span.trace_id)
+                if spans is not None and len(spans) < self.max_spans_per_trace:
+                    spans.append(span)
+                return
+            children = self._open.pop(span.trace_id, [])
+            self._finished.append((span, children))
+
+    def open_trace(self, span: Span) -> None:
+        with self._lock:
+            self._open[span.trace_id] = []
+
+    def slowest(self, limit: int = 10, top_spans: int = 5) -> List[Dict[str, Any]]:
+        """Slowest finished traces, each with its slowest spans"""
+        with self._lock:
+            finished = list(self._finished)
+        finished.sort(key=lambda entry: entry[0].duration_ms, reverse=True)
+        report = []
+        for root, children in finished[:limit]:
+            slowest_children = sorted(children, key=lambda span: span.duration_ms, reverse=True)[:top_spans]
+            report.append({
+                "trace_id": root.trace_id,
+                "request_id": root.request_id,
+                "name": root.name,
+                "status": root.status,
+                "duration_ms": round(root.duration_ms, 2),
+                "started_at": root.start_ns // 1_000_000,
+                "span_count": len(children) + 1,
+                "attributes": root.attributes,
+                "slowest_spans": [
+                    {"name": span.name, "duration_ms": round(span.duration_ms, 2), "status": span.status,
+                     "attributes": span.attributes}
+                    for span in slowest_children
+                ],
+            })
+        return report
+
+    def clear(self) -> None:
+        with self._lock:
+            self._open.clear()
+            self._finished.clear()
+
+
+class Tracer:
+    """Creates spans, nests them through the context and hands finished spans to the exporters"""
+
+    def __init__(self, enabled: bool = True, exporters: Optional[list] = None, recent: Optional[RecentTraces] = None):
+        self.enabled = enabled
+        self.exporters = list(exporters or [])
+        self.recent = recent if recent is not None else RecentTraces()
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        kind: str = "INTERNAL",
+        trace_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+        request_id: Optional[str] = None
+    ) -> Iterator[Span]:
+        """
+        Open a span as a child of the current one (or a new trace); yields ``NOOP_SPAN`` when tracing is off
+
+        ``trace_id`` / ``parent_id`` continue a trace started by a caller (W3C ``traceparent``).
+        """
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        parent = _current_span.get()
+        if parent is not None and trace_id is None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+            request_id = request_id or parent.request_id
+        is_root = parent is None
+        span = Span(
+            name, trace_id or secrets.token_hex(16), parent_id, kind=kind,
+            request_id=request_id or _request_id.get(), attributes=attributes
+        )
+        if is_root:
+            self.recent.open_trace(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            if span.status == "UNSET":
+                span.status = "OK"
+            self._finish(span, is_root)
+
+    def _finish(self, span: Span, is_root: bool) -> None:
+        self.recent.add(span, is_root)
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.warning(f"⚠️ Span export failed: {str(e)}")
+
+
+def create_tracer(settings) -> Tracer:
+    """Build the tracer and its exporter from settings (``tracing_exporter``: none, console or file)"""
+    exporters = []
+    if settings.tracing_exporter == "console":
+        exporters.append(ConsoleSpanExporter())
+    elif settings.tracing_exporter == "file":
+        exporters.append(FileSpanExporter(settings.tracing_file_path))
+    return Tracer(
+        enabled=settings.tracing_enabled,
+        exporters=exporters,
+        recent=RecentTraces(max_traces=settings.tracing_recent_traces)
+    )
+
+
+def _build_tracer() -> Tracer:
+    from config.settings import get_settings
+    return create_tracer(get_settings())
+
+
+# Global tracer
+tracer = _build_tracer()
+
+
+def traced(name: Optional[str] = None, **attributes):
+    """
+    Decorator running a function (sync or async) inside a span named ``name``
+    (default: ``Class.method``)
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                with tracer.start_span(span_name, attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.start_span(span_name, attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def parse_traceparent(value: str):
+    """Return (trace_id, parent span id) from a W3C ``traceparent`` header, or (None, None)"""
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    trace_id, span_id = parts[1].lower(), parts[2].lower()
+    try:
+        int(trace_id, 16), int(span_id, 16)
+    except ValueError:
+        return None, None
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None, None
+    return trace_id, span_id
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening the root (server) span of every request.
+
+    The request id is taken from ``X-Request-ID`` (or generated) and echoed in the response;
+    an incoming ``traceparent`` continues the caller's trace, and the response carries the
+    ``traceparent`` of this request's span. The span is renamed to the matched route template.
+    """
+
+    def __init__(self, app: Callable, tracer: Tracer = tracer, exclude_paths=("/metrics", "/health", "/ready")):
+        self.app = app
+        self.tracer = tracer
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:128] or secrets.token_hex(8)
+        trace_id, parent_id = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        token = _request_id.set(request_id)
+        try:
+            with self.tracer.start_span(
+                f"{scope['method']} {scope['path']}",
+                {"http.method": scope["method"], "http.target": scope["path"]},
+                kind="SERVER", trace_id=trace_id, parent_id=parent_id, request_id=request_id
+            ) as span:
+                async def send_wrapper(message):
+                    if message["type"] == "http.response.start":
+                        span.set_attribute("http.status_code", message["status"])
+                        if message["status"] >= 500:
+                            span.status = "ERROR"
+                        message = {**message, "headers": [
+                            *message.get("headers", []),
+                            (b"x-request-id", request_id.encode("latin-1")),
+                            (b"traceparent", f"00-{span.trace_id}-{span.span_id}-01".encode("latin-1")),
+                        ]}
+                    await send(message)
+
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    route = getattr(scope.get("route"), "path", None)
+                    if route:
+                        span.name = f"{scope['method']} {route}"
+                        span.set_attribute("http.route", route)
+        finally:
+            _request_id.reset(token)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+In-process throughput micro-benchmark for the contract list and get endpoints
+
+Drives the ASGI app directly through httpx (no network, no server), so with
+STORAGE_BACKEND=local the numbers are dominated by the API's own routing,
+validation and JSON serialization rather than by Cosmos DB.
+
+Usage:
+    STORAGE_BACKEND=local python benchmarks/bench_api_throughput.py --seed 500 --requests 2000
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import contract_repository  # noqa: E402
+from app.models import ContractData  # noqa: E402
+from app.request_units import request_charge_ledger  # noqa: E402
+from main import app  # noqa: E402
+
+BENCH_USER = "bench-throughput@saaseer.local"
+
+
+async def seed(count: int):
+    for i in range(count):
+        await contract_repository.create_contract(ContractData(
+            id=f"bench-{i}",
+            UserEmail=BENCH_USER,
+            supplier_name=f"サプライヤー{i % 40}株式会社",
+            customer_name=f"顧客{i % 15}株式会社",
+            service_name=f"サービス{i % 25}",
+            contract_start_date="2025/01/01",
+            contract_end_date=f"2027/{i % 12 + 1:02d}/01",
+            contract_details="所在地: 東京都港区三田三丁目５番１９号、面積: 5.19㎡、月額賃料: 23,550円" * 3,
+            termination_notice_period="契約期間満了の1年前から6ヶ月前まで"
+        ))
+
+
+async def run(client: httpx.AsyncClient, label: str, url: str, params: dict, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(url, params=params)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    # Warm up caches and lazily-built services
+    await one()
+    latencies.clear()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(
+        f"{label:28} {requests / elapsed:9.1f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms"
+    )
+
+
+def print_request_charge_report():
+    """RU per Cosmos DB operation type recorded during the run (empty on the local backend)"""
+    report = request_charge_ledger.report()
+    if not report["operations"]:
+        return
+    print(f"\n💸 Request charge per operation ({report['total_ru']:.1f} RU total)")
+    print(f"{'operation':32} {'calls':>9} {'RU':>9} {'RU/call':>9}")
+    for operation, entry in report["operations"].items():
+        print(f"{operation:32} {entry['requests']:9} {entry['ru']:9.1f} {entry['ru_per_request']:9.2f}")
+
+
+async def main(args):
+    if args.seed:
+        await seed(args.seed)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"⏱️  {args.requests} requests per endpoint, concurrency {args.concurrency}\n")
+        await run(client, "GET /contracts/{id}", "/api/v1/contracts/bench-0",
+                  {"user_email": BENCH_USER}, args.requests, args.concurrency)
+        await run(client, f"GET /contracts?limit={args.limit}", "/api/v1/contracts/",
+                  {"user_email": BENCH_USER, "limit": args.limit}, args.requests, args.concurrency)
+    print_request_charge_report()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark list/get endpoint throughput in-process")
+    parser.add_argument("--seed", type=int, default=0, help="Create this many benchmark contracts first")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests")
+    parser.add_argument("--limit", type=int, default=100, help="Page size for the list endpoint")
+    asyncio.run(main(parser.parse_args()))
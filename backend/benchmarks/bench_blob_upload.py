@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for concurrent contract file uploads to Blob Storage
+
+Compares the synchronous AzureStorageService called from async code (what the upload
+route used to do: each transfer blocks the event loop, so uploads serialize) with the
+pooled AsyncAzureStorageService driven by asyncio.gather.
+
+Usage:
+    python benchmarks/bench_blob_upload.py --uploads 64 --size-kb 2048 --concurrency 1 8 32
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.async_storage_service import create_async_storage_service  # noqa: E402
+from app.storage_service import create_storage_service  # noqa: E402
+
+BENCH_USER = "bench-upload@saaseer.local"
+
+
+async def run_sync(service, payload: bytes, uploads: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, blob_names = [], []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            ok, message, url = service.upload_file(payload, f"bench_{i}.pdf", "application/pdf", BENCH_USER)
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                raise RuntimeError(message)
+            blob_names.append(service.blob_name_from_url(url))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(uploads)))
+    return time.perf_counter() - start, latencies, blob_names
+
+
+async def run_async(service, payload: bytes, uploads: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, blob_names = [], []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            ok, message, url = await service.upload_file(payload, f"bench_{i}.pdf", "application/pdf", BENCH_USER)
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                raise RuntimeError(message)
+            blob_names.append(service.blob_name_from_url(url))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(uploads)))
+    return time.perf_counter() - start, latencies, blob_names
+
+
+def report(label: str, elapsed: float, latencies, total_bytes: int):
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(
+        f"{label:28} {total_bytes / elapsed / (1024 * 1024):9.2f} MB/s "
+        f"{len(latencies) / elapsed:8.1f} uploads/s  p50 {statistics.median(latencies) * 1000:8.1f} ms  p95 {p95 * 1000:8.1f} ms"
+    )
+
+
+async def main(args):
+    payload = os.urandom(args.size_kb * 1024)
+    total_bytes = len(payload) * args.uploads
+
+    sync_service = create_storage_service()
+    async_service = create_async_storage_service()
+    await async_service.open()
+
+    print(f"⏱️  {args.uploads} uploads of {args.size_kb} KB per run\n")
+    try:
+        for concurrency in args.concurrency:
+            elapsed, latencies, names = await run_sync(sync_service, payload, args.uploads, concurrency)
+            report(f"sync  c={concurrency}", elapsed, latencies, total_bytes)
+            await asyncio.gather(*(async_service.delete_file(name) for name in names))
+
+            elapsed, latencies, names = await run_async(async_service, payload, args.uploads, concurrency)
+            report(f"async c={concurrency}", elapsed, latencies, total_bytes)
+            await asyncio.gather(*(async_service.delete_file(name) for name in names))
+    finally:
+        await async_service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent blob upload throughput")
+    parser.add_argument("--uploads", type=int, default=64, help="Uploads per run")
+    parser.add_argument("--size-kb", type=int, default=1024, help="Size of each uploaded file in KB")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrency levels")
+    asyncio.run(main(parser.parse_args()))
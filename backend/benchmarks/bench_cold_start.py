@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark: time to import the app, and time to first request / readiness of a fresh server
+
+Each run starts a new interpreter so nothing is cached in-process:
+  * import:  `import main` in a fresh interpreter
+  * serve:   start uvicorn, then time until `/health` first answers and until `/ready` returns 200
+
+Usage:
+    python benchmarks/bench_cold_start.py --runs 5
+    python benchmarks/bench_cold_start.py --local          # STORAGE_BACKEND=local in a temporary directory
+    python benchmarks/bench_cold_start.py --importtime 15  # also list the 15 slowest imports
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_import(env) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def poll(url: str, deadline: float, want_status: int = 200) -> bool:
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == want_status:
+                    return True
+        except urllib.error.HTTPError as e:
+            if e.code == want_status:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.01)
+    return False
+
+
+def time_serve(env, timeout: float):
+    """Returns (seconds to first /health response, seconds to /ready 200 or None)"""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = start + timeout
+        base = f"http://127.0.0.1:{port}"
+        if not poll(f"{base}/health", deadline):
+            raise RuntimeError("Server did not answer /health before the timeout")
+        first_request = time.perf_counter() - start
+        ready = time.perf_counter() - start if poll(f"{base}/ready", deadline) else None
+        return first_request, ready
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def print_importtime(env, top: int):
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    print(f"\n🐢 Slowest {top} imports (cumulative µs):")
+    for cumulative, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative:>10}  {name}")
+
+
+def report(label: str, values):
+    values = [v for v in values if v is not None]
+    if not values:
+        print(f"{label:24} n/a")
+        return
+    print(f"{label:24} median {statistics.median(values) * 1000:8.1f} ms   max {max(values) * 1000:8.1f} ms")
+
+
+def main(args):
+    env = dict(os.environ)
+    if args.local:
+        env.update(STORAGE_BACKEND="local", LOCAL_DATA_DIR=tempfile.mkdtemp(prefix="saaseer-coldstart-"))
+
+    imports, first_requests, readies = [], [], []
+    for _ in range(args.runs):
+        imports.append(time_import(env))
+        first_request, ready = time_serve(env, args.timeout)
+        first_requests.append(first_request)
+        readies.append(ready)
+
+    print(f"⏱️  Cold start over {args.runs} run(s)\n")
+    report("import main", imports)
+    report("first request (/health)", first_requests)
+    report("ready (/ready 200)", readies)
+    if args.importtime:
+        print_importtime(env, args.importtime)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark application cold start")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh-process runs")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the server per run")
+    parser.add_argument("--local", action="store_true", help="Use the local storage backend in a temporary directory")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="List the N slowest imports")
+    main(parser.parse_args())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Logging overhead on the request path: synchronous stdout handler vs the background queue handler
+
+Two scenarios, each with both handler setups; the sink is a pipe drained by a child process
+(like a container log driver), or a file with ``--sink file``:
+  * ``POST /contracts`` through the app in-process (the route's own log lines)
+  * the log calls of one upload, before (f-strings, extracted data at INFO with ``indent=2``)
+    and after (lazy formatting, ``log_payload`` capped and sampled)
+
+Reports p50 / p99 latency per request under concurrency.
+
+Usage:
+    STORAGE_BACKEND=local python benchmarks/bench_logging.py --requests 3000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import queue
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from logging.handlers import QueueListener
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("LOCAL_DATA_DIR", tempfile.mkdtemp(prefix="saaseer-bench-logging-"))
+
+from app.logging_setup import TEXT_FORMAT, BackgroundQueueHandler, JsonFormatter, log_payload  # noqa: E402
+from main import app  # noqa: E402
+
+BENCH_USER = "bench-logging@saaseer.local"
+logger = logging.getLogger("bench.upload")
+
+EXTRACTED = {
+    "supplier_name": "サプライヤー株式会社",
+    "customer_name": "顧客株式会社",
+    "service_name": "クラウドストレージ",
+    "contract_start_date": "2025/01/01",
+    "contract_end_date": "2027/03/31",
+    "termination_notice_period": "契約期間満了の1年前から6ヶ月前まで",
+    "contract_details": "所在地: 東京都港区三田三丁目５番１９号、面積: 5.19㎡、月額賃料: 23,550円。" * 40,
+}
+
+
+def open_sink(kind: str):
+    if kind == "file":
+        return open(os.path.join(tempfile.mkdtemp(), "bench.log"), "w", encoding="utf-8"), None
+    reader = subprocess.Popen(["cat"], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+    return open(reader.stdin.fileno(), "w", encoding="utf-8", closefd=False), reader
+
+
+def install(mode: str, stream):
+    """Route the root logger to ``stream``: synchronously, or through the background queue"""
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    output = logging.StreamHandler(stream)
+    if mode == "sync":
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+        root.addHandler(output)
+        return None
+    output.setFormatter(JsonFormatter())
+    handler = BackgroundQueueHandler(queue.Queue(maxsize=10000))
+    root.addHandler(handler)
+    listener = QueueListener(handler.queue, output)
+    listener.start()
+    return listener
+
+
+def upload_logs_before(file_name: str):
+    logger.info(f"📤 Received file upload request: {file_name} from user: {BENCH_USER}")
+    logger.info(f"📊 File size: {1.25:.2f} MB")
+    logger.info("☁️ Step 1: Uploading file to Azure Storage...")
+    logger.info(f"✅ File uploaded to: https://example.blob/{file_name}")
+    logger.info("🤖 Step 2: Extracting contract information using AI...")
+    for page in range(3):
+        logger.info(f"  📎 Added page {page + 1} to AI request")
+    logger.info(f"📊 Extracted data: {json.dumps(EXTRACTED, ensure_ascii=False, indent=2)}")
+    logger.info("💾 Step 3: Saving contract to database...")
+    logger.info(f"✅ Contract saved to database with ID: {file_name}")
+
+
+def upload_logs_after(file_name: str):
+    logger.info("📤 Received file upload request: %s (%.2f MB) from user: %s", file_name, 1.25, BENCH_USER)
+    logger.info("✅ File uploaded to: %s", f"https://example.blob/{file_name}")
+    for page in range(3):
+        logger.debug("  📎 Added page %d to AI request", page + 1)
+    log_payload(logger, logging.INFO, "📊 Extracted data: %s", EXTRACTED)
+    logger.info("✅ Contract saved to database with ID: %s", file_name)
+
+
+def report(label: str, latencies, elapsed: float):
+    latencies.sort()
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    print(
+        f"{label:40} {len(latencies) / elapsed:9.1f} req/s  "
+        f"p50 {statistics.median(latencies) * 1e6:8.1f} µs  p99 {p99 * 1e6:8.1f} µs"
+    )
+
+
+async def bench_route(client: httpx.AsyncClient, label: str, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            body = {"id": f"bench-{uuid.uuid4()}", "UserEmail": BENCH_USER, "customer_name": "顧客株式会社",
+                    "service_name": "サービス", "contract_details": EXTRACTED["contract_details"][:500]}
+            start = time.perf_counter()
+            response = await client.post("/api/v1/contracts/", json=body)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    report(label, latencies, time.perf_counter() - start)
+
+
+async def bench_upload_logs(label: str, log_calls, requests: int, concurrency: int):
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for i in remaining:
+            start = time.perf_counter()
+            log_calls(f"contract-{i}.pdf")
+            latencies.append(time.perf_counter() - start)
+            # Other requests run between the stages of an upload
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    report(label, latencies, time.perf_counter() - start)
+
+
+async def main(args):
+    stream, reader = open_sink(args.sink)
+    transport = httpx.ASGITransport(app=app)
+    print(f"⏱️  {args.requests} requests, concurrency {args.concurrency}, sink: {args.sink}\n")
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for mode in ("sync", "queue"):
+                listener = install(mode, stream)
+                await bench_route(client, f"[{mode}] POST /contracts", args.requests, args.concurrency)
+                calls = upload_logs_before if mode == "sync" else upload_logs_after
+                await bench_upload_logs(f"[{mode}] upload log calls", calls, args.requests, args.concurrency)
+                if listener is not None:
+                    listener.stop()
+    finally:
+        stream.close()
+        if reader is not None:
+            reader.stdin.close()
+            reader.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure request latency added by logging")
+    parser.add_argument("--requests", type=int, default=3000, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests")
+    parser.add_argument("--sink", choices=("pipe", "file"), default="pipe", help="Where log lines are written")
+    asyncio.run(main(parser.parse_args()))
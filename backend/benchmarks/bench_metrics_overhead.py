@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Instrumentation overhead micro-benchmark
+
+Measures what the metrics add to the request path:
+  * MetricsMiddleware around a no-op ASGI app, against the bare app
+  * one stage observation (``observe_stage``) and one Cosmos request charge record
+
+For the end-to-end effect, compare bench_api_throughput.py with METRICS_ENABLED=true and false.
+
+Usage:
+    python benchmarks/bench_metrics_overhead.py --iterations 200000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.metrics import MetricsMiddleware, observe_stage, record_request_charge  # noqa: E402
+
+
+class _Route:
+    path = "/api/v1/contracts/{contract_id}"
+
+
+async def bare_app(scope, receive, send):
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def time_app(app, iterations: int) -> float:
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        scope = {"type": "http", "method": "GET", "path": "/api/v1/contracts/bench-0", "headers": []}
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / iterations
+
+
+def time_call(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def observe_once():
+    with observe_stage("json_parse"):
+        pass
+
+
+def main(args):
+    bare = asyncio.run(time_app(bare_app, args.iterations))
+    instrumented = asyncio.run(time_app(MetricsMiddleware(bare_app), args.iterations))
+    headers = {"x-ms-request-charge": "1.0"}
+
+    print(f"⏱️  {args.iterations} iterations\n")
+    print(f"{'bare ASGI call':32} {bare * 1e6:8.2f} µs")
+    print(f"{'with MetricsMiddleware':32} {instrumented * 1e6:8.2f} µs")
+    print(f"{'middleware overhead':32} {(instrumented - bare) * 1e6:8.2f} µs / request")
+    print(f"{'observe_stage':32} {time_call(observe_once, args.iterations) * 1e6:8.2f} µs")
+    print(f"{'record_request_charge':32} "
+          f"{time_call(lambda: record_request_charge('read', headers), args.iterations) * 1e6:8.2f} µs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure metrics instrumentation overhead")
+    parser.add_argument("--iterations", type=int, default=200000, help="Calls per measurement")
+    main(parser.parse_args())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Cost of live upload progress on the pipeline
+
+  * ``report_progress`` per call: outside an upload, for an upload nobody watches, and for an
+    upload with open event streams (memory and sqlite brokers)
+  * ``POST /contracts`` through the app in-process, with and without ``X-Upload-ID``
+    (progress middleware: body byte counting and the final ``done`` event)
+
+Usage:
+    STORAGE_BACKEND=local python benchmarks/bench_progress.py --calls 100000 --requests 2000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("LOCAL_DATA_DIR", tempfile.mkdtemp(prefix="saaseer-bench-progress-"))
+
+import app.progress as progress  # noqa: E402
+from app.progress import MemoryProgressBroker, SQLiteProgressBroker, report_progress  # noqa: E402
+from main import app  # noqa: E402
+
+BENCH_USER = "bench-progress@saaseer.local"
+
+
+def time_calls(calls: int) -> float:
+    start = time.perf_counter()
+    for page in range(calls):
+        report_progress("pages_rendered", page=page, pages=calls)
+    return (time.perf_counter() - start) / calls
+
+
+async def bench_report(label: str, broker, calls: int, subscribers: int):
+    progress.progress_broker = broker
+    upload_id = f"bench-{uuid.uuid4()}"
+    streams = []
+    for _ in range(subscribers):
+        async def follow():
+            async for _ in broker.subscribe(upload_id, 0, heartbeat_seconds=60):
+                pass
+        streams.append(asyncio.create_task(follow()))
+    await asyncio.sleep(0.01)
+
+    token = progress._upload_id.set(upload_id)
+    try:
+        per_call = time_calls(calls)
+    finally:
+        progress._upload_id.reset(token)
+    for stream in streams:
+        stream.cancel()
+    await asyncio.gather(*streams, return_exceptions=True)
+    print(f"{label:48} {per_call * 1e6:8.2f} µs / event")
+
+
+async def bench_route(client: httpx.AsyncClient, label: str, requests: int, with_upload_id: bool):
+    latencies = []
+    for _ in range(requests):
+        body = {"id": f"bench-{uuid.uuid4()}", "UserEmail": BENCH_USER, "service_name": "サービス"}
+        headers = {"X-Upload-ID": f"bench-{uuid.uuid4()}"} if with_upload_id else {}
+        start = time.perf_counter()
+        response = await client.post("/api/v1/contracts/", json=body, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    latencies.sort()
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    print(f"{label:48} p50 {statistics.median(latencies) * 1e3:7.3f} ms  p99 {p99 * 1e3:7.3f} ms")
+
+
+async def main(args):
+    print(f"⏱️  {args.calls} report_progress calls, {args.requests} requests per scenario\n")
+    progress.progress_broker = MemoryProgressBroker(max_events_per_upload=args.calls)
+    outside = time_calls(args.calls)
+    print(f"{'report_progress outside an upload':48} {outside * 1e6:8.2f} µs / event")
+    for subscribers in (0, 10):
+        broker = MemoryProgressBroker(max_events_per_upload=args.calls)
+        await bench_report(f"memory broker, {subscribers} subscribers", broker, args.calls, subscribers)
+    sqlite_broker = SQLiteProgressBroker(
+        os.path.join(tempfile.mkdtemp(), "progress.db"), queue_size=args.calls
+    )
+    await bench_report("sqlite broker (background writer)", sqlite_broker, args.calls, 0)
+
+    progress.progress_broker = MemoryProgressBroker()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(2):
+            await bench_route(client, "POST /contracts", args.requests, with_upload_id=False)
+            await bench_route(client, "POST /contracts with X-Upload-ID", args.requests, with_upload_id=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the cost of publishing upload progress events")
+    parser.add_argument("--calls", type=int, default=100000, help="report_progress calls per scenario")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per route scenario")
+    asyncio.run(main(parser.parse_args()))
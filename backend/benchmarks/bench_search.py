@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for GET /api/v1/contracts/search over a partition with 10k contracts
+
+Seeds a dedicated benchmark partition (once), then runs each search scenario several
+times against the configured storage backend (Cosmos DB, or SQLite with
+STORAGE_BACKEND=local) and reports latency percentiles and request charge per scenario
+and per Cosmos DB operation type.
+
+Usage:
+    python benchmarks/bench_search.py --seed            # seed 10k contracts, then benchmark
+    python benchmarks/bench_search.py --iterations 50   # benchmark an already seeded partition
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import contract_repository  # noqa: E402
+from app.models import ContractData  # noqa: E402
+from app.request_units import request_charge_ledger  # noqa: E402
+
+BENCH_USER = "bench-search@saaseer.local"
+SUPPLIERS = [f"サプライヤー{i}株式会社" for i in range(40)]
+SERVICES = [f"サービス{i}" for i in range(25)]
+CUSTOMERS = [f"顧客{i}株式会社" for i in range(15)]
+
+SCENARIOS = {
+    "sorted_by_end_date": {},
+    "supplier_filter_sorted": {"supplier_name": SUPPLIERS[3]},
+    "supplier_filter_by_updated": {"supplier_name": SUPPLIERS[3], "sort_by": "updated_at", "sort_order": "desc"},
+    "end_date_range": {"end_date_from": "2026/01/01", "end_date_to": "2026/06/30"},
+    "status_near_expiry": {"status": "near_expiry"},
+    "text_match": {"text": "倉庫"},
+    "combined": {"service_name": SERVICES[1], "start_date_from": "2024/01/01", "text": "東京"},
+}
+
+
+def make_contract(index: int) -> dict:
+    start = datetime(2023, 1, 1) + timedelta(days=random.randint(0, 900))
+    end = start + timedelta(days=random.randint(180, 1500))
+    now = datetime.utcnow().isoformat()
+    return {
+        "id": f"bench_{index:06d}",
+        "UserEmail": BENCH_USER,
+        "supplier_name": random.choice(SUPPLIERS),
+        "customer_name": random.choice(CUSTOMERS),
+        "service_name": random.choice(SERVICES),
+        "contract_start_date": start.strftime("%Y/%m/%d"),
+        "contract_end_date": end.strftime("%Y/%m/%d") if random.random() > 0.05 else None,
+        "contract_details": random.choice(["所在地: 東京都港区", "所在地: 大阪市北区", "防災備蓄倉庫"]) + f"、月額{random.randint(10, 500)},000円",
+        "termination_notice_period": "契約期間満了の6ヶ月前まで",
+        "LinkImage": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+async def seed(count: int, workers: int = 16) -> None:
+    print(f"🌱 Seeding {count} contracts into partition {BENCH_USER}...")
+    start = time.perf_counter()
+    if hasattr(contract_repository, "container"):
+        # Cosmos DB: parallel upserts so seeding is not bound by per-request latency
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda i: contract_repository.container.upsert_item(make_contract(i)), range(count)))
+    else:
+        for i in range(count):
+            await contract_repository.create_contract(ContractData(**make_contract(i)))
+    print(f"   Seeded in {time.perf_counter() - start:.1f}s")
+
+
+async def run_scenario(params: dict, iterations: int, page_size: int):
+    latencies, charges = [], []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = await contract_repository.search_contracts(BENCH_USER, params, page_size)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if not result["success"]:
+            raise RuntimeError(result["message"])
+        charges.append(result["request_charge"])
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[max(0, int(len(latencies) * 0.95) - 1)],
+        "mean_ms": statistics.mean(latencies),
+        "ru": statistics.mean(charges),
+    }
+
+
+def print_request_charge_report():
+    """RU per Cosmos DB operation type recorded during the run (empty on the local backend)"""
+    report = request_charge_ledger.report()
+    if not report["operations"]:
+        return
+    print(f"\n💸 Request charge per operation ({report['total_ru']:.1f} RU total)")
+    print(f"{'operation':32} {'calls':>9} {'RU':>9} {'RU/call':>9}")
+    for operation, entry in report["operations"].items():
+        print(f"{operation:32} {entry['requests']:9} {entry['ru']:9.1f} {entry['ru_per_request']:9.2f}")
+
+
+async def main(args):
+    if args.seed:
+        await seed(args.count)
+
+    print(f"\n⏱️  {args.iterations} iterations per scenario, page size {args.page_size}\n")
+    print(f"{'scenario':32} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9} {'RU':>8}")
+    for name, params in SCENARIOS.items():
+        stats = await run_scenario(params, args.iterations, args.page_size)
+        print(f"{name:32} {stats['p50_ms']:9.1f} {stats['p95_ms']:9.1f} {stats['mean_ms']:9.1f} {stats['ru']:8.2f}")
+    print_request_charge_report()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark contract search latency")
+    parser.add_argument("--seed", action="store_true", help="Seed the benchmark partition before running")
+    parser.add_argument("--count", type=int, default=10000, help="Number of contracts to seed")
+    parser.add_argument("--iterations", type=int, default=20, help="Runs per scenario")
+    parser.add_argument("--page-size", type=int, default=50, help="Search page size")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Over-the-network throughput of the development launcher vs the production launcher
+
+Starts each server configuration as a subprocess on the local backend, drives it over HTTP with
+keep-alive connections, and reports req/s and latency for a cheap endpoint and a contract read:
+
+* dev   - ``uvicorn main:app --reload`` (what scripts/run_server.py starts: one process, auto loop)
+* prod  - ``scripts/serve.py`` (gunicorn, CPU-sized uvicorn workers on uvloop / httptools)
+
+The load generator runs in this process, so on small machines it competes with the server for CPU;
+compare the configurations on the same host.
+
+Usage:
+    python benchmarks/bench_server_throughput.py --requests 5000 --concurrency 64
+    python benchmarks/bench_server_throughput.py --only prod --workers 4 --max-requests 0
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+DATA_DIR = tempfile.mkdtemp(prefix="saaseer-bench-server-")
+os.environ.update({"STORAGE_BACKEND": "local", "LOCAL_DATA_DIR": DATA_DIR})
+
+BENCH_USER = "bench-server@saaseer.local"
+
+
+def seed(count: int):
+    from app.database import contract_repository
+    from app.models import ContractData
+
+    async def create():
+        for i in range(count):
+            await contract_repository.create_contract(ContractData(
+                id=f"bench-{i}",
+                UserEmail=BENCH_USER,
+                supplier_name=f"サプライヤー{i % 40}株式会社",
+                service_name=f"サービス{i % 25}",
+                contract_start_date="2025/01/01",
+                contract_end_date=f"2027/{i % 12 + 1:02d}/01",
+                contract_details="所在地: 東京都港区三田三丁目５番１９号、面積: 5.19㎡、月額賃料: 23,550円" * 3
+            ))
+    asyncio.run(create())
+
+
+def launch(mode: str, port: int, workers: int, max_requests=None) -> subprocess.Popen:
+    env = {
+        **os.environ, "DEBUG": "false", "LOG_LEVEL": "WARNING", "TRACING_EXPORTER": "none", "SERVER_ACCESS_LOG": "false"
+    }
+    if mode == "dev":
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--reload",
+                   "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--no-access-log"]
+    else:
+        command = [sys.executable, "scripts/serve.py", "--bind", f"127.0.0.1:{port}"]
+        if workers:
+            command += ["--workers", str(workers)]
+        if max_requests is not None:
+            command += ["--max-requests", str(max_requests)]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/ready")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not become ready")
+
+
+async def run(client: httpx.AsyncClient, label: str, url: str, params: dict, requests: int, concurrency: int):
+    latencies = []
+    remaining = iter(range(requests))
+    reconnects = 0
+
+    async def worker():
+        nonlocal reconnects
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await client.get(url, params=params)
+            except (httpx.RemoteProtocolError, httpx.ReadError):
+                # A recycled worker closed this keep-alive connection; clients retry idempotent requests
+                reconnects += 1
+                response = await client.get(url, params=params)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    # Warm up connections and lazily-built services
+    await asyncio.gather(*(client.get(url, params=params) for _ in range(concurrency)))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(
+        f"{label:32} {requests / elapsed:9.1f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms"
+        + (f"  ({reconnects} reconnects)" if reconnects else "")
+    )
+
+
+async def bench(mode: str, port: int, args):
+    base_url = f"http://127.0.0.1:{port}"
+    process = launch(mode, port, args.workers, args.max_requests)
+    try:
+        await wait_ready(base_url)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+            await run(client, f"[{mode}] GET /health", "/health", {}, args.requests, args.concurrency)
+            await run(client, f"[{mode}] GET /contracts/{{id}}", "/api/v1/contracts/bench-0",
+                      {"user_email": BENCH_USER}, args.requests, args.concurrency)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main(args):
+    from app.server import available_cpus
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    seed(args.seed)
+    print(f"⏱️  {args.requests} requests per endpoint, concurrency {args.concurrency}, {available_cpus()} CPU(s)\n")
+    for offset, mode in enumerate(args.only or ("dev", "prod")):
+        asyncio.run(bench(mode, args.port + offset, args))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare dev and production launcher throughput over HTTP")
+    parser.add_argument("--seed", type=int, default=50, help="Benchmark contracts to create first")
+    parser.add_argument("--requests", type=int, default=3000, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent keep-alive connections")
+    parser.add_argument("--workers", type=int, default=0, help="Production workers (default: CPU count)")
+    parser.add_argument("--max-requests", type=int, default=None, help="Production worker recycling (0 = never)")
+    parser.add_argument("--port", type=int, default=8790, help="First port to listen on")
+    parser.add_argument("--only", nargs="+", choices=("dev", "prod"), help="Run only these configurations")
+    main(parser.parse_args())
@@ -0,0 +1,313 @@
+"""
+Local stand-ins for Cosmos DB, Blob Storage and OpenAI used by benchmarks/load_test.py
+
+Each service gets a ``FaultProfile`` (latency, jitter, error rate, throttling rate):
+
+  * ``FakeCosmosRepository`` wraps the SQLite repository. Every call first runs a simulated SDK
+    call through the app's own ``cosmos_throttle``; like the real (synchronous) SDK it blocks the
+    calling thread for its latency, and throttled calls raise a 429 carrying
+    ``x-ms-retry-after-ms``, so the app's retry / backoff path is what gets measured.
+  * ``FakeBlobStorage`` wraps the local async blob store with non-blocking latency and failures.
+  * ``FakeOpenAIServer`` is an HTTP server (in a thread) answering ``/v1/chat/completions`` and
+    ``/v1/responses``; the app reaches it through the real OpenAI SDK via ``OPENAI_BASE_URL``,
+    including the SDK's own retries on 429 / 5xx.
+"""
+
+import asyncio
+import random
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, Optional
+
+import orjson
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.metrics import record_request_charge
+from app.request_units import cosmos_throttle, request_charge_ledger
+
+
+@dataclass
+class FaultProfile:
+    """Behaviour of one fake service"""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after_ms: float = 100.0
+
+    def delay_seconds(self) -> float:
+        return max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000 if self.latency_ms else 0.0
+
+    def outcome(self) -> Optional[int]:
+        """None for success, otherwise the status code of a simulated failure"""
+        roll = random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 503
+        return None
+
+    def scaled(self, factor: float) -> "FaultProfile":
+        return replace(self, latency_ms=self.latency_ms * factor, jitter_ms=self.jitter_ms * factor)
+
+
+# Latency / fault profiles per service; --latency-scale shrinks or stretches all latencies
+PROFILES: Dict[str, Dict[str, FaultProfile]] = {
+    "ideal": {
+        "cosmos": FaultProfile(),
+        "blob": FaultProfile(),
+        "openai": FaultProfile(),
+    },
+    "typical": {
+        "cosmos": FaultProfile(latency_ms=6, jitter_ms=2),
+        "blob": FaultProfile(latency_ms=25, jitter_ms=10),
+        "openai": FaultProfile(latency_ms=1500, jitter_ms=400),
+    },
+    "degraded": {
+        "cosmos": FaultProfile(latency_ms=25, jitter_ms=15, error_rate=0.01),
+        "blob": FaultProfile(latency_ms=120, jitter_ms=60, error_rate=0.01),
+        "openai": FaultProfile(latency_ms=4000, jitter_ms=1500, error_rate=0.02),
+    },
+    "throttled": {
+        "cosmos": FaultProfile(latency_ms=6, jitter_ms=2, throttle_rate=0.2, retry_after_ms=50),
+        "blob": FaultProfile(latency_ms=25, jitter_ms=10),
+        "openai": FaultProfile(latency_ms=1500, jitter_ms=400, throttle_rate=0.1, retry_after_ms=500),
+    },
+}
+
+
+def profile_settings(name: str, latency_scale: float = 1.0) -> Dict[str, FaultProfile]:
+    return {service: profile.scaled(latency_scale) for service, profile in PROFILES[name].items()}
+
+
+def describe(profiles: Dict[str, FaultProfile]) -> Dict[str, Dict[str, float]]:
+    return {service: asdict(profile) for service, profile in profiles.items()}
+
+
+class SimulatedServiceError(Exception):
+    """A failed call to a fake service; shaped like the SDK errors the app inspects"""
+
+    def __init__(self, service: str, status_code: int, retry_after_ms: float):
+        super().__init__(f"{service} returned {status_code} (simulated)")
+        self.status_code = status_code
+        self.headers = {"x-ms-retry-after-ms": str(retry_after_ms)} if status_code == 429 else {}
+
+
+# Typical request charges of the Cosmos DB operations behind each repository call
+REQUEST_CHARGES = {
+    "create": 7.6, "read": 1.0, "replace": 10.7, "delete": 7.6,
+    "list": 3.4, "search": 4.2, "count_references": 2.9, "read_summary": 1.0,
+}
+
+
+class FakeCosmosRepository:
+    """
+    The SQLite contract repository behind simulated Cosmos DB calls; methods without fault
+    injection (change feed, summaries maintenance) go straight to the SQLite repository
+    """
+
+    def __init__(self, inner, profile: FaultProfile):
+        self.inner = inner
+        self.profile = profile
+        self.calls = 0
+        self.failures = 0
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.inner, attr)
+
+    def _sdk_call(self, operation: str) -> None:
+        # The real SDK blocks the event loop for the round trip; so does this
+        delay = self.profile.delay_seconds()
+        if delay:
+            time.sleep(delay)
+        status = self.profile.outcome()
+        if status is not None:
+            raise SimulatedServiceError("Cosmos DB", status, self.profile.retry_after_ms)
+
+    async def _call(self, operation: str, name: str, *args, **kwargs):
+        self.calls += 1
+        try:
+            await cosmos_throttle.run(self._sdk_call, operation)
+        except SimulatedServiceError as e:
+            self.failures += 1
+            return {"success": False, "message": str(e)}
+        charge = record_request_charge(operation, {"x-ms-request-charge": str(REQUEST_CHARGES[operation])})
+        request_charge_ledger.record(operation, charge, None)
+        return await getattr(self.inner, name)(*args, **kwargs)
+
+    async def create_contract(self, *args, **kwargs):
+        return await self._call("create", "create_contract", *args, **kwargs)
+
+    async def get_contract(self, *args, **kwargs):
+        return await self._call("read", "get_contract", *args, **kwargs)
+
+    async def update_contract(self, *args, **kwargs):
+        return await self._call("replace", "update_contract", *args, **kwargs)
+
+    async def delete_contract(self, *args, **kwargs):
+        return await self._call("delete", "delete_contract", *args, **kwargs)
+
+    async def list_contracts_by_user(self, *args, **kwargs):
+        return await self._call("list", "list_contracts_by_user", *args, **kwargs)
+
+    async def search_contracts(self, *args, **kwargs):
+        return await self._call("search", "search_contracts", *args, **kwargs)
+
+    async def get_summary(self, *args, **kwargs):
+        return await self._call("read_summary", "get_summary", *args, **kwargs)
+
+
+class FakeBlobStorage:
+    """The local async blob store behind simulated (non-blocking) Blob Storage latency and failures"""
+
+    def __init__(self, inner, profile: FaultProfile):
+        self.inner = inner
+        self.profile = profile
+        self.calls = 0
+        self.failures = 0
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.inner, attr)
+
+    async def _round_trip(self) -> bool:
+        self.calls += 1
+        delay = self.profile.delay_seconds()
+        if delay:
+            await asyncio.sleep(delay)
+        if self.profile.outcome() is not None:
+            self.failures += 1
+            return False
+        return True
+
+    async def upload_file(self, *args, **kwargs):
+        if not await self._round_trip():
+            return False, "Blob Storage unavailable (simulated)", None
+        return await self.inner.upload_file(*args, **kwargs)
+
+    async def download_file(self, *args, **kwargs):
+        if not await self._round_trip():
+            return False, "Blob Storage unavailable (simulated)", None
+        return await self.inner.download_file(*args, **kwargs)
+
+    async def delete_file(self, *args, **kwargs):
+        if not await self._round_trip():
+            return False, "Blob Storage unavailable (simulated)"
+        return await self.inner.delete_file(*args, **kwargs)
+
+    async def get_file_properties(self, *args, **kwargs):
+        await self._round_trip()
+        return await self.inner.get_file_properties(*args, **kwargs)
+
+
+EXTRACTED_CONTRACT = {
+    "supplier_name": "住友不動産株式会社",
+    "customer_name": "ＦＰＴジャパンホールディングス株式会社",
+    "contract_start_date": "2025/09/01",
+    "contract_end_date": "2028/06/30",
+    "termination_notice_period": "契約期間満了の1年前から6ヶ月前まで",
+    "contract_details": "所在地: 東京都港区三田三丁目５番１９号、面積: 5.19㎡(1.57坪)、月額金123,550円",
+    "service_name": "防災備蓄倉庫",
+}
+
+REPORT_TEXT = "## 現在の契約の概要\n\n" + "本契約の条件と代替サービスの比較。\n" * 120
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeOpenAIServer:
+    """OpenAI-compatible HTTP endpoints with a fault profile, served from a background thread"""
+
+    def __init__(self, profile: FaultProfile, port: Optional[int] = None):
+        self.profile = profile
+        self.port = port or free_port()
+        self.calls = 0
+        self.failures = 0
+        self._server = uvicorn.Server(uvicorn.Config(
+            self._build_app(), host="127.0.0.1", port=self.port, log_level="error", access_log=False
+        ))
+        self._thread = threading.Thread(target=self._server.run, name="fake-openai", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def _build_app(self) -> FastAPI:
+        api = FastAPI()
+
+        async def simulate(request: Request) -> Optional[JSONResponse]:
+            await request.body()
+            self.calls += 1
+            delay = self.profile.delay_seconds()
+            if delay:
+                await asyncio.sleep(delay)
+            status = self.profile.outcome()
+            if status is None:
+                return None
+            self.failures += 1
+            headers = {"retry-after-ms": str(int(self.profile.retry_after_ms))} if status == 429 else {}
+            error = {"error": {"message": "simulated failure", "type": "server_error", "code": None}}
+            return JSONResponse(error, status_code=429 if status == 429 else 500, headers=headers)
+
+        @api.post("/v1/chat/completions")
+        async def chat_completions(request: Request):
+            failure = await simulate(request)
+            if failure is not None:
+                return failure
+            return {
+                "id": "chatcmpl-load-test",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "fake",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": orjson.dumps(EXTRACTED_CONTRACT).decode()},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 1850, "completion_tokens": 210, "total_tokens": 2060},
+            }
+
+        @api.post("/v1/responses")
+        async def responses(request: Request):
+            failure = await simulate(request)
+            if failure is not None:
+                return failure
+            return {
+                "id": "resp-load-test",
+                "object": "response",
+                "created_at": int(time.time()),
+                "model": "fake",
+                "status": "completed",
+                "output": [{
+                    "type": "message",
+                    "id": "msg-load-test",
+                    "role": "assistant",
+                    "status": "completed",
+                    "content": [{"type": "output_text", "text": REPORT_TEXT, "annotations": []}],
+                }],
+                "parallel_tool_calls": True,
+                "tool_choice": "auto",
+                "tools": [],
+                "usage": {"input_tokens": 600, "output_tokens": 1400, "total_tokens": 2000},
+            }
+
+        return api
+
+    def start(self) -> None:
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Fake OpenAI server did not start")
+            time.sleep(0.01)
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Load test of the whole API against local stand-ins for Cosmos DB, Blob Storage and OpenAI
+
+Boots the app in-process (uvicorn in a background thread, real HTTP on 127.0.0.1) with the
+contract repository, blob store and OpenAI endpoint replaced by the fakes in ``load_fakes.py``,
+then drives a weighted mix of list / get / update / upload / report requests from closed-loop
+clients at increasing concurrency. For every (profile, concurrency) scenario it reports
+throughput, p50 / p95 / p99 latency overall and per operation, failures, Cosmos DB throttling
+retries and peak RSS of the process (server and load generator together).
+
+Uploads are generated PNG images (PDF rendering needs poppler); each one carries random bytes so
+the page cache and idempotency fingerprints never short-circuit the extraction path.
+
+Usage:
+    python benchmarks/load_test.py --profile typical --concurrency 1,4,16,64 --duration 20
+    python benchmarks/load_test.py --profile ideal,throttled --mix list=6,get=6,update=2 --output run.json
+    python benchmarks/load_test.py --profile typical --latency-scale 0.1 --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import os
+import platform
+import random
+import resource
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import orjson
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Fault profiles defined in load_fakes.py (imported only once the environment is configured:
+# settings are read on the first import of the app)
+PROFILE_NAMES = ("ideal", "typical", "degraded", "throttled")
+
+# Request mixes: operation -> weight
+MIXES = {
+    "browse": {"list": 6, "get": 10, "update": 2, "upload": 1, "report": 1},
+    "read-heavy": {"list": 5, "get": 15},
+    "ingest": {"list": 2, "get": 2, "upload": 6},
+}
+
+BENCH_USERS = [f"load-{n}@saaseer.local" for n in range(8)]
+
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(len(ordered) * fraction)) - 1))]
+
+
+def summarize(latencies) -> dict:
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else 0.0,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def parse_mix(value: str) -> dict:
+    if value in MIXES:
+        return MIXES[value]
+    mix = {}
+    for part in value.split(","):
+        operation, _, weight = part.partition("=")
+        mix[operation.strip()] = float(weight or 1)
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown operations: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RssSampler:
+    """Peak resident set size of this process, sampled from /proc (ru_maxrss elsewhere)"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def current(self) -> int:
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * self._page_size
+        except OSError:
+            # ru_maxrss is the lifetime peak: kilobytes on Linux, bytes on macOS
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+    def reset(self) -> None:
+        self.peak = self.current()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.current())
+
+    def start(self):
+        self.reset()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+class AppServer:
+    """The API on uvicorn in a background thread"""
+
+    def __init__(self, app):
+        import uvicorn
+
+        self.port = free_port()
+        self._server = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, log_level="warning", access_log=False
+        ))
+        self._thread = threading.Thread(target=self._server.run, name="api-server", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        self._thread.start()
+        deadline = time.monotonic() + 60
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("API server did not start")
+            time.sleep(0.05)
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=30)
+
+
+def contract_image() -> bytes:
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (1240, 1754), "white")
+    draw = ImageDraw.Draw(image)
+    for line in range(60):
+        draw.rectangle((100, 120 + line * 26, 100 + random.randint(400, 1000), 132 + line * 26), fill="black")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class Workload:
+    """Request builders for each operation; contract ids are shared by all clients of a user"""
+
+    def __init__(self, image: bytes):
+        self.image = image
+        self.contracts = defaultdict(list)
+
+    async def list(self, client, user):
+        return await client.get("/api/v1/contracts/", params={"user_email": user, "limit": 50})
+
+    async def get(self, client, user):
+        contract_id = random.choice(self.contracts[user])
+        return await client.get(f"/api/v1/contracts/{contract_id}", params={"user_email": user})
+
+    async def update(self, client, user):
+        contract_id = random.choice(self.contracts[user])
+        body = {"service_name": f"サービス{random.randint(0, 99)}"}
+        return await client.put(f"/api/v1/contracts/{contract_id}", params={"user_email": user}, json=body)
+
+    async def upload(self, client, user):
+        content = self.image + os.urandom(16)
+        response = await client.post(
+            "/api/v1/contracts/upload",
+            files={"file": (f"contract-{uuid.uuid4().hex[:8]}.png", content, "image/png")},
+            data={"user_email": user},
+        )
+        if response.status_code == 201:
+            contract_id = response.json().get("contract_id")
+            if contract_id:
+                self.contracts[user].append(contract_id)
+        return response
+
+    async def report(self, client, user):
+        contract_id = random.choice(self.contracts[user])
+        return await client.get(f"/api/v1/contracts/report/{contract_id}", params={"user_email": user})
+
+
+OPERATIONS = ("list", "get", "update", "upload", "report")
+
+
+async def seed(repository, per_user: int, workload: Workload):
+    from app.models import ContractData
+
+    for user in BENCH_USERS:
+        for i in range(per_user):
+            contract_id = f"load-{uuid.uuid4().hex[:12]}"
+            await repository.create_contract(ContractData(
+                id=contract_id,
+                UserEmail=user,
+                supplier_name=f"サプライヤー{i % 40}株式会社",
+                customer_name=f"顧客{i % 15}株式会社",
+                service_name=f"サービス{i % 25}",
+                contract_start_date="2025/01/01",
+                contract_end_date=f"2027/{i % 12 + 1:02d}/01",
+                contract_details="所在地: 東京都港区三田三丁目５番１９号、面積: 5.19㎡、月額賃料: 23,550円" * 3,
+                termination_notice_period="契約期間満了の1年前から6ヶ月前まで"
+            ))
+            workload.contracts[user].append(contract_id)
+
+
+async def drive(base_url: str, workload: Workload, mix: dict, concurrency: int, duration: float, warmup: float):
+    """Closed-loop clients: each sends its next request as soon as the previous one finishes"""
+    operations = list(mix)
+    weights = [mix[operation] for operation in operations]
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    measuring = False
+    stop_at = time.monotonic() + warmup + duration
+
+    async def client_loop(client, user):
+        while time.monotonic() < stop_at:
+            operation = random.choices(operations, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await getattr(workload, operation)(client, user)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            if measuring:
+                latencies[operation].append(elapsed)
+                statuses[operation][status] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        clients = [
+            asyncio.create_task(client_loop(client, BENCH_USERS[n % len(BENCH_USERS)]))
+            for n in range(concurrency)
+        ]
+        await asyncio.sleep(warmup)
+        measuring = True
+        started = time.perf_counter()
+        await asyncio.gather(*clients)
+        elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+def scenario_result(profile, concurrency, latencies, statuses, elapsed, fakes, throttle_before, peak_rss) -> dict:
+    from app.request_units import cosmos_throttle
+
+    everything = [value for values in latencies.values() for value in values]
+    failures = sum(
+        count for counter in statuses.values() for status, count in counter.items()
+        if not status.isdigit() or int(status) >= 400
+    )
+    throttle = cosmos_throttle.stats()
+    return {
+        "profile": profile,
+        "concurrency": concurrency,
+        "duration_seconds": round(elapsed, 2),
+        "throughput_rps": round(len(everything) / elapsed, 2) if elapsed else 0.0,
+        **summarize(everything),
+        "failures": failures,
+        "peak_rss_mb": round(peak_rss / (1024 * 1024), 1),
+        "operations": {
+            operation: {**summarize(values), "statuses": dict(statuses[operation])}
+            for operation, values in sorted(latencies.items())
+        },
+        "cosmos_throttled": sum(throttle["throttled"].values()) - sum(throttle_before["throttled"].values()),
+        "cosmos_gave_up": sum(throttle["gave_up"].values()) - sum(throttle_before["gave_up"].values()),
+        "fake_calls": {name: fake.calls for name, fake in fakes.items()},
+        "fake_failures": {name: fake.failures for name, fake in fakes.items()},
+    }
+
+
+def print_result(result: dict):
+    print(
+        f"{result['profile']:10} c={result['concurrency']:<4} {result['throughput_rps']:9.1f} req/s  "
+        f"p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms  "
+        f"fail {result['failures']:<5} 429s {result['cosmos_throttled']:<5} rss {result['peak_rss_mb']:7.1f} MB"
+    )
+    for operation, stats in result["operations"].items():
+        codes = " ".join(f"{status}×{count}" for status, count in sorted(stats["statuses"].items()))
+        print(
+            f"{'':17}{operation:7} {stats['requests']:7} req  p50 {stats['p50_ms']:8.2f}  "
+            f"p95 {stats['p95_ms']:8.2f}  p99 {stats['p99_ms']:8.2f} ms  [{codes}]"
+        )
+
+
+def print_comparison(baseline_path: str, results: list):
+    baseline = {
+        (entry["profile"], entry["concurrency"]): entry
+        for entry in orjson.loads(Path(baseline_path).read_bytes())["scenarios"]
+    }
+    print(f"\n📊 Compared with {baseline_path}")
+    for result in results:
+        before = baseline.get((result["profile"], result["concurrency"]))
+        if before is None:
+            continue
+
+        def delta(key):
+            old, new = before[key], result[key]
+            return f"{(new - old) / old * 100:+6.1f}%" if old else "   n/a"
+
+        print(
+            f"{result['profile']:10} c={result['concurrency']:<4} req/s {delta('throughput_rps')}  "
+            f"p50 {delta('p50_ms')}  p95 {delta('p95_ms')}  p99 {delta('p99_ms')}  rss {delta('peak_rss_mb')}"
+        )
+
+
+def configure_environment(args, data_dir: str, openai_base_url: str):
+    """Point the app at the local backends and the fake OpenAI endpoint (overriding any .env)"""
+    os.environ.update({
+        "STORAGE_BACKEND": "local",
+        "LOCAL_DATA_DIR": data_dir,
+        "CHANGE_FEED_CHECKPOINT_FILE": os.path.join(data_dir, "change_feed_checkpoint.json"),
+        "OPENAI_API_KEY": "load-test",
+        "OPENAI_BASE_URL": openai_base_url,
+        "RATE_LIMIT_ENABLED": "true" if args.rate_limits else "false",
+        "LOG_LEVEL": "WARNING",
+        "SERVER_ACCESS_LOG": "false",
+        "TRACING_EXPORTER": "none",
+    })
+
+
+def main(args):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    data_dir = tempfile.mkdtemp(prefix="saaseer-load-")
+    openai_port = free_port()
+    configure_environment(args, data_dir, f"http://127.0.0.1:{openai_port}/v1")
+
+    from load_fakes import FakeBlobStorage, FakeCosmosRepository, FakeOpenAIServer, describe, profile_settings
+    from app.async_storage_service import async_storage_service, create_async_storage_service
+    from app.database import contract_repository, create_contract_repository
+    from app.request_units import cosmos_throttle
+    from main import app
+
+    # The local (SQLite / filesystem) backends hold the data; the fakes add the service behaviour
+    services = profile_settings(args.profile[0], args.latency_scale)
+    cosmos = FakeCosmosRepository(create_contract_repository(), services["cosmos"])
+    blob = FakeBlobStorage(create_async_storage_service(), services["blob"])
+    openai = FakeOpenAIServer(services["openai"], port=openai_port)
+    openai.start()
+    contract_repository.override(cosmos)
+    async_storage_service.override(blob)
+
+    workload = Workload(contract_image())
+    asyncio.run(seed(cosmos.inner, args.seed, workload))
+
+    sampler = RssSampler()
+    server = AppServer(app)
+    try:
+        server.start()
+    except Exception:
+        openai.stop()
+        raise
+    sampler.start()
+
+    fakes = {"cosmos": cosmos, "blob": blob, "openai": openai}
+    results = []
+    print(
+        f"⏱️  mix {args.mix}, {args.duration:.0f}s per scenario after {args.warmup:.0f}s warm-up, "
+        f"latency scale {args.latency_scale}, {os.cpu_count()} CPU(s)\n"
+    )
+    try:
+        for profile in args.profile:
+            services = profile_settings(profile, args.latency_scale)
+            cosmos.profile, blob.profile, openai.profile = services["cosmos"], services["blob"], services["openai"]
+            for concurrency in args.concurrency:
+                for fake in fakes.values():
+                    fake.calls = fake.failures = 0
+                throttle_before = cosmos_throttle.stats()
+                sampler.reset()
+                latencies, statuses, elapsed = asyncio.run(
+                    drive(server.base_url, workload, args.mix_weights, concurrency, args.duration, args.warmup)
+                )
+                result = scenario_result(
+                    profile, concurrency, latencies, statuses, elapsed, fakes, throttle_before, sampler.peak
+                )
+                results.append(result)
+                print_result(result)
+    finally:
+        sampler.stop()
+        server.stop()
+        openai.stop()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.output:
+        report = {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+            "settings": {
+                "mix": args.mix_weights,
+                "duration_seconds": args.duration,
+                "warmup_seconds": args.warmup,
+                "latency_scale": args.latency_scale,
+                "rate_limits": args.rate_limits,
+                "seed_per_user": args.seed,
+                "profiles": {name: describe(profile_settings(name, args.latency_scale)) for name in args.profile},
+            },
+            "scenarios": results,
+        }
+        Path(args.output).write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        print(f"\n💾 Results written to {args.output}")
+    if args.compare:
+        print_comparison(args.compare, results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the API against fake Cosmos DB, Blob Storage and OpenAI")
+    parser.add_argument("--profile", default="typical",
+                        help=f"Comma-separated fault profiles ({', '.join(PROFILE_NAMES)})")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Comma-separated concurrent client counts")
+    parser.add_argument("--mix", default="browse",
+                        help=f"Named mix ({', '.join(MIXES)}) or weights such as list=6,get=10,upload=1")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiply every fake latency by this")
+    parser.add_argument("--seed", type=int, default=50, help="Contracts created per load-test user")
+    parser.add_argument("--rate-limits", action="store_true", help="Keep per-user admission control enabled")
+    parser.add_argument("--output", help="Write machine-readable results (JSON) to this file")
+    parser.add_argument("--compare", help="Print deltas against a previous --output file")
+    args = parser.parse_args()
+
+    args.profile = [name.strip() for name in args.profile.split(",")]
+    unknown = [name for name in args.profile if name not in PROFILE_NAMES]
+    if unknown:
+        parser.error(f"unknown profile(s): {', '.join(unknown)}")
+    args.concurrency = [int(value) for value in args.concurrency.split(",")]
+    try:
+        args.mix_weights = parse_mix(args.mix)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    main(args)
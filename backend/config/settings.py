@@ -26,17 +26,123 @@ class Settings(BaseSettings):
     # Server settings
     host: str = Field(default="0.0.0.0", env="HOST")
     port: int = Field(default=8000, env="PORT")
+
+    # Production launcher (scripts/serve.py); 0 workers = one per available CPU, capped by server_max_workers
+    server_workers: int = Field(default=0, env="SERVER_WORKERS")
+    server_max_workers: int = Field(default=8, env="SERVER_MAX_WORKERS")
+    server_preload: bool = Field(default=True, env="SERVER_PRELOAD")
+    # Recycle a worker after this many requests (plus random jitter) to bound PIL / PDF memory growth; 0 disables
+    server_max_requests: int = Field(default=2000, env="SERVER_MAX_REQUESTS")
+    server_max_requests_jitter: int = Field(default=200, env="SERVER_MAX_REQUESTS_JITTER")
+    server_keep_alive_seconds: int = Field(default=5, env="SERVER_KEEP_ALIVE_SECONDS")
+    server_backlog: int = Field(default=2048, env="SERVER_BACKLOG")
+    server_graceful_timeout_seconds: int = Field(default=30, env="SERVER_GRACEFUL_TIMEOUT_SECONDS")
+    server_worker_timeout_seconds: int = Field(default=120, env="SERVER_WORKER_TIMEOUT_SECONDS")
+    server_access_log: bool = Field(default=True, env="SERVER_ACCESS_LOG")
+
+    # Dependency warm-up: failed initializers are retried with backoff between these bounds;
+    # storage requests arriving before Blob Storage is ready wait this long, then get a 503
+    warm_up_retry_initial_seconds: float = Field(default=1.0, env="WARM_UP_RETRY_INITIAL_SECONDS")
+    warm_up_retry_max_seconds: float = Field(default=60.0, env="WARM_UP_RETRY_MAX_SECONDS")
+    warm_up_request_wait_seconds: float = Field(default=10.0, env="WARM_UP_REQUEST_WAIT_SECONDS")
+
+    # Storage backend: "azure" (Cosmos DB + Blob Storage) or "local" (SQLite + filesystem)
+    storage_backend: str = Field(default="azure", env="STORAGE_BACKEND")
+    local_data_dir: str = Field(default=".local_data", env="LOCAL_DATA_DIR")
+    local_blob_signing_key: str = Field(default="saaseer-local-dev-key", env="LOCAL_BLOB_SIGNING_KEY")
     
-    # Azure Cosmos DB settings
-    cosmos_endpoint: str = Field(..., env="COSMOS_ENDPOINT")
-    cosmos_key: str = Field(..., env="COSMOS_KEY")
+    # Azure Cosmos DB settings (required when storage_backend is "azure")
+    cosmos_endpoint: Optional[str] = Field(default=None, env="COSMOS_ENDPOINT")
+    cosmos_key: Optional[str] = Field(default=None, env="COSMOS_KEY")
     cosmos_database_name: str = Field(default="ContractManagement", env="COSMOS_DATABASE_NAME")
     cosmos_container_name: str = Field(default="contracts", env="COSMOS_CONTAINER_NAME")
+    cosmos_summary_container_name: str = Field(default="contract_summaries", env="COSMOS_SUMMARY_CONTAINER_NAME")
+    cosmos_reconcile_indexing_policy: bool = Field(default=True, env="COSMOS_RECONCILE_INDEXING_POLICY")
+    # 429 handling: the SDK retries throttled calls only briefly, then the app-level throttle takes over
+    # (honours x-ms-retry-after-ms and slows background work before interactive requests)
+    cosmos_sdk_throttle_retries: int = Field(default=1, env="COSMOS_SDK_THROTTLE_RETRIES")  # at least 1
+    cosmos_sdk_throttle_max_wait_seconds: int = Field(default=2, env="COSMOS_SDK_THROTTLE_MAX_WAIT_SECONDS")
+    cosmos_throttle_max_retries: int = Field(default=5, env="COSMOS_THROTTLE_MAX_RETRIES")
+    cosmos_throttle_max_wait_seconds: float = Field(default=30.0, env="COSMOS_THROTTLE_MAX_WAIT_SECONDS")
+    cosmos_background_max_delay_seconds: float = Field(default=10.0, env="COSMOS_BACKGROUND_MAX_DELAY_SECONDS")
+    
+    # Azure Storage Account settings (required when storage_backend is "azure")
+    azure_sa_url: Optional[str] = Field(default=None, env="AZURE_SA_URL")
+    azure_sa_key: Optional[str] = Field(default=None, env="AZURE_SA_KEY")
+    azure_container_name: Optional[str] = Field(default=None, env="AZURE_CONTAINER_NAME")
+    # Rendered PDF pages persisted as derived blobs (0 disables the page cache)
+    pdf_render_dpi: int = Field(default=200, env="PDF_RENDER_DPI")
+    page_cache_max_bytes: int = Field(default=512 * 1024 * 1024, env="PAGE_CACHE_MAX_BYTES")
+    # Opt-in: name blobs by the SHA-256 of their content so re-uploads of the same file are stored
+    # once (deletes then depend on reference counting; see "Upload deduplication" in the README)
+    blob_content_addressed: bool = Field(default=False, env="BLOB_CONTENT_ADDRESSED")
+    blob_max_concurrency: int = Field(default=4, env="BLOB_MAX_CONCURRENCY")
+    blob_max_block_size: int = Field(default=4 * 1024 * 1024, env="BLOB_MAX_BLOCK_SIZE")
+    blob_max_single_put_size: int = Field(default=8 * 1024 * 1024, env="BLOB_MAX_SINGLE_PUT_SIZE")
+    # Chunk size for streamed downloads; bounds per-request memory of GET /{id}/file
+    blob_stream_chunk_size: int = Field(default=1024 * 1024, env="BLOB_STREAM_CHUNK_SIZE")
+    blob_connection_pool_size: int = Field(default=100, env="BLOB_CONNECTION_POOL_SIZE")
+    upload_url_ttl_seconds: int = Field(default=600, env="UPLOAD_URL_TTL_SECONDS")
+    
+    # Response compression
+    compression_enabled: bool = Field(default=True, env="COMPRESSION_ENABLED")
+    compression_minimum_size: int = Field(default=1024, env="COMPRESSION_MINIMUM_SIZE")
+    compression_brotli_enabled: bool = Field(default=True, env="COMPRESSION_BROTLI_ENABLED")
+    
+    # Prometheus metrics (GET /metrics)
+    metrics_enabled: bool = Field(default=True, env="METRICS_ENABLED")
+    
+    # Admission control for expensive endpoints: per-user token bucket + global concurrency cap.
+    # Backend "memory" (per worker) or "sqlite" (shared by all workers on the host)
+    rate_limit_enabled: bool = Field(default=True, env="RATE_LIMIT_ENABLED")
+    rate_limit_backend: str = Field(default="memory", env="RATE_LIMIT_BACKEND")
+    rate_limit_state_path: Optional[str] = Field(default=None, env="RATE_LIMIT_STATE_PATH")
+    rate_limit_queue_size: int = Field(default=20, env="RATE_LIMIT_QUEUE_SIZE")
+    rate_limit_queue_timeout_seconds: float = Field(default=10.0, env="RATE_LIMIT_QUEUE_TIMEOUT_SECONDS")
+    rate_limit_upload_per_minute: float = Field(default=10, env="RATE_LIMIT_UPLOAD_PER_MINUTE")
+    rate_limit_upload_burst: int = Field(default=5, env="RATE_LIMIT_UPLOAD_BURST")
+    rate_limit_upload_concurrency: int = Field(default=4, env="RATE_LIMIT_UPLOAD_CONCURRENCY")
+    rate_limit_report_per_minute: float = Field(default=10, env="RATE_LIMIT_REPORT_PER_MINUTE")
+    rate_limit_report_burst: int = Field(default=3, env="RATE_LIMIT_REPORT_BURST")
+    rate_limit_report_concurrency: int = Field(default=4, env="RATE_LIMIT_REPORT_CONCURRENCY")
+    rate_limit_alerts_per_minute: float = Field(default=30, env="RATE_LIMIT_ALERTS_PER_MINUTE")
+    rate_limit_alerts_burst: int = Field(default=10, env="RATE_LIMIT_ALERTS_BURST")
+    rate_limit_alerts_concurrency: int = Field(default=8, env="RATE_LIMIT_ALERTS_CONCURRENCY")
     
-    # Azure Storage Account settings
-    azure_sa_url: str = Field(..., env="AZURE_SA_URL")
-    azure_sa_key: str = Field(..., env="AZURE_SA_KEY")
-    azure_container_name: str = Field(..., env="AZURE_CONTAINER_NAME")
+    # Idempotency-Key support for create / upload: outcomes kept for idempotency_ttl_seconds.
+    # Backend "memory" (per worker) or "sqlite" (shared by all workers on the host)
+    idempotency_enabled: bool = Field(default=True, env="IDEMPOTENCY_ENABLED")
+    idempotency_backend: str = Field(default="memory", env="IDEMPOTENCY_BACKEND")
+    idempotency_state_path: Optional[str] = Field(default=None, env="IDEMPOTENCY_STATE_PATH")
+    idempotency_ttl_seconds: int = Field(default=24 * 3600, env="IDEMPOTENCY_TTL_SECONDS")
+    # A crashed worker's in-progress key is released after this long
+    idempotency_lease_seconds: int = Field(default=900, env="IDEMPOTENCY_LEASE_SECONDS")
+    # How long a retry waits for the original request before getting 409
+    idempotency_wait_seconds: float = Field(default=120.0, env="IDEMPOTENCY_WAIT_SECONDS")
+    
+    # Live upload progress (GET /upload/{upload_id}/events, SSE) for requests sent with X-Upload-ID.
+    # Backend "memory" (stream served by the uploading worker) or "sqlite" (shared by all workers on the host)
+    progress_enabled: bool = Field(default=True, env="PROGRESS_ENABLED")
+    progress_backend: str = Field(default="memory", env="PROGRESS_BACKEND")
+    progress_state_path: Optional[str] = Field(default=None, env="PROGRESS_STATE_PATH")
+    progress_retention_seconds: int = Field(default=600, env="PROGRESS_RETENTION_SECONDS")
+    progress_heartbeat_seconds: float = Field(default=15.0, env="PROGRESS_HEARTBEAT_SECONDS")
+    # A stream with no events for this long is closed (e.g. the upload never started)
+    progress_idle_timeout_seconds: float = Field(default=300.0, env="PROGRESS_IDLE_TIMEOUT_SECONDS")
+    
+    # Per-request sampling profiler for requests sent with X-Profile-Token: <PROFILING_TOKEN>.
+    # Collapsed-stack profiles go to PROFILING_OUTPUT_DIR (default: <LOCAL_DATA_DIR>/profiles)
+    profiling_enabled: bool = Field(default=False, env="PROFILING_ENABLED")
+    profiling_token: Optional[str] = Field(default=None, env="PROFILING_TOKEN")
+    profiling_output_dir: Optional[str] = Field(default=None, env="PROFILING_OUTPUT_DIR")
+    profiling_interval_ms: float = Field(default=5.0, env="PROFILING_INTERVAL_MS")
+    profiling_max_profiles: int = Field(default=200, env="PROFILING_MAX_PROFILES")
+    
+    # Request tracing: spans kept in memory for GET /stats/traces, optionally exported ("none", "console", "file")
+    tracing_enabled: bool = Field(default=True, env="TRACING_ENABLED")
+    tracing_exporter: str = Field(default="none", env="TRACING_EXPORTER")
+    tracing_file_path: str = Field(default="logs/traces.jsonl", env="TRACING_FILE_PATH")
+    tracing_recent_traces: int = Field(default=200, env="TRACING_RECENT_TRACES")
     
     # CORS settings
     cors_origins: list = Field(default=["*"], env="CORS_ORIGINS")
@@ -46,6 +152,12 @@ class Settings(BaseSettings):
     
     # Logging settings
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
+    # "text" or "json" (one JSON object per line, with request / trace ids); written by a background thread
+    log_format: str = Field(default="text", env="LOG_FORMAT")
+    log_queue_size: int = Field(default=10000, env="LOG_QUEUE_SIZE")
+    # Large payloads (extracted data, model responses): cap per record, fraction logged at INFO
+    log_payload_max_chars: int = Field(default=2000, env="LOG_PAYLOAD_MAX_CHARS")
+    log_payload_sample_rate: float = Field(default=0.1, env="LOG_PAYLOAD_SAMPLE_RATE")
     
     # OpenAI settings
     openai_api_key: Optional[str] = Field(default=None, env="OPENAI_API_KEY")
@@ -54,6 +166,27 @@ class Settings(BaseSettings):
     # Expiration settings
     expiry_warning_days: int = Field(default=60, env="EXPIRY_WARNING_DAYS")
     
+    # Contract read cache settings
+    contract_cache_enabled: bool = Field(default=True, env="CONTRACT_CACHE_ENABLED")
+    contract_cache_max_entries: int = Field(default=1024, env="CONTRACT_CACHE_MAX_ENTRIES")
+    contract_cache_ttl_seconds: float = Field(default=10.0, env="CONTRACT_CACHE_TTL_SECONDS")
+    
+    # Change feed / summary settings
+    change_feed_enabled: bool = Field(default=True, env="CHANGE_FEED_ENABLED")
+    change_feed_poll_interval_seconds: float = Field(default=5.0, env="CHANGE_FEED_POLL_INTERVAL_SECONDS")
+    # Checkpoint and lease shared by the workers of one host; use the lease container across hosts
+    change_feed_checkpoint_file: str = Field(default=".change_feed_checkpoint.json", env="CHANGE_FEED_CHECKPOINT_FILE")
+    change_feed_lease_container_name: Optional[str] = Field(default=None, env="CHANGE_FEED_LEASE_CONTAINER_NAME")
+    summary_next_expiring_limit: int = Field(default=5, env="SUMMARY_NEXT_EXPIRING_LIMIT")
+    
+    # Blob cleanup settings
+    blob_delete_batch_size: int = Field(default=256, env="BLOB_DELETE_BATCH_SIZE")
+    blob_delete_flush_interval_seconds: float = Field(default=2.0, env="BLOB_DELETE_FLUSH_INTERVAL_SECONDS")
+    # Queued files modified this recently (re-uploaded, contract not saved yet) are left to the sweeper
+    blob_delete_min_age_seconds: int = Field(default=900, env="BLOB_DELETE_MIN_AGE_SECONDS")
+    orphan_sweep_min_age_seconds: int = Field(default=24 * 3600, env="ORPHAN_SWEEP_MIN_AGE_SECONDS")
+    orphan_sweep_concurrency: int = Field(default=8, env="ORPHAN_SWEEP_CONCURRENCY")
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
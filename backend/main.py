@@ -1,8 +1,9 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 import uvicorn
 import os
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
@@ -10,52 +11,102 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-from app.routes import router as contracts_router
-from app.database import cosmos_db
-from config.settings import get_settings
+# Configure logging before the app modules log anything
+# (written by a background thread; LOG_FORMAT=json for structured logs)
+from app.logging_setup import configure_logging  # noqa: E402
+from config.settings import get_settings  # noqa: E402
+
+configure_logging(get_settings())
+
+from app.routes import router as contracts_router, blob_deletion_queue
+from app.database import contract_repository, summary_processor
+from app.async_storage_service import async_storage_service
+from app.extraction_service import extraction_service
+from app.services import readiness
+from app.compression import CompressionMiddleware
+from app.metrics import CONTENT_TYPE_LATEST, MetricsMiddleware, register_service_collector, render_metrics
+from app.profiling import ProfilingMiddleware
+from app.progress import ProgressMiddleware
+from app.tracing import TracingMiddleware
+from app.request_units import RequestChargeMiddleware
 
 # Get application settings
 settings = get_settings()
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
-# Disable verbose Azure logging
-azure_logger = logging.getLogger('azure.core.pipeline.policies.http_logging_policy')
-azure_logger.setLevel(logging.WARNING)
-
-azure_cosmos_logger = logging.getLogger('azure.cosmos')
-azure_cosmos_logger.setLevel(logging.WARNING)
-
 # Keep uvicorn access logs to see API requests
 uvicorn_access_logger = logging.getLogger('uvicorn.access')
 uvicorn_access_logger.setLevel(logging.INFO)
 
 
+async def init_database():
+    """Build the repository and create the database and containers, both off the event loop"""
+    await asyncio.to_thread(contract_repository.get)
+    # Setup errors are logged and reported as False rather than raised
+    if not await asyncio.to_thread(contract_repository.create_database_and_container_if_not_exists):
+        raise RuntimeError("Database and container setup failed")
+    logger.info("✅ Database and container initialization completed")
+    
+    # Keep per-user summaries up to date from the change feed
+    if settings.change_feed_enabled:
+        await asyncio.to_thread(summary_processor.get)
+        await summary_processor.start()
+
+
+async def init_blob_storage():
+    """Open the shared Blob Storage client and make sure the container exists"""
+    await asyncio.to_thread(async_storage_service.get)
+    await async_storage_service.open()
+    await async_storage_service.ensure_container_exists()
+
+
+async def init_extraction():
+    """Build the extraction service (imports the OpenAI SDK)"""
+    await asyncio.to_thread(extraction_service.get)
+
+
+async def warm_up():
+    """Initialize dependencies concurrently; one failing doesn't block the others"""
+    await asyncio.gather(
+        readiness.warm_up("database", init_database),
+        readiness.warm_up("blob_storage", init_blob_storage),
+        readiness.warm_up("extraction", init_extraction),
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Application lifespan manager - handles startup and shutdown events
+    
+    Dependencies warm up in the background so the server accepts connections immediately;
+    `/ready` reports when they are usable.
     """
     # Startup
     logger.info("🚀 Starting SaaSeer Contract Management API...")
+    readiness.register("database")
+    readiness.register("blob_storage")
+    # Only needed by the upload endpoints
+    readiness.register("extraction", required=False)
+    warm_up_task = asyncio.create_task(warm_up())
     
-    # Initialize database and container if they don't exist
-    try:
-        await cosmos_db.create_database_and_container_if_not_exists()
-        logger.info("✅ Database and container initialization completed")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize database: {str(e)}")
-        # Don't fail startup, but log the error
+    # Delete files released by contract deletions in batches
+    await blob_deletion_queue.start()
     
     yield
     
     # Shutdown
     logger.info("⏹️ Shutting down SaaSeer Contract Management API...")
+    warm_up_task.cancel()
+    try:
+        await warm_up_task
+    except asyncio.CancelledError:
+        pass
+    if summary_processor.initialized:
+        await summary_processor.stop()
+    await blob_deletion_queue.stop()
+    if async_storage_service.initialized:
+        await async_storage_service.close()
 
 
 # Create FastAPI application
@@ -86,9 +137,38 @@ app = FastAPI(
     license_info={
         "name": "MIT",
     },
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# Compress JSON lists, reports and event streams (gzip, or brotli when accepted and installed)
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        brotli_enabled=settings.compression_brotli_enabled
+    )
+
+# Per-route latency histograms (added after compression, so its cost is included)
+if settings.metrics_enabled:
+    register_service_collector()
+    app.add_middleware(MetricsMiddleware)
+
+# Cosmos DB RU per request (X-Request-Charge) and per route / user
+app.add_middleware(RequestChargeMiddleware)
+
+# Live progress events for uploads sent with X-Upload-ID
+if settings.progress_enabled:
+    app.add_middleware(ProgressMiddleware)
+
+# Sampling profile of requests sent with X-Profile-Token (not installed unless enabled)
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+# Root span and request id (X-Request-ID / traceparent) for every request
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -102,6 +182,11 @@ app.add_middleware(
 # Include routers
 app.include_router(contracts_router)
 
+# Local stand-in for direct-to-Blob uploads
+if settings.storage_backend == "local":
+    from app.local_blob_routes import router as local_blob_router
+    app.include_router(local_blob_router)
+
 
 # Root endpoint
 @app.get("/", tags=["root"])
@@ -135,6 +220,28 @@ async def health_check():
         raise HTTPException(status_code=503, detail="Service unavailable")
 
 
+# Readiness probe
+@app.get("/ready", tags=["health"])
+async def readiness_check():
+    """
+    Readiness probe: 200 once the database and blob storage are initialized, 503 before that
+    
+    Reports the warm-up status and duration of each dependency.
+    """
+    report = readiness.report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+
+# Prometheus scrape endpoint
+if settings.metrics_enabled:
+    @app.get("/metrics", tags=["health"], include_in_schema=False)
+    async def metrics():
+        """
+        Prometheus metrics: request and upload stage latency, OpenAI tokens, Cosmos RU, cache hit ratios
+        """
+        return Response(content=render_metrics(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Migration check: report drift between the declared and live contracts indexing policy
+
+Usage:
+    python scripts/check_indexing_policy.py          # report drift, exit code 1 if any
+    python scripts/check_indexing_policy.py --apply  # replace the live policy with the declared one
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Allow running from the backend directory or the scripts directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import contract_repository  # noqa: E402
+from app.indexing_policy import CONTRACTS_INDEXING_POLICY  # noqa: E402
+from app.logging_setup import configure_logging  # noqa: E402
+from config.settings import get_settings  # noqa: E402
+
+
+def main(apply: bool, show: bool) -> int:
+    if show:
+        print(json.dumps(CONTRACTS_INDEXING_POLICY, indent=2))
+
+    drift = contract_repository.check_indexing_policy()
+    if not drift:
+        print("✅ Live indexing policy matches the declared policy")
+        return 0
+
+    print(f"⚠️  {len(drift)} difference(s) between declared and live indexing policy:")
+    for item in drift:
+        print(f"   - {item}")
+
+    if apply:
+        contract_repository.reconcile_indexing_policy()
+        print("✅ Declared indexing policy applied (Cosmos DB re-indexes online)")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    configure_logging(get_settings())
+    parser = argparse.ArgumentParser(description="Check the contracts container indexing policy for drift")
+    parser.add_argument("--apply", action="store_true", help="Replace the live policy with the declared one")
+    parser.add_argument("--show", action="store_true", help="Print the declared policy")
+    args = parser.parse_args()
+    sys.exit(main(args.apply, args.show))
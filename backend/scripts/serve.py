@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Non-interactive production entry point: gunicorn with uvicorn workers on uvloop / httptools
+
+Workers, preloading, recycling, keep-alive and backlog come from the SERVER_* settings;
+the options below override them for one run. Use scripts/run_server.py for development.
+
+Usage:
+    python scripts/serve.py                           # one worker per CPU on HOST:PORT
+    python scripts/serve.py --workers 4 --bind 0.0.0.0:8080
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+# The app is imported as main:app from the backend directory
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.chdir(BACKEND_DIR)
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+from app import server  # noqa: E402
+from app.logging_setup import configure_logging  # noqa: E402
+from config.settings import get_settings  # noqa: E402
+
+
+def main(args):
+    settings = get_settings()
+    configure_logging(settings)
+    if args.max_requests is not None:
+        settings.server_max_requests = args.max_requests
+    if args.no_preload:
+        settings.server_preload = False
+    if settings.debug:
+        logging.getLogger(__name__).warning("⚠️ DEBUG is enabled: error details are returned to clients")
+    server.run(settings, workers=args.workers, bind=args.bind)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the API with the production server configuration")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: SERVER_WORKERS or CPU count)")
+    parser.add_argument("--bind", default=None, help="host:port to listen on (default: HOST:PORT)")
+    parser.add_argument("--max-requests", type=int, default=None, help="Recycle workers after this many requests (0 = never)")
+    parser.add_argument("--no-preload", action="store_true", help="Import the app in every worker instead of once")
+    main(parser.parse_args())
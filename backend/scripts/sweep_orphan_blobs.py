@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Find contract files in Blob Storage that no contract points at, and optionally delete them
+
+Usage:
+    python scripts/sweep_orphan_blobs.py                    # dry run: report orphans and their size
+    python scripts/sweep_orphan_blobs.py --apply            # delete orphans and report bytes reclaimed
+    python scripts/sweep_orphan_blobs.py --min-age-hours 1  # also consider files newer than the default age
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Allow running from the backend directory or the scripts directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.async_storage_service import async_storage_service  # noqa: E402
+from app.blob_cleanup import create_orphan_sweeper  # noqa: E402
+from app.database import contract_repository  # noqa: E402
+from app.logging_setup import configure_logging  # noqa: E402
+from config.settings import get_settings  # noqa: E402
+
+
+async def main(args):
+    sweeper = create_orphan_sweeper(contract_repository, async_storage_service, get_settings())
+    if args.min_age_hours is not None:
+        sweeper.min_age_seconds = args.min_age_hours * 3600
+
+    await async_storage_service.open()
+    try:
+        report = await sweeper.sweep(apply=args.apply)
+    finally:
+        await async_storage_service.close()
+
+    action = "Deleted" if args.apply else "Found (dry run)"
+    print(f"✅ {action} {report['orphans']} orphaned file(s), {report['orphan_bytes'] / (1024 * 1024):.2f} MB")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    configure_logging(get_settings())
+    parser = argparse.ArgumentParser(description="Sweep orphaned contract files from Blob Storage")
+    parser.add_argument("--apply", action="store_true", help="Delete the orphans instead of only reporting them")
+    parser.add_argument("--min-age-hours", type=float, default=None, help="Only consider files older than this")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import time
+
+from app.blob_cleanup import BlobDeletionQueue, OrphanSweeper
+from app.local_storage import AsyncLocalBlobStorageService, LocalBlobStorageService, SQLiteContractRepository
+from app.models import ContractData
+
+USER = "tester@example.com"
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def _setup(tmp_path):
+    store = LocalBlobStorageService(str(tmp_path / "blobs"), content_addressed=True)
+    repository = SQLiteContractRepository(str(tmp_path / "contracts.db"))
+    return store, AsyncLocalBlobStorageService(store), repository
+
+
+def _age(store, url, seconds):
+    path = store._path(store.blob_name_from_url(url))
+    os.utime(path, (time.time() - seconds, time.time() - seconds))
+
+
+def test_deletion_queue_keeps_referenced_blobs(tmp_path):
+    store, storage, repository = _setup(tmp_path)
+    shared = store.upload_file(b"shared", "a.pdf", "application/pdf", USER)[2]
+    single = store.upload_file(b"single", "b.pdf", "application/pdf", USER)[2]
+    run(repository.create_contract(ContractData(id="keep", UserEmail=USER, LinkImage=shared)))
+    for url in (shared, single):
+        _age(store, url, 7200)
+
+    queue = BlobDeletionQueue(repository, storage, batch_size=2, min_age_seconds=3600)
+    assert queue.enqueue(USER, shared)
+    assert queue.enqueue(USER, single)
+    assert not queue.enqueue(USER, "https://elsewhere.example.com/file.pdf")
+
+    assert run(queue.flush()) == 1
+    assert store.blob_exists(store.blob_name_from_url(shared))
+    assert not store.blob_exists(store.blob_name_from_url(single))
+    assert queue.metrics()["kept_referenced"] == 1
+    assert queue.metrics()["pending"] == 0
+
+
+def test_deletion_queue_keeps_blobs_reused_by_a_pending_upload(tmp_path):
+    store, storage, repository = _setup(tmp_path)
+    reuploaded = store.upload_file(b"same file", "a.pdf", "application/pdf", USER)[2]
+    queued_before = store.upload_file(b"other file", "b.pdf", "application/pdf", USER)[2]
+    for url in (reuploaded, queued_before):
+        _age(store, url, 7200)
+
+    queue = BlobDeletionQueue(repository, storage, min_age_seconds=0)
+    queue.enqueue(USER, reuploaded)
+    # Re-upload of the same file between enqueue and flush; its contract isn't saved yet
+    time.sleep(0.01)
+    assert store.upload_file(b"same file", "a.pdf", "application/pdf", USER)[2] == reuploaded
+    assert run(queue.flush()) == 0
+    assert store.blob_exists(store.blob_name_from_url(reuploaded))
+
+    # Re-upload just before the enqueue is covered by the minimum age
+    queue.min_age_seconds = 3600
+    store.upload_file(b"other file", "b.pdf", "application/pdf", USER)
+    queue.enqueue(USER, queued_before)
+    assert run(queue.flush()) == 0
+    assert store.blob_exists(store.blob_name_from_url(queued_before))
+    assert queue.metrics()["kept_recently_modified"] == 2
+    assert queue.metrics()["deleted"] == 0
+
+
+def test_orphan_sweeper_reports_and_reclaims(tmp_path):
+    store, storage, repository = _setup(tmp_path)
+    referenced = store.upload_file(b"referenced", "a.pdf", "application/pdf", USER)[2]
+    orphan = store.upload_file(b"orphaned!", "b.pdf", "application/pdf", USER)[2]
+    recent = store.upload_file(b"recent", "c.pdf", "application/pdf", "other@example.com")[2]
+    store.put_blob("_derived/pages/abc/200dpi-png/page-0001.png", b"derived")
+    run(repository.create_contract(ContractData(id="c1", UserEmail=USER, LinkImage=referenced)))
+    for url in (referenced, orphan):
+        _age(store, url, 7200)
+
+    sweeper = OrphanSweeper(repository, storage, min_age_seconds=3600, concurrency=2)
+    report = run(sweeper.sweep())
+    assert report["dry_run"]
+    assert report["prefixes_scanned"] == 2
+    assert report["blobs_scanned"] == 3
+    assert report["orphans"] == 1
+    assert report["orphan_bytes"] == len(b"orphaned!")
+    assert report["skipped_too_recent"] == 1
+    assert store.blob_exists(store.blob_name_from_url(orphan))
+
+    report = run(sweeper.sweep(apply=True))
+    assert report["deleted"] == 1
+    assert report["bytes_reclaimed"] == len(b"orphaned!")
+    assert not store.blob_exists(store.blob_name_from_url(orphan))
+    assert store.blob_exists(store.blob_name_from_url(referenced))
+    assert store.blob_exists(store.blob_name_from_url(recent))
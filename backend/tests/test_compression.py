@@ -0,0 +1,78 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+
+from app.compression import CompressionMiddleware, CompressionStats, choose_encoding
+
+
+
+def _app(content_type: bytes, chunks, status: int = 200):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", content_type)]})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+    return app
+
+
+def _call(app, accept_encoding: str = "gzip", **options):
+    stats = CompressionStats()
+    middleware = CompressionMiddleware(app, minimum_size=100, stats=stats, **options)
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    scope = {"type": "http", "method": "GET", "path": "/items", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(middleware(scope, receive, send))
+    headers = dict(sent[0]["headers"])
+    return headers, [message.get("body", b"") for message in sent[1:]], stats
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("br;q=0, gzip") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip, br", brotli_enabled=False) == "gzip"
+
+
+def test_large_json_is_gzipped_and_recorded():
+    payload = ("契約" * 500).encode("utf-8")
+    headers, bodies, stats = _call(_app(b"application/json", [payload]), brotli_enabled=False)
+    assert headers[b"content-encoding"] == b"gzip"
+    assert gzip.decompress(b"".join(bodies)) == payload
+    report = stats.report()
+    assert report["routes"]["GET /items"]["bytes_in"] == len(payload)
+    assert report["bytes_saved"] > 0
+
+
+def test_small_and_binary_responses_pass_through():
+    headers, bodies, _ = _call(_app(b"application/json", [b'{"ok": true}']))
+    assert b"content-encoding" not in headers
+    assert bodies == [b'{"ok": true}']
+
+    headers, _, _ = _call(_app(b"application/pdf", [b"%PDF" * 1000]))
+    assert b"content-encoding" not in headers
+
+
+def test_event_stream_flushes_every_event():
+    events = [f"data: 進捗 {i}\n\n".encode("utf-8") for i in range(3)]
+    headers, bodies, _ = _call(_app(b"text/event-stream", events + [b""]), brotli_enabled=False)
+    assert headers[b"content-encoding"] == b"gzip"
+
+    # Each chunk must decode to its event on its own, without waiting for the end of the stream
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for event, body in zip(events, bodies):
+        assert decoder.decompress(body) == event
+
+
+def test_brotli_when_accepted():
+    brotli = pytest.importorskip("brotli")
+    payload = ("レポート" * 500).encode("utf-8")
+    headers, bodies, _ = _call(_app(b"text/markdown; charset=utf-8", [payload]), accept_encoding="gzip, br")
+    assert headers[b"content-encoding"] == b"br"
+    assert brotli.decompress(b"".join(bodies)) == payload
@@ -0,0 +1,55 @@
+"""
+Unit tests for the contract read cache
+"""
+
+import time
+
+from app.cache import ContractCache
+
+
+def test_hit_after_put():
+    cache = ContractCache(max_entries=4, ttl_seconds=60)
+    cache.put(("a@x.com", "c1"), {"id": "c1", "_etag": '"1"'})
+
+    entry = cache.get(("a@x.com", "c1"))
+
+    assert entry is not None
+    assert entry.etag == '"1"'
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 0
+
+
+def test_lru_eviction_respects_size_bound():
+    cache = ContractCache(max_entries=2, ttl_seconds=60)
+    cache.put("k1", {"id": "1"})
+    cache.put("k2", {"id": "2"})
+    cache.get("k1")  # k1 becomes most recently used
+    cache.put("k3", {"id": "3"})
+
+    assert cache.get("k2") is None
+    assert cache.get("k1") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entry_is_kept_for_revalidation():
+    cache = ContractCache(max_entries=2, ttl_seconds=0.01)
+    cache.put("k", {"id": "1", "_etag": '"e"'})
+    time.sleep(0.02)
+
+    assert cache.get("k") is None
+    stale = cache.get_stale("k")
+    assert stale is not None and stale.etag == '"e"'
+
+    cache.touch("k")
+    assert cache.stats()["revalidations"] == 1
+
+
+def test_invalidate_and_disabled_cache():
+    cache = ContractCache(max_entries=2, ttl_seconds=60)
+    cache.put("k", {"id": "1"})
+    cache.invalidate("k")
+    assert cache.get("k") is None
+
+    disabled = ContractCache(max_entries=0, ttl_seconds=60)
+    disabled.put("k", {"id": "1"})
+    assert disabled.get("k") is None
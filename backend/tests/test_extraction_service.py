@@ -0,0 +1,109 @@
+import json
+import os
+import tracemalloc
+from types import SimpleNamespace
+
+import orjson
+import pdf2image
+import pytest
+
+from app.extraction_service import ContractExtractionService
+from app.local_storage import LocalBlobStorageService
+from app.page_cache import PageCache
+
+PAGES = 30
+PAGE_BYTES = 200 * 1024
+
+
+class FakeOpenAI:
+    """Keeps each request's body chunks (decoded later, outside any measurement) and answers with fixed data"""
+
+    def __init__(self):
+        self.requests = []
+
+    def post(self, path, content=None, options=None, cast_to=None):
+        self.requests.append({"path": path, "content": content, "headers": options["headers"]})
+        message = SimpleNamespace(content=json.dumps({"service_name": "防災備蓄倉庫"}))
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=message)],
+            usage=SimpleNamespace(prompt_tokens=1000, completion_tokens=50)
+        )
+
+
+def _images(request):
+    body = orjson.loads(b"".join(request["content"]))
+    return [part for part in body["messages"][1]["content"] if part["type"] == "image_url"]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    extractor = ContractExtractionService()
+    extractor.client = FakeOpenAI()
+    extractor._post_takes_content = True
+    extractor.page_cache = None
+    return extractor
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Poppler stand-in: writes one PNG-sized file per page, as pdftoppm does with paths_only"""
+    calls = []
+
+    def convert_from_bytes(pdf, dpi, fmt, first_page, output_folder, paths_only, poppler_path):
+        calls.append(first_page)
+        paths = []
+        for page in range(first_page, PAGES + 1):
+            path = os.path.join(output_folder, f"page-{page:02d}.png")
+            with open(path, "wb") as f:
+                f.write(os.urandom(PAGE_BYTES))
+            paths.append(path)
+        return paths
+
+    monkeypatch.setattr(pdf2image, "convert_from_bytes", convert_from_bytes)
+    return calls
+
+
+def test_peak_memory_per_page_stays_near_the_encoded_page(service, renders):
+    # Warm up imports and lazily-built state outside the measurement
+    service.extract_from_file(b"%PDF-1.4 warm-up", "warm-up.pdf")
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = service.extract_from_file(b"%PDF-1.4 contract", "contract.pdf")
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    assert result["success"]
+    request = service.client.requests[-1]
+    assert request["path"] == "/chat/completions"
+    assert int(request["headers"]["Content-Length"]) == sum(map(len, request["content"]))
+    images = _images(request)
+    assert len(images) == PAGES
+    assert images[0]["image_url"]["detail"] == "high"
+    # Only the base64 body chunks (4/3 of a page per page) are kept: a single joined copy of the
+    # body would add another 4/3, and holding every page as PNG bytes, base64 text, a data: URL
+    # and a serialized body takes over 5x a page
+    assert peak / PAGES < 1.75 * PAGE_BYTES, f"{peak / PAGES / 1024:.0f} KiB per page"
+
+
+def test_rendered_pages_are_cached_and_streamed_back(service, renders, tmp_path):
+    service.page_cache = PageCache(LocalBlobStorageService(str(tmp_path / "blobs")))
+
+    service.extract_from_file(b"%PDF-1.4 contract", "contract.pdf")
+    service.extract_from_file(b"%PDF-1.4 contract", "contract.pdf")
+
+    assert renders == [1]
+    first, second = service.client.requests
+    assert _images(first) == _images(second)
+    assert service.page_cache.stats()["hits"] == 1
+
+    # A page missing from the cache is rendered again from that page on
+    digest = service.page_cache.document_hash(b"%PDF-1.4 contract")
+    prefix = service.page_cache.rendition_prefix(digest, service.render_dpi, "png")
+    service.page_cache.store.delete_file(prefix + "page-0010.png")
+    service.extract_from_file(b"%PDF-1.4 contract", "contract.pdf")
+    assert renders == [1, 10]
+    assert len(_images(service.client.requests[-1])) == PAGES
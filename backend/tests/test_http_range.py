@@ -0,0 +1,30 @@
+import pytest
+
+from app.http_range import RangeNotSatisfiable, content_range, parse_range_header
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-5000", (990, 999)),
+    # Ignored: the full content is served
+    ("bytes=0-1,5-9", None),
+    ("items=0-1", None),
+    ("bytes=abc", None),
+    ("bytes=10-5", None),
+])
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=2000-3000", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header(header, 1000)
+
+
+def test_content_range():
+    assert content_range(0, 99, 1000) == "bytes 0-99/1000"
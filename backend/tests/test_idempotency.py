@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.testclient import TestClient
+
+import app.idempotency as idempotency
+from app.idempotency import IdempotencyConflict, IdempotencyManager, MemoryIdempotencyStore, SQLiteIdempotencyStore
+
+
+def _app(monkeypatch, manager, calls):
+    monkeypatch.setattr(idempotency, "idempotency_manager", manager)
+    api = FastAPI()
+
+    @api.post("/contracts", status_code=201)
+    @idempotency.idempotent("create", status_code=201)
+    async def create(request: Request):
+        calls.append(await request.json())
+        return {"success": True, "contract_id": f"contract_{len(calls)}"}
+
+    return TestClient(api)
+
+
+def test_retry_with_same_key_replays_the_first_response(monkeypatch):
+    calls = []
+    client = _app(monkeypatch, IdempotencyManager(MemoryIdempotencyStore()), calls)
+    headers = {"Idempotency-Key": "k-1"}
+
+    first = client.post("/contracts", json={"id": "a"}, headers=headers)
+    retry = client.post("/contracts", json={"id": "a"}, headers=headers)
+    assert (first.status_code, retry.status_code) == (201, 201)
+    assert retry.json() == first.json() == {"success": True, "contract_id": "contract_1"}
+    assert retry.headers["Idempotency-Replayed"] == "true"
+    assert len(calls) == 1
+
+    # Different request under the same key
+    assert client.post("/contracts", json={"id": "b"}, headers=headers).status_code == 422
+    # No key: no deduplication
+    client.post("/contracts", json={"id": "a"})
+    assert len(calls) == 2
+
+
+def test_same_key_from_different_users_does_not_collide(monkeypatch):
+    calls = []
+    client = _app(monkeypatch, IdempotencyManager(MemoryIdempotencyStore()), calls)
+    headers = {"Idempotency-Key": "k-1"}
+
+    first = client.post("/contracts", json={"UserEmail": "a@x.com", "id": "a"}, headers=headers)
+    other = client.post("/contracts", json={"contract_data": '{"UserEmail": "b@x.com", "id": "a"}'}, headers=headers)
+    assert (first.status_code, other.status_code) == (201, 201)
+    assert "Idempotency-Replayed" not in other.headers
+    assert len(calls) == 2
+
+    assert idempotency.body_user_email(b'{"contract_data": {"UserEmail": "c@x.com"}}') == "c@x.com"
+    assert idempotency.body_user_email(b"not json") is None
+
+
+def test_upload_retry_is_recognised_as_the_same_request(monkeypatch):
+    monkeypatch.setattr(idempotency, "idempotency_manager", IdempotencyManager(MemoryIdempotencyStore()))
+    api = FastAPI()
+    calls = []
+
+    @api.post("/upload", status_code=201)
+    @idempotency.idempotent("upload", status_code=201)
+    async def upload(file: UploadFile = File(...), user_email: str = Form(...)):
+        calls.append(file.filename)
+        return {"success": True}
+
+    client = TestClient(api)
+    form = {"user_email": "a@example.com"}
+    headers = {"Idempotency-Key": "k-1"}
+    for _ in range(2):
+        response = client.post("/upload", files={"file": ("a.pdf", b"%PDF", "application/pdf")}, data=form, headers=headers)
+        assert response.status_code == 201
+    assert response.headers["Idempotency-Replayed"] == "true"
+    other = client.post("/upload", files={"file": ("b.pdf", b"%PDF", "application/pdf")}, data=form, headers=headers)
+    assert other.status_code == 422
+    # Same name and size, different content
+    edited = client.post("/upload", files={"file": ("a.pdf", b"%PDX", "application/pdf")}, data=form, headers=headers)
+    assert edited.status_code == 422
+    assert calls == ["a.pdf"]
+
+
+def test_fingerprint_leaves_the_upload_readable(monkeypatch):
+    monkeypatch.setattr(idempotency, "idempotency_manager", IdempotencyManager(MemoryIdempotencyStore()))
+    api = FastAPI()
+
+    @api.post("/upload")
+    @idempotency.idempotent("upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"success": True, "content": (await file.read()).decode()}
+
+    response = TestClient(api).post("/upload", files={"file": ("a.pdf", b"%PDF-1.7", "application/pdf")}, headers={"Idempotency-Key": "k"})
+    assert response.json()["content"] == "%PDF-1.7"
+
+
+def test_concurrent_retry_attaches_to_the_running_request():
+    manager = IdempotencyManager(MemoryIdempotencyStore())
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"success": True}
+
+    async def scenario():
+        return await asyncio.gather(manager.run("k", "f", slow, 201), manager.run("k", "f", slow, 201))
+
+    original, attached = asyncio.run(scenario())
+    assert original == {"success": True}
+    assert attached.status_code == 201 and attached.body == b'{"success":true}'
+    assert len(calls) == 1
+    assert manager.stats()["attached"] == 1
+
+
+def test_server_errors_and_failed_results_are_not_stored():
+    manager = IdempotencyManager(MemoryIdempotencyStore())
+    outcomes = [HTTPException(status_code=500, detail="boom"), {"success": False}, {"success": True}]
+
+    async def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def scenario():
+        with pytest.raises(HTTPException):
+            await manager.run("k", "f", call)
+        assert await manager.run("k", "f", call) == {"success": False}
+        assert await manager.run("k", "f", call) == {"success": True}
+        return await manager.run("k", "f", call)
+
+    assert asyncio.run(scenario()).headers["Idempotency-Replayed"] == "true"
+    assert manager.stats()["executed"] == 3
+
+
+def test_waiters_on_a_failed_run_run_again():
+    manager = IdempotencyManager(MemoryIdempotencyStore())
+    outcomes = [{"success": False}, {"success": True}]
+
+    async def call():
+        await asyncio.sleep(0.05)
+        return outcomes.pop(0)
+
+    async def scenario():
+        return await asyncio.gather(manager.run("k", "f", call), manager.run("k", "f", call))
+
+    failed, retried = asyncio.run(scenario())
+    assert failed == {"success": False}
+    # The waiter ran the request itself instead of getting the failure back
+    assert retried == {"success": True}
+    assert manager.stats()["executed"] == 2
+    assert manager.stats()["attached"] == 0
+
+
+def test_sqlite_store_shares_keys_between_workers(tmp_path):
+    path = str(tmp_path / "idempotency.db")
+    worker_a = IdempotencyManager(SQLiteIdempotencyStore(path))
+    worker_b = IdempotencyManager(SQLiteIdempotencyStore(path), wait_seconds=0.1, poll_interval_seconds=0.02)
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(0.3)
+            return {"success": True}
+
+        running = asyncio.create_task(worker_a.run("k", "f", slow))
+        await started.wait()
+        # Still running in the other worker
+        with pytest.raises(IdempotencyConflict):
+            await worker_b.run("k", "f", slow)
+        await running
+        return await worker_b.run("k", "f", slow)
+
+    replayed = asyncio.run(scenario())
+    assert replayed.body == b'{"success":true}'
+    assert worker_b.stats()["conflicts"] == 1
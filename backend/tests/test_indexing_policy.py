@@ -0,0 +1,29 @@
+"""
+Unit tests for indexing policy drift detection
+"""
+
+import copy
+
+from app.indexing_policy import CONTRACTS_INDEXING_POLICY, diff_indexing_policy
+
+
+def test_matching_policy_has_no_drift():
+    live = copy.deepcopy(CONTRACTS_INDEXING_POLICY)
+    live["indexingMode"] = "Consistent"
+    live["compositeIndexes"] = list(reversed(live["compositeIndexes"]))
+
+    assert diff_indexing_policy(CONTRACTS_INDEXING_POLICY, live) == []
+
+
+def test_default_policy_reports_missing_exclusions_and_composites():
+    default_live = {
+        "indexingMode": "consistent",
+        "automatic": True,
+        "includedPaths": [{"path": "/*"}],
+        "excludedPaths": [{"path": '/"_etag"/?'}],
+    }
+
+    drift = diff_indexing_policy(CONTRACTS_INDEXING_POLICY, default_live)
+
+    assert "excludedPaths: missing /contract_details/?" in drift
+    assert any(item.startswith("compositeIndexes: missing (('/UserEmail', 'ascending')") for item in drift)
@@ -0,0 +1,172 @@
+"""
+Tests for the local SQLite contract repository and filesystem blob store
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from app.local_storage import AsyncLocalBlobStorageService, LocalBlobStorageService, SQLiteContractRepository  # noqa: E402
+from app.models import ContractData, ContractUpdateData  # noqa: E402
+
+USER = "tester@example.com"
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return SQLiteContractRepository(str(tmp_path / "contracts.db"))
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_contract_crud_round_trip(repository):
+    created = run(repository.create_contract(ContractData(id="c1", UserEmail=USER, supplier_name="S")))
+    assert created["success"]
+    assert created["data"]["_etag"]
+
+    duplicate = run(repository.create_contract(ContractData(id="c1", UserEmail=USER)))
+    assert not duplicate["success"]
+
+    updated = run(repository.update_contract("c1", USER, ContractUpdateData(service_name="Svc")))
+    assert updated["data"]["service_name"] == "Svc"
+    assert updated["data"]["supplier_name"] == "S"
+    assert updated["data"]["_etag"] != created["data"]["_etag"]
+
+    assert run(repository.get_contract("c1", "other@example.com"))["success"] is False
+    assert run(repository.delete_contract("c1", USER))["success"]
+    assert run(repository.get_contract("c1", USER))["success"] is False
+
+
+def test_search_pages_and_change_feed(repository):
+    for i in range(5):
+        run(repository.create_contract(ContractData(
+            id=f"c{i}", UserEmail=USER, supplier_name="S", contract_end_date=f"2026/0{i + 1}/01"
+        )))
+
+    first = run(repository.search_contracts(USER, {"supplier_name": "S"}, page_size=3))
+    second = run(repository.search_contracts(USER, {"supplier_name": "S"}, page_size=3, continuation=first["continuation"]))
+    assert [c["id"] for c in first["data"] + second["data"]] == ["c0", "c1", "c2", "c3", "c4"]
+    assert second["continuation"] is None
+
+    changes, token = repository.read_change_feed(None, max_item_count=2)
+    assert [c["id"] for c in changes] == ["c0", "c1"]
+    changes, token = repository.read_change_feed(token)
+    assert [c["id"] for c in changes] == ["c2", "c3", "c4"]
+    assert repository.read_change_feed(token)[0] == []
+
+
+def test_local_blob_store(tmp_path):
+    store = LocalBlobStorageService(str(tmp_path / "blobs"))
+    ok, _, url = store.upload_file(b"%PDF-1.4", "contract.pdf", "application/pdf", USER)
+    assert ok
+
+    blob_name = store.blob_name_from_url(url)
+    assert blob_name.startswith("tester_at_example_com/")
+    assert store.download_file(blob_name)[2] == b"%PDF-1.4"
+    assert store.delete_file(blob_name)[0]
+    assert store.download_file(blob_name)[0] is False
+
+    with pytest.raises(ValueError):
+        store._path("../escape.txt")
+
+
+def test_local_blob_signed_upload_url(tmp_path):
+    store = LocalBlobStorageService(str(tmp_path / "blobs"), signing_key="test-key")
+    blob_name = store.generate_blob_name("contract.pdf", USER)
+    upload = store.generate_upload_url(blob_name, "application/pdf", 60, "http://api.local/")
+    assert upload["upload_url"].startswith(f"http://api.local/api/v1/local-blobs/{blob_name}?")
+
+    query = dict(part.split("=") for part in upload["upload_url"].split("?", 1)[1].split("&"))
+    expires, sig = int(query["expires"]), query["sig"]
+    assert store.verify_upload_signature(blob_name, expires, sig)
+    assert not store.verify_upload_signature(blob_name + "x", expires, sig)
+    assert not store.verify_upload_signature(blob_name, expires - 120, sig)
+
+    assert store.write_blob(blob_name, b"%PDF-1.4") == upload["blob_url"]
+    assert store.download_file(blob_name)[2] == b"%PDF-1.4"
+
+
+def test_content_addressed_upload_dedup_and_references(tmp_path):
+    store = LocalBlobStorageService(str(tmp_path / "blobs"), content_addressed=True)
+    ok, message, url = store.upload_file(b"%PDF-1.4 same", "first.PDF", "application/pdf", USER)
+    assert ok and message == "File uploaded successfully"
+    ok, message, again = store.upload_file(b"%PDF-1.4 same", "second.pdf", "application/pdf", USER)
+    assert ok and message == "File already stored"
+    assert again == url
+    assert store.blob_name_from_url(url).endswith(".pdf")
+    assert store.upload_file(b"%PDF-1.4 other", "first.pdf", "application/pdf", USER)[2] != url
+
+    repository = SQLiteContractRepository(str(tmp_path / "contracts.db"))
+    for contract_id in ("a", "b"):
+        run(repository.create_contract(ContractData(id=contract_id, UserEmail=USER, LinkImage=url)))
+    assert run(repository.count_blob_references(USER, url)) == 2
+    run(repository.delete_contract("a", USER))
+    assert run(repository.count_blob_references(USER, url)) == 1
+    assert run(repository.count_blob_references("other@example.com", url)) == 0
+
+
+def test_pinned_download_fails_once_the_file_is_replaced(tmp_path):
+    storage = AsyncLocalBlobStorageService(LocalBlobStorageService(str(tmp_path / "blobs")))
+    blob_name = storage.generate_blob_name("contract.pdf", USER)
+    run(storage.write_blob(blob_name, b"%PDF-1.4 small"))
+    etag = run(storage.get_file_properties(blob_name))["etag"]
+    assert run(storage.download_file(blob_name, etag=etag))[2] == b"%PDF-1.4 small"
+
+    run(storage.write_blob(blob_name, b"%PDF-1.4 replaced with something larger"))
+    assert run(storage.download_file(blob_name, etag=etag))[0] is False
+
+
+def test_oversized_direct_upload_is_rejected_before_download(tmp_path, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app import routes
+
+    storage = AsyncLocalBlobStorageService(LocalBlobStorageService(str(tmp_path / "blobs")))
+    monkeypatch.setattr(routes, "async_storage_service", storage)
+
+    async def download_file(*args, **kwargs):
+        raise AssertionError("an oversized file must not be downloaded")
+    monkeypatch.setattr(storage, "download_file", download_file)
+
+    blob_name = storage.generate_blob_name("contract.pdf", USER)
+    storage.store.write_blob(blob_name, b"\0" * (routes.MAX_UPLOAD_SIZE_MB * 1024 * 1024 + 1))
+
+    api = FastAPI()
+    api.include_router(routes.router)
+    response = TestClient(api).post(
+        "/api/v1/contracts/upload/complete",
+        json={"blob_name": blob_name, "user_email": USER, "upload_token": storage.upload_owner_token(blob_name, USER)}
+    )
+    assert response.status_code == 400
+    assert not storage.store.blob_exists(blob_name)
+
+
+def test_direct_upload_is_completed_only_by_the_user_it_was_issued_to(tmp_path, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app import routes
+
+    storage = AsyncLocalBlobStorageService(LocalBlobStorageService(str(tmp_path / "blobs")))
+    monkeypatch.setattr(routes, "async_storage_service", storage)
+    api = FastAPI()
+    api.include_router(routes.router)
+    client = TestClient(api)
+
+    issued = client.post(
+        "/api/v1/contracts/upload/sas", json={"file_name": "contract.pdf", "user_email": "a.b@x.com"}
+    ).json()
+    storage.store.write_blob(issued["blob_name"], b"%PDF-1.4 small")
+
+    # Same blob name prefix, different user
+    assert storage.user_prefix("a_b@x.com") == storage.user_prefix("a.b@x.com")
+    response = client.post("/api/v1/contracts/upload/complete", json={
+        "blob_name": issued["blob_name"], "user_email": "a_b@x.com", "upload_token": issued["upload_token"]
+    })
+    assert response.status_code == 403
+    assert storage.verify_upload_owner(issued["blob_name"], "a.b@x.com", issued["upload_token"])
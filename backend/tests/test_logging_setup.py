@@ -0,0 +1,77 @@
+import json
+import logging
+import queue
+
+from app.logging_setup import BackgroundQueueHandler, JsonFormatter, LogPayload, log_payload
+from app.tracing import Tracer
+
+
+class _Expensive:
+    formatted = 0
+
+    def __str__(self):
+        _Expensive.formatted += 1
+        return "expensive"
+
+
+def _logger(name, level, handler):
+    logger = logging.getLogger(f"test_logging_setup.{name}")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(level)
+    return logger
+
+
+def test_payload_is_compact_and_capped():
+    assert str(LogPayload({"名前": "株式会社", "n": 1})) == '{"名前":"株式会社","n":1}'
+    capped = str(LogPayload("x" * 50, max_chars=10))
+    assert capped.startswith("x" * 10) and capped.endswith("[truncated, 50 chars]")
+
+
+def test_payloads_are_sampled_at_info_and_kept_on_errors():
+    log_queue = queue.Queue()
+    logger = _logger("sampling", logging.INFO, BackgroundQueueHandler(log_queue))
+
+    log_payload(logger, logging.INFO, "data: %s", {"a": 1}, sample_rate=0)
+    assert log_queue.empty()
+    log_payload(logger, logging.INFO, "data: %s", {"a": 1}, sample_rate=1)
+    log_payload(logger, logging.ERROR, "response: %s", "not json", sample_rate=0)
+    assert [log_queue.get().getMessage() for _ in range(2)] == ['data: {"a":1}', "response: not json"]
+
+
+def test_records_are_formatted_in_the_listener_not_the_caller():
+    log_queue = queue.Queue()
+    logger = _logger("lazy", logging.INFO, BackgroundQueueHandler(log_queue))
+    _Expensive.formatted = 0
+
+    logger.debug("skipped: %s", _Expensive())
+    logger.info("queued: %s", _Expensive())
+    assert _Expensive.formatted == 0
+    assert log_queue.get().getMessage() == "queued: expensive"
+
+
+def test_json_lines_carry_request_and_trace_ids():
+    log_queue = queue.Queue()
+    logger = _logger("json", logging.INFO, BackgroundQueueHandler(log_queue))
+    local = Tracer()
+
+    with local.start_span("upload", request_id="req-7") as span:
+        logger.info("uploaded %s", "a.pdf", extra={"file_size_bytes": 123})
+
+    entry = json.loads(JsonFormatter().format(log_queue.get()))
+    assert entry["message"] == "uploaded a.pdf"
+    assert entry["level"] == "INFO"
+    assert entry["request_id"] == "req-7"
+    assert (entry["trace_id"], entry["span_id"]) == (span.trace_id, span.span_id)
+    assert entry["file_size_bytes"] == 123
+
+
+def test_full_queue_drops_info_records_instead_of_blocking():
+    handler = BackgroundQueueHandler(queue.Queue(maxsize=1))
+    logger = _logger("full", logging.INFO, handler)
+
+    logger.info("first")
+    logger.info("second")
+    logger.warning("third")
+    assert handler.dropped == 2
+    assert handler.queue.get().getMessage() == "first"
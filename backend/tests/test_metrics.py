@@ -0,0 +1,78 @@
+import asyncio
+from types import SimpleNamespace
+
+from prometheus_client import REGISTRY
+
+from app.metrics import (
+    MetricsMiddleware,
+    observe_stage,
+    record_openai_usage,
+    record_request_charge,
+    track_job,
+)
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _call(middleware, path, route_path=None):
+    sent = []
+
+    async def app(scope, receive, send):
+        if route_path:
+            scope["route"] = SimpleNamespace(path=route_path)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+    asyncio.run(middleware(app)(scope, receive, send))
+    return sent
+
+
+def test_request_latency_is_labelled_by_route_template():
+    labels = {"method": "GET", "route": "/api/v1/contracts/{contract_id}", "status": "200"}
+    before = _sample("saaseer_http_request_duration_seconds_count", **labels)
+    _call(MetricsMiddleware, "/api/v1/contracts/abc", "/api/v1/contracts/{contract_id}")
+    _call(MetricsMiddleware, "/api/v1/contracts/def", "/api/v1/contracts/{contract_id}")
+    assert _sample("saaseer_http_request_duration_seconds_count", **labels) == before + 2
+
+    unmatched = {"method": "GET", "route": "unmatched", "status": "200"}
+    before = _sample("saaseer_http_request_duration_seconds_count", **unmatched)
+    _call(MetricsMiddleware, "/nowhere")
+    assert _sample("saaseer_http_request_duration_seconds_count", **unmatched) == before + 1
+
+
+def test_stage_tokens_and_request_charge_are_recorded():
+    before = _sample("saaseer_upload_stage_duration_seconds_count", stage="json_parse")
+    with observe_stage("json_parse"):
+        pass
+    assert _sample("saaseer_upload_stage_duration_seconds_count", stage="json_parse") == before + 1
+
+    before = _sample("saaseer_openai_tokens_total", model="test-model", kind="prompt")
+    record_openai_usage("test-model", SimpleNamespace(prompt_tokens=1200, completion_tokens=80))
+    record_openai_usage("test-model", None)
+    assert _sample("saaseer_openai_tokens_total", model="test-model", kind="prompt") == before + 1200
+
+    before = _sample("saaseer_cosmos_request_charge_sum", operation="test_read")
+    assert record_request_charge("test_read", {"x-ms-request-charge": "2.86"}) == 2.86
+    assert record_request_charge("test_read", {}) == 0.0
+    assert _sample("saaseer_cosmos_request_charge_sum", operation="test_read") == before + 2.86
+
+
+def test_track_job_counts_running_coroutines():
+    seen = []
+
+    @track_job("test_job")
+    async def job():
+        seen.append(_sample("saaseer_jobs_in_progress", job="test_job"))
+
+    asyncio.run(job())
+    assert seen == [1.0]
+    assert _sample("saaseer_jobs_in_progress", job="test_job") == 0.0
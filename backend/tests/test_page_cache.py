@@ -0,0 +1,55 @@
+import os
+import time
+
+from app.local_storage import LocalBlobStorageService
+from app.page_cache import DERIVED_PREFIX, PageCache
+
+
+def _store(tmp_path):
+    return LocalBlobStorageService(str(tmp_path / "blobs"))
+
+
+def test_page_cache_roundtrip_and_stats(tmp_path):
+    cache = PageCache(_store(tmp_path), max_bytes=1024 * 1024)
+    digest = cache.document_hash(b"%PDF-1.4 doc")
+
+    assert cache.get(digest, 200, "png") is None
+    cache.put(digest, 200, "png", [b"page-one", b"page-two"])
+    assert cache.get(digest, 200, "png") == [b"page-one", b"page-two"]
+    # Different render settings are a different rendition
+    assert cache.get(digest, 150, "png") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["stores"] == 1
+    assert stats["hit_rate"] == round(1 / 3, 4)
+
+
+def test_page_cache_missing_page_is_a_miss(tmp_path):
+    store = _store(tmp_path)
+    cache = PageCache(store, max_bytes=1024 * 1024)
+    cache.put("abc", 200, "png", [b"page-one", b"page-two"])
+    store.delete_file(cache.rendition_prefix("abc", 200, "png") + "page-0002.png")
+
+    assert cache.get("abc", 200, "png") is None
+    assert cache.stats()["errors"] == 1
+    # The manifest is dropped, so the rendition is no longer served
+    assert not store.blob_exists(cache.rendition_prefix("abc", 200, "png") + "manifest.json")
+
+
+def test_page_cache_evicts_oldest_renditions_over_budget(tmp_path):
+    store = _store(tmp_path)
+    cache = PageCache(store, max_bytes=2500)
+    for index, digest in enumerate(("first", "second", "third")):
+        cache.put(digest, 200, "png", [os.urandom(1000)])
+        # Distinct manifest write times
+        manifest = store._path(cache.rendition_prefix(digest, 200, "png") + "manifest.json")
+        os.utime(manifest, (time.time() + index, time.time() + index))
+
+    cache.evict()
+    assert cache.get("first", 200, "png") is None
+    assert cache.get("second", 200, "png") is not None
+    assert cache.get("third", 200, "png") is not None
+    assert cache.stats()["bytes"] <= 2500
+    assert all(blob["name"].startswith(DERIVED_PREFIX) for blob in store.list_blobs(DERIVED_PREFIX))
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+import app.profiling as profiling
+from app.profiling import ProfileSession, ProfileStore, ProfilingMiddleware, RequestProfiler, profiled
+
+
+def blocking_cosmos_call():
+    time.sleep(0.05)
+
+
+@profiled
+def render_pages():
+    time.sleep(0.05)
+
+
+def _profiled_app():
+    api = FastAPI()
+    api.add_middleware(ProfilingMiddleware)
+
+    @api.get("/contracts")
+    async def contracts():
+        blocking_cosmos_call()
+        await asyncio.to_thread(render_pages)
+        # Time spent waiting is not this request's: the loop is free to serve others
+        await asyncio.sleep(0.05)
+        return {"success": True}
+
+    return api
+
+
+def test_profiles_only_requests_with_the_token(monkeypatch, tmp_path):
+    profiler = RequestProfiler("secret", ProfileStore(str(tmp_path)), interval_seconds=0.001)
+    monkeypatch.setattr(profiling, "request_profiler", profiler)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=_profiled_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            plain = await client.get("/contracts")
+            wrong = await client.get("/contracts", headers={"X-Profile-Token": "guess"})
+            profiled_response = await client.get("/contracts", headers={"X-Profile-Token": "secret"})
+            return plain, wrong, profiled_response
+
+    plain, wrong, response = asyncio.run(scenario())
+    assert "x-profile-id" not in plain.headers and "x-profile-id" not in wrong.headers
+    name = response.headers["x-profile-id"]
+    [entry] = profiler.store.list()
+    assert entry["name"] == name
+    assert entry["path"] == "/contracts" and entry["status"] == 200
+
+    stacks = {}
+    for line in profiler.store.read(name).decode().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        stacks[stack] = int(count)
+    # The blocking call on the event loop and the section in the worker thread are both sampled
+    assert any(stack.startswith("event-loop;") and "blocking_cosmos_call" in stack for stack in stacks)
+    assert any(not stack.startswith("event-loop;") and "render_pages" in stack for stack in stacks)
+    # ... but not the loop sitting idle during asyncio.sleep
+    assert not any("select" in stack.split(";")[-1] for stack in stacks)
+    assert profiler.store.read("../secret") is None
+
+
+def test_store_keeps_the_newest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+    session = ProfileSession(None, None)
+    session.stacks["event-loop;handler (app/routes.py:1)"] = 3
+    for second in range(4):
+        store.save(f"20260101T00000{second}-get-contracts-0000000{second}", session, {"path": "/contracts"})
+    assert [entry["name"] for entry in store.list()] == [
+        "20260101T000003-get-contracts-00000003",
+        "20260101T000002-get-contracts-00000002",
+    ]
+    assert store.read("20260101T000000-get-contracts-00000000") is None
+    assert store.read("20260101T000003-get-contracts-00000003") == b"event-loop;handler (app/routes.py:1) 3\n"
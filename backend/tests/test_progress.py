@@ -0,0 +1,103 @@
+import asyncio
+
+import httpx
+import orjson
+from fastapi import FastAPI, Request
+
+import app.progress as progress
+from app.progress import MemoryProgressBroker, ProgressMiddleware, SQLiteProgressBroker, report_progress, stream_events
+
+
+def _parse(body: bytes):
+    return [
+        orjson.loads(line[len(b"data: "):])
+        for frame in body.split(b"\n\n") for line in frame.split(b"\n") if line.startswith(b"data: ")
+    ]
+
+
+def test_events_published_from_a_worker_thread_reach_the_stream(monkeypatch):
+    broker = MemoryProgressBroker()
+    monkeypatch.setattr(progress, "progress_broker", broker)
+
+    def pipeline():
+        broker.publish("u-1", {"stage": "received"}, owner="A@example.com")
+        for page in (1, 2):
+            broker.publish("u-1", {"stage": "pages_rendered", "page": page, "pages": 2})
+        broker.publish("u-1", {"stage": "done", "status": 201})
+
+    async def scenario():
+        chunks = []
+
+        async def consume():
+            async for chunk in stream_events("u-1", "a@example.com", heartbeat_seconds=5):
+                chunks.append(chunk)
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        await asyncio.to_thread(pipeline)
+        await asyncio.wait_for(consumer, 2)
+        return b"".join(chunks)
+
+    events = _parse(asyncio.run(scenario()))
+    assert [event["stage"] for event in events] == ["received", "pages_rendered", "pages_rendered", "done"]
+    assert [event["id"] for event in events] == [1, 2, 3, 4]
+    assert broker.subscribers() == 0
+
+    async def resume():
+        return b"".join([chunk async for chunk in stream_events("u-1", "a@example.com", after_id=2)])
+
+    # A reconnecting client (Last-Event-ID: 2) gets the rest, and another user gets nothing
+    assert [event["id"] for event in _parse(asyncio.run(resume()))] == [3, 4]
+
+    async def other_user():
+        return [chunk async for chunk in stream_events("u-1", "b@example.com")]
+
+    assert asyncio.run(other_user()) == []
+
+
+def test_middleware_reports_body_bytes_and_final_status(monkeypatch):
+    broker = MemoryProgressBroker()
+    monkeypatch.setattr(progress, "progress_broker", broker)
+    api = FastAPI()
+    api.add_middleware(ProgressMiddleware)
+
+    @api.post("/upload", status_code=201)
+    async def upload(request: Request):
+        body = await request.body()
+        report_progress("received", owner="a@example.com", bytes=len(body))
+        # Work done in a thread inherits the upload id
+        await asyncio.to_thread(report_progress, "pages_rendered", page=1, pages=1)
+        return {"success": True}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=api)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/upload", content=b"x" * 1000, headers={"X-Upload-ID": "u-2"})
+            await client.post("/upload", content=b"x" * 1000)
+
+    asyncio.run(scenario())
+    events = broker.read("u-2", 0)
+    assert [event["stage"] for event in events] == ["receiving", "received", "pages_rendered", "done"]
+    assert events[0]["bytes"] == events[0]["total"] == 1000
+    assert events[-1]["status"] == 201
+    # The request without X-Upload-ID published nothing
+    assert broker.published == 4
+
+
+def test_sqlite_broker_serves_events_published_by_another_worker(tmp_path):
+    path = str(tmp_path / "progress.db")
+    uploading = SQLiteProgressBroker(path)
+    streaming = SQLiteProgressBroker(path, poll_interval_seconds=0.01)
+    uploading.publish("u-3", {"stage": "received"}, owner="a@example.com")
+    uploading.publish("u-3", {"stage": "done", "status": 201})
+
+    async def scenario():
+        batches = []
+        async for events in streaming.subscribe("u-3", 0, heartbeat_seconds=5):
+            batches.extend(events)
+            if batches and batches[-1]["stage"] == "done":
+                return batches
+
+    events = asyncio.run(asyncio.wait_for(scenario(), 2))
+    assert [event["stage"] for event in events] == ["received", "done"]
+    assert streaming.owner("u-3") == "a@example.com"
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from app.rate_limit import (
+    AdmissionController,
+    MemoryRateLimitStore,
+    RateLimited,
+    RatePolicy,
+    SQLiteRateLimitStore,
+)
+
+
+def _controller(store=None, queue_size=2, queue_timeout_seconds=0.5, **policy):
+    options = {"rate_per_minute": 600, "burst": 100, "max_concurrency": 1, **policy}
+    return AdmissionController(
+        store or MemoryRateLimitStore(),
+        {"upload": RatePolicy("upload", **options)},
+        queue_size=queue_size,
+        queue_timeout_seconds=queue_timeout_seconds,
+        poll_interval_seconds=0.01
+    )
+
+
+def test_token_bucket_rejects_burst_beyond_limit_per_user():
+    controller = _controller(rate_per_minute=1, burst=2, max_concurrency=10)
+
+    async def scenario():
+        for _ in range(2):
+            await controller.release("upload", await controller.acquire("upload", "a@example.com"))
+        with pytest.raises(RateLimited) as exc_info:
+            await controller.acquire("upload", "a@example.com")
+        # Another user has their own bucket
+        await controller.release("upload", await controller.acquire("upload", "b@example.com"))
+        return exc_info.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert int(error.headers["Retry-After"]) >= 1
+    assert asyncio.run(controller.stats())["policies"]["upload"]["rejected_rate"] == 1
+
+
+def test_requests_queue_for_a_free_slot():
+    controller = _controller()
+
+    async def scenario():
+        slot = await controller.acquire("upload", "a@example.com")
+        waiter = asyncio.create_task(controller.acquire("upload", "b@example.com"))
+        await asyncio.sleep(0.05)
+        assert (await controller.stats())["policies"]["upload"]["waiting"] == 1
+        await controller.release("upload", slot)
+        await controller.release("upload", await waiter)
+
+    asyncio.run(scenario())
+    stats = asyncio.run(controller.stats())["policies"]["upload"]
+    assert stats["admitted"] == 2
+    assert stats["queued"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_full_queue_and_queue_timeout_are_rejected():
+    controller = _controller(queue_size=1, queue_timeout_seconds=0.1)
+
+    async def scenario():
+        await controller.acquire("upload", "a@example.com")
+        waiter = asyncio.create_task(controller.acquire("upload", "b@example.com"))
+        await asyncio.sleep(0.02)
+        with pytest.raises(RateLimited):
+            await controller.acquire("upload", "c@example.com")
+        with pytest.raises(RateLimited):
+            await waiter
+
+    asyncio.run(scenario())
+    assert asyncio.run(controller.stats())["policies"]["upload"]["rejected_busy"] == 2
+
+
+def test_busy_rejection_refunds_the_users_token(tmp_path):
+    for store in (MemoryRateLimitStore(), SQLiteRateLimitStore(str(tmp_path / "rate_limits.db"))):
+        controller = _controller(store, queue_timeout_seconds=0.05, burst=1, rate_per_minute=1)
+
+        async def scenario():
+            slot = await controller.acquire("upload", "a@example.com")
+            # b's only token is refunded when no slot frees up in time
+            with pytest.raises(RateLimited) as exc_info:
+                await controller.acquire("upload", "b@example.com")
+            assert "server busy" in exc_info.value.detail
+            await controller.release("upload", slot)
+            await controller.release("upload", await controller.acquire("upload", "b@example.com"))
+            return await controller.stats()
+
+        stats = asyncio.run(scenario())["policies"]["upload"]
+        assert stats["admitted"] == 2
+        assert stats["rejected_rate"] == 0
+        assert stats["in_flight"] == 0
+
+
+def test_sqlite_store_shares_limits_between_workers(tmp_path):
+    path = str(tmp_path / "rate_limits.db")
+    worker_a = _controller(SQLiteRateLimitStore(path), queue_timeout_seconds=0.05, burst=1, rate_per_minute=1)
+    worker_b = _controller(SQLiteRateLimitStore(path), queue_timeout_seconds=0.05, burst=1, rate_per_minute=1)
+
+    async def scenario():
+        slot = await worker_a.acquire("upload", "a@example.com")
+        # Concurrency slot is held by worker A
+        with pytest.raises(RateLimited):
+            await worker_b.acquire("upload", "b@example.com")
+        await worker_a.release("upload", slot)
+        # User a already spent their token on worker A
+        with pytest.raises(RateLimited):
+            await worker_b.acquire("upload", "a@example.com")
+
+    asyncio.run(scenario())
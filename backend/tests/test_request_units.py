@@ -0,0 +1,144 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.request_units import (
+    BACKGROUND,
+    INTERACTIVE,
+    AdaptiveThrottle,
+    RequestChargeLedger,
+    RequestChargeMiddleware,
+    RequestThrottled,
+    background_priority,
+    current_priority,
+)
+
+
+class Throttled(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after_ms: int):
+        super().__init__("Request rate is large")
+        self.headers = {"x-ms-retry-after-ms": str(retry_after_ms)}
+
+
+def _flaky(failures: int, retry_after_ms: int = 20):
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise Throttled(retry_after_ms)
+        return "ok"
+    return call, calls
+
+
+def test_throttle_retries_after_retry_after_window():
+    throttle = AdaptiveThrottle(max_retries=3)
+    call, calls = _flaky(2)
+    assert asyncio.run(throttle.run(call)) == "ok"
+    assert len(calls) == 3
+    stats = throttle.stats()
+    assert stats["throttled"][INTERACTIVE] == 2
+    assert stats["waited_seconds"][INTERACTIVE] >= 0.02
+
+
+def test_throttle_gives_up_with_429_and_retry_after():
+    throttle = AdaptiveThrottle(max_retries=0)
+    call, _ = _flaky(5, retry_after_ms=1500)
+    with pytest.raises(RequestThrottled) as exc_info:
+        asyncio.run(throttle.run(call))
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers["Retry-After"] == "2"
+    assert throttle.stats()["gave_up"][INTERACTIVE] == 1
+
+
+def test_background_work_backs_off_longer_than_interactive():
+    throttle = AdaptiveThrottle(max_retries=3, max_background_delay_seconds=0.5)
+    call, _ = _flaky(1, retry_after_ms=10)
+    with background_priority():
+        assert current_priority() == BACKGROUND
+        assert throttle.run_sync(call) == "ok"
+    assert current_priority() == INTERACTIVE
+
+    # The retry-after window has passed: interactive calls go straight through, background ones still wait
+    assert throttle._delay(INTERACTIVE) == 0.0
+    assert throttle._delay(BACKGROUND) > 0.0
+
+
+def test_non_throttling_errors_are_not_retried():
+    throttle = AdaptiveThrottle()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(throttle.run(fail))
+
+
+def test_ledger_attributes_charges_to_route_and_user():
+    ledger = RequestChargeLedger()
+    sent = []
+
+    async def app(scope, receive, send):
+        scope["route"] = SimpleNamespace(path="/api/v1/contracts/{contract_id}")
+        ledger.record("read", 1.0, "a@example.com")
+        ledger.record("read", 2.5, "a@example.com")
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/contracts/c1", "headers": []}
+    asyncio.run(RequestChargeMiddleware(app)(scope, receive, send))
+    ledger.record("scan_references", 40.0)
+
+    assert dict(sent[0]["headers"])[b"x-request-charge"] == b"3.50"
+    report = ledger.report()
+    assert report["total_ru"] == 43.5
+    assert report["operations"]["read"] == {"requests": 2, "ru": 3.5, "ru_per_request": 1.75}
+    assert report["routes"]["GET /api/v1/contracts/{contract_id}"]["ru"] == 3.5
+    assert report["routes"]["(interactive)"]["ru"] == 40.0
+    assert report["top_users"]["a@example.com"]["requests"] == 2
+
+
+def test_search_retries_with_a_fresh_pager_and_books_its_own_charge():
+    from app.database import CosmosDBManager
+
+    queries = []
+
+    class Container:
+        # Another call's response, as seen through the shared client connection
+        client_connection = SimpleNamespace(last_response_headers={"x-ms-request-charge": "99"})
+
+        def query_items(self, raw_response_hook, **kwargs):
+            queries.append(kwargs)
+
+            class Pager:
+                continuation_token = "next-page"
+
+                def by_page(self, continuation):
+                    assert continuation == "page-2"
+                    if len(queries) == 1:
+                        raise Throttled(10)
+                    headers = {"x-ms-request-charge": "3.5"}
+                    raw_response_hook(SimpleNamespace(http_response=SimpleNamespace(headers=headers)))
+                    return self
+
+                def __next__(self):
+                    return [{"id": "c1"}]
+            return Pager()
+
+    manager = object.__new__(CosmosDBManager)
+    manager.container = Container()
+    result = asyncio.run(manager.search_contracts("a@x.com", {}, page_size=10, continuation="page-2"))
+    assert result["success"]
+    assert len(queries) == 2
+    assert result["data"] == [{"id": "c1"}]
+    assert result["continuation"] == "next-page"
+    assert result["request_charge"] == 3.5
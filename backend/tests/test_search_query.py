@@ -0,0 +1,73 @@
+"""
+Unit tests for the contract search query builder
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.search import build_search_query
+
+
+def test_filters_are_parameterized():
+    query, parameters = build_search_query(supplier_name="x' OR 1=1 --", text="倉庫")
+
+    assert "x' OR" not in query
+    assert "c.supplier_name = @supplier_name" in query
+    assert "CONTAINS(c.contract_details, @text, true)" in query
+    assert {"name": "@supplier_name", "value": "x' OR 1=1 --"} in parameters
+
+
+def test_single_equality_filter_uses_composite_order():
+    query, _ = build_search_query(supplier_name="S", sort_by="contract_end_date", sort_order="desc")
+
+    assert query.endswith("ORDER BY c.supplier_name DESC, c.contract_end_date DESC")
+
+
+def test_date_ranges_are_normalized_and_status_translated():
+    query, parameters = build_search_query(
+        end_date_from="2026-01-01",
+        status="near_expiry",
+        window_days=30,
+        now=datetime(2026, 1, 1)
+    )
+
+    assert {"name": "@end_from", "value": "2026/01/01"} in parameters
+    assert {"name": "@window_end", "value": "2026/01/31"} in parameters
+    assert "c.contract_end_date >= @today" in query
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"sort_by": "contract_details"},
+    {"sort_order": "sideways"},
+    {"status": "unknown"},
+    {"start_date_from": "not a date"},
+])
+def test_invalid_input_raises(kwargs):
+    with pytest.raises(ValueError):
+        build_search_query(**kwargs)
+
+
+def test_sqlite_query_matches_cosmos_semantics():
+    import json
+    import sqlite3
+
+    from app.search import build_sqlite_search_query
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE contracts (user_email TEXT, id TEXT, body TEXT)")
+    rows = [
+        {"id": "c1", "supplier_name": "S", "contract_end_date": "2026/03/01", "contract_details": "東京 倉庫"},
+        {"id": "c2", "supplier_name": "S", "contract_end_date": "2026/01/15", "contract_details": "Osaka"},
+        {"id": "c3", "supplier_name": "T", "contract_end_date": None, "contract_details": "tokyo"},
+    ]
+    for row in rows:
+        conn.execute("INSERT INTO contracts VALUES (?, ?, ?)", ("a@x.com", row["id"], json.dumps(row)))
+
+    clause, parameters = build_sqlite_search_query(supplier_name="S", sort_by="contract_end_date")
+    ids = [r[0] for r in conn.execute(f"SELECT id FROM contracts WHERE user_email = ?{clause}", ["a@x.com", *parameters])]
+    assert ids == ["c2", "c1"]
+
+    clause, parameters = build_sqlite_search_query(status="missing_end_date")
+    ids = [r[0] for r in conn.execute(f"SELECT id FROM contracts WHERE user_email = ?{clause}", ["a@x.com", *parameters])]
+    assert ids == ["c3"]
@@ -0,0 +1,61 @@
+import os
+from types import SimpleNamespace
+
+from app import server
+from app.rate_limit import RatePolicy, SQLiteRateLimitStore
+
+
+def _settings(**overrides):
+    values = {
+        "host": "0.0.0.0", "port": 8000, "server_workers": 0, "server_max_workers": 8, "server_preload": True,
+        "server_max_requests": 2000, "server_max_requests_jitter": 200, "server_keep_alive_seconds": 5,
+        "server_backlog": 2048, "server_graceful_timeout_seconds": 30, "server_worker_timeout_seconds": 120,
+        "server_access_log": True, "log_level": "INFO", "metrics_enabled": True,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_workers_follow_cpus_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(server, "available_cpus", lambda: 32)
+    assert server.default_workers(_settings()) == 8
+    monkeypatch.setattr(server, "available_cpus", lambda: 2)
+    assert server.default_workers(_settings()) == 2
+    assert server.default_workers(_settings(server_workers=5)) == 5
+
+
+def test_gunicorn_options_from_settings():
+    options = server.gunicorn_options(_settings(server_workers=3), bind="127.0.0.1:9000")
+    assert options["bind"] == "127.0.0.1:9000"
+    assert options["workers"] == 3
+    assert options["worker_class"] == "app.server.ProductionWorker"
+    assert (options["max_requests"], options["max_requests_jitter"]) == (2000, 200)
+    assert (options["keepalive"], options["backlog"], options["preload_app"]) == (5, 2048, True)
+
+    # No jitter without recycling
+    assert server.gunicorn_options(_settings(server_max_requests=0))["max_requests_jitter"] == 0
+
+
+def test_multiprocess_metrics_dir_only_for_several_workers(monkeypatch, tmp_path):
+    path = tmp_path / "prometheus"
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(path))
+    assert server.prepare_multiprocess_metrics(_settings(), workers=1) is None
+
+    (path / "stale.db").parent.mkdir()
+    (path / "stale.db").write_bytes(b"old")
+    assert server.prepare_multiprocess_metrics(_settings(), workers=4) == str(path)
+    assert os.listdir(path) == []
+
+
+def test_sqlite_rate_limit_store_reconnects_after_fork(tmp_path):
+    store = SQLiteRateLimitStore(str(tmp_path / "rate_limits.db"))
+    policy = RatePolicy("upload", 60, 1, max_concurrency=1)
+    slot = store.acquire_slot(policy)
+    inherited = store._conn
+
+    # As seen from a forked worker
+    store._pid = -1
+    assert store.in_flight(policy) == 1
+    assert store._conn is not inherited
+    store.release_slot(policy, slot)
+    assert store.in_flight(policy) == 0
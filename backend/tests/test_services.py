@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+
+from app.services import LazyService, Readiness
+
+
+def test_lazy_service_builds_once_on_first_use():
+    calls = []
+
+    class Service:
+        value = 42
+
+    def factory():
+        calls.append(1)
+        return Service()
+
+    service = LazyService("test", factory)
+    assert not service.initialized
+    assert calls == []
+    assert service.value == 42
+    assert service.value == 42
+    assert service.initialized
+    assert calls == [1]
+
+
+def test_lazy_service_override_skips_the_factory():
+    def factory():
+        raise AssertionError("factory should not run")
+
+    service = LazyService("stand-in", factory)
+    service.override("fake")
+    assert service.initialized
+    assert service.get() == "fake"
+    assert service.upper() == "FAKE"
+
+
+def test_lazy_service_retries_after_failure():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ValueError("unreachable")
+        return "ok"
+
+    service = LazyService("flaky", factory)
+    with pytest.raises(ValueError):
+        service.get()
+    assert service.get() == "ok"
+
+
+def test_readiness_reports_required_components():
+    readiness = Readiness(retry_initial_seconds=0.01)
+    readiness.register("database")
+    readiness.register("extraction", required=False)
+    assert not readiness.ready
+
+    async def ok():
+        pass
+
+    async def broken():
+        raise RuntimeError("no key")
+
+    async def scenario():
+        assert await readiness.warm_up("database", ok)
+        extraction = asyncio.create_task(readiness.warm_up("extraction", broken))
+        await asyncio.sleep(0.05)
+        report = readiness.report()
+        extraction.cancel()
+        return report
+
+    report = asyncio.run(scenario())
+    assert report["ready"]
+    assert report["components"]["database"]["status"] == "ready"
+    assert report["components"]["extraction"]["status"] == "failed"
+    assert report["components"]["extraction"]["error"] == "no key"
+    assert report["components"]["extraction"]["attempts"] > 1
+
+
+def test_failed_warm_up_is_retried_and_waiters_released():
+    readiness = Readiness(retry_initial_seconds=0.01)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("unreachable")
+
+    async def scenario():
+        readiness.register("blob_storage")
+        assert await readiness.wait_until_ready("untracked", timeout=0)
+        assert not await readiness.wait_until_ready("blob_storage", timeout=0.01)
+        warm_up = asyncio.create_task(readiness.warm_up("blob_storage", flaky))
+        assert await readiness.wait_until_ready("blob_storage", timeout=1)
+        return await warm_up
+
+    assert asyncio.run(scenario())
+    assert len(attempts) == 3
+    assert readiness.ready
+    assert readiness.report()["components"]["blob_storage"]["error"] is None
+
+
+def test_storage_requests_get_503_while_blob_storage_is_down(monkeypatch):
+    from fastapi import HTTPException
+
+    from app import routes
+
+    down = Readiness()
+    monkeypatch.setattr(routes, "readiness", down)
+
+    async def scenario():
+        down.register("blob_storage")
+        down.components["blob_storage"]["status"] = "failed"
+        with pytest.raises(HTTPException) as error:
+            await routes.require_blob_storage()
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "5"
+
+
+def test_database_setup_runs_off_the_event_loop_and_fails_loudly(monkeypatch):
+    import threading
+
+    import main
+
+    class Repository:
+        def __init__(self):
+            self.threads = []
+
+        def create_database_and_container_if_not_exists(self):
+            self.threads.append(threading.current_thread())
+            return False
+
+    repository = Repository()
+    lazy = LazyService("contract_repository", lambda: repository)
+    monkeypatch.setattr(main, "contract_repository", lazy)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main.init_database())
+    assert repository.threads and repository.threads[0] is not threading.main_thread()
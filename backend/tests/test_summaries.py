@@ -0,0 +1,220 @@
+"""
+Unit tests for the per-user contract summary aggregation
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.database import CosmosDBManager
+from app.local_storage import SQLiteContractRepository
+from app.models import ContractData
+from app.summaries import (
+    ContractSummaryProcessor,
+    FileCheckpointStore,
+    apply_entry,
+    contract_entry,
+    new_summary,
+    refresh_aggregates,
+)
+
+
+NOW = datetime(2026, 1, 1)
+USER = "a@x.com"
+
+
+def _contract(contract_id, end_date, supplier="S", service="Svc", ts=100):
+    return {
+        "id": contract_id,
+        "UserEmail": USER,
+        "contract_end_date": end_date,
+        "supplier_name": supplier,
+        "service_name": service,
+        "_ts": ts,
+    }
+
+
+def _processor(tmp_path, top_n=5):
+    repository = SQLiteContractRepository(str(tmp_path / "contracts.db"))
+    return repository, ContractSummaryProcessor(
+        repository, FileCheckpointStore(str(tmp_path / "checkpoint.json")), window_days=60, top_n=top_n
+    )
+
+
+def _summary(repository):
+    return asyncio.run(repository.get_summary(USER))["data"]
+
+
+def test_aggregates_counts_and_next_expiring():
+    summary = refresh_aggregates(new_summary(USER), window_days=60, top_n=5, now=NOW)
+    for contract in (
+        _contract("c1", "2025/12/01"),
+        _contract("c2", "2026/01/20", supplier="T"),
+        _contract("c3", "2027/06/30"),
+        _contract("c4", None),
+    ):
+        apply_entry(summary, None, contract_entry(contract), top_n=5)
+
+    refresh_aggregates(summary, window_days=60, top_n=5, now=NOW)
+
+    assert summary["counts_by_status"] == {"expired": 1, "near_expiry": 1, "active": 1, "missing_end_date": 1}
+    assert [c["contract_id"] for c in summary["next_expiring"]] == ["c2", "c3"]
+    assert summary["supplier_counts"] == {"S": 3, "T": 1}
+
+    # A month later c2 has expired
+    refresh_aggregates(summary, window_days=60, top_n=5, now=datetime(2026, 2, 1))
+    assert summary["counts_by_status"]["expired"] == 2
+    assert [c["contract_id"] for c in summary["next_expiring"]] == ["c3"]
+
+
+def test_summary_document_size_does_not_grow_with_contracts(tmp_path):
+    repository, processor = _processor(tmp_path)
+    processor._apply_changes([_contract(f"c{i:05d}", "2090/01/01", supplier=f"S{i % 3}") for i in range(3000)])
+    processor._apply_changes([_contract("c00000", "2090/02/01", supplier="S0", ts=200)])
+
+    summary = _summary(repository)
+    assert summary["total"] == 3000
+    assert summary["supplier_counts"] == {"S0": 1000, "S1": 1000, "S2": 1000}
+    assert summary["end_date_counts"] == {"2090-01-01": 2999, "2090-02-01": 1}
+    assert len(summary["next_expiring"]) == 5
+    assert len(json.dumps(summary)) < 4096
+    assert len(repository.read_summary_entries(USER, ["c00000", "c02999"])) == 2
+
+
+def test_update_and_remove_are_incremental(tmp_path):
+    repository, processor = _processor(tmp_path)
+    processor._apply_changes([_contract("c1", "2000/12/01"), _contract("c2", "2090/01/01")])
+    processor._apply_changes([_contract("c1", "2090/12/01", supplier="T", ts=150)])
+    summary = _summary(repository)
+    assert summary["total"] == 2
+    assert summary["counts_by_status"]["active"] == 2
+    assert summary["supplier_counts"] == {"S": 1, "T": 1}
+
+    asyncio.run(processor.remove_contract(USER, "c1"))
+    summary = _summary(repository)
+    assert summary["total"] == 1
+    assert summary["supplier_counts"] == {"S": 1}
+    assert [c["contract_id"] for c in summary["next_expiring"]] == ["c2"]
+
+
+def test_lagging_changes_do_not_resurrect_removed_contracts(tmp_path):
+    repository, processor = _processor(tmp_path)
+    processor._apply_changes([_contract("c1", "2090/12/01", ts=100)])
+    processor._apply_changes([_contract("c1", "2000/12/01", ts=90)])
+    assert repository.read_summary_entries(USER, ["c1"])["c1"]["contract_end_date"] == "2090/12/01"
+
+    asyncio.run(processor.remove_contract(USER, "c1", last_ts=200))
+    processor._apply_changes([_contract("c1", "2090/12/01", ts=150)])
+    assert _summary(repository)["total"] == 0
+
+    # Re-created after the removal
+    processor._apply_changes([_contract("c1", "2091/01/01", ts=10 ** 10)])
+    assert _summary(repository)["total"] == 1
+
+
+def test_next_expiring_is_refilled_from_the_entries(tmp_path):
+    repository, processor = _processor(tmp_path, top_n=2)
+    processor._apply_changes([_contract(f"c{i}", f"209{i}/01/01") for i in range(4)])
+    assert [c["contract_id"] for c in _summary(repository)["next_expiring"]] == ["c0", "c1"]
+
+    asyncio.run(processor.remove_contract(USER, "c0"))
+    processor._apply_changes([_contract("c1", "2099/01/01", ts=200)])
+    assert [c["contract_id"] for c in _summary(repository)["next_expiring"]] == ["c2", "c3"]
+
+
+def test_entries_of_an_interrupted_update_are_stored_by_the_next_one(tmp_path, monkeypatch):
+    repository, processor = _processor(tmp_path)
+    processor._apply_changes([_contract("c1", "2090/01/01")])
+
+    # The worker dies after the summary is saved, before its entries are stored
+    write = repository.write_summary_entries
+    monkeypatch.setattr(repository, "write_summary_entries", lambda user_email, entries: write(user_email, []))
+    processor._apply_changes([_contract("c1", "2091/01/01", supplier="T", ts=200)])
+    monkeypatch.setattr(repository, "write_summary_entries", write)
+    assert repository.read_summary_entries(USER, ["c1"])["c1"]["supplier_name"] == "S"
+
+    # The replayed batch and a later change count c1 once, from its newest entry
+    processor._apply_changes([_contract("c1", "2091/01/01", supplier="T", ts=200)])
+    processor._apply_changes([_contract("c2", "2092/01/01", ts=300)])
+    summary = _summary(repository)
+    assert summary["supplier_counts"] == {"T": 1, "S": 1}
+    assert summary["end_date_counts"] == {"2091-01-01": 1, "2092-01-01": 1}
+    assert repository.read_summary_entries(USER, ["c1"])["c1"]["supplier_name"] == "T"
+
+
+def test_legacy_summary_is_upgraded_on_its_next_update(tmp_path):
+    repository, processor = _processor(tmp_path)
+    legacy = {**new_summary(USER), "contracts": {
+        "c1": {"contract_end_date": "2090/01/01", "supplier_name": "S", "service_name": "Svc", "_ts": 100},
+    }, "removed": {"c0": 50}}
+    repository.update_summary(USER, lambda summary: summary.update(legacy))
+
+    processor._apply_changes([_contract("c2", "2091/01/01"), _contract("c0", "2091/01/01", ts=40)])
+    summary = _summary(repository)
+    assert "contracts" not in summary
+    assert summary["total"] == 2
+    assert [c["contract_id"] for c in summary["next_expiring"]] == ["c1", "c2"]
+
+
+def test_file_checkpoint_lease_is_held_by_one_worker(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    first = FileCheckpointStore(path, lease_seconds=60)
+    second = FileCheckpointStore(path, lease_seconds=60)
+
+    assert first.try_acquire("worker-1")
+    assert not second.try_acquire("worker-2")
+    first.save("etag-1")
+    second.save("etag-2")
+    assert second.load() == "etag-1"
+
+    # The lease moves on once it expires
+    second.lease_seconds = first.lease_seconds = 0
+    assert first.try_acquire("worker-1")
+    assert second.try_acquire("worker-2")
+    second.save("etag-2")
+    assert first.load() == "etag-2"
+    assert not os.path.exists(path + ".lock")
+
+
+def test_change_feed_continuation_comes_from_its_own_response():
+    class Container:
+        # Another call's response, as seen through the shared client connection
+        client_connection = SimpleNamespace(last_response_headers={"etag": '"other"'})
+
+        def query_items_change_feed(self, raw_response_hook, max_item_count, **start):
+            assert start == {"continuation": '"10"'}
+
+            class Pager:
+                def by_page(self):
+                    raw_response_hook(SimpleNamespace(http_response=SimpleNamespace(headers={"etag": '"11"'})))
+                    yield [{"id": "c1"}]
+            return Pager()
+
+    manager = object.__new__(CosmosDBManager)
+    manager.container = Container()
+    changes, continuation = manager.read_change_feed('"10"')
+    assert changes == [{"id": "c1"}]
+    assert continuation == '"11"'
+
+
+def test_rebuild_reads_every_contract_of_the_user(tmp_path):
+    repository, processor = _processor(tmp_path)
+    # Counted before, but no longer in the user's partition
+    processor._apply_changes([_contract("gone", "2090/01/01")])
+
+    async def scenario():
+        for i in range(1203):
+            await repository.create_contract(ContractData(id=f"c{i:05d}", UserEmail="a@x.com", contract_end_date="2030/01/01"))
+        await repository.create_contract(ContractData(id="other", UserEmail="b@x.com"))
+        pages = [len(page) async for page in repository.iter_contracts_by_user("a@x.com", page_size=500)]
+        applied = await processor.rebuild("a@x.com")
+        return pages, applied, (await repository.get_summary("a@x.com"))["data"]
+
+    pages, applied, summary = asyncio.run(scenario())
+    assert pages == [500, 500, 203]
+    assert applied == 1203
+    assert summary["total"] == 1203
+    assert summary["generation"] == 1
+    assert repository.list_stale_summary_entries("a@x.com", 1) == []
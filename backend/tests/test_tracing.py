@@ -0,0 +1,101 @@
+import asyncio
+import json
+import time
+
+from app.tracing import (
+    FileSpanExporter,
+    RecentTraces,
+    Tracer,
+    TracingMiddleware,
+    current_request_id,
+    parse_traceparent,
+    traced,
+    tracer,
+)
+
+
+class _Repository:
+    @traced()
+    async def get(self):
+        return await asyncio.to_thread(self.render)
+
+    @traced("render")
+    def render(self):
+        time.sleep(0.01)
+        return current_request_id()
+
+
+def test_spans_nest_across_await_and_threads():
+    tracer.recent.clear()
+
+    async def handler():
+        with tracer.start_span("GET /items", request_id="req-1") as root:
+            assert await _Repository().get() == "req-1"
+        return root
+
+    root = asyncio.run(handler())
+    [trace] = tracer.recent.slowest()
+    assert trace["trace_id"] == root.trace_id
+    assert trace["request_id"] == "req-1"
+    assert trace["span_count"] == 3
+    assert [span["name"] for span in trace["slowest_spans"]] == ["_Repository.get", "render"]
+
+
+def test_failed_span_is_marked_as_error():
+    local = Tracer(recent=RecentTraces())
+    try:
+        with local.start_span("boom"):
+            raise ValueError("bad")
+    except ValueError:
+        pass
+    [trace] = local.recent.slowest()
+    assert trace["status"] == "ERROR"
+
+
+def test_disabled_tracer_yields_noop_span():
+    local = Tracer(enabled=False)
+    with local.start_span("off") as span:
+        span.set_attribute("ignored", 1)
+    assert local.recent.slowest() == []
+
+
+def test_parse_traceparent():
+    trace_id, parent_id = parse_traceparent(f"00-{'a' * 32}-{'b' * 16}-01")
+    assert (trace_id, parent_id) == ("a" * 32, "b" * 16)
+    assert parse_traceparent("garbage") == (None, None)
+    assert parse_traceparent(f"00-{'0' * 32}-{'b' * 16}-01") == (None, None)
+
+
+def test_middleware_propagates_request_id_and_exports(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    local = Tracer(exporters=[FileSpanExporter(str(path))], recent=RecentTraces())
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["request_id"] = current_request_id()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    scope = {
+        "type": "http", "method": "GET", "path": "/api/v1/contracts/c1",
+        "headers": [(b"x-request-id", b"req-42"), (b"traceparent", f"00-{'c' * 32}-{'d' * 16}-01".encode())],
+    }
+    asyncio.run(TracingMiddleware(app, tracer=local)(scope, receive, send))
+
+    headers = dict(sent[0]["headers"])
+    assert seen["request_id"] == "req-42"
+    assert headers[b"x-request-id"] == b"req-42"
+    assert headers[b"traceparent"].startswith(f"00-{'c' * 32}-".encode())
+    [span] = [json.loads(line) for line in path.read_text().splitlines()]
+    assert span["traceId"] == "c" * 32
+    assert span["parentSpanId"] == "d" * 16
+    assert span["attributes"]["http.status_code"] == 200
+    assert span["attributes"]["request.id"] == "req-42"
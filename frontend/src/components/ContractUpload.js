@@ -5,10 +5,72 @@ import { InboxOutlined, FileTextOutlined, CheckCircleOutlined, LoadingOutlined,
 const { Dragger } = Upload;
 const { Text, Paragraph } = Typography;
 
+const API_URL = 'http://localhost:8000/api/v1/contracts';
+
+// Stage events streamed by GET /upload/{uploadId}/events while the upload request runs
+const PROGRESS_STAGES = [
+  'receiving', 'received', 'blob_uploaded', 'pages_rendered',
+  'model_request_sent', 'model_response_received', 'saved', 'failed', 'done'
+];
+
+// Share of one file's progress bar reached at each stage
+const stageProgress = (event) => {
+  switch (event.stage) {
+    case 'receiving':
+      return event.total ? 0.2 * event.bytes / event.total : 0.1;
+    case 'received':
+      return 0.2;
+    case 'blob_uploaded':
+      return 0.3;
+    case 'pages_rendered':
+      return 0.3 + 0.2 * event.page / event.pages;
+    case 'model_request_sent':
+      return 0.5;
+    case 'model_response_received':
+      return 0.9;
+    case 'saved':
+    case 'failed':
+    case 'done':
+      return 1;
+    default:
+      return 0;
+  }
+};
+
+const stageFor = (event) => {
+  switch (event.stage) {
+    case 'receiving':
+    case 'received':
+      return 'uploading';
+    case 'model_response_received':
+    case 'saved':
+    case 'failed':
+      return 'saving';
+    default:
+      return 'extracting';
+  }
+};
+
+const stageDetail = (event) => {
+  switch (event.stage) {
+    case 'receiving':
+      return event.total ? `${Math.round(100 * event.bytes / event.total)}% sent` : '';
+    case 'pages_rendered':
+      return `Page ${event.page} of ${event.pages} rendered`;
+    case 'model_request_sent':
+      return `Sent ${event.pages} page(s) to the AI model`;
+    case 'model_response_received':
+      return event.completion_tokens ? `Received ${event.completion_tokens} tokens` : 'Received AI response';
+    default:
+      return '';
+  }
+};
+
 const ContractUpload = ({ visible, onClose, onSuccess, userEmail }) => {
   const [uploading, setUploading] = useState(false);
   const [uploadProgress, setUploadProgress] = useState(0);
   const [uploadStage, setUploadStage] = useState('idle'); // idle, uploading, extracting, saving, complete
+  const [stageMessage, setStageMessage] = useState('');
   const [extractedData, setExtractedData] = useState(null);
   const [fileList, setFileList] = useState([]);
   const [uploadResults, setUploadResults] = useState([]);
@@ -30,7 +92,31 @@ const ContractUpload = ({ visible, onClose, onSuccess, userEmail }) => {
     }
   };
 
-  const uploadSingleFile = async (file, fileIndex) => {
+  // Follow the upload's stage events; closed once the upload is done
+  const followProgress = (uploadId, fileIndex, fileCount) => {
+    if (typeof EventSource === 'undefined') {
+      return () => {};
+    }
+    const source = new EventSource(
+      `${API_URL}/upload/${uploadId}/events?user_email=${encodeURIComponent(userEmail)}`
+    );
+    const onEvent = (message) => {
+      const event = JSON.parse(message.data);
+      if (event.stage === 'done') {
+        source.close();
+        return;
+      }
+      setUploadStage(stageFor(event));
+      setStageMessage(stageDetail(event));
+      setUploadProgress(Math.round(100 * (fileIndex + stageProgress(event)) / fileCount));
+    };
+    PROGRESS_STAGES.forEach(stage => source.addEventListener(stage, onEvent));
+    return () => source.close();
+  };
+
+  const uploadSingleFile = async (file, fileIndex, fileCount) => {
+    const uploadId = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+    const stopFollowing = followProgress(uploadId, fileIndex, fileCount);
     try {
       // Validate file type
       const allowedTypes = [
@@ -58,8 +144,9 @@ const ContractUpload = ({ visible, onClose, onSuccess, userEmail }) => {
       formData.append('user_email', userEmail);
 
       // Upload to backend
-      const response = await fetch('http://localhost:8000/api/v1/contracts/upload', {
+      const response = await fetch(`${API_URL}/upload`, {
         method: 'POST',
+        headers: { 'X-Upload-ID': uploadId },
         body: formData,
       });
 
@@ -73,6 +160,8 @@ const ContractUpload = ({ visible, onClose, onSuccess, userEmail }) => {
 
     } catch (error) {
       return { success: false, error: error.message, fileName: file.name };
+    } finally {
+      stopFollowing();
     }
   };
 
@@ -93,30 +182,15 @@ const ContractUpload = ({ visible, onClose, onSuccess, userEmail }) => {
     for (let i = 0; i < fileList.length; i++) {
       setCurrentFileIndex(i);
       
-      // Stage 1: Uploading
+      // Stages and progress follow the server's events for this file
       setUploadStage('uploading');
-      setUploadProgress((i / fileList.length) * 100);
-      
-      // Stage 2: Extracting
-      setTimeout(() => {
-        setUploadStage('extracting');
-      }, 500);
-      
-      // Stage 3: Saving
-      setTimeout(() => {
-        setUploadStage('saving');
-      }, 1000);
+      setStageMessage('');
+      setUploadProgress(Math.round((i / fileList.length) * 100));
 
-      const result = await uploadSingleFile(fileList[i], i);
+      const result = await uploadSingleFile(fileList[i], i, fileList.length);
       results.push(result);
 
-      // Update progress
-      setUploadProgress(((i + 1) / fileList.length) * 100);
-      
-      // Small delay between files
-      if (i < fileList.length - 1) {
-        await new Promise(resolve => setTimeout(resolve, 500));
-      }
+      setUploadProgress(Math.round(((i + 1) / fileList.length) * 100));
     }
 
     // Complete
@@ -148,6 +222,7 @@ const ContractUpload = ({ visible, onClose, onSuccess, userEmail }) => {
     setUploading(false);
     setUploadProgress(0);
     setUploadStage('idle');
+    setStageMessage('');
     setExtractedData(null);
     setUploadResults([]);
     setCurrentFileIndex(0);
@@ -242,6 +317,7 @@ const ContractUpload = ({ visible, onClose, onSuccess, userEmail }) => {
             <LoadingOutlined style={{ fontSize: 20, marginRight: 12, color: '#1890ff' }} />
             <Text strong>{getStageMessage()}</Text>
           </div>
+          {stageMessage && <Text type="secondary">{stageMessage}</Text>}
           <Progress percent={uploadProgress} status="active" />
           
           <div style={{ marginTop: 16 }}>